@@ -2,7 +2,6 @@
 """MCP server for LVGL simulator control."""
 import asyncio
 import json
-import socket
 import subprocess
 import sys
 from pathlib import Path
@@ -11,6 +10,8 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from sim_cli import SimConnection, WidgetTreeMirror
+
 # Project root
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 SIMULATOR_BIN = PROJECT_ROOT / "bin" / "micropython_unix"
@@ -23,6 +24,7 @@ server = Server("lvgl-sim")
 # Global state
 sim_process = None
 sim_socket = None
+tree_mirror = None
 
 
 def connect_to_simulator(timeout_ms=5000):
@@ -32,13 +34,14 @@ def connect_to_simulator(timeout_ms=5000):
     deadline = asyncio.get_event_loop().time() + (timeout_ms / 1000)
 
     while asyncio.get_event_loop().time() < deadline:
+        conn = SimConnection(("127.0.0.1", CONTROL_PORT), timeout=0.5)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.5)
-            sock.connect(("127.0.0.1", CONTROL_PORT))
-            sim_socket = sock
+            conn.connect()
+            conn.timeout = 5.0
+            conn.sock.settimeout(conn.timeout)
+            sim_socket = conn
             return True
-        except (ConnectionRefusedError, socket.timeout, OSError):
+        except OSError:
             import time
             time.sleep(0.1)
 
@@ -47,26 +50,11 @@ def connect_to_simulator(timeout_ms=5000):
 
 def send_command(cmd):
     """Send command to simulator and get response."""
-    global sim_socket
-
     if not sim_socket:
         return {"ok": False, "error": "Not connected to simulator"}
 
     try:
-        data = json.dumps(cmd) + "\n"
-        sim_socket.sendall(data.encode())
-
-        # Read response (newline-delimited)
-        buf = b""
-        sim_socket.settimeout(5.0)
-        while b"\n" not in buf:
-            chunk = sim_socket.recv(65536)
-            if not chunk:
-                return {"ok": False, "error": "Connection closed"}
-            buf += chunk
-
-        line = buf.split(b"\n")[0]
-        return json.loads(line.decode())
+        return sim_socket.request(cmd)
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -96,8 +84,20 @@ async def list_tools():
         ),
         Tool(
             name="get_widget_tree",
-            description="Get the full widget tree of current screen",
-            inputSchema={"type": "object", "properties": {}},
+            description="Get the widget tree of current screen (incrementally synced)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "root": {
+                        "type": "string",
+                        "description": "Subtree root as child index path, e.g. '0.2' (default: screen)",
+                    },
+                    "max_depth": {
+                        "type": "integer",
+                        "description": "Maximum depth below root",
+                    },
+                },
+            },
         ),
         Tool(
             name="find_widget",
@@ -127,6 +127,33 @@ async def list_tools():
                 "required": ["text"],
             },
         ),
+        Tool(
+            name="run_batch",
+            description=(
+                "Run several simulator commands in order in one round trip "
+                "(click, navigate, wait_for_text, get_state, set_state, widget_tree_diff, ...)"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "commands": {
+                        "type": "array",
+                        "items": {"type": "object"},
+                        "description": (
+                            'Control protocol commands, e.g. [{"action": "click", "text": "Settings"}, '
+                            '{"action": "wait_for_text", "text": "Language", "timeout_ms": 2000}, '
+                            '{"action": "get_state"}]'
+                        ),
+                    },
+                    "stop_on_error": {
+                        "type": "boolean",
+                        "description": "Skip remaining commands after the first failure",
+                        "default": True,
+                    },
+                },
+                "required": ["commands"],
+            },
+        ),
         Tool(
             name="get_state",
             description="Get current SpecterState and UIState",
@@ -168,7 +195,7 @@ async def list_tools():
 @server.call_tool()
 async def call_tool(name: str, arguments: dict):
     """Handle tool calls."""
-    global sim_process, sim_socket
+    global sim_process, sim_socket, tree_mirror
 
     if name == "start_simulator":
         timeout_ms = arguments.get("timeout_ms", 5000)
@@ -189,6 +216,7 @@ async def call_tool(name: str, arguments: dict):
 
         # Connect to control socket
         if connect_to_simulator(timeout_ms):
+            tree_mirror = WidgetTreeMirror(send_command)
             # Verify connection with ping
             resp = send_command({"action": "ping"})
             if resp.get("ok"):
@@ -206,6 +234,7 @@ async def call_tool(name: str, arguments: dict):
             except:
                 pass
             sim_socket = None
+        tree_mirror = None
 
         if sim_process:
             sim_process.terminate()
@@ -219,15 +248,27 @@ async def call_tool(name: str, arguments: dict):
         return [TextContent(type="text", text="Simulator was not running")]
 
     elif name == "get_widget_tree":
-        resp = send_command({"action": "widget_tree"})
+        root = arguments.get("root", "")
+        max_depth = arguments.get("max_depth")
+        mirror = tree_mirror or WidgetTreeMirror(send_command)
+        if root or max_depth is not None:
+            # One-off view; the shared mirror always tracks the whole screen
+            mirror = WidgetTreeMirror(send_command, root, max_depth)
+        tree = mirror.refresh()
+        if tree is None:
+            resp = {"ok": False, "error": mirror.error}
+        else:
+            resp = {"ok": True, "revision": mirror.revision, "tree": tree}
         return [TextContent(type="text", text=json.dumps(resp, indent=2))]
 
     elif name == "find_widget":
         text = arguments.get("text", "")
-        # Get tree and search client-side
-        resp = send_command({"action": "widget_tree"})
-        if not resp.get("ok"):
-            return [TextContent(type="text", text=json.dumps(resp))]
+        # Sync tree (changed nodes only) and search client-side
+        mirror = tree_mirror or WidgetTreeMirror(send_command)
+        tree = mirror.refresh()
+        if tree is None:
+            return [TextContent(type="text", text=json.dumps({"ok": False, "error": mirror.error}))]
+        resp = {"ok": True, "tree": tree}
 
         def search(node, target):
             if node.get("text") == target:
@@ -248,6 +289,14 @@ async def call_tool(name: str, arguments: dict):
         resp = send_command({"action": "click", "text": text})
         return [TextContent(type="text", text=json.dumps(resp, indent=2))]
 
+    elif name == "run_batch":
+        resp = send_command({
+            "action": "batch",
+            "commands": arguments.get("commands", []),
+            "stop_on_error": arguments.get("stop_on_error", True),
+        })
+        return [TextContent(type="text", text=json.dumps(resp, indent=2))]
+
     elif name == "get_state":
         resp = send_command({"action": "get_state"})
         return [TextContent(type="text", text=json.dumps(resp, indent=2))]
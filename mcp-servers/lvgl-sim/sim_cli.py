@@ -3,17 +3,108 @@
 import socket
 import json
 import base64
+import contextlib
 import os
 import click
 
 
 # --- Core functions ---
 
+SIM_ADDRESS = ('127.0.0.1', 9876)
+
+
+class SimConnection:
+    """Persistent connection to the control server with request pipelining.
+
+    Connects lazily and reconnects once if the simulator dropped the
+    connection (e.g. after a restart).
+    """
+
+    def __init__(self, address=None, timeout=2):
+        self.address = address or SIM_ADDRESS
+        self.timeout = timeout
+        self.sock = None
+        self.buf = b''
+
+    def connect(self):
+        """Open the socket if not connected yet."""
+        if self.sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+            self.buf = b''
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def request(self, cmd):
+        """Send one command and return its JSON response."""
+        return self.pipeline([cmd])[0]
+
+    def pipeline(self, cmds):
+        """Send all commands in one write, then read their responses in order."""
+        data = ''.join(json.dumps(cmd) + '\n' for cmd in cmds).encode()
+        for attempt in (0, 1):
+            self.connect()
+            responses = []
+            try:
+                self.sock.sendall(data)
+                while len(responses) < len(cmds):
+                    responses.append(self._read_response())
+                return responses
+            except (ConnectionError, EOFError):
+                self.close()
+                # A stale socket (simulator restarted) fails before any reply;
+                # only then is resending safe
+                if attempt or responses:
+                    raise
+
+    def _read_response(self):
+        while b'\n' not in self.buf:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise EOFError('Connection closed by simulator')
+            self.buf += chunk
+        line, self.buf = self.buf.split(b'\n', 1)
+        return json.loads(line.decode())
+
+
+# Set by persistent_connection(); send() then reuses one socket for all commands
+_connection = None
+
+
+@contextlib.contextmanager
+def persistent_connection():
+    """Route send()/pipeline() through one socket for the duration of the block."""
+    global _connection
+    if _connection is not None:
+        yield _connection
+        return
+    _connection = SimConnection()
+    try:
+        yield _connection
+    finally:
+        _connection.close()
+        _connection = None
+
+
 def send(cmd):
     """Send command to simulator and return JSON response."""
+    if _connection is not None:
+        return _connection.request(cmd)
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.settimeout(2)
-    sock.connect(('127.0.0.1', 9876))
+    sock.connect(SIM_ADDRESS)
     sock.sendall((json.dumps(cmd) + '\n').encode())
     buf = b''
     while b'\n' not in buf:
@@ -25,11 +116,29 @@ def send(cmd):
     return json.loads(buf.decode().strip())
 
 
-def get_labels():
-    """Extract visible text labels from widget tree."""
-    result = send({'action': 'widget_tree'})
-    if not result.get('ok'):
-        return []
+def pipeline(cmds):
+    """Send several commands without waiting for each reply; returns all responses."""
+    if _connection is not None:
+        return _connection.pipeline(cmds)
+    conn = SimConnection()
+    try:
+        return conn.pipeline(cmds)
+    finally:
+        conn.close()
+
+
+def batch(cmds, stop_on_error=True):
+    """Run commands in order on the simulator in a single round trip.
+
+    Returns the batch response: {'ok': all succeeded, 'results': [...]}.
+    Besides the normal actions, commands may be
+    {'action': 'wait_for_text', 'text': ..., 'timeout_ms': ...}.
+    """
+    return send({'action': 'batch', 'commands': cmds, 'stop_on_error': stop_on_error})
+
+
+def labels_from_tree(tree):
+    """Visible text labels of a widget tree, depth-first."""
     labels = []
     def find(node):
         t = node.get('text', '')
@@ -37,44 +146,155 @@ def get_labels():
             labels.append(t)
         for c in node.get('children', []):
             find(c)
-    find(result['tree'])
+    find(tree)
     return labels
 
 
-def save_screenshot(out_filename):
-    """Save screenshot to file. Returns (width, height) or None on error."""
+def get_labels(mirror=None):
+    """Extract visible text labels from widget tree.
+
+    With a WidgetTreeMirror only the nodes changed since its last refresh
+    are transferred.
+    """
+    if mirror is not None:
+        tree = mirror.refresh()
+        return labels_from_tree(tree) if tree is not None else []
+    result = send({'action': 'widget_tree'})
+    if not result.get('ok'):
+        return []
+    return labels_from_tree(result['tree'])
+
+
+class WidgetTreeMirror:
+    """Client-side copy of the widget tree kept current via widget_tree_diff.
+
+    Nodes are stored flat by path ("" is the root, "0.2" the third child of
+    the first child); tree() rebuilds the nested widget_tree format.
+    """
+
+    NODE_FIELDS = ('type', 'x', 'y', 'width', 'height', 'text')
+
+    def __init__(self, send_fn=None, root='', max_depth=None):
+        self._send = send_fn or (lambda cmd: send(cmd))
+        self.root = root
+        self.max_depth = max_depth
+        self.revision = None
+        self.nodes = {}
+        self.error = None
+
+    def refresh(self):
+        """Fetch changes from the simulator; returns the nested tree or None on error."""
+        cmd = {'action': 'widget_tree_diff', 'since': self.revision}
+        if self.root:
+            cmd['root'] = self.root
+        if self.max_depth is not None:
+            cmd['max_depth'] = self.max_depth
+        r = self._send(cmd)
+        if not r.get('ok'):
+            self.revision = None
+            self.error = r.get('error')
+            return None
+        self.apply(r)
+        return self.tree()
+
+    def apply(self, diff):
+        """Apply one widget_tree_diff response."""
+        if diff['full']:
+            self.nodes.clear()
+        for path in diff['removed']:
+            prefix = path + '.'
+            for p in [p for p in self.nodes if p == path or p.startswith(prefix)]:
+                del self.nodes[p]
+        for node in diff['changed']:
+            node = dict(node)
+            self.nodes[node.pop('path')] = node
+        self.revision = diff['revision']
+
+    def tree(self, path=''):
+        """Nested widget tree (same format as the widget_tree action)."""
+        node = self.nodes.get(path)
+        if node is None:
+            return None
+        out = {k: node.get(k) for k in self.NODE_FIELDS}
+        children = []
+        for i in range(node.get('child_count', 0)):
+            child = self.tree(f'{path}.{i}' if path else str(i))
+            if child is not None:
+                children.append(child)
+        out['children'] = children
+        return out
+
+
+def rgb565_to_image(raw, width, height):
+    """Convert a little-endian RGB565 frame to a PIL RGB image (decoded in C)."""
     from PIL import Image
-    import struct
 
-    r = send({'action': 'screenshot'})
+    need = width * height * 2
+    if len(raw) < need:
+        raw = bytes(raw) + bytes(need - len(raw))
+    return Image.frombuffer('RGB', (width, height), raw, 'raw', 'BGR;16', 0, 1)
+
+
+def read_screenshot(crop=None, scale=1):
+    """Capture a screenshot as a PIL image, or None on error.
+
+    crop is (x, y, w, h) in display pixels; scale keeps every Nth pixel and
+    row. Both are applied by the simulator before the frame is read.
+    """
+    cmd = {'action': 'screenshot'}
+    if crop is not None:
+        cmd['crop'] = list(crop)
+    if scale != 1:
+        cmd['scale'] = scale
+    r = send(cmd)
     if not r.get('ok'):
         return None
 
-    w, h = r['width'], r['height']
     raw_file = r.get('file')
-
     if raw_file:
         with open(raw_file, 'rb') as f:
             raw = f.read()
     else:
         raw = base64.b64decode(r['data'])
+    return rgb565_to_image(raw, r['width'], r['height'])
 
-    pixels = bytearray(w * h * 3)
-    for i in range(0, len(raw), 2):
-        if i + 1 >= len(raw):
-            break
-        pixel = struct.unpack('<H', raw[i:i+2])[0]
-        rv = ((pixel >> 11) & 0x1F) << 3
-        gv = ((pixel >> 5) & 0x3F) << 2
-        bv = (pixel & 0x1F) << 3
-        idx = (i // 2) * 3
-        pixels[idx] = rv
-        pixels[idx + 1] = gv
-        pixels[idx + 2] = bv
-
-    img = Image.frombytes('RGB', (w, h), bytes(pixels))
+
+def save_screenshot(out_filename, crop=None, scale=1):
+    """Save screenshot to file. Returns (width, height) or None on error."""
+    img = read_screenshot(crop, scale)
+    if img is None:
+        return None
     img.save(out_filename, 'PNG')
-    return (w, h)
+    return img.size
+
+
+def dhash(img, hash_size=8):
+    """Perceptual difference hash of an image as a hex string.
+
+    Robust to small rendering noise and rescaling; compare two hashes with
+    hash_distance() (0 = visually identical).
+    """
+    from PIL import Image
+
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.BOX)
+    px = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        base = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (px[base + col] > px[base + col + 1])
+    return f'{bits:0{hash_size * hash_size // 4}x}'
+
+
+def hash_distance(a, b):
+    """Number of differing bits of two dhash() strings."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def screenshot_hash(crop=None, scale=1):
+    """Perceptual hash of the current screen (no PNG written), or None on error."""
+    img = read_screenshot(crop, scale)
+    return dhash(img) if img is not None else None
 
 
 def get_state():
@@ -90,9 +310,11 @@ def navigate(target):
 # --- CLI Commands ---
 
 @click.group()
-def cli():
+@click.pass_context
+def cli(ctx):
     """LVGL Simulator CLI - control the MockUI simulator."""
-    pass
+    # One connection for all commands of this invocation
+    ctx.with_resource(persistent_connection())
 
 
 @cli.command()
@@ -118,8 +340,7 @@ def state():
 @click.argument('text')
 def click_cmd(text):
     """Click a button by its text label."""
-    send({'action': 'click', 'text': text})
-    r = get_state()
+    _, r = pipeline([{'action': 'click', 'text': text}, {'action': 'get_state'}])
     click.echo(f"-> {r['ui']['current_menu_id']} (history: {r['ui']['history']})")
 
 
@@ -146,16 +367,22 @@ def set_cmd(attr, value):
 
 
 @cli.command()
-def tree():
-    """Dump full widget tree as JSON."""
-    click.echo(json.dumps(send({'action': 'widget_tree'}), indent=2))
+@click.option('--root', default='', help='Subtree root path, e.g. 0.2')
+@click.option('--max-depth', type=int, default=None, help='Maximum depth below root')
+def tree(root, max_depth):
+    """Dump widget tree as JSON."""
+    cmd = {'action': 'widget_tree'}
+    if root:
+        cmd['root'] = root
+    if max_depth is not None:
+        cmd['max_depth'] = max_depth
+    click.echo(json.dumps(send(cmd), indent=2))
 
 
 @cli.command()
 def back():
     """Navigate back to previous menu."""
-    navigate('back')
-    r = get_state()
+    _, r = pipeline([{'action': 'navigate', 'target': 'back'}, {'action': 'get_state'}])
     click.echo(f"-> {r['ui']['current_menu_id']} (history: {r['ui']['history']})")
 
 
@@ -163,19 +390,57 @@ def back():
 @click.argument('menu_id')
 def goto_cmd(menu_id):
     """Navigate directly to a menu by ID."""
-    navigate(menu_id)
-    r = get_state()
+    _, r = pipeline([{'action': 'navigate', 'target': menu_id}, {'action': 'get_state'}])
     click.echo(f"-> {r['ui']['current_menu_id']} (history: {r['ui']['history']})")
 
 
+@cli.command('batch')
+@click.argument('script', type=click.File('r'))
+@click.option('--keep-going', is_flag=True, help='Run remaining commands after a failure')
+def batch_cmd(script, keep_going):
+    """Run a JSON list of commands from SCRIPT ('-' for stdin) in one round trip.
+
+    Example: [{"action": "click", "text": "Settings"},
+              {"action": "wait_for_text", "text": "Language"},
+              {"action": "get_state"}]
+    """
+    r = batch(json.load(script), stop_on_error=not keep_going)
+    click.echo(json.dumps(r, indent=2))
+    if not r.get('ok'):
+        raise SystemExit(1)
+
+
+def parse_crop(ctx, param, value):
+    """click callback: 'x,y,w,h' -> tuple of ints."""
+    if value is None:
+        return None
+    try:
+        crop = tuple(int(v) for v in value.split(','))
+    except ValueError:
+        crop = ()
+    if len(crop) != 4:
+        raise click.BadParameter('expected x,y,w,h')
+    return crop
+
+
 @cli.command()
 @click.argument('filename', required=False)
-def screenshot(filename):
+@click.option('--crop', callback=parse_crop, help='Region x,y,w,h')
+@click.option('--scale', default=1, help='Keep every Nth pixel and row')
+@click.option('--hash', 'as_hash', is_flag=True, help='Print a perceptual hash instead of saving a PNG')
+def screenshot(filename, crop, scale, as_hash):
     """Capture screenshot to PNG file."""
+    if as_hash:
+        h = screenshot_hash(crop, scale)
+        if h is None:
+            click.echo("Error: screenshot failed", err=True)
+        else:
+            click.echo(h)
+        return
     screenshot_dir = '/tmp/specter-playground_agent/screenshots'
     os.makedirs(screenshot_dir, exist_ok=True)
     out_filename = filename or f'{screenshot_dir}/screenshot.png'
-    result = save_screenshot(out_filename)
+    result = save_screenshot(out_filename, crop, scale)
     if result:
         click.echo(f"Screenshot saved to {out_filename} ({result[0]}x{result[1]})")
     else:
@@ -258,6 +523,7 @@ def explore(folder, max_depth):
 
     os.makedirs(folder, exist_ok=True)
     visited = set()
+    mirror = WidgetTreeMirror()
 
     def capture_screen(menu_id):
         """Capture current screen."""
@@ -268,12 +534,12 @@ def explore(folder, max_depth):
         if result:
             click.echo(f"  {menu_id}/screenshot.png ({result[0]}x{result[1]})")
 
-        lbls = get_labels()
+        lbls = get_labels(mirror)
         with open(f'{path}/labels.txt', 'w') as f:
             for label in lbls:
                 f.write(f"  {label}\n")
 
-        tree_data = send({'action': 'widget_tree'})
+        tree_data = {'ok': True, 'tree': mirror.tree()}
         with open(f'{path}/tree.json', 'w') as f:
             json.dump(tree_data, f, indent=2)
 
@@ -301,16 +567,14 @@ def explore(folder, max_depth):
 
         for item in menu_items:
             try:
-                send({'action': 'click', 'text': item})
-                new_state = get_state()
+                _, new_state = pipeline([{'action': 'click', 'text': item}, {'action': 'get_state'}])
                 new_menu = new_state['ui']['current_menu_id']
 
                 if new_menu != menu_id and new_menu not in visited:
                     explore_menu(depth + 1)
 
                 # Return to current menu
-                navigate('back')
-                back_state = get_state()
+                _, back_state = pipeline([{'action': 'navigate', 'target': 'back'}, {'action': 'get_state'}])
                 if back_state['ui']['current_menu_id'] != menu_id:
                     navigate(menu_id)
 
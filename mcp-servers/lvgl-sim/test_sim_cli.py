@@ -1,9 +1,16 @@
 """Tests for sim_cli.py"""
 import base64
+import importlib
+import json
 import os
+import socket
+import sys
 import tempfile
+import threading
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 import sim_cli
 
 
@@ -229,3 +236,310 @@ class TestNavigate:
 
             mock_send.assert_called_once_with({'action': 'navigate', 'target': 'back'})
             assert result['navigated'] == 'back'
+
+
+class _Widget:
+    """Minimal LVGL object for driving the control server's tree walk."""
+
+    def __init__(self, text=None, x=0, y=0, children=()):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.children = list(children)
+
+    def get_x(self):
+        return self.x
+
+    def get_y(self):
+        return self.y
+
+    def get_width(self):
+        return 100
+
+    def get_height(self):
+        return 20
+
+    def get_text(self):
+        if self.text is None:
+            raise AttributeError('no text')
+        return self.text
+
+    def get_child_count(self):
+        return len(self.children)
+
+    def get_child(self, i):
+        return self.children[i]
+
+
+class _FakeClient:
+    """Client socket stand-in accepting every send()."""
+
+    def send(self, data):
+        return len(data)
+
+
+@pytest.fixture
+def sim_server():
+    """ControlServer (without socket) serving a mutable fake screen."""
+    screen = _Widget(children=[
+        _Widget(children=[_Widget('Manage Device')]),
+        _Widget(children=[_Widget('Settings')]),
+    ])
+    clock = [0]
+    fake_lv = MagicMock()
+    fake_lv.screen_active = lambda: server.screen
+    fake_lv.tick_get = lambda: clock[0]
+    fake_lv.tick_elaps = lambda start: clock[0] - start
+    scenarios = os.path.join(os.path.dirname(__file__), '..', '..', 'scenarios')
+    with patch.dict(sys.modules, {'lvgl': fake_lv}), patch.object(sys, 'path', [scenarios] + sys.path):
+        for name in [n for n in sys.modules if n.startswith('sim_control')]:
+            del sys.modules[name]
+        control_server = importlib.import_module('sim_control.control_server')
+        server = control_server.ControlServer.__new__(control_server.ControlServer)
+        server.tree_revision = 0
+        server.tree_key = None
+        server.tree_snapshot = None
+        server.screen = screen
+        server.clock = clock
+        server.client = _FakeClient()
+        server.buf = b''
+        server.out = b''
+        server.pending = None
+        yield server
+        for name in [n for n in sys.modules if n.startswith('sim_control')]:
+            del sys.modules[name]
+
+
+class TestWidgetTreeDiff:
+    """widget_tree_diff round trips between ControlServer and WidgetTreeMirror."""
+
+    def test_first_refresh_is_full_tree(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command)
+        tree = mirror.refresh()
+        full = sim_server._handle_command({'action': 'widget_tree'})['tree']
+        assert tree == full
+        assert sim_cli.get_labels(mirror) == ['Manage Device', 'Settings']
+
+    def test_unchanged_tree_sends_nothing(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command)
+        mirror.refresh()
+        r = sim_server._handle_command({'action': 'widget_tree_diff', 'since': mirror.revision})
+        assert r['revision'] == mirror.revision
+        assert not r['full']
+        assert r['changed'] == [] and r['removed'] == []
+
+    def test_only_changed_nodes_are_sent(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command)
+        mirror.refresh()
+        sim_server.screen.children[1].children[0].text = 'Preferences'
+        r = sim_server._handle_command({'action': 'widget_tree_diff', 'since': mirror.revision})
+        assert [n['path'] for n in r['changed']] == ['1.0']
+        mirror.apply(r)
+        assert mirror.tree() == sim_server._handle_command({'action': 'widget_tree'})['tree']
+
+    def test_added_and_removed_children(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command)
+        mirror.refresh()
+        screen = sim_server.screen
+        screen.children[0].children = []
+        screen.children.append(_Widget('Back', y=200))
+        r = sim_server._handle_command({'action': 'widget_tree_diff', 'since': mirror.revision})
+        assert r['removed'] == ['0.0']
+        assert sorted(n['path'] for n in r['changed']) == ['', '0', '2']
+        mirror.apply(r)
+        assert mirror.tree() == sim_server._handle_command({'action': 'widget_tree'})['tree']
+        assert '0.0' not in mirror.nodes
+
+    def test_stale_revision_gets_full_tree(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command)
+        mirror.refresh()
+        other = sim_cli.WidgetTreeMirror(sim_server._handle_command, max_depth=1)
+        other.refresh()
+        r = sim_server._handle_command({'action': 'widget_tree_diff', 'since': mirror.revision})
+        assert r['full']
+        assert len(r['changed']) == 5
+
+    def test_root_and_max_depth(self, sim_server):
+        mirror = sim_cli.WidgetTreeMirror(sim_server._handle_command, root='1', max_depth=0)
+        assert mirror.refresh() == {
+            'type': '_Widget', 'x': 0, 'y': 0, 'width': 100, 'height': 20,
+            'text': None, 'children': [],
+        }
+        r = sim_server._handle_command({'action': 'widget_tree_diff', 'root': '7'})
+        assert not r['ok']
+        assert mirror.error is None
+
+
+def _replies(server):
+    """Decode and clear the server's queued replies."""
+    lines = server.out.decode().splitlines()
+    server.out = b''
+    return [json.loads(line) for line in lines]
+
+
+class TestBatchAndPipelining:
+    """Server-side batch/wait_for_text and pipelined command handling."""
+
+    def test_batch_returns_all_results(self, sim_server):
+        sim_server.buf = json.dumps({'action': 'batch', 'commands': [
+            {'action': 'ping'},
+            {'action': 'wait_for_text', 'text': 'Settings'},
+            {'action': 'widget_tree', 'max_depth': 0},
+        ]}).encode() + b'\n'
+        sim_server._process_commands()
+        [r] = _replies(sim_server)
+        assert r['ok']
+        assert [x['ok'] for x in r['results']] == [True, True, True]
+        assert r['results'][1]['found'] == 'Settings'
+
+    def test_batch_stops_on_error(self, sim_server):
+        cmds = [{'action': 'bogus'}, {'action': 'ping'}]
+        for stop, count in ((True, 1), (False, 2)):
+            sim_server.buf = json.dumps({'action': 'batch', 'commands': cmds, 'stop_on_error': stop}).encode() + b'\n'
+            sim_server._process_commands()
+            [r] = _replies(sim_server)
+            assert not r['ok']
+            assert len(r['results']) == count
+
+    def test_pipelined_commands_answered_in_order(self, sim_server):
+        sim_server.buf = b'{"action": "ping"}\nnot json\n{"action": "widget_tree"}\n{"action": "pi'
+        sim_server._process_commands()
+        replies = _replies(sim_server)
+        assert [r['ok'] for r in replies] == [True, False, True]
+        assert 'tree' in replies[2]
+        assert sim_server.buf == b'{"action": "pi'
+
+    def test_wait_for_text_holds_later_commands(self, sim_server):
+        sim_server.buf = (b'{"action": "wait_for_text", "text": "Back", "timeout_ms": 500}\n'
+                          b'{"action": "ping"}\n')
+        sim_server._process_commands()
+        assert sim_server.out == b''
+        assert sim_server.pending is not None
+        sim_server.clock[0] = 100
+        sim_server.screen.children.append(_Widget('Back'))
+        assert sim_server._step_pending()
+        sim_server._process_commands()
+        wait, ping = _replies(sim_server)
+        assert wait == {'ok': True, 'found': 'Back', 'waited_ms': 100}
+        assert ping['pong']
+
+    def test_wait_for_text_times_out(self, sim_server):
+        sim_server.buf = b'{"action": "wait_for_text", "text": "Back", "timeout_ms": 500}\n'
+        sim_server._process_commands()
+        sim_server.clock[0] = 500
+        assert sim_server._step_pending()
+        [r] = _replies(sim_server)
+        assert not r['ok']
+        assert 'Timeout' in r['error']
+
+
+class TestSimConnection:
+    """Persistent, pipelined client connection."""
+
+    @pytest.fixture
+    def echo_server(self):
+        """Line server answering {"echo": cmd} in small chunks; records accepted connections."""
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        stats = {'connections': 0}
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                stats['connections'] += 1
+                with conn:
+                    buf = b''
+                    while True:
+                        data = conn.recv(4096)
+                        if not data:
+                            break
+                        buf += data
+                        while b'\n' in buf:
+                            line, buf = buf.split(b'\n', 1)
+                            reply = (json.dumps({'echo': json.loads(line)}) + '\n').encode()
+                            for i in range(0, len(reply), 7):
+                                conn.sendall(reply[i:i + 7])
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        yield listener.getsockname(), stats
+        listener.close()
+
+    def test_pipeline_returns_responses_in_order(self, echo_server):
+        address, stats = echo_server
+        conn = sim_cli.SimConnection(address)
+        cmds = [{'action': 'ping', 'n': i} for i in range(20)]
+        assert conn.pipeline(cmds) == [{'echo': c} for c in cmds]
+        assert conn.request({'action': 'get_state'}) == {'echo': {'action': 'get_state'}}
+        assert stats['connections'] == 1
+        conn.close()
+
+    def test_send_reuses_persistent_connection(self, echo_server):
+        address, stats = echo_server
+        with patch.object(sim_cli, 'SIM_ADDRESS', address):
+            with sim_cli.persistent_connection():
+                for _ in range(5):
+                    assert sim_cli.send({'action': 'ping'}) == {'echo': {'action': 'ping'}}
+                assert sim_cli.batch([{'action': 'ping'}])['echo']['action'] == 'batch'
+        assert stats['connections'] == 1
+        assert sim_cli._connection is None
+
+
+def _gradient_frame(w, h):
+    """RGB565 frame with red rising along x and blue along y."""
+    raw = bytearray()
+    for y in range(h):
+        for x in range(w):
+            pixel = ((x * 31 // max(w - 1, 1)) << 11) | ((y * 31 // max(h - 1, 1)) & 0x1F)
+            raw += pixel.to_bytes(2, 'little')
+    return bytes(raw)
+
+
+class TestScreenshotTransport:
+    """Crop/scale, vectorised conversion and perceptual hashes."""
+
+    def test_conversion_matches_channel_bits(self):
+        raw = bytes([0x00, 0xF8, 0xE0, 0x07, 0x1F, 0x00, 0x00, 0x00])  # red, green, blue, black
+        img = sim_cli.rgb565_to_image(raw, 4, 1)
+        pixels = [img.getpixel((x, 0)) for x in range(4)]
+        assert pixels == [(255, 0, 0), (0, 255, 0), (0, 0, 255), (0, 0, 0)]
+
+    def test_crop_and_scale(self, sim_server, tmp_path):
+        crop_rgb565 = sys.modules[type(sim_server).__module__].crop_rgb565
+        w, h = 40, 30
+        src = tmp_path / 'frame.raw'
+        src.write_bytes(_gradient_frame(w, h))
+        full = sim_cli.rgb565_to_image(src.read_bytes(), w, h)
+        dst = tmp_path / 'crop.raw'
+        for scale in (1, 3):
+            ow, oh = crop_rgb565(str(src), str(dst), w, (5, 4, 20, 16), scale)
+            assert (ow, oh) == ((20 + scale - 1) // scale, (16 + scale - 1) // scale)
+            got = sim_cli.rgb565_to_image(dst.read_bytes(), ow, oh)
+            for ox, oy in ((0, 0), (ow - 1, oh - 1), (ow // 2, 1)):
+                assert got.getpixel((ox, oy)) == full.getpixel((5 + ox * scale, 4 + oy * scale))
+
+    def test_read_screenshot_requests_crop_and_scale(self):
+        with patch.object(sim_cli, 'send') as mock_send:
+            mock_send.return_value = {
+                'ok': True, 'width': 2, 'height': 1,
+                'data': base64.b64encode(b'\x00\xF8' * 2).decode(),
+            }
+            img = sim_cli.read_screenshot(crop=(10, 20, 4, 2), scale=2)
+            mock_send.assert_called_once_with({'action': 'screenshot', 'crop': [10, 20, 4, 2], 'scale': 2})
+            assert img.size == (2, 1)
+
+    def test_dhash_distance(self):
+        w, h = 48, 32
+        base = sim_cli.rgb565_to_image(_gradient_frame(w, h), w, h)
+        noisy = base.copy()
+        noisy.putpixel((3, 3), (255, 255, 255))
+        flipped = base.transpose(0)  # mirror left/right
+        h_base = sim_cli.dhash(base)
+        assert len(h_base) == 16
+        assert sim_cli.hash_distance(h_base, sim_cli.dhash(base.copy())) == 0
+        assert sim_cli.hash_distance(h_base, sim_cli.dhash(noisy)) <= 2
+        assert sim_cli.hash_distance(h_base, sim_cli.dhash(flipped)) > 16
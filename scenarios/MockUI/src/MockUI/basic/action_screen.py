@@ -4,6 +4,9 @@ from .titled_screen import TitledScreen
 
 class ActionScreen(TitledScreen):
     """Generic action screen for menu items."""
+
+    I18N_KEYS = ("ACTION_SCREEN_PREFIX", "ACTION_SCREEN_BACK")
+
     def __init__(self, title, parent):
         # TitledScreen creates title_bar (with optional back_btn + title_lbl) and body
         super().__init__(title, parent)
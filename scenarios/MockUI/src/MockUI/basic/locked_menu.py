@@ -42,6 +42,8 @@ def _shuffle(items_or_count):
 class LockedMenu(TitledScreen):
     """Simple lock screen that accepts a numeric PIN to unlock the device."""
 
+    I18N_KEYS = ("LOCKED_MENU_TITLE", "LOCKED_MENU_FW_VERSION", "LOCKED_MENU_ENTER_PIN")
+
     def __init__(self, parent):
         super().__init__(parent.i18n.t("LOCKED_MENU_TITLE"), parent)
 
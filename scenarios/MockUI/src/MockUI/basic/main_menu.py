@@ -7,6 +7,17 @@ from .ui_consts import GREEN_HEX, RED_HEX, WHITE_HEX
 
 class MainMenu(GenericMenu):
     TITLE_KEY = "MAIN_MENU_TITLE"
+    I18N_KEYS = (
+        "MAIN_MENU_PROCESS_INPUT",
+        "MAIN_MENU_SCAN_QR",
+        "MAIN_MENU_LOAD_SD",
+        "MAIN_MENU_SIGN_MESSAGE",
+        "MAIN_MENU_IMPORT_SMARTCARD",
+        "MAIN_MENU_CHOOSE_WALLET",
+        "MENU_MANAGE_WALLET",
+        "MAIN_MENU_CHANGE_ADD_WALLET",
+        "MENU_ADD_WALLET",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = []
@@ -143,55 +143,64 @@ class SpecterGui(lv.obj):
             # ensure the ui history is cleared when locking
             self.ui_state.clear_history()
             self.ui_state.current_menu_id = "locked"
+            self.i18n.prefetch(LockedMenu.get_i18n_keys())
             self.current_screen = LockedMenu(self)
             self.refresh_ui()
             return
 
-        # Create new screen (micropython doesn't support match/case)
+        # Pick screen class (micropython doesn't support match/case)
         current = self.ui_state.current_menu_id
         if current in ("main", "start_intro_tour"):
-            self.current_screen = MainMenu(self)
+            screen_cls = MainMenu
         elif current == "manage_wallet":
-            self.current_screen = WalletMenu(self)
+            screen_cls = WalletMenu
         elif current == "manage_security_settings":
-            self.current_screen = SecuritySettingsMenu(self)
+            screen_cls = SecuritySettingsMenu
         elif current == "manage_backups":
-            self.current_screen = BackupsMenu(self)
+            screen_cls = BackupsMenu
         elif current == "manage_firmware":
-            self.current_screen = FirmwareMenu(self)
+            screen_cls = FirmwareMenu
         elif current == "connect_sw_wallet":
-            self.current_screen = ConnectWalletsMenu(self)
+            screen_cls = ConnectWalletsMenu
         elif current == "change_wallet":
-            self.current_screen = ChangeWalletMenu(self)
+            screen_cls = ChangeWalletMenu
         elif current == "add_wallet":
-            self.current_screen = AddWalletMenu(self)
+            screen_cls = AddWalletMenu
         elif current == "manage_security_features":
-            self.current_screen = SecurityFeaturesMenu(self)
+            screen_cls = SecurityFeaturesMenu
         elif current == "interfaces":
-            self.current_screen = InterfacesMenu(self)
+            screen_cls = InterfacesMenu
         elif current == "manage_seedphrase":
-            self.current_screen = SeedPhraseMenu(self)
+            screen_cls = SeedPhraseMenu
         elif current == "store_seedphrase":
-            self.current_screen = StoreSeedphraseMenu(self)
+            screen_cls = StoreSeedphraseMenu
         elif current == "clear_seedphrase":
-            self.current_screen = ClearSeedphraseMenu(self)
+            screen_cls = ClearSeedphraseMenu
         elif current == "generate_seedphrase":
-            self.current_screen = GenerateSeedMenu(self)
+            screen_cls = GenerateSeedMenu
         elif current == "set_passphrase":
-            self.current_screen = PassphraseMenu(self)
+            screen_cls = PassphraseMenu
         elif current == "manage_storage":
-            self.current_screen = StorageMenu(self)
+            screen_cls = StorageMenu
         elif current == "select_language":
-            self.current_screen = LanguageMenu(self)
+            screen_cls = LanguageMenu
         elif current == "manage_preferences":
-            self.current_screen = PreferencesMenu(self)
+            screen_cls = PreferencesMenu
         elif current == "manage_settings":
-            self.current_screen = SettingsMenu(self)
+            screen_cls = SettingsMenu
         else:
+            screen_cls = ActionScreen
+
+        # Batch-read all strings the screen needs before building it
+        self.i18n.prefetch(screen_cls.get_i18n_keys())
+
+        if screen_cls is ActionScreen:
             # For all other actions, show a generic action screen
             title = (target_menu_id or "").replace("_", " ")
             title = title[0].upper() + title[1:] if title else ""
             self.current_screen = ActionScreen(title, self)
+        else:
+            self.current_screen = screen_cls(self)
 
         # refresh the UI
         self.refresh_ui()
@@ -1,8 +1,65 @@
 """Core Icon class and bitmap conversion utilities."""
 
+from collections import OrderedDict
+
 import lvgl as lv
 from ..ui_consts import WHITE_HEX, BTC_ICON_ZOOM
 
+# Pattern encodings (see tools/symbol_lib/generate_btc_icons.py --encoding)
+ENCODING_A8 = "a8"    # one alpha byte per pixel, used in place
+ENCODING_A4 = "a4"    # two 4-bit alpha pixels per byte, rendered natively by LVGL (A4)
+ENCODING_RLE = "rle"  # run-length encoded A8, expanded into RAM on demand
+
+# Budget for RLE icons expanded to A8 in RAM (~a screenful of 42x42 icons).
+# Least recently used descriptors are dropped first; icons still shown on
+# screen stay alive through Icon._pinned.
+DECODE_CACHE_BYTES = 16 * 42 * 42
+PIN_PRUNE_THRESHOLD = 48  # prune pins of deleted images once this many exist
+
+# Constant runs used by decode_rle() (no per-run allocation for 0xFF runs)
+_RUN_FULL = b"\xff" * 129
+
+
+def decode_rle(data, size):
+    """
+    Expand a run-length encoded alpha pattern into a new bytearray of size bytes.
+
+    Encoding (PackBits style, written by generate_btc_icons.py):
+        control < 0x80  -> control + 1 literal bytes follow
+        control >= 0x80 -> next byte repeated control - 126 times (2..129)
+
+    Raises:
+        ValueError: if the data does not expand to exactly size bytes
+    """
+    out = bytearray(size)  # zero-initialised: transparent runs need no write
+    src = memoryview(data)
+    pos = 0
+    i = 0
+    end = len(data)
+    while i < end:
+        control = src[i]
+        if control < 0x80:
+            count = control + 1
+            if pos + count > size:
+                break
+            out[pos:pos + count] = src[i + 1:i + 1 + count]
+            i += count + 1
+        else:
+            count = control - 126
+            if pos + count > size:
+                break
+            value = src[i + 1]
+            if value == 0xFF:
+                out[pos:pos + count] = _RUN_FULL[:count]
+            elif value:
+                for j in range(pos, pos + count):
+                    out[j] = value
+            i += 2
+        pos += count
+    if pos != size or i != end:
+        raise ValueError("RLE pattern does not expand to {} bytes".format(size))
+    return out
+
 
 
 def color_to_rgb(color):
@@ -30,24 +87,51 @@ def color_to_rgb(color):
     return (r, g, b)
 
 
-def create_icon_from_bitmap(pattern, width, height):
+def create_icon_from_bitmap(pattern, width, height, encoding=ENCODING_A8):
     """
     Convert an alpha-channel bitmap pattern to A8 format for LVGL.
 
     Uses A8 (alpha-only) format to minimise memory allocation.
-    For 8-bit patterns already stored as ``bytes``, the data is used
-    directly with zero heap allocation (references frozen bytecode).
+    For 8-bit patterns already stored as ``bytes`` (or a ``memoryview``
+    slice of the icon atlas), the data is used directly with zero heap
+    allocation (references frozen bytecode).
+    A4 patterns are handed to LVGL as A4 images, also without a copy.
+    RLE patterns are expanded into a new A8 buffer.
     Color is applied separately via the image recolor style.
 
     Args:
-        pattern: bytes or list of alpha values (0-255) for each pixel, or
-                 list of 0s and 1s for legacy binary patterns
+        pattern: bytes, memoryview or list of alpha values (0-255) for each
+                 pixel, or list of 0s and 1s for legacy binary patterns;
+                 encoded bytes for ENCODING_A4 / ENCODING_RLE
         width: Width of the icon in pixels
         height: Height of the icon in pixels
+        encoding: ENCODING_A8 (default), ENCODING_A4 or ENCODING_RLE
 
     Returns:
         lv.image_dsc_t object ready to use with lv.image
     """
+    if encoding == ENCODING_A4:
+        stride = (width + 1) // 2
+        if len(pattern) != stride * height:
+            raise ValueError(
+                f"A4 pattern size mismatch: got {len(pattern)} bytes, "
+                f"expected {stride * height} (width={width} × height={height})"
+            )
+        return lv.image_dsc_t({
+            'header': {
+                'w': width,
+                'h': height,
+                'stride': stride,
+                'cf': lv.COLOR_FORMAT.A4,
+            },
+            'data_size': len(pattern),
+            'data': pattern,
+        })
+    if encoding == ENCODING_RLE:
+        pattern = decode_rle(pattern, width * height)
+    elif encoding != ENCODING_A8:
+        raise ValueError(f"Unknown icon encoding {encoding!r}")
+
     # Validate pattern size matches expected dimensions
     expected_size = width * height
     if len(pattern) != expected_size:
@@ -63,8 +147,9 @@ def create_icon_from_bitmap(pattern, width, height):
     if is_binary:
         # Convert binary (0/1) to full alpha (0x00/0xFF)
         icon_data_bytes = bytes(0xFF if a else 0x00 for a in pattern)
-    elif isinstance(pattern, bytes):
-        # 8-bit alpha already in bytes — use directly (zero copy from flash)
+    elif isinstance(pattern, (bytes, bytearray, memoryview)):
+        # 8-bit alpha already in bytes, an atlas slice or a decoded RLE
+        # buffer — use directly (zero copy)
         icon_data_bytes = pattern
     else:
         # List of 8-bit alpha values — convert once
@@ -97,25 +182,33 @@ class Icon:
     to add icons to buttons/containers with flex layout alongside labels.
     """
     
-    # Class-level cache shared across all Icon instances
-    # Key: (pattern_id, color_string) -> Value: lv.image_dsc_t
-    _global_image_dsc_cache = {}
+    # Class-level cache shared across all Icon instances (LRU order)
+    # Key: id(pattern) -> Value: (lv.image_dsc_t, expanded bytes held in RAM)
+    _global_image_dsc_cache = OrderedDict()
+    _decoded_bytes = 0
+    # Descriptors of evictable (RLE) icons currently set on an lv.image:
+    # id(image) -> (image, lv.image_dsc_t). LVGL only keeps a raw pointer,
+    # so this keeps the expanded buffer alive while the image shows it.
+    _pinned = {}
     
-    def __init__(self, pattern, width, height, color=None):
+    def __init__(self, pattern, width, height, color=None, encoding=ENCODING_A8):
         """
         Initialize an icon with a bitmap pattern.
         
         Args:
-            pattern: bytes or list of alpha values (0-255) for each pixel,
-                    or list of 0s and 1s for legacy binary patterns
+            pattern: bytes, memoryview (atlas slice) or list of alpha values
+                    (0-255) for each pixel, or list of 0s and 1s for legacy
+                    binary patterns; encoded bytes for A4 / RLE
             width: Width of the icon in pixels
             height: Height of the icon in pixels
             color: Optional lv.color_t object (defaults to WHITE_HEX)
+            encoding: ENCODING_A8 (default), ENCODING_A4 or ENCODING_RLE
         """
         self.pattern = pattern
         self.width = width
         self.height = height
         self.color = color if color is not None else WHITE_HEX
+        self.encoding = encoding
     
     def __call__(self, color):
         """
@@ -128,7 +221,7 @@ class Icon:
         Returns:
             New Icon instance with the specified color
         """
-        return Icon(self.pattern, self.width, self.height, color)
+        return Icon(self.pattern, self.width, self.height, color, self.encoding)
     
     def get_image_dsc(self):
         """
@@ -137,17 +230,61 @@ class Icon:
         With A8 format the descriptor is colour-independent, so one cached
         entry per unique pattern is sufficient.
 
+        A8/A4 descriptors reference the pattern in place and stay cached.
+        RLE icons are expanded into RAM; once the expanded icons exceed
+        DECODE_CACHE_BYTES the least recently used ones are dropped.
+
         Returns:
             lv.image_dsc_t object
         """
+        cache = Icon._global_image_dsc_cache
         cache_key = id(self.pattern)
 
-        if cache_key not in Icon._global_image_dsc_cache:
-            Icon._global_image_dsc_cache[cache_key] = create_icon_from_bitmap(
-                self.pattern, self.width, self.height
+        entry = cache.pop(cache_key, None)
+        if entry is None:
+            dsc = create_icon_from_bitmap(
+                self.pattern, self.width, self.height, self.encoding
             )
+            entry = (dsc, self.width * self.height if self.encoding == ENCODING_RLE else 0)
+            Icon._decoded_bytes += entry[1]
+        # Re-insert at the end: most recently used
+        cache[cache_key] = entry
+        if Icon._decoded_bytes > DECODE_CACHE_BYTES:
+            Icon._evict_decoded(cache_key)
+        return entry[0]
+
+    @staticmethod
+    def _evict_decoded(keep_key):
+        """Drop least recently used expanded descriptors until within budget."""
+        cache = Icon._global_image_dsc_cache
+        victims = []
+        excess = Icon._decoded_bytes - DECODE_CACHE_BYTES
+        for key in cache:
+            if excess <= 0:
+                break
+            size = cache[key][1]
+            if size and key != keep_key:
+                victims.append(key)
+                excess -= size
+        for key in victims:
+            Icon._decoded_bytes -= cache.pop(key)[1]
+
+    @staticmethod
+    def _pin(image, dsc):
+        """Keep dsc alive while image displays it (see Icon._pinned)."""
+        pinned = Icon._pinned
+        pinned[id(image)] = (image, dsc)
+        if len(pinned) > PIN_PRUNE_THRESHOLD:
+            # Forget images LVGL has deleted since (screen changes)
+            for key in [k for k, (img, _) in pinned.items()
+                        if hasattr(img, 'is_valid') and not img.is_valid()]:
+                del pinned[key]
 
-        return Icon._global_image_dsc_cache[cache_key]
+    @staticmethod
+    def clear_cache():
+        """Drop all cached descriptors that are not on screen."""
+        Icon._global_image_dsc_cache = OrderedDict()
+        Icon._decoded_bytes = 0
 
     def add_to_parent(self, parent, zoom=None):
         """
@@ -161,12 +298,18 @@ class Icon:
         """
         if zoom is None:
             zoom = BTC_ICON_ZOOM
-        parent.set_src(self.get_image_dsc())
+        dsc = self.get_image_dsc()
+        parent.set_src(dsc)
+        if self.encoding == ENCODING_RLE:
+            Icon._pin(parent, dsc)
+        else:
+            # A new non-evictable source replaces a pinned RLE one
+            Icon._pinned.pop(id(parent), None)
         scaled_w = self.width * zoom // 256
         scaled_h = self.height * zoom // 256
         parent.set_size(scaled_w, scaled_h)
         parent.set_scale(zoom)
-        # Apply colour via recolor (image data is alpha-only A8)
+        # Apply colour via recolor (image data is alpha-only A8/A4)
         r, g, b = color_to_rgb(self.color)
         parent.set_style_image_recolor(lv.color_make(r, g, b), 0)
         parent.set_style_image_recolor_opa(lv.OPA.COVER, 0)
@@ -32,8 +32,22 @@ class TitledScreen(lv.obj):
         self.title_lbl  – lv.label centred inside title_bar  (alias: self.title)
         self.back_btn   – lv.button in title_bar (only when navigation history exists)
         self.body       – lv.obj below the title bar; put content here
+
+    Subclasses list the i18n keys they look up while being built in
+    I18N_KEYS; SpecterGui.show_menu prefetches them in one batch before
+    constructing the screen.
     """
 
+    I18N_KEYS = ()
+
+    @classmethod
+    def get_i18n_keys(cls):
+        """Return I18N_KEYS plus TITLE_KEY (menus) for batched prefetching."""
+        title_key = getattr(cls, "TITLE_KEY", None)
+        if title_key:
+            return (title_key,) + cls.I18N_KEYS
+        return cls.I18N_KEYS
+
     def __init__(self, title, parent):
         lv_parent = getattr(parent, "content", parent)
         super().__init__(lv_parent)
@@ -6,6 +6,7 @@ class BackupsMenu(GenericMenu):
     """Menu for managing backups on SD Card."""
 
     TITLE_KEY = "MENU_MANAGE_BACKUPS"
+    I18N_KEYS = ("BACKUPS_MENU_BACKUP_TO_SD", "BACKUPS_MENU_RESTORE_FROM_SD", "BACKUPS_MENU_REMOVE_FROM_SD")
 
     def get_menu_items(self, t, state):
         return [
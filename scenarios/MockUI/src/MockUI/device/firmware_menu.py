@@ -7,6 +7,13 @@ class FirmwareMenu(GenericMenu):
     """Menu for firmware management."""
 
     TITLE_KEY = "MENU_MANAGE_FIRMWARE"
+    I18N_KEYS = (
+        "FIRMWARE_MENU_CURRENT_VERSION",
+        "FIRMWARE_MENU_UPDATE_VIA",
+        "HARDWARE_SD_CARD",
+        "HARDWARE_USB",
+        "HARDWARE_QR_CODE",
+    )
 
     def get_menu_items(self, t, state):
         fw_version = state.fw_version
@@ -6,6 +6,14 @@ from ..basic.symbol_lib import BTC_ICONS
 class InterfacesMenu(TitledScreen):
     """Menu to enable/disable hardware interfaces."""
 
+    I18N_KEYS = (
+        "MENU_ENABLE_DISABLE_INTERFACES",
+        "HARDWARE_QR_CODE",
+        "HARDWARE_USB",
+        "HARDWARE_SD_CARD",
+        "HARDWARE_SMARTCARD",
+    )
+
     def __init__(self, parent):
         # TitledScreen sets self.gui, self.state, self.i18n, self.on_navigate
         super().__init__(parent.i18n.t("MENU_ENABLE_DISABLE_INTERFACES"), parent)
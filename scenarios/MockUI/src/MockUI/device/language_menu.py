@@ -5,6 +5,7 @@ from ..basic.symbol_lib import BTC_ICONS
 
 class LanguageMenu(GenericMenu):
     TITLE_KEY = "MENU_LANGUAGE"
+    I18N_KEYS = ("MENU_LOAD_NEW_LANGUAGE",)
 
     def get_menu_items(self, t, state):
         available_langs = self.i18n.get_available_languages()
@@ -7,6 +7,7 @@ class PreferencesMenu(GenericMenu):
     """Menu for UI preferences: display, sounds, tour restart."""
 
     TITLE_KEY = "MENU_MANAGE_PREFERENCES"
+    I18N_KEYS = ("DEVICE_MENU_DISPLAY", "DEVICE_MENU_SOUNDS", "DEVICE_MENU_RESTART_TOUR")
 
     def get_menu_items(self, t, state):
         return [
@@ -4,6 +4,14 @@ import lvgl as lv
 
 class SecurityFeaturesMenu(GenericMenu):
     TITLE_KEY = "MENU_MANAGE_SECURITY"
+    I18N_KEYS = (
+        "SECURITY_MENU_SELF_TEST",
+        "SECURITY_MENU_CHANGE_PIN",
+        "SECURITY_MENU_PIN_RETRIES",
+        "SECURITY_MENU_PIN_ACTION",
+        "SECURITY_MENU_DURESS_PIN",
+        "SECURITY_MENU_DURESS_ACTION",
+    )
 
     def get_menu_items(self, t, state):
         return [
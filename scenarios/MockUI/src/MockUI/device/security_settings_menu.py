@@ -7,6 +7,14 @@ class SecuritySettingsMenu(GenericMenu):
     """Security hub: security features, firmware, backups, danger zone."""
 
     TITLE_KEY = "MENU_SETTINGS_SECURITY"
+    I18N_KEYS = (
+        "MENU_MANAGE_SECURITY",
+        "MENU_ENABLE_DISABLE_INTERFACES",
+        "MENU_MANAGE_FIRMWARE",
+        "MENU_MANAGE_BACKUPS",
+        "DEVICE_MENU_DANGERZONE",
+        "DEVICE_MENU_WIPE",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = [
@@ -6,6 +6,7 @@ from ..basic.symbol_lib import BTC_ICONS
 
 class SettingsMenu(GenericMenu):
     TITLE_KEY = "MENU_MANAGE_SETTINGS"
+    I18N_KEYS = ("MENU_LANGUAGE", "MENU_SETTINGS_SECURITY", "MENU_MANAGE_STORAGE", "MENU_MANAGE_PREFERENCES")
 
     def get_menu_items(self, t, state):
         # Show current language code inline on the Language button
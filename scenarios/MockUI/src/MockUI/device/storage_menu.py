@@ -6,6 +6,12 @@ class StorageMenu(GenericMenu):
     """Menu to manage storage devices (SD / SmartCard)."""
 
     TITLE_KEY = "MENU_MANAGE_STORAGE"
+    I18N_KEYS = (
+        "STORAGE_MENU_INTERNAL_FLASH",
+        "STORAGE_MENU_SMARTCARD",
+        "STORAGE_MENU_SD_CARD",
+        "MENU_MANAGE_BACKUPS",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = []
@@ -8,9 +8,8 @@ Enables runtime loading of new languages via JSON to binary conversion.
 
 import os
 import json
-from .translation_keys import KEY_TO_INDEX, Keys
 from .lang_compiler import (
-    read_translation_from_binary,
+    TranslationTable,
     get_binary_filename,
     get_json_filename,
     BINARY_FILE_PREFIX,
@@ -24,6 +23,17 @@ from .lang_compiler import (
 )
 
 
+def _key_to_index():
+    """
+    Return KEY_TO_INDEX, imported on first use.
+
+    Only needed to compile languages and to resolve string keys when the
+    default language file has no v2 key hash section.
+    """
+    from .translation_keys import KEY_TO_INDEX
+    return KEY_TO_INDEX
+
+
 class I18nManager:
     """Manages UI translations and language switching."""
 
@@ -35,6 +45,7 @@ class I18nManager:
     DEFAULT_LANGUAGE = "en"  # Default language is English
     FLASH_I18N_DIR = "/flash/i18n"  # Flash filesystem directory for all language files
     FLASH_CONFIG_PATH = FLASH_I18N_DIR + "/language_config.json"  # Persistent language preference storage
+    STRING_CACHE_SIZE = 32  # Decoded strings kept per open language file (LRU)
     
     def __init__(self):
         """
@@ -47,6 +58,8 @@ class I18nManager:
         self.current_lang_file = None
         self.default_lang_file = None
         self.available_languages = []
+        self._current_table = None  # TranslationTable for current_lang_file
+        self._default_table = None  # TranslationTable for default_lang_file (may be the same object)
         
         # Ensure flash directory exists
         self._ensure_flash_i18n_dir()
@@ -161,6 +174,9 @@ class I18nManager:
         self.current_lang_file = current_path
         self.default_lang_file = default_path
         self.current_language = lang_code
+
+        # Load offset indexes once; this also drops all cached strings
+        self._open_tables()
         
         # Save preference
         self._save_language_preference(lang_code)
@@ -168,6 +184,24 @@ class I18nManager:
         print(f"Language set to '{lang_code}' (file: {current_path})")
         return True
     
+    def _open_tables(self):
+        """(Re)open translation tables for the current and default language files."""
+        self._close_tables()
+        self._default_table = TranslationTable(self.default_lang_file, self.STRING_CACHE_SIZE)
+        if self.current_lang_file == self.default_lang_file:
+            self._current_table = self._default_table
+        else:
+            self._current_table = TranslationTable(self.current_lang_file, self.STRING_CACHE_SIZE)
+
+    def _close_tables(self):
+        """Release file handles and cached strings of the open translation tables."""
+        if self._current_table is not None:
+            self._current_table.close()
+        if self._default_table is not None:
+            self._default_table.close()
+        self._current_table = None
+        self._default_table = None
+
     def get_language(self):
         """Get the current language code."""
         return self.current_language
@@ -198,6 +232,9 @@ class I18nManager:
     def t(self, key):
         """
         Get translation for a key using binary file lookup.
+
+        Strings are served from the open TranslationTables (offset index in
+        RAM, recently used strings cached), see set_language().
         
         Supports both string keys (e.g., "MAIN_MENU_TITLE") and
         integer keys (e.g., Keys.MAIN_MENU_TITLE) for RAM efficiency.
@@ -209,26 +246,22 @@ class I18nManager:
             str: Translated text or fallback string
         """
         # Validate setup
-        if not self.current_lang_file or not self.default_lang_file:
+        if not self.current_lang_file or not self.default_lang_file or self._current_table is None:
             print(f"Warning: Language files not set up properly")
             return self.STR_MISSING
         
-        # Convert string key to index if needed
-        if isinstance(key, str):
-            key_index = KEY_TO_INDEX.get(key)
-            if key_index is None:
-                print(f"Warning: Unknown translation key '{key}'")
-                return self.STR_UNKNOWN_KEY
-        else:
-            # Direct integer index (RAM efficient)
-            key_index = key
+        # Convert string key to index if needed (integer keys pass through)
+        key_index = self._key_index(key)
+        if key_index is None:
+            print(f"Warning: Unknown translation key '{key}'")
+            return self.STR_UNKNOWN_KEY
         
         # Try to read from current language file
-        text, error = read_translation_from_binary(self.current_lang_file, key_index)
+        text, error = self._current_table.lookup(key_index)
         
         # If not found in current language, try default language
         if text is None and error == "missing":
-            text, error = read_translation_from_binary(self.default_lang_file, key_index)
+            text, error = self._default_table.lookup(key_index)
         
         # If still not found, return fallback
         if text is None:
@@ -243,15 +276,75 @@ class I18nManager:
         # default language (English) so the placeholder never reaches the UI.
         if text == FILL_PLACEHOLDER:
             if self.current_language != self.DEFAULT_LANGUAGE:
-                default_text, default_error = read_translation_from_binary(
-                    self.default_lang_file, key_index
-                )
+                default_text, default_error = self._default_table.lookup(key_index)
                 if default_text is not None and default_text != FILL_PLACEHOLDER:
                     return default_text
             return self.STR_MISSING
 
         return text
     
+    def t_many(self, keys):
+        """
+        Translate several keys with one sorted-offset pass per language file.
+
+        Reads all requested strings via TranslationTable.lookup_many() (keys
+        that need the default language fallback are batched the same way),
+        then resolves each key through t() from the warmed string cache.
+
+        Args:
+            keys: Iterable of translation keys (strings or integers from Keys)
+
+        Returns:
+            list: Translated texts in the same order as keys (same fallbacks as t())
+        """
+        keys = list(keys)
+        self._fetch_many(keys)
+        return [self.t(key) for key in keys]
+
+    def prefetch(self, keys):
+        """
+        Warm the string cache for keys a screen is about to look up.
+
+        Called by the navigation controller with the screen's I18N_KEYS before
+        constructing it, so the individual t() calls during construction are
+        served from RAM. Only the last STRING_CACHE_SIZE strings are kept.
+        """
+        if keys:
+            self._fetch_many(keys)
+
+    def _fetch_many(self, keys):
+        """Batch-read keys into the current (and, where needed, default) table cache."""
+        if self._current_table is None:
+            return
+        indices = []
+        for key in keys:
+            key_index = self._key_index(key)
+            if key_index is not None:
+                indices.append(key_index)
+
+        found = self._current_table.lookup_many(indices)
+        if self._default_table is not self._current_table:
+            fallback = [
+                key_index for key_index, (text, error) in found.items()
+                if (text is None and error == "missing") or text == FILL_PLACEHOLDER
+            ]
+            if fallback:
+                self._default_table.lookup_many(fallback)
+
+    def _key_index(self, key):
+        """
+        Map a translation key to its index, or None if the key is unknown.
+
+        String keys are resolved through the key hash section of the default
+        language file when present (v2), otherwise through KEY_TO_INDEX.
+        """
+        if not isinstance(key, str):
+            return key
+        table = self._default_table
+        if table is not None and table.has_key_hashes():
+            return table.find_key(key)
+        return _key_to_index().get(key)
+
     def __getitem__(self, key):
         """Allow using the manager as a dictionary: i18n['KEY']"""
         return self.t(key)
@@ -289,8 +382,18 @@ class I18nManager:
             # Construct target path in flash directory
             output_path = f"{self.FLASH_I18N_DIR}/{get_binary_filename(lang_code)}"
             
+            # Replacing an active language file: release its handle first and
+            # reload the index afterwards so no stale cached strings survive
+            replaces_active = self.current_lang_file is not None and \
+                lang_code in (self.current_language, self.DEFAULT_LANGUAGE)
+            if replaces_active:
+                self._close_tables()
+
             # Convert JSON to binary - write directly to target location
-            result_path = json_to_binary(json_path, KEY_TO_INDEX, output_path)
+            result_path = json_to_binary(json_path, _key_to_index(), output_path)
+
+            if replaces_active:
+                self._open_tables()
             
             if result_path is None:
                 print("Error: Language compilation failed due to validation errors")
@@ -6,9 +6,21 @@ Converts JSON language files to efficient binary format for flash storage.
 Generates translation key mappings for runtime lookups.
 """
 
+import io
 import json
 import struct
 import os
+from array import array
+from collections import OrderedDict
+
+try:
+    import deflate  # MicroPython >= 1.21: streaming DeflateIO
+except ImportError:
+    deflate = None
+try:
+    import zlib  # CPython (compression + decompression), older MicroPython (decompression)
+except ImportError:
+    zlib = None
 
 
 # File Format Constants
@@ -30,6 +42,32 @@ KEY_COUNT_SIZE = 4    # uint32 key count
 LANG_NAME_FIELD_SIZE = 32  # fixed-width language name field (null-padded UTF-8, max 31 usable bytes)
 HEADER_SIZE = MAGIC_SIZE + VERSION_SIZE + KEY_COUNT_SIZE + LANG_NAME_FIELD_SIZE  # = 44 bytes
 OFFSET_SIZE = 4       # uint32 offset in index
+LENGTH_SIZE = 2       # uint16 string length in v2 index (also v2 key hash index entry)
+V2_HEADER_SIZE = 8    # v2 only: uint32 flags + uint32 key hash section offset
+MISSING_OFFSET = 0xFFFFFFFF  # index marker for a missing translation
+MAX_STRING_LENGTH_V2 = 0xFFFF  # longest string (bytes) a v2 index entry can describe
+
+# Binary Format Versions
+MAGIC = b"LANG"
+FORMAT_VERSION_V1 = 1  # uint32 offset index, null-terminated strings
+FORMAT_VERSION_V2 = 2  # offset + length index, optional key hash section, optional string dedup
+FORMAT_VERSION = FORMAT_VERSION_V2  # written by json_to_binary() unless asked otherwise
+FLAG_KEY_HASHES = 0x1  # v2 flag: key hash section present
+FLAG_DEDUP = 0x2       # v2 flag: identical strings stored once
+FLAG_COMPRESSED = 0x4  # v2 flag: strings stored in independently deflated blocks
+KEY_HASH_MASK = 0x7FFF  # key_hash() is built from two 15-bit halves
+
+# Runtime read tuning
+STRING_READ_CHUNK = 64  # bytes fetched per read() while scanning for a null terminator
+BATCH_READ_WINDOW = 256  # bytes read at once by TranslationTable.lookup_many()
+DEFAULT_CACHE_SIZE = 32  # strings kept decoded by TranslationTable (LRU)
+
+# Compressed language packs (FLAG_COMPRESSED)
+BLOCK_TABLE_HEADER_SIZE = 4  # uint16 block count + uint16 deflate window bits
+DEFAULT_BLOCK_SIZE = 512     # uncompressed bytes per block (a longer string gets its own block)
+MAX_BLOCK_SIZE = 0xFFFF      # block-relative string offsets are 16 bit
+COMPRESS_WBITS = 9           # 512-byte deflate window - smallest one zlib can write
+BLOCK_OFFSET_MASK = 0xFFFF   # compressed index entry: (block << 16) | offset inside block
 
 
 # --- Path helpers (os.path not available in MicroPython) ---
@@ -71,13 +109,135 @@ def get_binary_filename(lang_code):
 
 
 
+def _read_cstring(f, offset):
+    """
+    Read a null-terminated string starting at offset from an open binary file.
+
+    Reads in STRING_READ_CHUNK blocks instead of byte-by-byte so that a typical
+    UI string costs a single read() call on flash.
+
+    Returns:
+        bytes|bytearray: String bytes without the terminator (stops at EOF if
+        no terminator is found)
+    """
+    f.seek(offset)
+    result = bytearray()
+    while True:
+        chunk = f.read(STRING_READ_CHUNK)
+        if not chunk:
+            return result
+        end = chunk.find(b'\x00')
+        if end >= 0:
+            if not result:
+                return chunk[:end]
+            result.extend(chunk[:end])
+            return result
+        result.extend(chunk)
+
+
+def _read_exact(f, offset, length):
+    """Read length bytes at offset (v2 strings); raises OSError on short read."""
+    f.seek(offset)
+    raw = f.read(length)
+    if len(raw) != length:
+        raise OSError("unexpected EOF")
+    return raw
+
+
+def _inflate_into(raw, buf, size, wbits):
+    """
+    Decompress a raw deflate stream into the first size bytes of buf.
+
+    Uses deflate.DeflateIO on MicroPython (decompresses straight into buf, no
+    intermediate bytes object), zlib elsewhere. Raises OSError if the stream
+    does not decompress to exactly size bytes.
+    """
+    if deflate is not None:
+        stream = deflate.DeflateIO(io.BytesIO(raw), deflate.RAW, wbits)
+        view = memoryview(buf)
+        filled = 0
+        while filled < size:
+            n = stream.readinto(view[filled:size])
+            if not n:
+                break
+            filled += n
+    else:
+        data = zlib.decompress(raw, -wbits)
+        filled = len(data)
+        if filled <= len(buf):
+            buf[:filled] = data
+    if filled != size:
+        raise OSError("corrupt compressed block")
+    return size
+
+
+def _read_block_table(f, key_count):
+    """
+    Read the block table of a compressed v2 file.
+
+    Returns:
+        Tuple (wbits, block_offsets: array('I'), block_sizes: array('H')) -
+        block_offsets has one extra entry marking the end of the last block
+    """
+    f.seek(HEADER_SIZE + V2_HEADER_SIZE + key_count * (OFFSET_SIZE + LENGTH_SIZE))
+    block_count, wbits = struct.unpack('<HH', f.read(BLOCK_TABLE_HEADER_SIZE))
+    block_offsets = array('I', f.read((block_count + 1) * OFFSET_SIZE))
+    block_sizes = array('H', f.read(block_count * LENGTH_SIZE))
+    if len(block_sizes) != block_count or len(block_offsets) != block_count + 1:
+        raise ValueError("truncated block table")
+    return (wbits, block_offsets, block_sizes)
+
+
+def key_hash(key):
+    """
+    30-bit hash of a translation key name, as stored in the v2 key hash section.
+
+    Built from two 15-bit multiplicative hashes so every intermediate value
+    stays a MicroPython small int (no heap allocation per character).
+    """
+    h1 = 5381 & KEY_HASH_MASK
+    h2 = 0
+    for c in key.encode('utf-8'):
+        h1 = (h1 * 33 + c) & KEY_HASH_MASK
+        h2 = (h2 * 31 + c) & KEY_HASH_MASK
+    return (h1 << 15) | h2
+
+
+def _read_index_entry(f, version, key_count, key_index):
+    """
+    Read one index entry without loading the whole index.
+
+    Returns:
+        Tuple (offset, length) - length is None for v1 (null-terminated strings)
+    """
+    if version == FORMAT_VERSION_V1:
+        f.seek(HEADER_SIZE + key_index * OFFSET_SIZE)
+        return (struct.unpack('<I', f.read(OFFSET_SIZE))[0], None)
+    if version == FORMAT_VERSION_V2:
+        index_start = HEADER_SIZE + V2_HEADER_SIZE
+        f.seek(index_start + key_index * OFFSET_SIZE)
+        offset = struct.unpack('<I', f.read(OFFSET_SIZE))[0]
+        f.seek(index_start + key_count * OFFSET_SIZE + key_index * LENGTH_SIZE)
+        return (offset, struct.unpack('<H', f.read(LENGTH_SIZE))[0])
+    raise ValueError("unsupported format version")
+
+
+def _read_v2_flags(f):
+    """Read the flags word of a v2 file."""
+    f.seek(HEADER_SIZE)
+    return struct.unpack('<I', f.read(4))[0]
+
+
 def read_translation_from_binary(file_path, key_index):
     """
-    Read translation string from binary file.
+    Read translation string from binary file (format v1 or v2).
     
     This function assumes the binary file has already been validated
     (via validate_binary_file) during import/load. It performs minimal
     checks for performance - use validate_binary_file() before first use.
+
+    Opens the file and re-reads the header on every call - for repeated
+    lookups use a TranslationTable instead.
     
     Args:
         file_path: Path to binary language file (must be pre-validated)
@@ -88,7 +248,7 @@ def read_translation_from_binary(file_path, key_index):
         - ("translated text", None) - Success, use the text
         - (None, "missing") - Translation not present (0xFFFFFFFF marker)
         - (None, "invalid_key_index") - key_index out of bounds (>= key_count)
-        - (None, "read_error") - I/O error during read
+        - (None, "read_error") - I/O error during read (or unknown format version)
         - (None, "utf8_decode_error") - Invalid UTF-8 sequence
         
     Usage:
@@ -102,32 +262,34 @@ def read_translation_from_binary(file_path, key_index):
     """
     try:
         with open(file_path, 'rb') as f:
-            # Read header to get key_count
-            f.seek(MAGIC_SIZE + VERSION_SIZE)
-            key_count = struct.unpack('<I', f.read(KEY_COUNT_SIZE))[0]
+            # Read header to get version and key_count
+            f.seek(MAGIC_SIZE)
+            version, key_count = struct.unpack('<II', f.read(VERSION_SIZE + KEY_COUNT_SIZE))
             
             # Validate key_index is in bounds (reject negative indices too)
             if key_index < 0 or key_index >= key_count:
                 return (None, "invalid_key_index")
             
-            # Seek to index entry for this key
-            index_offset = HEADER_SIZE + (key_index * OFFSET_SIZE)
-            f.seek(index_offset)
-            string_offset = struct.unpack('<I', f.read(OFFSET_SIZE))[0]
+            string_offset, length = _read_index_entry(f, version, key_count, key_index)
             
             # Check for missing translation sentinel
-            if string_offset == 0xFFFFFFFF:
+            if string_offset == MISSING_OFFSET:
                 return (None, "missing")
             
-            # Seek to string and read until null terminator
-            f.seek(string_offset)
-            result = bytearray()
-            
-            while True:
-                byte = f.read(1)
-                if not byte or byte == b'\x00':
-                    break
-                result.extend(byte)
+            # v1: read up to null terminator, v2: read exactly length bytes
+            if length is None:
+                result = _read_cstring(f, string_offset)
+            elif _read_v2_flags(f) & FLAG_COMPRESSED:
+                # Decompress only the block holding the string
+                wbits, block_offsets, block_sizes = _read_block_table(f, key_count)
+                block = string_offset >> 16
+                start = string_offset & BLOCK_OFFSET_MASK
+                buf = bytearray(block_sizes[block])
+                _inflate_into(_read_exact(f, block_offsets[block], block_offsets[block + 1] - block_offsets[block]),
+                              buf, block_sizes[block], wbits)
+                result = buf[start:start + length]
+            else:
+                result = _read_exact(f, string_offset, length)
             
             # Decode UTF-8
             try:
@@ -140,6 +302,338 @@ def read_translation_from_binary(file_path, key_index):
         return (None, "read_error")
 
 
+class TranslationTable:
+    """
+    Open binary language file with its offset index held in RAM.
+
+    Loads the header and offset index once (as compact arrays: 4 bytes per
+    key for v1, 6 bytes per key for v2) and keeps the file handle open, so a
+    lookup costs one seek and usually a single read(). Decoded strings are
+    kept in a bounded LRU cache; the least recently used entry is evicted once
+    cache_size is reached.
+
+    For v2 files with a key hash section, find_key() resolves string keys
+    without the KEY_TO_INDEX dictionary.
+
+    Compressed v2 files (FLAG_COMPRESSED) keep only the block table in RAM.
+    A lookup decompresses the block holding the string into one reused
+    buffer; the most recently decompressed block stays in that buffer, so
+    neighbouring keys (e.g. from the same screen) cost no further inflate.
+
+    Lookups follow the read_translation_from_binary() contract and return
+    (text, error) tuples. If the file cannot be opened or its header/index is
+    unreadable, every lookup returns (None, "read_error").
+
+    Call close() when the table is no longer needed (e.g. on language switch)
+    to release the file handle and the cached strings.
+    """
+
+    def __init__(self, file_path, cache_size=DEFAULT_CACHE_SIZE):
+        self.file_path = file_path
+        self.cache_size = cache_size
+        self.version = None
+        self.key_count = 0
+        self._file = None
+        self._offsets = None
+        self._lengths = None  # v2 only: string byte lengths
+        self._key_hashes = None  # v2 only: sorted key hashes ...
+        self._key_hash_index = None  # ... and the key index for each hash
+        self._key_names_offset = 0  # ... and where their key names start
+        self._wbits = 0  # compressed only: deflate window bits
+        self._block_offsets = None  # compressed only: file offset of each block (+ end)
+        self._block_sizes = None  # compressed only: uncompressed size of each block
+        self._block_buf = None  # compressed only: reused decompression buffer ...
+        self._block_id = -1  # ... and the block it currently holds
+        self._cache = OrderedDict()
+        self._load()
+
+    def _load(self):
+        """Open the file and read header + offset index (file must be pre-validated)."""
+        try:
+            f = open(self.file_path, 'rb')
+        except Exception:
+            return
+        try:
+            header = f.read(MAGIC_SIZE + VERSION_SIZE + KEY_COUNT_SIZE)
+            if len(header) < MAGIC_SIZE + VERSION_SIZE + KEY_COUNT_SIZE or header[:MAGIC_SIZE] != MAGIC:
+                raise ValueError("invalid header")
+            version, key_count = struct.unpack('<II', header[MAGIC_SIZE:])
+            # Native arrays - the on-disk little-endian layout matches all supported targets
+            if version == FORMAT_VERSION_V1:
+                f.seek(HEADER_SIZE)
+                offsets = array('I', self._read_block(f, key_count * OFFSET_SIZE))
+                lengths = None
+                hashes = None
+                hash_index = None
+                blocks = None
+            elif version == FORMAT_VERSION_V2:
+                f.seek(HEADER_SIZE)
+                flags, hash_offset = struct.unpack('<II', self._read_block(f, V2_HEADER_SIZE))
+                offsets = array('I', self._read_block(f, key_count * OFFSET_SIZE))
+                lengths = array('H', self._read_block(f, key_count * LENGTH_SIZE))
+                hashes = None
+                hash_index = None
+                blocks = None
+                if flags & FLAG_COMPRESSED:
+                    blocks = _read_block_table(f, key_count)
+                if flags & FLAG_KEY_HASHES:
+                    f.seek(hash_offset)
+                    hashes = array('I', self._read_block(f, key_count * OFFSET_SIZE))
+                    hash_index = array('H', self._read_block(f, key_count * LENGTH_SIZE))
+                    names_offset = hash_offset + key_count * (OFFSET_SIZE + LENGTH_SIZE)
+            else:
+                raise ValueError("unsupported format version")
+        except Exception:
+            f.close()
+            return
+        self._file = f
+        self._offsets = offsets
+        self._lengths = lengths
+        self._key_hashes = hashes
+        self._key_hash_index = hash_index
+        if hashes is not None:
+            self._key_names_offset = names_offset
+        if blocks is not None:
+            self._wbits, self._block_offsets, self._block_sizes = blocks
+            self._block_buf = bytearray(max(self._block_sizes) if len(self._block_sizes) else 0)
+        self.version = version
+        self.key_count = key_count
+
+    @staticmethod
+    def _read_block(f, size):
+        """Read exactly size bytes or raise ValueError."""
+        raw = f.read(size)
+        if len(raw) != size:
+            raise ValueError("truncated file")
+        return raw
+
+    def is_open(self):
+        """True if the file was loaded successfully and not closed yet."""
+        return self._file is not None
+
+    def has_key_hashes(self):
+        """True if string keys can be resolved with find_key() (v2 key hash section)."""
+        return self._key_hashes is not None
+
+    def find_key(self, key):
+        """
+        Resolve a string key to its key index via the v2 key hash section.
+
+        Binary search over the sorted hash array - no KEY_TO_INDEX needed.
+        The key name stored next to the matching hash is compared as well,
+        so an unknown key that happens to share a hash is not resolved to
+        somebody else's string. Only meaningful if has_key_hashes() is True.
+
+        Returns:
+            int|None: key index, or None if the key is unknown
+        """
+        hashes = self._key_hashes
+        if hashes is None:
+            return None
+        h = key_hash(key)
+        lo = 0
+        hi = len(hashes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if hashes[mid] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(hashes) and hashes[lo] == h and self._key_name(lo) == key.encode('utf-8'):
+            return self._key_hash_index[lo]
+        return None
+
+    def _key_name(self, pos):
+        """Read the UTF-8 key name stored for hash position pos."""
+        f = self._file
+        f.seek(self._key_names_offset + pos * OFFSET_SIZE)
+        start, end = struct.unpack('<II', f.read(2 * OFFSET_SIZE))
+        f.seek(self._key_names_offset + (self.key_count + 1) * OFFSET_SIZE + start)
+        return f.read(end - start)
+
+    def lookup(self, key_index):
+        """
+        Return translation for key_index as (text, error) tuple.
+
+        Same return values as read_translation_from_binary().
+        """
+        cache = self._cache
+        if key_index in cache:
+            # Move to most-recently-used position (re-insert at the end)
+            text = cache.pop(key_index)
+            cache[key_index] = text
+            return (text, None)
+
+        if self._file is None:
+            return (None, "read_error")
+        if key_index < 0 or key_index >= self.key_count:
+            return (None, "invalid_key_index")
+
+        string_offset = self._offsets[key_index]
+        if string_offset == MISSING_OFFSET:
+            return (None, "missing")
+
+        try:
+            if self._lengths is None:
+                raw = _read_cstring(self._file, string_offset)
+            elif self._block_offsets is not None:
+                raw = self._read_from_block(string_offset, self._lengths[key_index])
+            else:
+                raw = _read_exact(self._file, string_offset, self._lengths[key_index])
+        except Exception:
+            return (None, "read_error")
+        try:
+            text = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            return (None, "utf8_decode_error")
+
+        self._remember(key_index, text)
+        return (text, None)
+
+    def lookup_many(self, key_indices):
+        """
+        Look up several keys in one forward pass over the file.
+
+        Uncached keys are sorted by string offset and read through a sliding
+        BATCH_READ_WINDOW buffer, so strings stored next to each other are
+        served by the same read() call. All decoded strings enter the cache.
+
+        Returns:
+            dict: key_index -> (text, error) as returned by lookup()
+        """
+        if self._block_offsets is not None:
+            # Compressed: offsets are (block << 16) | start, so lookup() in
+            # offset order decompresses every block at most once
+            results = {}
+            for key_index in key_indices:
+                if key_index not in results:
+                    results[key_index] = None
+            order = sorted(results, key=self._sort_offset)
+            for key_index in order:
+                results[key_index] = self.lookup(key_index)
+            return results
+
+        results = {}
+        pending = []
+        for key_index in key_indices:
+            if key_index in results:
+                continue
+            if key_index in self._cache or self._file is None \
+                    or key_index < 0 or key_index >= self.key_count \
+                    or self._offsets[key_index] == MISSING_OFFSET:
+                results[key_index] = self.lookup(key_index)
+            else:
+                results[key_index] = None
+                pending.append((self._offsets[key_index], key_index))
+        pending.sort()
+
+        f = self._file
+        lengths = self._lengths
+        window = b''
+        window_start = 0
+        # Never read further than the last requested string needs
+        if pending:
+            last_offset, last_index = pending[-1]
+            span_end = last_offset + (STRING_READ_CHUNK if lengths is None else lengths[last_index])
+        for string_offset, key_index in pending:
+            rel = string_offset - window_start
+            try:
+                if lengths is None:
+                    # v1: string ends at the next null terminator
+                    end = window.find(b'\x00', rel) if 0 <= rel < len(window) else -1
+                    if end < 0:
+                        f.seek(string_offset)
+                        window = f.read(min(BATCH_READ_WINDOW, span_end - string_offset))
+                        window_start = string_offset
+                        rel = 0
+                        end = window.find(b'\x00')
+                    # Longer than the window - fall back to the chunked reader
+                    raw = window[rel:end] if end >= 0 else _read_cstring(f, string_offset)
+                else:
+                    # v2: string length is known from the index
+                    end = rel + lengths[key_index]
+                    if rel < 0 or end > len(window):
+                        f.seek(string_offset)
+                        window = f.read(max(min(BATCH_READ_WINDOW, span_end - string_offset),
+                                            lengths[key_index]))
+                        window_start = string_offset
+                        rel = 0
+                        end = lengths[key_index]
+                        if end > len(window):
+                            raise OSError("unexpected EOF")
+                    raw = window[rel:end]
+            except Exception:
+                results[key_index] = (None, "read_error")
+                continue
+            try:
+                text = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                results[key_index] = (None, "utf8_decode_error")
+                continue
+            self._remember(key_index, text)
+            results[key_index] = (text, None)
+        return results
+
+    def _sort_offset(self, key_index):
+        """Sort key for lookup_many(): string offset, invalid indices first."""
+        if 0 <= key_index < self.key_count:
+            return self._offsets[key_index]
+        return -1
+
+    def _read_from_block(self, string_offset, length):
+        """Return string bytes from a compressed block, inflating the block if needed."""
+        block = string_offset >> 16
+        if block != self._block_id:
+            f = self._file
+            start = self._block_offsets[block]
+            self._block_id = -1  # buffer contents undefined until inflate succeeds
+            _inflate_into(_read_exact(f, start, self._block_offsets[block + 1] - start),
+                          self._block_buf, self._block_sizes[block], self._wbits)
+            self._block_id = block
+        start = string_offset & BLOCK_OFFSET_MASK
+        return self._block_buf[start:start + length]
+
+    def is_compressed(self):
+        """True for compressed v2 files (FLAG_COMPRESSED)."""
+        return self._block_offsets is not None
+
+    def _remember(self, key_index, text):
+        """Insert into the LRU cache, evicting the oldest entry when full."""
+        if self.cache_size <= 0:
+            return
+        cache = self._cache
+        while len(cache) >= self.cache_size:
+            del cache[next(iter(cache))]
+        cache[key_index] = text
+
+    def cached_count(self):
+        """Number of strings currently held in the cache."""
+        return len(self._cache)
+
+    def clear_cache(self):
+        """Drop all cached strings (index and file handle stay loaded)."""
+        self._cache = OrderedDict()
+
+    def close(self):
+        """Release file handle, offset index and cached strings."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._file = None
+        self._offsets = None
+        self._lengths = None
+        self._key_hashes = None
+        self._key_hash_index = None
+        self._block_offsets = None
+        self._block_sizes = None
+        self._block_buf = None
+        self._block_id = -1
+        self.key_count = 0
+        self.clear_cache()
+
+
 def extract_language_code_from_filename(filename):
     """
     Extract language code from filename following project naming conventions.
@@ -192,7 +686,8 @@ def extract_language_name_from_file(filename):
     """
     Extract the language name from a binary language file.
     
-    Opens the file and reads the language name from the fixed-width header field.
+    Opens the file and reads the language name from the fixed-width header field
+    (same position in format v1 and v2).
     
     Args:
         filename: Path to binary language file (e.g. 'lang_en.bin' or full path)
@@ -308,17 +803,20 @@ def generate_translation_keys(default_lang_json_path, output_path=None):
     return key_to_index
 
 
-def json_to_binary(json_path, key_to_index, output_path=None):
+def json_to_binary(json_path, key_to_index, output_path=None,
+                   version=FORMAT_VERSION, key_hashes=True, dedup=True,
+                   compress=False, block_size=DEFAULT_BLOCK_SIZE):
     """
     Convert JSON language file to binary format.
     
-    Binary Format:
+    Binary Format (both versions):
     [Header: 44 bytes]
     - magic: 4 bytes "LANG"
     - version: 4 bytes (uint32)  
     - key_count: 4 bytes (uint32)
     - lang_name: 32 bytes (null-padded UTF-8, max 31 usable bytes)
     
+    Version 1:
     [Index: key_count * 4 bytes]
     - offset[0]: 4 bytes → string offset or 0xFFFFFFFF if missing
     - offset[1]: 4 bytes → string offset or 0xFFFFFFFF if missing
@@ -326,15 +824,64 @@ def json_to_binary(json_path, key_to_index, output_path=None):
     
     [Strings: variable size]
     - null-terminated UTF-8 strings
+
+    Version 2:
+    [V2 header: 8 bytes]
+    - flags: 4 bytes (uint32, FLAG_KEY_HASHES | FLAG_DEDUP | FLAG_COMPRESSED)
+    - hash_offset: 4 bytes (uint32 absolute offset of key hash section, 0 if absent)
+
+    [Index: key_count * 6 bytes]
+    - offsets: key_count * uint32 → string offset or 0xFFFFFFFF if missing
+      (compressed: (block << 16) | offset inside the uncompressed block)
+    - lengths: key_count * uint16 → string length in bytes (0 if missing)
+
+    [Block table (compressed only)]
+    - block_count: 2 bytes (uint16), wbits: 2 bytes (uint16 deflate window bits)
+    - block offsets: (block_count + 1) * uint32 → absolute offset of each
+      compressed block, last entry marks the end of the last block
+    - block sizes: block_count * uint16 → uncompressed size of each block
+
+    [Key hash section (optional)]
+    - hashes: key_count * uint32 → key_hash(key), sorted ascending
+    - key indexes: key_count * uint16 → key index belonging to each hash
+    - name offsets: (key_count + 1) * uint32 → offset of each key name
+      relative to the first name, last entry marks the end of the last name
+    - names: UTF-8 key names without terminator, in hash order
+
+    [Strings: variable size]
+    - UTF-8 strings without terminator (identical strings stored once if deduplicated)
+    - compressed: raw deflate blocks of at most block_size uncompressed bytes;
+      strings never span two blocks
     
     Args:
         json_path: Input JSON file path
         key_to_index: KEY_TO_INDEX mapping from generate_translation_keys()
         output_path: Output .bin file path (default: auto-generate)
-        calc_stats: If True, calculate and print statistics about translations
+        version: FORMAT_VERSION_V1 or FORMAT_VERSION_V2 (default)
+        key_hashes: v2 only - write the key hash section (string keys resolve
+                    without KEY_TO_INDEX at runtime)
+        dedup: v2 only - store identical strings once
+        compress: v2 only - store strings in independently deflated blocks
+                  (host only, needs zlib)
+        block_size: uncompressed bytes per block when compressing
     Returns:
         str: Path to generated binary file, or None if validation failed
     """
+    if version not in (FORMAT_VERSION_V1, FORMAT_VERSION_V2):
+        print(f"Error: Unsupported binary format version {version}")
+        return None
+    if compress:
+        if version != FORMAT_VERSION_V2:
+            print("Error: Compressed language packs require format version 2")
+            return None
+        if zlib is None or not hasattr(zlib, 'compressobj'):
+            print("Error: Compressed language packs can only be built on the host (zlib missing)")
+            return None
+        if not 0 < block_size <= MAX_BLOCK_SIZE:
+            print(f"Error: Block size must be between 1 and {MAX_BLOCK_SIZE} bytes")
+            return None
+
+
     # Validate input filename format
     filename_lang_code = extract_language_code_from_filename(json_path)
     if filename_lang_code is None:
@@ -384,23 +931,17 @@ def json_to_binary(json_path, key_to_index, output_path=None):
     
     # Prepare index and string data - process in key_to_index order for easier debugging
     key_count = len(key_to_index)
-    
-    # Calculate binary format layout
-    index_size = key_count * OFFSET_SIZE  # Each offset is uint32
-    strings_start_offset = HEADER_SIZE + index_size  # Where string data begins
-    
-    index_data = [0xFFFFFFFF] * key_count  # Initialize with "missing" markers
-    string_data = bytearray()
+    texts = [None] * key_count  # encoded string per key index, None = missing
     
     # Create reverse mapping for ordered processing
     index_to_key = {v: k for k, v in key_to_index.items()}
     
-    # Process translations in index order (same order as index_data)
+    # Process translations in index order (same order as the index)
     for i in range(key_count):
         key = index_to_key[i]
         
         if key not in translations:
-            # Missing translation - index_data[i] stays 0xFFFFFFFF
+            # Missing translation - index entry stays 0xFFFFFFFF
             print(f"Warning: Missing translation for key '{key}', will fall back to default language")
             continue
             
@@ -417,13 +958,10 @@ def json_to_binary(json_path, key_to_index, output_path=None):
             print(f"Warning: Invalid translation format for key '{key}', will fall back to default language")
             continue
         
-        # Store string and update index - both use same index i for alignment
-        string_offset = len(string_data)
-        string_data.extend(text.encode('utf-8'))
-        string_data.append(0)  # null terminator
-        
-        # Store absolute file offset (already includes header + index offset)
-        index_data[i] = strings_start_offset + string_offset
+        texts[i] = text.encode('utf-8')
+        if version == FORMAT_VERSION_V2 and len(texts[i]) > MAX_STRING_LENGTH_V2:
+            print(f"Error: Translation for key '{key}' is longer than {MAX_STRING_LENGTH_V2} bytes")
+            return None
     
     # Second pass: detect extra translations (keys in JSON but not in key mapping)
     # This saves RAM compared to building a processed_keys set
@@ -438,26 +976,23 @@ def json_to_binary(json_path, key_to_index, output_path=None):
             print(f"  - '{extra_key}' (will be ignored)")
         print("These keys may need to be added to the default language file.")
     
+    # Language name (fixed LANG_NAME_FIELD_SIZE bytes, null-padded)
+    lang_name = metadata.get('language_name', '')
+    name_bytes = lang_name.encode('utf-8')[:LANG_NAME_FIELD_SIZE - 1]  # Reserve 1 byte for null
+    header = MAGIC + struct.pack('<II', version, key_count) \
+        + name_bytes + b'\x00' * (LANG_NAME_FIELD_SIZE - len(name_bytes))
+    
+    if version == FORMAT_VERSION_V1:
+        body = _build_v1_body(texts)
+    else:
+        body = _build_v2_body(texts, index_to_key, key_hashes, dedup,
+                              block_size if compress else 0)
+    
     # Write binary file
     try:
         with open(output_path, 'wb') as f:
-            # Header
-            f.write(b"LANG")  # Magic signature
-            f.write(struct.pack('<I', 1))  # Version
-            f.write(struct.pack('<I', key_count))  # Key count
-            
-            # Language name (fixed LANG_NAME_FIELD_SIZE bytes, null-padded)
-            lang_name = metadata.get('language_name', '')
-            name_bytes = lang_name.encode('utf-8')[:LANG_NAME_FIELD_SIZE - 1]  # Reserve 1 byte for null
-            name_field = name_bytes + b'\x00' * (LANG_NAME_FIELD_SIZE - len(name_bytes))
-            f.write(name_field)
-            
-            # Index
-            for offset in index_data:
-                f.write(struct.pack('<I', offset))
-            
-            # Strings
-            f.write(string_data)
+            f.write(header)
+            f.write(body)
     except Exception as e:
         print(f"Error: Could not write binary file '{output_path}': {e}")
         return None
@@ -465,16 +1000,138 @@ def json_to_binary(json_path, key_to_index, output_path=None):
     return str(output_path)
 
 
+def _build_v1_body(texts):
+    """Build v1 index + null-terminated string data for json_to_binary()."""
+    key_count = len(texts)
+    strings_start_offset = HEADER_SIZE + key_count * OFFSET_SIZE  # Where string data begins
+    index_data = [MISSING_OFFSET] * key_count  # Initialize with "missing" markers
+    string_data = bytearray()
+    for i, raw in enumerate(texts):
+        if raw is None:
+            continue
+        # Store absolute file offset (already includes header + index offset)
+        index_data[i] = strings_start_offset + len(string_data)
+        string_data.extend(raw)
+        string_data.append(0)  # null terminator
+    return struct.pack(f'<{key_count}I', *index_data) + string_data
+
+
+def _build_v2_body(texts, index_to_key, key_hashes, dedup, block_size=0):
+    """
+    Build v2 header extension, index, key hash section and strings for json_to_binary().
+
+    block_size > 0 writes a compressed body (block table + deflated blocks).
+    """
+    key_count = len(texts)
+    flags = 0
+    hash_section = b''
+    if key_hashes:
+        pairs = sorted((key_hash(index_to_key[i]), i) for i in range(key_count))
+        if any(pairs[i][0] == pairs[i + 1][0] for i in range(key_count - 1)):
+            # Two keys share a hash - runtime falls back to KEY_TO_INDEX
+            print("Warning: Key hash collision, writing file without key hash section")
+        else:
+            flags |= FLAG_KEY_HASHES
+            names = [index_to_key[i].encode('utf-8') for _, i in pairs]
+            name_offsets = [0]
+            for name in names:
+                name_offsets.append(name_offsets[-1] + len(name))
+            hash_section = struct.pack(f'<{key_count}I', *[h for h, _ in pairs]) \
+                + struct.pack(f'<{key_count}H', *[i for _, i in pairs]) \
+                + struct.pack(f'<{key_count + 1}I', *name_offsets) \
+                + b''.join(names)
+    if dedup:
+        flags |= FLAG_DEDUP
+    if block_size:
+        return _build_compressed_v2_body(texts, flags | FLAG_COMPRESSED, hash_section, dedup, block_size)
+
+    index_start = HEADER_SIZE + V2_HEADER_SIZE
+    hash_offset = index_start + key_count * (OFFSET_SIZE + LENGTH_SIZE)
+    strings_start_offset = hash_offset + len(hash_section)
+
+    offsets = [MISSING_OFFSET] * key_count
+    lengths = [0] * key_count
+    string_data = bytearray()
+    stored = {}  # encoded string -> absolute offset (dedup only)
+    for i, raw in enumerate(texts):
+        if raw is None:
+            continue
+        offset = stored.get(raw) if dedup else None
+        if offset is None:
+            offset = strings_start_offset + len(string_data)
+            string_data.extend(raw)
+            if dedup:
+                stored[raw] = offset
+        offsets[i] = offset
+        lengths[i] = len(raw)
+
+    return struct.pack('<II', flags, hash_offset if hash_section else 0) \
+        + struct.pack(f'<{key_count}I', *offsets) \
+        + struct.pack(f'<{key_count}H', *lengths) \
+        + hash_section + string_data
+
+
+def _build_compressed_v2_body(texts, flags, hash_section, dedup, block_size):
+    """
+    Build a compressed v2 body: strings are packed into blocks of at most
+    block_size uncompressed bytes and every block is deflated on its own,
+    so the reader only has to inflate the block holding the requested key.
+    """
+    key_count = len(texts)
+    offsets = [MISSING_OFFSET] * key_count
+    lengths = [0] * key_count
+    blocks = [bytearray()]
+    stored = {}  # encoded string -> compressed index entry (dedup only)
+    for i, raw in enumerate(texts):
+        if raw is None:
+            continue
+        entry = stored.get(raw) if dedup else None
+        if entry is None:
+            if blocks[-1] and len(blocks[-1]) + len(raw) > block_size:
+                blocks.append(bytearray())
+            entry = ((len(blocks) - 1) << 16) | len(blocks[-1])
+            blocks[-1].extend(raw)
+            if dedup:
+                stored[raw] = entry
+        offsets[i] = entry
+        lengths[i] = len(raw)
+    if not blocks[-1]:
+        blocks.pop()
+
+    compressed = []
+    for block in blocks:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -COMPRESS_WBITS)
+        compressed.append(compressor.compress(bytes(block)) + compressor.flush())
+
+    block_count = len(blocks)
+    block_table_start = HEADER_SIZE + V2_HEADER_SIZE + key_count * (OFFSET_SIZE + LENGTH_SIZE)
+    hash_offset = block_table_start + BLOCK_TABLE_HEADER_SIZE \
+        + (block_count + 1) * OFFSET_SIZE + block_count * LENGTH_SIZE
+    block_offsets = [hash_offset + len(hash_section)]
+    for data in compressed:
+        block_offsets.append(block_offsets[-1] + len(data))
+
+    return struct.pack('<II', flags, hash_offset if hash_section else 0) \
+        + struct.pack(f'<{key_count}I', *offsets) \
+        + struct.pack(f'<{key_count}H', *lengths) \
+        + struct.pack('<HH', block_count, COMPRESS_WBITS) \
+        + struct.pack(f'<{block_count + 1}I', *block_offsets) \
+        + struct.pack(f'<{block_count}H', *[len(b) for b in blocks]) \
+        + hash_section + b''.join(compressed)
+
+
 def validate_binary_file(binary_path, translation_keys_module=None):
     """
     Validate and inspect a binary language file with comprehensive checks.
     
     This function performs complete structural validation including:
-    - File format (magic bytes, header structure)
+    - File format (magic bytes, header structure, supported version)
     - All index offsets are valid (within file bounds or 0xFFFFFFFF)
     - File size consistency
     - Key count matches (if translation_keys provided)
-    - All strings are readable and null-terminated
+    - v1: All strings are readable and null-terminated
+    - v2: All strings lie within the file; key hash section is sorted,
+      in bounds and covers every key index exactly once
     
     IMPORTANT: Call this function once when loading/importing a binary language file.
     After validation passes, read_translation_from_binary() can safely be used
@@ -508,7 +1165,7 @@ def validate_binary_file(binary_path, translation_keys_module=None):
             
             # Read and validate header
             magic = f.read(4)
-            if magic != b'LANG':
+            if magic != MAGIC:
                 return (False, f"Invalid magic bytes: expected b'LANG', got {magic!r}")
             
             version = struct.unpack('<I', f.read(4))[0]
@@ -543,56 +1200,17 @@ def validate_binary_file(binary_path, translation_keys_module=None):
                 if key_count != expected_count:
                     return (False, f"Key count mismatch: expected {expected_count}, got {key_count}")
             
-            # Calculate expected minimum file size
-            index_size = key_count * OFFSET_SIZE
-            min_size = HEADER_SIZE + index_size
-            
-            if file_size < min_size:
-                return (False, f"File too small: {file_size} bytes < minimum {min_size} bytes")
-            
-            # Validate all index offsets point to valid locations
-            invalid_offsets = []
-            all_offsets = []
-            for i in range(key_count):
-                offset = struct.unpack('<I', f.read(4))[0]
-                all_offsets.append(offset)
-                if offset != 0xFFFFFFFF and offset >= file_size:
-                    invalid_offsets.append((i, offset))
-            
-            if invalid_offsets:
-                errors = "; ".join([f"index {i}: offset {o} >= file_size {file_size}" 
-                                   for i, o in invalid_offsets[:5]])
-                return (False, f"Invalid offsets found: {errors}")
-            
-            # Verify all strings are properly null-terminated
-            for i, offset in enumerate(all_offsets):
-                if offset == 0xFFFFFFFF:
-                    continue  # Missing translation, OK
-                
-                # Try to read the string to ensure it's valid
-                try:
-                    f.seek(offset)
-                    found_terminator = False
-                    bytes_read = 0
-                    max_read = file_size - offset
-                    
-                    while bytes_read < max_read:
-                        byte = f.read(1)
-                        if not byte:
-                            return (False, f"String at index {i} (offset {offset}) has unexpected EOF")
-                        if byte == b'\x00':
-                            found_terminator = True
-                            break
-                        bytes_read += 1
-                    
-                    if not found_terminator:
-                        return (False, f"String at index {i} (offset {offset}) missing null terminator")
-                        
-                except Exception as e:
-                    return (False, f"Cannot read string at index {i} (offset {offset}): {e}")
+            if version == FORMAT_VERSION_V1:
+                all_offsets, error = _validate_v1_body(f, key_count, file_size)
+            elif version == FORMAT_VERSION_V2:
+                all_offsets, error = _validate_v2_body(f, key_count, file_size)
+            else:
+                return (False, f"Unsupported format version {version}")
+            if error:
+                return (False, error)
             
             # Count translations
-            translated = sum(1 for o in all_offsets if o != 0xFFFFFFFF)
+            translated = sum(1 for o in all_offsets if o != MISSING_OFFSET)
             missing = key_count - translated
             
             print(f"  Translated strings: {translated}")
@@ -605,14 +1223,243 @@ def validate_binary_file(binary_path, translation_keys_module=None):
         return (False, f"Validation error: {e}")
 
 
+def _validate_v1_body(f, key_count, file_size):
+    """
+    Validate v1 index and null-terminated strings (file positioned after header).
+
+    Returns:
+        Tuple of (offsets: list, error: str|None)
+    """
+    # Calculate expected minimum file size
+    index_size = key_count * OFFSET_SIZE
+    min_size = HEADER_SIZE + index_size
+    
+    if file_size < min_size:
+        return (None, f"File too small: {file_size} bytes < minimum {min_size} bytes")
+    
+    # Validate all index offsets point to valid locations
+    invalid_offsets = []
+    all_offsets = []
+    for i in range(key_count):
+        offset = struct.unpack('<I', f.read(4))[0]
+        all_offsets.append(offset)
+        if offset != MISSING_OFFSET and offset >= file_size:
+            invalid_offsets.append((i, offset))
+    
+    if invalid_offsets:
+        errors = "; ".join([f"index {i}: offset {o} >= file_size {file_size}" 
+                           for i, o in invalid_offsets[:5]])
+        return (None, f"Invalid offsets found: {errors}")
+    
+    # Verify all strings are properly null-terminated
+    for i, offset in enumerate(all_offsets):
+        if offset == MISSING_OFFSET:
+            continue  # Missing translation, OK
+        
+        # Try to read the string to ensure it's valid
+        try:
+            f.seek(offset)
+            found_terminator = False
+            bytes_read = 0
+            max_read = file_size - offset
+            
+            while bytes_read < max_read:
+                chunk = f.read(min(STRING_READ_CHUNK, max_read - bytes_read))
+                if not chunk:
+                    return (None, f"String at index {i} (offset {offset}) has unexpected EOF")
+                if b'\x00' in chunk:
+                    found_terminator = True
+                    break
+                bytes_read += len(chunk)
+            
+            if not found_terminator:
+                return (None, f"String at index {i} (offset {offset}) missing null terminator")
+                
+        except Exception as e:
+            return (None, f"Cannot read string at index {i} (offset {offset}): {e}")
+    
+    return (all_offsets, None)
+
+
+def _validate_v2_body(f, key_count, file_size):
+    """
+    Validate v2 header extension, index, key hash section and strings
+    (file positioned after header).
+
+    Returns:
+        Tuple of (offsets: list, error: str|None)
+    """
+    index_start = HEADER_SIZE + V2_HEADER_SIZE
+    min_size = index_start + key_count * (OFFSET_SIZE + LENGTH_SIZE)
+    if file_size < min_size:
+        return (None, f"File too small: {file_size} bytes < minimum {min_size} bytes")
+    
+    flags, hash_offset = struct.unpack('<II', f.read(V2_HEADER_SIZE))
+    all_offsets = list(struct.unpack(f'<{key_count}I', f.read(key_count * OFFSET_SIZE)))
+    lengths = struct.unpack(f'<{key_count}H', f.read(key_count * LENGTH_SIZE))
+    print(f"  Flags: key_hashes={bool(flags & FLAG_KEY_HASHES)} dedup={bool(flags & FLAG_DEDUP)}"
+          f" compressed={bool(flags & FLAG_COMPRESSED)}")
+    
+    if flags & FLAG_COMPRESSED:
+        error = _validate_compressed_strings(f, key_count, file_size, all_offsets, lengths)
+        if error:
+            return (None, error)
+        return _validate_key_hash_section(f, key_count, file_size, flags, hash_offset, min_size, all_offsets)
+    
+    # Every string must lie completely inside the file
+    invalid_offsets = [
+        (i, o) for i, o in enumerate(all_offsets)
+        if o != MISSING_OFFSET and o + lengths[i] > file_size
+    ]
+    if invalid_offsets:
+        errors = "; ".join([f"index {i}: offset {o} + length {lengths[i]} > file_size {file_size}"
+                           for i, o in invalid_offsets[:5]])
+        return (None, f"Invalid offsets found: {errors}")
+    
+    for i, offset in enumerate(all_offsets):
+        if offset == MISSING_OFFSET:
+            continue
+        f.seek(offset)
+        try:
+            f.read(lengths[i]).decode('utf-8')
+        except UnicodeDecodeError:
+            return (None, f"String at index {i} (offset {offset}) is not valid UTF-8")
+    
+    return _validate_key_hash_section(f, key_count, file_size, flags, hash_offset, min_size, all_offsets)
+
+
+def _validate_key_hash_section(f, key_count, file_size, flags, hash_offset, min_size, all_offsets):
+    """Validate the optional v2 key hash section; returns (offsets, error) like _validate_v2_body()."""
+    if flags & FLAG_KEY_HASHES:
+        names_start = hash_offset + key_count * (OFFSET_SIZE + LENGTH_SIZE) + (key_count + 1) * OFFSET_SIZE
+        if hash_offset < min_size or names_start > file_size:
+            return (None, f"Key hash section offset {hash_offset} out of bounds")
+        f.seek(hash_offset)
+        hashes = struct.unpack(f'<{key_count}I', f.read(key_count * OFFSET_SIZE))
+        hash_index = struct.unpack(f'<{key_count}H', f.read(key_count * LENGTH_SIZE))
+        name_offsets = struct.unpack(f'<{key_count + 1}I', f.read((key_count + 1) * OFFSET_SIZE))
+        if any(hashes[i] >= hashes[i + 1] for i in range(key_count - 1)):
+            return (None, "Key hash section is not strictly sorted")
+        if sorted(hash_index) != list(range(key_count)):
+            return (None, "Key hash section does not cover every key index exactly once")
+        if name_offsets[0] != 0 or any(name_offsets[i] > name_offsets[i + 1] for i in range(key_count)) \
+                or names_start + name_offsets[-1] > file_size:
+            return (None, "Key name offsets out of bounds")
+        for i in range(key_count):
+            try:
+                name = f.read(name_offsets[i + 1] - name_offsets[i]).decode('utf-8')
+            except UnicodeDecodeError:
+                return (None, f"Key name at hash position {i} is not valid UTF-8")
+            if key_hash(name) != hashes[i]:
+                return (None, f"Key name {name!r} does not match its hash")
+    
+    return (all_offsets, None)
+
+
+def _validate_compressed_strings(f, key_count, file_size, offsets, lengths):
+    """
+    Validate block table, every deflated block and the strings inside them.
+
+    Returns:
+        str|None: error description, None if valid
+    """
+    try:
+        wbits, block_offsets, block_sizes = _read_block_table(f, key_count)
+    except Exception:
+        return "Block table out of bounds"
+    block_count = len(block_sizes)
+    print(f"  Compressed blocks: {block_count} (window {1 << wbits} bytes)")
+    if not 9 <= wbits <= 15:
+        return f"Invalid deflate window bits {wbits}"
+    table_end = f.tell()
+    if block_offsets[0] < table_end or block_offsets[-1] > file_size \
+            or any(block_offsets[b] > block_offsets[b + 1] for b in range(block_count)):
+        return "Invalid block offsets"
+    
+    blocks = []
+    for b in range(block_count):
+        buf = bytearray(block_sizes[b])
+        try:
+            _inflate_into(_read_exact(f, block_offsets[b], block_offsets[b + 1] - block_offsets[b]),
+                          buf, block_sizes[b], wbits)
+        except Exception:
+            return f"Compressed block {b} does not decompress to {block_sizes[b]} bytes"
+        blocks.append(buf)
+    
+    for i, entry in enumerate(offsets):
+        if entry == MISSING_OFFSET:
+            continue
+        block = entry >> 16
+        start = entry & BLOCK_OFFSET_MASK
+        if block >= block_count or start + lengths[i] > block_sizes[block]:
+            return f"Invalid offsets found: index {i}: block {block} offset {start} + length {lengths[i]}"
+        try:
+            bytes(blocks[block][start:start + lengths[i]]).decode('utf-8')
+        except UnicodeDecodeError:
+            return f"String at index {i} (block {block} offset {start}) is not valid UTF-8"
+    return None
+
+
+def compression_report(binary_path):
+    """
+    Report compression ratio and worst-case lookup time of a compressed pack.
+
+    The worst case is a lookup whose block is not in the decompression buffer
+    yet: every block is inflated once from a cold TranslationTable and the
+    slowest single lookup is reported. Host timings are indicative only - run
+    tools/bench/bench_i18n.py on the unix port or device for target numbers.
+
+    Returns:
+        dict with keys raw_bytes, compressed_bytes, ratio, blocks,
+        worst_lookup_us - or None if the file is not a compressed pack
+    """
+    import time
+    ticks_us = getattr(time, 'ticks_us', None) or (lambda: time.perf_counter_ns() // 1000)
+    table = TranslationTable(binary_path, cache_size=0)
+    try:
+        if not table.is_compressed():
+            return None
+        first_key = {}
+        for key_index in range(table.key_count):
+            entry = table._offsets[key_index]
+            if entry != MISSING_OFFSET:
+                first_key.setdefault(entry >> 16, key_index)
+        worst = 0
+        for block in sorted(first_key):
+            table._block_id = -1
+            start = ticks_us()
+            table.lookup(first_key[block])
+            worst = max(worst, ticks_us() - start)
+        raw_bytes = sum(table._block_sizes)
+        compressed_bytes = table._block_offsets[-1] - table._block_offsets[0]
+    finally:
+        table.close()
+    report = {
+        'raw_bytes': raw_bytes,
+        'compressed_bytes': compressed_bytes,
+        'ratio': compressed_bytes / raw_bytes if raw_bytes else 1.0,
+        'blocks': len(first_key),
+        'worst_lookup_us': worst,
+    }
+    print(f"  Strings: {raw_bytes} -> {compressed_bytes} bytes "
+          f"({report['ratio'] * 100:.1f}%) in {report['blocks']} blocks")
+    print(f"  Worst-case lookup (cold block): {worst} us")
+    return report
+
+
 def main():
     """Command line interface for the language compiler."""
     import sys
     
+    # Compile options (format version and v2 features)
+    options = [arg for arg in sys.argv[2:] if arg.startswith("--")]
+    sys.argv = [arg for arg in sys.argv if not arg.startswith("--")]
+    
     if len(sys.argv) < 2:
         print("Usage:")
         print("  lang_compiler.py generate_keys <default_lang.json>")
-        print("  lang_compiler.py compile <lang.json> [keys_file.py]")
+        print("  lang_compiler.py compile <lang.json> [keys_file.py] [--format=1|2] [--no-key-hashes] [--no-dedup]"
+              " [--compress] [--block-size=N]")
         print("  lang_compiler.py validate <lang.bin> [keys_file.py]")
         return
     
@@ -658,10 +1505,28 @@ def main():
                 print("Error: No key mapping found. Run 'generate_keys' first.")
                 return
         
-        result = json_to_binary(json_path, key_to_index)
+        version = FORMAT_VERSION
+        block_size = DEFAULT_BLOCK_SIZE
+        for option in options:
+            if option.startswith("--format="):
+                version = int(option[len("--format="):])
+            elif option.startswith("--block-size="):
+                block_size = int(option[len("--block-size="):])
+            elif option not in ("--no-key-hashes", "--no-dedup", "--compress"):
+                print(f"Error: Unknown option '{option}'")
+                sys.exit(1)
+        
+        compress = "--compress" in options
+        result = json_to_binary(json_path, key_to_index, version=version,
+                                key_hashes="--no-key-hashes" not in options,
+                                dedup="--no-dedup" not in options,
+                                compress=compress, block_size=block_size)
         if result is None:
             print("Compilation failed due to validation errors.")
             sys.exit(1)
+        if compress:
+            print(f"Compressed language pack: {result} ({os.stat(result)[6]} bytes)")
+            compression_report(result)
     
     elif command == "validate":
         if len(sys.argv) < 3:
@@ -6,6 +6,16 @@ class AddWalletMenu(GenericMenu):
     """Menu to create or import a wallet."""
 
     TITLE_KEY = "MENU_ADD_WALLET"
+    I18N_KEYS = (
+        "ADD_WALLET_NEW_SEEDPHRASE",
+        "MENU_GENERATE_SEEDPHRASE",
+        "ADD_WALLET_IMPORT_FROM",
+        "HARDWARE_SMARTCARD",
+        "HARDWARE_QR_CODE",
+        "ADD_WALLET_KEYBOARD",
+        "HARDWARE_SD_CARD",
+        "HARDWARE_INTERNAL_FLASH",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = [
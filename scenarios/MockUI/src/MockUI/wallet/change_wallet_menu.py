@@ -15,6 +15,7 @@ class ChangeWalletMenu(GenericMenu):
     """
 
     TITLE_KEY = "MAIN_MENU_CHANGE_ADD_WALLET"
+    I18N_KEYS = ("MENU_ADD_WALLET",)
 
     def post_init(self, t, state):
         wallets = getattr(state, "registered_wallets", [])
@@ -6,6 +6,12 @@ class ClearSeedphraseMenu(GenericMenu):
     """Sub-menu for choosing where to clear the seedphrase from."""
 
     TITLE_KEY = "SEEDPHRASE_MENU_CLEAR_FROM"
+    I18N_KEYS = (
+        "HARDWARE_SMARTCARD",
+        "HARDWARE_SD_CARD",
+        "HARDWARE_INTERNAL_FLASH",
+        "SEEDPHRASE_MENU_CLEAR_ALL",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = []
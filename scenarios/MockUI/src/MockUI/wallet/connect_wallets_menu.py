@@ -5,6 +5,12 @@ class ConnectWalletsMenu(GenericMenu):
     """Menu to connect or export to software wallets."""
 
     TITLE_KEY = "MENU_CONNECT_SW_WALLET"
+    I18N_KEYS = (
+        "CONNECT_WALLETS_SPARROW",
+        "CONNECT_WALLETS_NUNCHUCK",
+        "CONNECT_WALLETS_BLUEWALLET",
+        "CONNECT_WALLETS_OTHER",
+    )
 
     def get_menu_items(self, t, state):
         return [
@@ -12,6 +12,18 @@ class GenerateSeedMenu(TitledScreen):
     menu_id: "generate_seedphrase"
     """
 
+    I18N_KEYS = (
+        "MENU_GENERATE_SEEDPHRASE",
+        "GENERATE_SEED_WALLET_NAME",
+        "COMMON_WALLET",
+        "COMMON_SINGLESIG",
+        "COMMON_MULTISIG",
+        "COMMON_MAINNET",
+        "COMMON_TESTNET",
+        "GENERATE_SEED_XPUB",
+        "GENERATE_SEED_CREATE",
+    )
+
     def __init__(self, parent):
         super().__init__(parent.i18n.t("MENU_GENERATE_SEEDPHRASE"), parent)
         t = self.i18n.t
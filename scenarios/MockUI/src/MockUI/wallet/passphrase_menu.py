@@ -12,6 +12,8 @@ class PassphraseMenu(TitledScreen):
     menu_id: "set_passphrase"
     """
 
+    I18N_KEYS = ("MENU_SET_PASSPHRASE", "PASSPHRASE_MENU_LABEL", "PASSPHRASE_MENU_CLEAR")
+
     def __init__(self, parent):
         super().__init__(parent.i18n.t("MENU_SET_PASSPHRASE"), parent)
         t = self.i18n.t
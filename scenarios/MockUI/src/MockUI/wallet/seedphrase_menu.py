@@ -4,6 +4,14 @@ import lvgl as lv
 
 class SeedPhraseMenu(GenericMenu):
     TITLE_KEY = "MENU_MANAGE_SEEDPHRASE"
+    I18N_KEYS = (
+        "SEEDPHRASE_MENU_SHOW",
+        "SEEDPHRASE_MENU_STORAGE",
+        "SEEDPHRASE_MENU_STORE_TO",
+        "SEEDPHRASE_MENU_CLEAR_FROM",
+        "SEEDPHRASE_MENU_ADVANCED",
+        "SEEDPHRASE_MENU_BIP85",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = []
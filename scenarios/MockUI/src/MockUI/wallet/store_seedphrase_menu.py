@@ -6,6 +6,7 @@ class StoreSeedphraseMenu(GenericMenu):
     """Sub-menu for choosing where to store the seedphrase."""
 
     TITLE_KEY = "SEEDPHRASE_MENU_STORE_TO"
+    I18N_KEYS = ("HARDWARE_SMARTCARD", "HARDWARE_SD_CARD", "HARDWARE_INTERNAL_FLASH")
 
     def get_menu_items(self, t, state):
         menu_items = []
@@ -8,6 +8,19 @@ class WalletMenu(GenericMenu):
     """Menu for managing an active wallet with editable name."""
 
     TITLE_KEY = "MENU_MANAGE_WALLET"
+    I18N_KEYS = (
+        "WALLET_MENU_EXPLORE",
+        "WALLET_MENU_VIEW_ADDRESSES",
+        "WALLET_MENU_VIEW_SIGNERS",
+        "WALLET_MENU_MANAGE",
+        "MENU_MANAGE_SEEDPHRASE",
+        "MENU_SET_PASSPHRASE",
+        "WALLET_MENU_MANAGE_DESCRIPTOR",
+        "WALLET_MENU_CHANGE_NETWORK",
+        "WALLET_MENU_CONNECT_EXPORT",
+        "MENU_CONNECT_SW_WALLET",
+        "WALLET_MENU_EXPORT_DATA",
+    )
 
     def get_menu_items(self, t, state):
         menu_items = []
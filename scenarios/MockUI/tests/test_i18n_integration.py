@@ -252,3 +252,36 @@ class TestRealLanguageFiles:
         """Keys.CONSTANT == KEY_TO_INDEX['CONSTANT'] for all entries."""
         for key, idx in KEY_TO_INDEX.items():
             assert getattr(Keys, key) == idx, f"Keys.{key} != KEY_TO_INDEX['{key}']"
+
+
+# =====================================================================
+# TestScreenKeyDeclarations
+# =====================================================================
+class TestScreenKeyDeclarations:
+    """I18N_KEYS declared on screens for batched prefetching."""
+
+    def _screen_classes(self):
+        import MockUI.basic.specter_gui as specter_gui
+        from MockUI.basic.titled_screen import TitledScreen
+        return [
+            obj for obj in vars(specter_gui).values()
+            if isinstance(obj, type) and issubclass(obj, TitledScreen) and obj is not TitledScreen
+        ]
+
+    def test_screens_found(self):
+        assert len(self._screen_classes()) > 10
+
+    def test_declared_keys_exist(self):
+        for cls in self._screen_classes():
+            for key in cls.get_i18n_keys():
+                assert key in KEY_TO_INDEX, f"{cls.__name__}: unknown key {key}"
+
+    def test_title_key_included(self):
+        from MockUI.basic.main_menu import MainMenu
+        keys = MainMenu.get_i18n_keys()
+        assert keys[0] == MainMenu.TITLE_KEY
+        assert len(keys) == len(MainMenu.I18N_KEYS) + 1
+
+    def test_prefetch_count_fits_cache(self):
+        for cls in self._screen_classes():
+            assert len(cls.get_i18n_keys()) <= I18nManager.STRING_CACHE_SIZE
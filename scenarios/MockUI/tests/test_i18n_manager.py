@@ -212,6 +212,120 @@ class TestTranslationLookup:
         assert result == I18nManager.STR_MISSING
 
 
+# =====================================================================
+# TestTranslationCache
+# =====================================================================
+class TestTranslationCache:
+    """String cache behind t() and its invalidation."""
+
+    def test_repeated_lookup_served_from_cache(self, i18n_manager, en_json_data):
+        first = i18n_manager.t("MAIN_MENU_TITLE")
+        assert i18n_manager._current_table.cached_count() == 1
+        assert i18n_manager.t("MAIN_MENU_TITLE") == first
+        assert i18n_manager._current_table.cached_count() == 1
+
+    def test_default_language_shares_table(self, i18n_manager):
+        assert i18n_manager._current_table is i18n_manager._default_table
+
+    def test_cache_bounded_by_class_setting(self, i18n_manager, key_to_index):
+        for idx in key_to_index.values():
+            i18n_manager.t(idx)
+        assert i18n_manager._current_table.cached_count() <= I18nManager.STRING_CACHE_SIZE
+
+    def test_set_language_invalidates_cache(self, i18n_manager, de_binary_path, de_json_data):
+        english = i18n_manager.t("MAIN_MENU_TITLE")
+        old_table = i18n_manager._current_table
+        i18n_manager._scan_available_languages()
+        i18n_manager.set_language("de")
+        assert not old_table.is_open()
+        assert i18n_manager._current_table.cached_count() == 0
+        expected = de_json_data["translations"]["MAIN_MENU_TITLE"]
+        if isinstance(expected, dict):
+            expected = expected["text"]
+        assert i18n_manager.t("MAIN_MENU_TITLE") == expected
+        i18n_manager.set_language("en")
+        assert i18n_manager.t("MAIN_MENU_TITLE") == english
+
+    def test_reloading_active_language_drops_stale_strings(
+        self, i18n_manager, tmp_path, en_json_data
+    ):
+        """Re-importing the active language must not serve old cached text."""
+        i18n_manager.t("MAIN_MENU_TITLE")
+        en_data = {
+            "_metadata": {"language_code": "en", "language_name": "English"},
+            "translations": {k: f"NEW:{k}" for k in en_json_data["translations"]},
+        }
+        en_json = tmp_path / "specter_ui_en.json"
+        with open(en_json, "w", encoding="utf-8") as f:
+            json.dump(en_data, f)
+        assert i18n_manager.load_language_from_json(str(en_json)) is True
+        assert i18n_manager.t("MAIN_MENU_TITLE") == "NEW:MAIN_MENU_TITLE"
+
+
+# =====================================================================
+# TestBatchedLookup
+# =====================================================================
+class TestBatchedLookup:
+    """t_many() / prefetch() — screen-level batched translation."""
+
+    def test_t_many_matches_t(self, i18n_manager, key_to_index):
+        keys = ["MAIN_MENU_TITLE", Keys.MENU_ADD_WALLET, "NONEXISTENT_KEY", 9999]
+        expected = [i18n_manager.t(k) for k in keys]
+        i18n_manager._current_table.clear_cache()
+        assert i18n_manager.t_many(keys) == expected
+
+    def test_t_many_preserves_order_and_duplicates(self, i18n_manager, en_json_data):
+        tr = en_json_data["translations"]
+        keys = ["MENU_ADD_WALLET", "MAIN_MENU_TITLE", "MENU_ADD_WALLET"]
+        assert i18n_manager.t_many(keys) == [tr[k] for k in keys]
+
+    def test_t_many_falls_back_to_english(
+        self, i18n_flash_dir, en_binary_path, key_to_index,
+        incomplete_de_json_path, en_json_data
+    ):
+        de_out = str(i18n_flash_dir / "lang_de.bin")
+        lang_compiler.json_to_binary(str(incomplete_de_json_path), key_to_index, de_out)
+        config_path = i18n_flash_dir / "language_config.json"
+        mgr = I18nManager()
+        mgr.FLASH_I18N_DIR = str(i18n_flash_dir)
+        mgr.FLASH_CONFIG_PATH = str(config_path)
+        mgr._scan_available_languages()
+        mgr.set_language("de")
+
+        all_keys = sorted(en_json_data["translations"].keys())
+        first, last = all_keys[0], all_keys[-1]
+        assert mgr.t_many([first, last]) == [f"DE:{first}", en_json_data["translations"][last]]
+        # Fallback string was batch-read into the English table cache
+        assert mgr._default_table.cached_count() == 1
+
+    def test_t_many_without_setup_returns_missing(self):
+        mgr = I18nManager()
+        mgr.FLASH_I18N_DIR = "/nonexistent"
+        mgr.current_lang_file = None
+        mgr.default_lang_file = None
+        assert mgr.t_many(["MAIN_MENU_TITLE"]) == [I18nManager.STR_MISSING]
+
+    def test_prefetch_warms_cache(self, i18n_manager):
+        keys = ("MAIN_MENU_TITLE", "MENU_ADD_WALLET", "MENU_MANAGE_WALLET")
+        i18n_manager.prefetch(keys)
+        assert i18n_manager._current_table.cached_count() == len(keys)
+
+    def test_prefetch_ignores_unknown_keys(self, i18n_manager):
+        i18n_manager.prefetch(("NONEXISTENT_KEY",))
+        assert i18n_manager._current_table.cached_count() == 0
+
+    def test_string_keys_resolve_from_hash_section(self, i18n_manager, monkeypatch, en_json_data):
+        """v2 files resolve string keys without importing KEY_TO_INDEX."""
+        import MockUI.i18n.i18n_manager as i18n_manager_module
+
+        def no_mapping():
+            raise AssertionError("KEY_TO_INDEX should not be needed")
+
+        monkeypatch.setattr(i18n_manager_module, "_key_to_index", no_mapping)
+        assert i18n_manager.t("MAIN_MENU_TITLE") == en_json_data["translations"]["MAIN_MENU_TITLE"]
+        assert i18n_manager.t("NONEXISTENT_KEY") == I18nManager.STR_UNKNOWN_KEY
+
+
 # =====================================================================
 # TestLanguagePreference
 # =====================================================================
@@ -0,0 +1,188 @@
+"""Tests for symbol_lib icon encodings and the descriptor cache."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import lvgl as lv
+from MockUI.basic.symbol_lib import icon as icon_module
+from MockUI.basic.symbol_lib.icon import (
+    ENCODING_A4,
+    ENCODING_A8,
+    ENCODING_RLE,
+    Icon,
+    create_icon_from_bitmap,
+    decode_rle,
+)
+
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(_REPO_ROOT / "tools" / "symbol_lib"))
+import generate_btc_icons  # noqa: E402
+
+_ICONS_DIR = Path(icon_module.__file__).parent / "icons"
+
+
+class _FakeImage:
+    """Minimal lv.image stand-in recording the source it was given."""
+
+    def __init__(self):
+        self.src = None
+        self.valid = True
+
+    def set_src(self, src):
+        self.src = src
+
+    def set_size(self, w, h):
+        pass
+
+    def set_scale(self, zoom):
+        pass
+
+    def set_style_image_recolor(self, color, selector):
+        pass
+
+    def set_style_image_recolor_opa(self, opa, selector):
+        pass
+
+    def is_valid(self):
+        return self.valid
+
+
+@pytest.fixture(autouse=True)
+def lv_image_api(monkeypatch):
+    """Descriptor API of the lvgl binding (plain dicts) and a clean icon cache."""
+    monkeypatch.setattr(lv, "image_dsc_t", lambda fields: fields, raising=False)
+    monkeypatch.setattr(lv, "COLOR_FORMAT", SimpleNamespace(A8="A8", A4="A4"), raising=False)
+    monkeypatch.setattr(lv, "color_make", lambda r, g, b: (r, g, b), raising=False)
+    Icon.clear_cache()
+    Icon._pinned = {}
+    yield
+    Icon.clear_cache()
+    Icon._pinned = {}
+
+
+@pytest.fixture(scope="module")
+def real_patterns():
+    """(name, A8 pattern) of a few real icons."""
+    paths = sorted(p for p in _ICONS_DIR.glob("*.py") if p.name != "__init__.py")[:12]
+    return [(m[0], m[3]) for m in map(generate_btc_icons.read_icon_module, paths)]
+
+
+def _rle_icon(seed):
+    """Distinct 42x42 RLE icon (distinct pattern object -> own cache entry)."""
+    data = bytes([0] * 800 + [seed] * 164 + [0xFF] * 800)
+    return Icon(generate_btc_icons.encode_rle(data), 42, 42, encoding=ENCODING_RLE)
+
+
+class TestDecodeRle:
+    def test_roundtrip_real_icons(self, real_patterns):
+        for name, pattern in real_patterns:
+            encoded = generate_btc_icons.encode_rle(pattern)
+            assert len(encoded) < len(pattern), name
+            assert bytes(decode_rle(encoded, len(pattern))) == pattern, name
+
+    def test_literal_and_repeat_runs(self):
+        data = bytes([1, 2, 3]) + bytes([7] * 200) + bytes([0] * 5) + bytes([0xFF] * 130)
+        encoded = generate_btc_icons.encode_rle(data)
+        assert bytes(decode_rle(encoded, len(data))) == data
+
+    def test_wrong_size_rejected(self):
+        encoded = generate_btc_icons.encode_rle(bytes(100))
+        with pytest.raises(ValueError):
+            decode_rle(encoded, 99)
+        with pytest.raises(ValueError):
+            decode_rle(encoded, 101)
+
+
+class TestEncodings:
+    def test_a8_bytes_used_in_place(self, real_patterns):
+        pattern = real_patterns[0][1]
+        dsc = create_icon_from_bitmap(pattern, 42, 42)
+        assert dsc["data"] is pattern
+        assert dsc["header"]["cf"] == "A8"
+
+    def test_a4_used_in_place(self, real_patterns):
+        packed = generate_btc_icons.encode_a4(real_patterns[0][1], 42, 42)
+        dsc = create_icon_from_bitmap(packed, 42, 42, ENCODING_A4)
+        assert dsc["data"] is packed
+        assert dsc["header"]["cf"] == "A4"
+        assert dsc["header"]["stride"] == 21
+
+    def test_a4_size_checked(self):
+        with pytest.raises(ValueError):
+            create_icon_from_bitmap(bytes(42 * 42), 42, 42, ENCODING_A4)
+
+    def test_rle_expands_to_a8(self, real_patterns):
+        pattern = real_patterns[1][1]
+        dsc = create_icon_from_bitmap(generate_btc_icons.encode_rle(pattern), 42, 42, ENCODING_RLE)
+        assert bytes(dsc["data"]) == pattern
+        assert dsc["header"]["cf"] == "A8"
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            create_icon_from_bitmap(bytes(4), 2, 2, "png")
+
+    def test_colored_copy_keeps_encoding(self):
+        icon = _rle_icon(5)
+        assert icon("red").encoding == ENCODING_RLE
+        assert icon("red").get_image_dsc() is icon.get_image_dsc()
+
+
+class TestDecodeCache:
+    def test_expanded_bytes_stay_within_budget(self, monkeypatch):
+        monkeypatch.setattr(icon_module, "DECODE_CACHE_BYTES", 4 * 42 * 42)
+        icons = [_rle_icon(i) for i in range(10)]
+        for icon in icons:
+            icon.get_image_dsc()
+            assert Icon._decoded_bytes <= 4 * 42 * 42
+        assert len(Icon._global_image_dsc_cache) == 4
+
+    def test_least_recently_used_is_evicted(self, monkeypatch):
+        monkeypatch.setattr(icon_module, "DECODE_CACHE_BYTES", 2 * 42 * 42)
+        a, b, c = _rle_icon(1), _rle_icon(2), _rle_icon(3)
+        dsc_a = a.get_image_dsc()
+        b.get_image_dsc()
+        assert a.get_image_dsc() is dsc_a  # hit: a becomes most recently used
+        c.get_image_dsc()  # evicts b
+        assert a.get_image_dsc() is dsc_a
+        assert id(b.pattern) not in Icon._global_image_dsc_cache
+
+    def test_a8_icons_do_not_count_against_budget(self, monkeypatch, real_patterns):
+        monkeypatch.setattr(icon_module, "DECODE_CACHE_BYTES", 42 * 42)
+        plain = [Icon(p, 42, 42) for _, p in real_patterns]
+        for icon in plain:
+            icon.get_image_dsc()
+        _rle_icon(1).get_image_dsc()
+        _rle_icon(2).get_image_dsc()
+        assert Icon._decoded_bytes == 42 * 42
+        assert all(id(icon.pattern) in Icon._global_image_dsc_cache for icon in plain)
+
+
+class TestPinning:
+    def test_displayed_rle_icon_stays_alive_after_eviction(self, monkeypatch):
+        monkeypatch.setattr(icon_module, "DECODE_CACHE_BYTES", 42 * 42)
+        shown = _rle_icon(1)
+        image = _FakeImage()
+        shown.add_to_parent(image)
+        _rle_icon(2).get_image_dsc()  # evicts shown from the cache
+        assert id(shown.pattern) not in Icon._global_image_dsc_cache
+        assert Icon._pinned[id(image)][1] is image.src
+
+    def test_new_source_replaces_pin(self, real_patterns):
+        image = _FakeImage()
+        _rle_icon(1).add_to_parent(image)
+        assert id(image) in Icon._pinned
+        Icon(real_patterns[0][1], 42, 42).add_to_parent(image)
+        assert id(image) not in Icon._pinned
+
+    def test_deleted_images_are_pruned(self, monkeypatch):
+        monkeypatch.setattr(icon_module, "PIN_PRUNE_THRESHOLD", 4)
+        icon = _rle_icon(1)
+        images = [_FakeImage() for _ in range(4)]
+        for image in images:
+            icon.add_to_parent(image)
+        for image in images[:3]:
+            image.valid = False
+        icon.add_to_parent(_FakeImage())
+        assert len(Icon._pinned) == 2
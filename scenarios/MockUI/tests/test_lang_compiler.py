@@ -10,18 +10,22 @@ import MockUI.i18n.lang_compiler as lc
 from MockUI.i18n.lang_compiler import (
     BINARY_FILE_PREFIX,
     BINARY_FILE_SUFFIX,
+    FORMAT_VERSION_V1,
+    FORMAT_VERSION_V2,
     HEADER_SIZE,
     KEY_COUNT_SIZE,
     LANG_NAME_FIELD_SIZE,
     MAGIC_SIZE,
     OFFSET_SIZE,
     VERSION_SIZE,
+    TranslationTable,
     extract_language_code_from_filename,
     extract_language_name_from_file,
     generate_translation_keys,
     get_binary_filename,
     get_json_filename,
     json_to_binary,
+    key_hash,
     read_translation_from_binary,
     validate_binary_file,
 )
@@ -383,6 +387,164 @@ class TestReadTranslationFromBinary:
         gc.collect()
 
 
+# =====================================================================
+# TestTranslationTable
+# =====================================================================
+class TestTranslationTable:
+    """TranslationTable — in-memory index + LRU string cache."""
+
+    def test_lookup_matches_direct_read(self, en_binary_path, key_to_index):
+        table = TranslationTable(str(en_binary_path))
+        for idx in key_to_index.values():
+            assert table.lookup(idx) == read_translation_from_binary(str(en_binary_path), idx)
+        table.close()
+
+    def test_index_loaded_once(self, en_binary_path, key_to_index):
+        table = TranslationTable(str(en_binary_path))
+        assert table.is_open()
+        assert table.key_count == len(key_to_index)
+        table.close()
+
+    def test_missing_returns_missing(self, tmp_path, key_to_index):
+        data = {
+            "_metadata": {"language_code": "xx", "language_name": "Test"},
+            "translations": {"MAIN_MENU_TITLE": "hello"},
+        }
+        p = tmp_path / "specter_ui_xx.json"
+        with open(p, "w") as f:
+            json.dump(data, f)
+        out = str(tmp_path / "lang_xx.bin")
+        json_to_binary(str(p), key_to_index, out)
+        table = TranslationTable(out)
+        other = [k for k in key_to_index if k != "MAIN_MENU_TITLE"][0]
+        assert table.lookup(key_to_index[other]) == (None, "missing")
+        assert table.lookup(key_to_index["MAIN_MENU_TITLE"]) == ("hello", None)
+        table.close()
+
+    def test_out_of_range(self, en_binary_path):
+        table = TranslationTable(str(en_binary_path))
+        assert table.lookup(9999) == (None, "invalid_key_index")
+        assert table.lookup(-1) == (None, "invalid_key_index")
+        table.close()
+
+    def test_nonexistent_file(self):
+        table = TranslationTable("/nonexistent/file.bin")
+        assert not table.is_open()
+        assert table.lookup(0) == (None, "read_error")
+
+    def test_truncated_index(self, en_binary_path):
+        with open(en_binary_path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        en_binary_path.write_bytes(header)
+        table = TranslationTable(str(en_binary_path))
+        assert table.lookup(0) == (None, "read_error")
+
+    def test_wrong_magic(self, tmp_path):
+        bad = tmp_path / "lang_xx.bin"
+        bad.write_bytes(b"GARBAGE_DATA")
+        assert TranslationTable(str(bad)).lookup(0) == (None, "read_error")
+
+    def test_cache_is_bounded(self, en_binary_path, key_to_index):
+        table = TranslationTable(str(en_binary_path), cache_size=4)
+        for idx in list(key_to_index.values())[:10]:
+            table.lookup(idx)
+        assert table.cached_count() == 4
+        table.close()
+
+    def test_lru_evicts_least_recently_used(self, en_binary_path):
+        table = TranslationTable(str(en_binary_path), cache_size=2)
+        table.lookup(0)
+        table.lookup(1)
+        table.lookup(0)  # 0 is now most recently used
+        table.lookup(2)  # evicts 1
+        assert 0 in table._cache
+        assert 1 not in table._cache
+        assert 2 in table._cache
+        table.close()
+
+    def test_cached_lookup_does_not_touch_file(self, en_binary_path, key_to_index):
+        idx = key_to_index["MAIN_MENU_TITLE"]
+        table = TranslationTable(str(en_binary_path))
+        expected = table.lookup(idx)
+        table._file.close()  # any further read would raise
+        assert table.lookup(idx) == expected
+
+    def test_zero_cache_size_disables_cache(self, en_binary_path):
+        table = TranslationTable(str(en_binary_path), cache_size=0)
+        table.lookup(0)
+        assert table.cached_count() == 0
+        table.close()
+
+    def test_close_releases_everything(self, en_binary_path):
+        table = TranslationTable(str(en_binary_path))
+        table.lookup(0)
+        table.close()
+        assert not table.is_open()
+        assert table.cached_count() == 0
+        assert table.lookup(0) == (None, "read_error")
+
+    def test_lookup_many_matches_lookup(self, en_binary_path, key_to_index):
+        indices = list(key_to_index.values())
+        table = TranslationTable(str(en_binary_path), cache_size=len(indices))
+        reference = TranslationTable(str(en_binary_path), cache_size=0)
+        results = table.lookup_many(reversed(indices))
+        assert set(results) == set(indices)
+        for idx in indices:
+            assert results[idx] == reference.lookup(idx)
+        assert table.cached_count() == len(indices)
+        table.close()
+        reference.close()
+
+    def test_lookup_many_reports_errors_per_key(self, en_binary_path):
+        table = TranslationTable(str(en_binary_path))
+        results = table.lookup_many([0, 9999, -1])
+        assert results[0][1] is None
+        assert results[9999] == (None, "invalid_key_index")
+        assert results[-1] == (None, "invalid_key_index")
+        table.close()
+
+    def test_lookup_many_long_string_beyond_window(self, tmp_path, key_to_index):
+        key_count = len(key_to_index)
+        strings_offset = HEADER_SIZE + key_count * OFFSET_SIZE
+        long_text = "B" * (lc.BATCH_READ_WINDOW * 3)
+        offsets = [0xFFFFFFFF] * key_count
+        offsets[0] = strings_offset
+        offsets[1] = strings_offset + len(long_text) + 1
+        binary = tmp_path / "lang_xx.bin"
+        with open(binary, "wb") as f:
+            f.write(b"LANG")
+            f.write(struct.pack("<I", 1))
+            f.write(struct.pack("<I", key_count))
+            f.write(b"Big\x00" + b"\x00" * (LANG_NAME_FIELD_SIZE - 4))
+            for o in offsets:
+                f.write(struct.pack("<I", o))
+            f.write(long_text.encode() + b"\x00" + b"short\x00")
+        table = TranslationTable(str(binary))
+        results = table.lookup_many([1, 0, 2])
+        assert results[0] == (long_text, None)
+        assert results[1] == ("short", None)
+        assert results[2] == (None, "missing")
+        table.close()
+
+    def test_utf8_decode_error_not_cached(self, tmp_path, key_to_index):
+        key_count = len(key_to_index)
+        offsets = [0xFFFFFFFF] * key_count
+        offsets[0] = HEADER_SIZE + key_count * OFFSET_SIZE
+        binary = tmp_path / "lang_xx.bin"
+        with open(binary, "wb") as f:
+            f.write(b"LANG")
+            f.write(struct.pack("<I", 1))
+            f.write(struct.pack("<I", key_count))
+            f.write(b"Bad\x00" + b"\x00" * (LANG_NAME_FIELD_SIZE - 4))
+            for o in offsets:
+                f.write(struct.pack("<I", o))
+            f.write(b"\xc0\xaf\x00")
+        table = TranslationTable(str(binary))
+        assert table.lookup(0) == (None, "utf8_decode_error")
+        assert table.cached_count() == 0
+        table.close()
+
+
 # =====================================================================
 # TestValidateBinaryFile
 # =====================================================================
@@ -488,6 +650,286 @@ class TestValidateBinaryFile:
         assert "null terminator" in error.lower() or "EOF" in error
 
 
+# =====================================================================
+# TestBinaryFormatV2
+# =====================================================================
+def _compile(json_path, key_to_index, out, **kwargs):
+    result = json_to_binary(str(json_path), key_to_index, str(out), **kwargs)
+    assert result is not None
+    return str(out)
+
+
+def _file_version(path):
+    with open(path, "rb") as f:
+        f.seek(MAGIC_SIZE)
+        return struct.unpack("<I", f.read(VERSION_SIZE))[0]
+
+
+class _ReadCounter:
+    """File wrapper counting read() calls."""
+
+    def __init__(self, f):
+        self._f = f
+        self.reads = 0
+
+    def read(self, n=-1):
+        self.reads += 1
+        return self._f.read(n)
+
+    def seek(self, *args):
+        return self._f.seek(*args)
+
+    def close(self):
+        self._f.close()
+
+
+class TestBinaryFormatV2:
+    """Format v2: (offset, length) index, key hash section, string dedup."""
+
+    def test_v2_is_default(self, en_binary_path):
+        assert _file_version(en_binary_path) == FORMAT_VERSION_V2
+
+    def test_v1_still_written_on_request(self, en_json_path, key_to_index, tmp_path):
+        out = _compile(en_json_path, key_to_index, tmp_path / "lang_en.bin", version=FORMAT_VERSION_V1)
+        assert _file_version(out) == FORMAT_VERSION_V1
+
+    def test_unsupported_version_rejected(self, en_json_path, key_to_index, tmp_path):
+        assert json_to_binary(str(en_json_path), key_to_index, str(tmp_path / "lang_en.bin"), version=3) is None
+
+    @pytest.mark.parametrize("version", [FORMAT_VERSION_V1, FORMAT_VERSION_V2])
+    def test_roundtrip_every_key_both_versions(self, de_json_path, key_to_index, tmp_path, de_json_data, version):
+        out = _compile(de_json_path, key_to_index, tmp_path / "lang_de.bin", version=version)
+        table = TranslationTable(out, cache_size=0)
+        for key, idx in key_to_index.items():
+            expected = de_json_data["translations"].get(key)
+            if isinstance(expected, dict):
+                expected = expected["text"]
+            text, error = read_translation_from_binary(out, idx)
+            assert text == expected, f"Mismatch for '{key}'"
+            assert table.lookup(idx) == (text, error)
+        assert table.version == version
+        table.close()
+
+    @pytest.mark.parametrize("version", [FORMAT_VERSION_V1, FORMAT_VERSION_V2])
+    def test_language_name_both_versions(self, de_json_path, key_to_index, tmp_path, version):
+        out = _compile(de_json_path, key_to_index, tmp_path / "lang_de.bin", version=version)
+        assert extract_language_name_from_file(out) == "Deutsch"
+
+    @pytest.mark.parametrize("version", [FORMAT_VERSION_V1, FORMAT_VERSION_V2])
+    def test_validate_both_versions(self, en_json_path, key_to_index, tmp_path, version):
+        out = _compile(en_json_path, key_to_index, tmp_path / "lang_en.bin", version=version)
+        assert validate_binary_file(out) == (True, None)
+
+    def test_find_key_resolves_every_key(self, en_binary_path, key_to_index):
+        table = TranslationTable(str(en_binary_path))
+        assert table.has_key_hashes()
+        for key, idx in key_to_index.items():
+            assert table.find_key(key) == idx
+        assert table.find_key("NONEXISTENT_KEY") is None
+        table.close()
+
+    def test_find_key_rejects_hash_collision(self, en_binary_path, monkeypatch):
+        table = TranslationTable(str(en_binary_path))
+        known = key_hash("MAIN_MENU_TITLE")
+        monkeypatch.setattr(lc, "key_hash", lambda key: known)
+        assert table.find_key("NOT_MAIN_MENU_TITLE") is None
+        assert table.find_key("MAIN_MENU_TITLE") is not None
+        table.close()
+
+    def test_key_hash_fits_small_int(self, key_to_index):
+        for key in key_to_index:
+            assert 0 <= key_hash(key) < 2 ** 30
+
+    def test_no_key_hashes_option(self, en_json_path, key_to_index, tmp_path):
+        out = _compile(en_json_path, key_to_index, tmp_path / "lang_en.bin", key_hashes=False)
+        table = TranslationTable(out)
+        assert not table.has_key_hashes()
+        assert table.find_key("MAIN_MENU_TITLE") is None
+        table.close()
+
+    def test_v1_has_no_key_hashes(self, en_json_path, key_to_index, tmp_path):
+        out = _compile(en_json_path, key_to_index, tmp_path / "lang_en.bin", version=FORMAT_VERSION_V1)
+        assert not TranslationTable(out).has_key_hashes()
+
+    def test_dedup_shares_identical_strings(self, tmp_path, key_to_index):
+        keys = sorted(key_to_index)[:4]
+        data = {
+            "_metadata": {"language_code": "xx", "language_name": "Test"},
+            "translations": {k: "same text" for k in keys},
+        }
+        p = tmp_path / "specter_ui_xx.json"
+        with open(p, "w") as f:
+            json.dump(data, f)
+        shared = _compile(p, key_to_index, tmp_path / "lang_xx.bin")
+        (tmp_path / "plain").mkdir()
+        plain = _compile(p, key_to_index, tmp_path / "plain" / "lang_xx.bin", dedup=False)
+        assert Path(plain).stat().st_size - Path(shared).stat().st_size == 3 * len("same text")
+        for k in keys:
+            assert read_translation_from_binary(shared, key_to_index[k]) == ("same text", None)
+
+    def test_validate_rejects_unsorted_hash_section(self, en_binary_path, key_to_index):
+        with open(en_binary_path, "rb") as f:
+            f.seek(HEADER_SIZE)
+            flags, hash_offset = struct.unpack("<II", f.read(8))
+        data = bytearray(en_binary_path.read_bytes())
+        data[hash_offset:hash_offset + 4], data[hash_offset + 4:hash_offset + 8] = \
+            data[hash_offset + 4:hash_offset + 8], data[hash_offset:hash_offset + 4]
+        en_binary_path.write_bytes(bytes(data))
+        success, error = validate_binary_file(str(en_binary_path))
+        assert success is False
+        assert "sorted" in error
+
+    def test_validate_rejects_string_past_eof(self, en_binary_path):
+        data = en_binary_path.read_bytes()
+        en_binary_path.write_bytes(data[:-3])
+        success, error = validate_binary_file(str(en_binary_path))
+        assert success is False
+        assert "Invalid offsets" in error
+
+    def test_unknown_version_rejected_by_readers(self, en_binary_path):
+        data = bytearray(en_binary_path.read_bytes())
+        data[MAGIC_SIZE:MAGIC_SIZE + VERSION_SIZE] = struct.pack("<I", 99)
+        en_binary_path.write_bytes(bytes(data))
+        assert read_translation_from_binary(str(en_binary_path), 0) == (None, "read_error")
+        assert TranslationTable(str(en_binary_path)).lookup(0) == (None, "read_error")
+        success, error = validate_binary_file(str(en_binary_path))
+        assert success is False
+        assert "version" in error
+
+    def test_size_comparison(self, en_json_path, key_to_index, tmp_path, en_json_data):
+        """v2 trades a few bytes per key for length-prefixed reads and key hashes."""
+        n = len(key_to_index)
+        text_bytes = sum(len(t.encode("utf-8")) for t in en_json_data["translations"].values())
+        sizes = {}
+        for name, kwargs in (
+            ("v1", {"version": FORMAT_VERSION_V1}),
+            ("v2", {"key_hashes": False, "dedup": False}),
+            ("v2+hash", {"dedup": False}),
+            ("v2+hash+dedup", {}),
+        ):
+            (tmp_path / name).mkdir()
+            out = _compile(en_json_path, key_to_index, tmp_path / name / "lang_en.bin", **kwargs)
+            sizes[name] = Path(out).stat().st_size
+        assert sizes["v1"] == HEADER_SIZE + n * OFFSET_SIZE + text_bytes + n
+        assert sizes["v2"] == HEADER_SIZE + 8 + n * 6 + text_bytes
+        name_bytes = sum(len(k.encode("utf-8")) for k in key_to_index)
+        assert sizes["v2+hash"] == sizes["v2"] + n * 6 + (n + 1) * OFFSET_SIZE + name_bytes
+        assert sizes["v2+hash+dedup"] <= sizes["v2+hash"]
+
+    def test_speed_comparison(self, en_json_path, key_to_index, tmp_path):
+        """v2 reads each string with exactly one read() call, v1 scans in chunks."""
+        results = {}
+        for name, version in (("v1", FORMAT_VERSION_V1), ("v2", FORMAT_VERSION_V2)):
+            (tmp_path / name).mkdir()
+            out = _compile(en_json_path, key_to_index, tmp_path / name / "lang_en.bin", version=version)
+            table = TranslationTable(out, cache_size=0)
+            table._file = _ReadCounter(table._file)
+            for _ in range(20):
+                for idx in key_to_index.values():
+                    table.lookup(idx)
+            results[name] = table._file.reads
+            table.close()
+        assert results["v2"] == 20 * len(key_to_index)
+        assert results["v2"] <= results["v1"]
+
+
+# =====================================================================
+# TestCompressedPacks
+# =====================================================================
+class TestCompressedPacks:
+    """Compressed v2 packs: independently deflated string blocks."""
+
+    @pytest.fixture
+    def compressed_de(self, de_json_path, key_to_index, tmp_path):
+        (tmp_path / "z").mkdir()
+        return _compile(de_json_path, key_to_index, tmp_path / "z" / "lang_de.bin",
+                        compress=True, block_size=256)
+
+    def test_roundtrip_matches_uncompressed(self, compressed_de, de_binary_path, key_to_index):
+        table = TranslationTable(compressed_de, cache_size=0)
+        assert table.is_compressed()
+        for idx in key_to_index.values():
+            expected = read_translation_from_binary(str(de_binary_path), idx)
+            assert read_translation_from_binary(compressed_de, idx) == expected
+            assert table.lookup(idx) == expected
+        table.close()
+
+    def test_smaller_than_uncompressed(self, compressed_de, de_binary_path):
+        assert Path(compressed_de).stat().st_size < de_binary_path.stat().st_size
+
+    def test_validate(self, compressed_de):
+        assert validate_binary_file(compressed_de) == (True, None)
+
+    def test_find_key_and_language_name(self, compressed_de, key_to_index):
+        table = TranslationTable(compressed_de)
+        assert table.find_key("MAIN_MENU_TITLE") == key_to_index["MAIN_MENU_TITLE"]
+        table.close()
+        assert extract_language_name_from_file(compressed_de) == "Deutsch"
+
+    def test_only_requested_block_is_inflated(self, compressed_de, key_to_index, monkeypatch):
+        inflated = []
+        original = lc._inflate_into
+
+        def counting(raw, buf, size, wbits):
+            inflated.append(size)
+            return original(raw, buf, size, wbits)
+
+        monkeypatch.setattr(lc, "_inflate_into", counting)
+        table = TranslationTable(compressed_de, cache_size=0)
+        assert len(table._block_sizes) > 1
+        idx = key_to_index["MAIN_MENU_TITLE"]
+        buf = table._block_buf
+        table.lookup(idx)
+        table.lookup(idx)
+        assert len(inflated) == 1
+        assert table._block_buf is buf  # decompression buffer is reused
+        table.close()
+
+    def test_lookup_many_inflates_each_block_once(self, compressed_de, key_to_index, monkeypatch):
+        inflated = []
+        original = lc._inflate_into
+        monkeypatch.setattr(lc, "_inflate_into",
+                            lambda *args: inflated.append(1) or original(*args))
+        table = TranslationTable(compressed_de)
+        indices = list(key_to_index.values())
+        results = table.lookup_many(indices + [9999])
+        assert len(inflated) == len(table._block_sizes)
+        assert results[9999] == (None, "invalid_key_index")
+        assert all(results[i][1] is None for i in indices)
+        table.close()
+
+    def test_blocks_respect_block_size(self, compressed_de):
+        table = TranslationTable(compressed_de)
+        single = {table._offsets[i] >> 16 for i in range(table.key_count)
+                  if table._offsets[i] & 0xFFFF == 0 and table._lengths[i] > 256}
+        for block, size in enumerate(table._block_sizes):
+            # Only a block holding a single overlong string may exceed the limit
+            assert size <= 256 or block in single
+        table.close()
+
+    def test_corrupt_block_detected(self, compressed_de, key_to_index):
+        table = TranslationTable(compressed_de)
+        start = table._block_offsets[0]
+        table.close()
+        data = bytearray(Path(compressed_de).read_bytes())
+        data[start:start + 8] = b"\xff" * 8
+        Path(compressed_de).write_bytes(bytes(data))
+        success, error = validate_binary_file(compressed_de)
+        assert success is False
+        assert "decompress" in error
+        assert TranslationTable(compressed_de).lookup(0) == (None, "read_error")
+
+    def test_compress_requires_v2(self, de_json_path, key_to_index, tmp_path):
+        assert json_to_binary(str(de_json_path), key_to_index, str(tmp_path / "lang_de.bin"),
+                              version=FORMAT_VERSION_V1, compress=True) is None
+
+    def test_compression_report(self, compressed_de, de_binary_path):
+        report = lc.compression_report(compressed_de)
+        assert 0 < report["ratio"] < 1
+        assert report["blocks"] > 1
+        assert lc.compression_report(str(de_binary_path)) is None
+
+
 # =====================================================================
 # TestHelperFunctions
 # =====================================================================
@@ -10,6 +10,10 @@ Requirements:
 By default these tests build the MockUI firmware with German included
 (ADD_LANG=de) and flash it before running.  Pass --no-build-flash to skip
 this step if you have already flashed a suitable binary yourself.
+
+Every step is a disco call over the serial REPL, so the simulator control
+server's batch / wait_for_text actions and pipelined connections
+(mcp-servers/lvgl-sim/sim_cli.py) do not apply here.
 """
 import json
 import os
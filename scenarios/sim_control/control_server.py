@@ -3,11 +3,31 @@ import socket
 import json
 import lvgl as lv
 
-from .widget_tree import get_widget_tree, find_widget_by_text
+from .widget_tree import (
+    diff_widget_tree,
+    find_widget_by_text,
+    get_widget_tree,
+    resolve_path,
+    snapshot_widget_tree,
+)
+
+
+# Poll period: fast while a client is issuing commands, slow when idle
+POLL_IDLE_MS = 50
+POLL_BUSY_MS = 5
+BUSY_POLLS = 20  # fast polls after the last activity before backing off
+RECV_CHUNK = 4096
+MAX_RECV_PER_POLL = 16
 
 
 class ControlServer:
-    """Non-blocking TCP server for remote control of simulator."""
+    """Non-blocking TCP server for remote control of simulator.
+
+    Commands are newline-delimited JSON. Clients may pipeline: every complete
+    line in the receive buffer is answered in order within one poll, unless
+    a command has to wait (wait_for_text, or a batch containing one). While
+    it waits, later lines stay queued so replies keep request order.
+    """
 
     def __init__(self, nav_controller, port=9876):
         self.nav = nav_controller
@@ -21,64 +41,195 @@ class ControlServer:
         self.socket.setblocking(False)
         self.client = None
         self.buf = b""
+        self.out = b""
+        self.pending = None  # generator of a command that is still waiting
+        self.idle_polls = 0
+
+        # widget_tree_diff: hashes of the last tree sent, per (root, max_depth)
+        self.tree_revision = 0
+        self.tree_key = None
+        self.tree_snapshot = None
 
         # Create LVGL timer to poll for commands
-        self.timer = lv.timer_create(self._poll, 50, None)
+        self.timer = lv.timer_create(self._poll, POLL_IDLE_MS, None)
 
     def _poll(self, timer):
         """Called by LVGL timer to check for commands."""
-        self._check_connection()
-        self._process_commands()
+        active = self._check_connection()
+        if self.pending is not None:
+            active = self._step_pending() or active
+        active = self._process_commands() or active
+        self._flush()
+        self._adapt_period(active or self.pending is not None)
+
+    def _adapt_period(self, active):
+        """Poll every POLL_BUSY_MS while commands arrive, back off when idle."""
+        if active:
+            if self.idle_polls >= BUSY_POLLS:
+                self.timer.set_period(POLL_BUSY_MS)
+            self.idle_polls = 0
+        elif self.idle_polls < BUSY_POLLS:
+            self.idle_polls += 1
+            if self.idle_polls == BUSY_POLLS:
+                self.timer.set_period(POLL_IDLE_MS)
 
     def _check_connection(self):
-        """Accept new connections or read from existing."""
+        """Accept new connections or read from existing. Returns True if data arrived."""
         if self.client is not None:
-            try:
-                b = self.client.recv(4096)
+            received = False
+            for _ in range(MAX_RECV_PER_POLL):
+                try:
+                    b = self.client.recv(RECV_CHUNK)
+                except OSError as e:
+                    if "EAGAIN" not in str(e) and "ECONNRESET" not in str(e):
+                        self._drop_client()
+                    break
                 if len(b) == 0:
-                    self.client.close()
-                    self.client = None
-                else:
-                    self.buf += b
-            except OSError as e:
-                if "EAGAIN" not in str(e) and "ECONNRESET" not in str(e):
-                    self.client.close()
-                    self.client = None
+                    self._drop_client()
+                    break
+                self.buf += b
+                received = True
+                if len(b) < RECV_CHUNK:
+                    break
+            return received
         else:
             try:
                 res = self.socket.accept()
                 self.client = res[0]
                 self.client.setblocking(False)
+                return True
             except OSError as e:
                 if "EAGAIN" not in str(e):
                     pass  # No connection waiting
+        return False
+
+    def _drop_client(self):
+        """Close the client and forget its queued input/output."""
+        self.client.close()
+        self.client = None
+        self.buf = b""
+        self.out = b""
+        self.pending = None
 
     def _process_commands(self):
-        """Process any complete commands in buffer."""
-        while b"\n" in self.buf:
+        """Process complete commands in buffer. Returns True if any ran."""
+        processed = False
+        while self.pending is None and b"\n" in self.buf:
             line, self.buf = self.buf.split(b"\n", 1)
+            processed = True
             try:
                 cmd = json.loads(line.decode())
-                response = self._handle_command(cmd)
             except Exception as e:
-                response = {"ok": False, "error": str(e)}
-            self._send_response(response)
+                self._send_response({"ok": False, "error": str(e)})
+                continue
+            self.pending = self._run(cmd)
+            self._step_pending()
+        return processed
+
+    def _step_pending(self):
+        """Advance the waiting command; send its reply once done. Returns True if done."""
+        try:
+            response = next(self.pending)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        if response is None:
+            return False
+        self.pending = None
+        self._send_response(response)
+        return True
 
     def _send_response(self, response):
-        """Send JSON response to client."""
+        """Queue JSON response for the client."""
         if self.client:
             try:
-                data = json.dumps(response) + "\n"
-                self.client.send(data.encode())
-            except:
-                pass
+                self.out += (json.dumps(response) + "\n").encode()
+            except Exception as e:
+                self.out += (json.dumps({"ok": False, "error": str(e)}) + "\n").encode()
+
+    def _flush(self):
+        """Send as much queued output as the socket takes without blocking."""
+        if self.client is None or not self.out:
+            return
+        try:
+            sent = self.client.send(self.out)
+        except OSError as e:
+            if "EAGAIN" not in str(e):
+                self._drop_client()
+            return
+        if sent:
+            self.out = self.out[sent:]
+
+    def _run(self, cmd):
+        """
+        Execute one command as a generator.
+
+        Yields None while the command waits for the UI (next poll resumes
+        it), then yields its response. Plain actions finish on the first
+        step via _handle_command.
+        """
+        action = cmd.get("action")
+        if action == "batch":
+            for response in self._run_batch(cmd):
+                yield response
+        elif action == "wait_for_text":
+            for response in self._run_wait_for_text(cmd):
+                yield response
+        else:
+            yield self._handle_command(cmd)
+
+    def _run_batch(self, cmd):
+        """Run cmd["commands"] in order and reply with all results at once."""
+        commands = cmd.get("commands")
+        if not isinstance(commands, list):
+            yield {"ok": False, "error": "Must provide 'commands' list"}
+            return
+        stop_on_error = cmd.get("stop_on_error", True)
+        results = []
+        ok = True
+        for sub in commands:
+            if sub.get("action") == "batch":
+                response = {"ok": False, "error": "Nested batch not supported"}
+            else:
+                try:
+                    for response in self._run(sub):
+                        if response is None:
+                            yield None
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+            results.append(response)
+            if not response.get("ok"):
+                ok = False
+                if stop_on_error:
+                    break
+        yield {"ok": ok, "results": results}
+
+    def _run_wait_for_text(self, cmd):
+        """Wait until a widget with cmd["text"] is on screen (up to timeout_ms)."""
+        text = cmd.get("text")
+        if not text:
+            yield {"ok": False, "error": "Must provide 'text'"}
+            return
+        timeout_ms = cmd.get("timeout_ms", 2000)
+        start = lv.tick_get()
+        while True:
+            widget, _ = find_widget_by_text(lv.screen_active(), text)
+            waited = lv.tick_elaps(start)
+            if widget:
+                yield {"ok": True, "found": text, "waited_ms": waited}
+                return
+            if waited >= timeout_ms:
+                yield {"ok": False, "error": "Timeout waiting for text: " + text}
+                return
+            yield None
 
     def _handle_command(self, cmd):
         """Route command to handler."""
         action = cmd.get("action")
 
         if action == "widget_tree":
-            return self._cmd_widget_tree()
+            return self._cmd_widget_tree(cmd)
+        elif action == "widget_tree_diff":
+            return self._cmd_widget_tree_diff(cmd)
         elif action == "click":
             return self._cmd_click(cmd)
         elif action == "get_state":
@@ -88,7 +239,7 @@ class ControlServer:
         elif action == "ping":
             return {"ok": True, "pong": True}
         elif action == "screenshot":
-            return self._cmd_screenshot()
+            return self._cmd_screenshot(cmd)
         elif action == "navigate":
             return self._cmd_navigate(cmd)
         else:
@@ -104,12 +255,46 @@ class ControlServer:
             self.nav.show_menu(target)
             return {"ok": True, "navigated": target}
 
-    def _cmd_widget_tree(self):
-        """Return full widget tree."""
-        screen = lv.screen_active()
-        tree = get_widget_tree(screen)
+    def _cmd_widget_tree(self, cmd):
+        """Return full widget tree (optionally below 'root' path, up to 'max_depth')."""
+        root = resolve_path(lv.screen_active(), cmd.get("root", ""))
+        if root is None:
+            return {"ok": False, "error": "No widget at path: " + cmd.get("root")}
+        tree = get_widget_tree(root, cmd.get("max_depth"))
         return {"ok": True, "tree": tree}
 
+    def _cmd_widget_tree_diff(self, cmd):
+        """
+        Return only the nodes changed since the client's revision.
+
+        The client passes back the 'revision' of its previous reply as
+        'since'. If that is not the last revision served for the same
+        'root'/'max_depth', the reply is the full flat node list with
+        "full": true and the client has to start over.
+        """
+        root_path = cmd.get("root", "")
+        max_depth = cmd.get("max_depth")
+        root = resolve_path(lv.screen_active(), root_path)
+        if root is None:
+            return {"ok": False, "error": "No widget at path: " + root_path}
+
+        key = (root_path, max_depth)
+        old = self.tree_snapshot if key == self.tree_key else None
+        base = old if old is not None and cmd.get("since") == self.tree_revision else None
+        snapshot = snapshot_widget_tree(root, max_depth)
+        if old is None or old[""][1] != snapshot[""][1]:
+            self.tree_revision += 1
+        changed, removed = diff_widget_tree(root, base or {}, snapshot, max_depth)
+        self.tree_key = key
+        self.tree_snapshot = snapshot
+        return {
+            "ok": True,
+            "revision": self.tree_revision,
+            "full": base is None,
+            "changed": changed,
+            "removed": removed,
+        }
+
     def _cmd_click(self, cmd):
         """Click widget by text or path."""
         text = cmd.get("text")
@@ -200,14 +385,58 @@ class ControlServer:
         setattr(ss, attr, value)
         return {"ok": True, "set": {attr: value}}
 
-    def _cmd_screenshot(self):
-        """Capture screenshot - writes to file, returns path for MCP to read."""
+    def _cmd_screenshot(self, cmd):
+        """
+        Capture screenshot - writes to file, returns path for MCP to read.
+
+        Optional "crop": [x, y, w, h] and "scale": N (keep every Nth pixel
+        and row) shrink the frame before the client has to read it.
+        """
         try:
             import SDL
             # Write screenshot directly to file (bypasses Python heap)
             filename = "/tmp/sim_screenshot.raw"
             w, h, _ = SDL.screenshot(filename)
+            crop = cmd.get("crop")
+            scale = cmd.get("scale", 1)
+            if crop is None and scale == 1:
+                return {"ok": True, "width": w, "height": h, "format": "RGB565", "file": filename}
 
-            return {"ok": True, "width": w, "height": h, "format": "RGB565", "file": filename}
+            x, y, cw, ch = crop if crop is not None else (0, 0, w, h)
+            if scale < 1 or x < 0 or y < 0 or cw < 1 or ch < 1 or x + cw > w or y + ch > h:
+                return {"ok": False, "error": "Crop/scale outside %dx%d frame" % (w, h)}
+            out_name = "/tmp/sim_screenshot_crop.raw"
+            ow, oh = crop_rgb565(filename, out_name, w, (x, y, cw, ch), scale)
+            return {
+                "ok": True, "width": ow, "height": oh, "format": "RGB565", "file": out_name,
+                "crop": [x, y, cw, ch], "scale": scale,
+            }
         except Exception as e:
             return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def crop_rgb565(src, dst, width, crop, scale=1):
+    """
+    Copy the crop rectangle of a raw RGB565 frame file, keeping every
+    scale-th pixel and row. Reads one row at a time into a reused buffer.
+
+    Returns (width, height) of the written frame.
+    """
+    x, y, cw, ch = crop
+    ow = (cw + scale - 1) // scale
+    oh = (ch + scale - 1) // scale
+    row = bytearray(cw * 2)
+    out = bytearray(ow * 2) if scale > 1 else row
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for r in range(y, y + ch, scale):
+            fin.seek((r * width + x) * 2)
+            fin.readinto(row)
+            if scale > 1:
+                step = scale * 2
+                j = 0
+                for i in range(0, ow * 2, 2):
+                    out[i] = row[j]
+                    out[i + 1] = row[j + 1]
+                    j += step
+            fout.write(out)
+    return ow, oh
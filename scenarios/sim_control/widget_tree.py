@@ -22,13 +22,16 @@ def get_widget_info(obj):
     return info
 
 
-def get_widget_tree(obj):
-    """Recursively build widget tree from LVGL object."""
+def get_widget_tree(obj, max_depth=None):
+    """Recursively build widget tree from LVGL object (children below max_depth are omitted)."""
     info = get_widget_info(obj)
+    if max_depth == 0:
+        return info
+    next_depth = None if max_depth is None else max_depth - 1
     child_count = obj.get_child_count()
     for i in range(child_count):
         child = obj.get_child(i)
-        info["children"].append(get_widget_tree(child))
+        info["children"].append(get_widget_tree(child, next_depth))
     return info
 
 
@@ -52,3 +55,110 @@ def find_widget_by_text(obj, text, parent=None):
             return result
 
     return (None, None)
+
+
+# --- Incremental tree diff (widget_tree_diff action) ---
+#
+# A snapshot maps node path -> (own_hash, subtree_hash, child_count). Paths
+# are child indices joined with "." relative to the walked root ("" is the
+# root itself). Only hashes are kept between requests; widget info for the
+# changed nodes is read back from LVGL when the diff is built.
+
+HASH_MASK = 0x3FFFFFFF  # 30 bits: a 20 bit hash collided too often on large screens
+
+
+def child_path(path, index):
+    """Path of child index of the node at path."""
+    return path + "." + str(index) if path else str(index)
+
+
+def resolve_path(obj, path):
+    """Return the widget at path below obj, or None if it does not exist."""
+    if not path:
+        return obj
+    for part in path.split("."):
+        index = int(part)
+        if index < 0 or index >= obj.get_child_count():
+            return None
+        obj = obj.get_child(index)
+    return obj
+
+
+def get_node_info(obj, depth_left=None):
+    """Widget info without children, plus child_count (flat diff entry)."""
+    info = get_widget_info(obj)
+    del info["children"]
+    info["child_count"] = obj.get_child_count() if depth_left != 0 else 0
+    return info
+
+
+def _own_hash(obj, child_count):
+    """Hash of the properties get_node_info() reports, without building the dict."""
+    h = hash(type(obj).__name__) & HASH_MASK
+    for value in (obj.get_x(), obj.get_y(), obj.get_width(), obj.get_height(), child_count):
+        h = (h * 31 + value) & HASH_MASK
+    if hasattr(obj, "get_text"):
+        try:
+            h = (h * 31 + (hash(obj.get_text()) & HASH_MASK)) & HASH_MASK
+        except:
+            pass
+    return h
+
+
+def snapshot_widget_tree(obj, max_depth=None, path="", out=None):
+    """
+    Hash every node below obj into a {path: (own, subtree, child_count)} dict.
+
+    Every node is visited and its properties are read on each call: LVGL
+    does not tell which widgets changed, only the diff built from two
+    snapshots skips unchanged subtrees.
+
+    Nodes deeper than max_depth are not visited; the node at max_depth is
+    reported with child_count 0. Returns the snapshot dict.
+    """
+    if out is None:
+        out = {}
+    count = obj.get_child_count() if max_depth != 0 else 0
+    own = _own_hash(obj, count)
+    subtree = own
+    next_depth = None if max_depth is None else max_depth - 1
+    for i in range(count):
+        cpath = child_path(path, i)
+        snapshot_widget_tree(obj.get_child(i), next_depth, cpath, out)
+        subtree = (subtree * 33 + out[cpath][1]) & HASH_MASK
+    out[path] = (own, subtree, count)
+    return out
+
+
+def diff_widget_tree(obj, old, new, max_depth=None):
+    """
+    Compare two snapshots of the tree below obj.
+
+    Returns (changed, removed): changed is a list of get_node_info() dicts
+    (with a "path" key) for nodes that are new or whose own properties
+    changed, in depth-first order; removed lists the topmost paths that no
+    longer exist. Unchanged subtrees are skipped without descending.
+    """
+    changed = []
+    removed = []
+    _diff_node(obj, "", old, new, max_depth, changed)
+    for path in old:
+        if path not in new:
+            parent = path.rsplit(".", 1)[0] if "." in path else ""
+            if path and parent in new:
+                removed.append(path)
+    return changed, removed
+
+
+def _diff_node(obj, path, old, new, depth_left, changed):
+    entry = new[path]
+    prev = old.get(path)
+    if prev is not None and prev[1] == entry[1] and prev[2] == entry[2]:
+        return
+    if prev is None or prev[0] != entry[0]:
+        info = get_node_info(obj, depth_left)
+        info["path"] = path
+        changed.append(info)
+    next_depth = None if depth_left is None else depth_left - 1
+    for i in range(entry[2]):
+        _diff_node(obj.get_child(i), child_path(path, i), old, new, next_depth, changed)
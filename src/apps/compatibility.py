@@ -6,7 +6,7 @@ After processing it sends converted command to a corresponding app.
 from app import BaseApp, AppError
 from io import BytesIO
 import json
-from helpers import read_until
+from helpers import BufferedReader
 from embit import bip32
 from binascii import unhexlify
 
@@ -34,16 +34,17 @@ def parse_cc_wallet_txt(stream):
     sigs_total = None
     cosigners = []
     current_derivation = None
+    stream = BufferedReader(stream)
     # cycle until we read everything
     char = b"\n"
     while char is not None:
-        line, char = read_until(stream, b"\r\n", max_len=300)
+        line, char = stream.read_until(b"\r\n", max_len=300)
         # skip comments
         while char is not None and (line.startswith(b"#") or len(line.strip()) == 0):
             # BW comment on derivation
             if line.startswith(b"# derivation:"):
                 current_derivation = bip32.parse_path(line.split(b":")[1].decode().strip())
-            line, char = read_until(stream, b"\r\n", max_len=300)
+            line, char = stream.read_until(b"\r\n", max_len=300)
         if b":" not in line:
             continue
         arr = line.split(b":")
@@ -0,0 +1,105 @@
+class WalletIndex:
+    """
+    Maps (fingerprint, derivation prefix) of every wallet key
+    to the wallets using this key.
+
+    A wallet can own a psbt scope only if one of the scope's derivations
+    starts with the origin of one of the wallet keys
+    (see Descriptor.check_derivation), so instead of trying
+    wallet.fill_scope() with every wallet we only try the candidates.
+
+    Indexed items are wallets or any other hashable handles
+    (e.g. wallet ids) added together with their entries.
+    """
+
+    def __init__(self, wallets=()):
+        self.wallets = []
+        # {wallet: position} - candidates keep the wallet order
+        self._order = {}
+        # {wallet: entries}
+        self._entries = {}
+        # {(fingerprint, tuple(derivation prefix)): [wallets]}
+        self._map = {}
+        # {fingerprint: [prefix lengths]} - which prefixes to look up
+        self._lengths = {}
+        # wallets without indexable keys - always candidates
+        self._fallback = []
+        for w in wallets:
+            self.add(w)
+
+    @staticmethod
+    def entries(w):
+        """(fingerprint, prefix) pairs that can match one of the wallet keys"""
+        entries = []
+        for k in w.keys:
+            if k.allowed_derivation is None:
+                # can't derive anything - check_derivation never matches
+                continue
+            if k.fingerprint is not None:
+                entries.append((k.fingerprint, tuple(k.derivation)))
+            if k.is_extended:
+                # derivation relative to the xpub itself
+                entries.append((k.my_fingerprint, ()))
+        return entries
+
+    def add(self, w, entries=None):
+        """Adds wallet w, entries are taken from the wallet keys if not passed"""
+        if entries is None:
+            entries = self.entries(w)
+        self._order[w] = len(self.wallets)
+        self.wallets.append(w)
+        self._entries[w] = entries
+        if not entries:
+            self._fallback.append(w)
+        for entry in entries:
+            lst = self._map.setdefault(entry, [])
+            if w not in lst:
+                lst.append(w)
+            lengths = self._lengths.setdefault(entry[0], [])
+            if len(entry[1]) not in lengths:
+                lengths.append(len(entry[1]))
+
+    def remove(self, w):
+        """Removes the wallet and rebuilds the index"""
+        items = [(ww, self._entries[ww]) for ww in self.wallets if ww != w]
+        self.__init__()
+        for ww, entries in items:
+            self.add(ww, entries)
+
+    def _matching(self, derivation, found):
+        fp = derivation.fingerprint
+        der = derivation.derivation
+        for l in self._lengths.get(fp, ()):
+            if l > len(der):
+                continue
+            for w in self._map.get((fp, tuple(der[:l])), ()):
+                found[w] = True
+
+    def matching(self, derivation):
+        """Wallets that may derive the derivation path, in the order they were added"""
+        found = {}
+        self._matching(derivation, found)
+        for w in self._fallback:
+            found[w] = True
+        return sorted(found, key=lambda w: self._order[w])
+
+    def candidates(self, scope, skip=()):
+        """
+        Wallets that may own the scope in the order they were added,
+        except the ones in skip (already tried by the caller).
+        """
+        found = {}
+        for derivation in scope.bip32_derivations.values():
+            self._matching(derivation, found)
+        for _, derivation in getattr(scope, "taproot_bip32_derivations", {}).values():
+            self._matching(derivation, found)
+        for w in self._fallback:
+            found[w] = True
+        for w in skip:
+            found.pop(w, None)
+        if not found:
+            return []
+        return sorted(found, key=lambda w: self._order[w])
+
+    def __len__(self):
+        return len(self.wallets)
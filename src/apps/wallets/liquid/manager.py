@@ -6,7 +6,7 @@ from embit.liquid.psetview import PSETView, ser_string
 from embit.liquid.networks import NETWORKS
 from embit.liquid.transaction import LSIGHASH as SIGHASH
 from embit.liquid.addresses import address as liquid_address
-from embit.liquid.addresses import to_unconfidential
+from embit.liquid.addresses import to_unconfidential, addr_decode
 from .wallet import WalletError, LWallet
 from helpers import is_liquid
 import secp256k1
@@ -95,32 +95,14 @@ class LWalletManager(WalletManager):
         return super().parse_stream(stream)
 
 
-    def find_wallet_from_address(self, addr: str, paths=None, index=None):
-        if index is not None:
-            for w in self.wallets:
-                a, _ = w.get_address(index, self.network)
-                unconf_a = to_unconfidential(a)
-                if addr in [a, unconf_a]:
-                    return w, (0, index)
-        if paths is not None:
-            # we can detect the wallet from just one path
-            p = paths[0]
-            if not p.startswith("m"):
-                fingerprint = unhexlify(p[:8])
-                derivation = bip32.parse_path("m"+p[8:])
-            else:
-                fingerprint = self.keystore.fingerprint
-                derivation = bip32.parse_path(p)
-            derivation_path = DerivationPath(fingerprint, derivation)
-            for w in self.wallets:
-                der = w.descriptor.check_derivation(derivation_path)
-                if der is not None:
-                    idx, branch_idx = der
-                    a, _ = w.get_address(idx, self.network, branch_idx)
-                    unconf_a = to_unconfidential(a)
-                    if addr in [a, unconf_a]:
-                        return w, (idx, branch_idx)
-        raise WalletError("Can't find wallet owning address %s" % addr)
+    def address_to_script(self, addr):
+        sc, _ = addr_decode(addr)
+        return sc
+
+
+    def address_matches(self, w, idx, branch_idx, addr):
+        a, _ = w.get_address(idx, self.network, branch_idx)
+        return addr in [a, to_unconfidential(a)]
 
 
     async def process_host_command(self, stream, show_screen):
@@ -249,8 +231,6 @@ class LWalletManager(WalletManager):
         # compress = True flag will make sure large fields won't be loaded to RAM
         psbtv = self.PSBTViewClass.view(stream, compress=True)
 
-        signed_inputs = self.check_signed_inputs(psbtv)
-
         # Start with global fields of PSBT
 
         # On Liquid we check if txseed is provided (for deterministic blinding)
@@ -275,7 +255,7 @@ class LWalletManager(WalletManager):
             "inputs": [{} for i in range(psbtv.num_inputs)],
             "outputs": [{} for i in range(psbtv.num_outputs)],
             "issuance": False, "reissuance": False,
-            "signed_inputs": signed_inputs,
+            "signed_inputs": 0,
         }
 
         fingerprint = self.keystore.fingerprint
@@ -287,6 +267,9 @@ class LWalletManager(WalletManager):
         # At the end we should have the most complete PSBT / PSET possible
         for i in range(psbtv.num_inputs):
             self.show_loader(title="Parsing input %d..." % i)
+            # check if input is already signed
+            if self.is_finalized(psbtv, i):
+                meta["signed_inputs"] += 1
             # load input to memory, verify it (check prevtx hash)
             inp = psbtv.input(i)
             metainp = meta["inputs"][i]
@@ -313,27 +296,20 @@ class LWalletManager(WalletManager):
             if rangeproof_offset is not None:
                 rangeproof_offset += off
 
-            # Find wallets owning the inputs and fill scope data:
-            # first we check already detected wallet owns the input
-            # as in most common case all inputs are owned by the same wallet.
+            # Find wallets owning the inputs and fill scope data.
+            # Only wallets with a key matching one of the derivations are tried,
+            # already detected wallets first - in most common case
+            # all inputs are owned by the same wallet.
             wallet = None
-            for w in wallets:
+            for w in self.wallet_candidates(inp, wallets):
                 # pass rangeproof offset if it's in the scope
-                if w and w.fill_scope(inp, fingerprint,
+                if w.fill_scope(inp, fingerprint,
                                 stream=psbtv.stream, rangeproof_offset=rangeproof_offset):
                     wallet = w
                     break
-            # if it's a different wallet - go through all our wallets and check
-            if wallet is None:
-                # find wallet and append it to wallets
-                for w in self.wallets:
-                    # pass rangeproof offset if it's in the scope
-                    if w.fill_scope(inp, fingerprint,
-                                    stream=psbtv.stream, rangeproof_offset=rangeproof_offset):
-                        wallet = w
-                        break
             # get gaps
             gaps = None
+            res = None
             if wallet:
                 gaps = [g for g in wallet.gaps] # copy
                 res = wallet.get_derivation(inp.bip32_derivations)
@@ -343,9 +319,14 @@ class LWalletManager(WalletManager):
             # add wallet to tx wallets dict
             if wallet not in wallets:
                 wallets[wallet] = {"amount": {}, "gaps": gaps}
+                if wallet:
+                    # max used derivation index per branch, for update_gaps on signing
+                    wallets[wallet]["used"] = [None] * len(wallet.gaps)
             else:
                 if wallets[wallet]["gaps"] is not None and gaps is not None:
                     wallets[wallet]["gaps"] = [max(g1,g2) for g1,g2 in zip(gaps, wallets[wallet]["gaps"])]
+            if wallet:
+                self._mark_used(wallets[wallet], res)
 
             # Get values (and assets) and store in metadata and wallets dict
             # we don't know yet if we unblinded the input or not, and if it was even blinded
@@ -507,24 +488,14 @@ class LWalletManager(WalletManager):
                 surj_proof_offset += off
 
             wallet = None
-            for w in wallets:
+            for w in self.wallet_candidates(out, wallets):
                 # pass rangeproof offset if it's in the scope
-                if w and w.fill_scope(out, fingerprint,
+                if w.fill_scope(out, fingerprint,
                                 stream=psbtv.stream,
                                 rangeproof_offset=rangeproof_offset,
                 ):
                     wallet = w
                     break
-            if wallet is None:
-                # find wallet and append it to wallets
-                for w in self.wallets:
-                    # pass rangeproof offset if it's in the scope
-                    if w.fill_scope(out, fingerprint,
-                                    stream=psbtv.stream,
-                                    rangeproof_offset=rangeproof_offset,
-                    ):
-                        wallet = w
-                        break
             # if we didn't blind it ourselves
             if not blinding_seed:
                 try:
@@ -548,6 +519,8 @@ class LWalletManager(WalletManager):
             if wallet:
                 metaout["label"] = wallet.name
                 res = wallet.get_derivation(out.bip32_derivations)
+                if wallet in wallets:
+                    self._mark_used(wallets[wallet], res)
                 if res:
                     idx, branch_idx = res
                     branch_txt = ""
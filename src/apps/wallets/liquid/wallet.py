@@ -29,7 +29,7 @@ class LWallet(Wallet):
         if der is None:
             return False
         idx, branch_idx = der
-        desc = self.descriptor.derive(idx, branch_index=branch_idx)
+        desc = self.derive(idx, branch_idx)
         # find keys with our fingerprint
         for key in desc.keys:
             if key.fingerprint == fingerprint:
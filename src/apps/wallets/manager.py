@@ -5,18 +5,21 @@ from .screens import WalletScreen, ConfirmWalletScreen
 import platform
 import os
 from binascii import hexlify, unhexlify, a2b_base64
-from embit import script, bip32, compact
-from embit.psbt import DerivationPath, CompressMode
+from embit import script, bip32, compact, hashes
+from embit.psbt import DerivationPath, CompressMode, read_string, skip_string
 from embit.psbtview import PSBTView, read_write, PSBTError
 from embit.networks import NETWORKS
 from embit.transaction import SIGHASH
 from .wallet import WalletError, Wallet
+from .index import WalletIndex
+from .scanner import AddressScanner
 from .commands import DELETE, EDIT
 from io import BytesIO
 from bcur import bcur_decode_stream
-from helpers import a2b_base64_stream, b2a_base64_stream
+from helpers import a2b_base64_stream, b2a_base64_stream, Base64Reader, Base64Writer, IterReader
 import gc
 import json
+import time
 
 SIGN_PSBT = 0x01
 ADD_WALLET = 0x02
@@ -30,10 +33,14 @@ DERIVE_ADDRESS = 0x04
 SIGN_BCUR = 0x05
 # list wallet names
 LIST_WALLETS = 0x06
+# find wallets and indexes of addresses
+FIND_ADDRESSES = 0x07
 
 BASE64_STREAM = 0x64
 RAW_STREAM = 0xFF
 
+NO_SIGNATURES = "We didn't add any signatures!\n\nMaybe you forgot to import the wallet?\n\nScan the wallet descriptor to import it."
+
 SIGHASH_NAMES = {
     SIGHASH.ALL: "ALL",
     SIGHASH.NONE: "NONE",
@@ -51,7 +58,7 @@ class WalletManager(BaseApp):
     """
 
     button = "Wallets"
-    prefixes = [b"addwallet", b"sign", b"showaddr", b"listwallets"]
+    prefixes = [b"addwallet", b"sign", b"showaddr", b"listwallets", b"findaddr"]
     name = "wallets"
 
     # Class constants for inheritance
@@ -62,12 +69,23 @@ class WalletManager(BaseApp):
     # supported networks
     Networks = NETWORKS
     DEFAULT_SIGHASH = SIGHASH.ALL
+    # print bytes written to the ramdisk and time of every signing stage
+    PRINT_SIGN_STATS = False
+    # addresses listed on the findaddr confirmation screen
+    FIND_ADDRESSES_SHOWN = 5
 
     def __init__(self, path):
         self.root_path = path
         platform.maybe_mkdir(path)
         self.path = None
-        self.wallets = []
+        # wallet manifest: [{"id", "name", "hash", "watchonly", "keys"}]
+        self.manifest = []
+        # {wallet id: Wallet} - wallets are loaded when needed
+        self._loaded = {}
+        self.index = WalletIndex()
+        self._scanner = None
+        # last signing: [(stage, bytes written, ms)]
+        self.sign_stats = []
 
     def init(self, keystore, network, *args, **kwargs):
         """Loads or creates default wallets for new keystore or network"""
@@ -83,10 +101,138 @@ class WalletManager(BaseApp):
         path += "/" + network
         platform.maybe_mkdir(path)
         self.path = path
-        self.wallets = self.load_wallets()
-        if self.wallets is None or len(self.wallets) == 0:
+        self._loaded = {}
+        self._scanner = None
+        self.manifest = self.load_manifest()
+        if len(self.manifest) == 0:
             w = self.create_default_wallet(path=self.path + "/0")
-            self.wallets = [w]
+            self._loaded[0] = w
+            self.manifest = [self.manifest_entry(0, w)]
+            self.save_manifest()
+        # built once, kept in sync by add_wallet / delete_wallet
+        self.build_index()
+
+    def iter_wallets(self, wids=None):
+        """
+        Loads wallets by id (all wallets of the manifest by default)
+        one by one, wallets that fail to load are skipped
+        """
+        if wids is None:
+            wids = [e["id"] for e in self.manifest]
+        for wid in wids:
+            try:
+                w = self.get_wallet(wid)
+            except Exception as e:
+                print(e)
+                continue
+            yield w
+
+    @property
+    def scanner(self):
+        # scanning derives addresses of all wallets - built on first use
+        if self._scanner is None:
+            self._scanner = AddressScanner(self.iter_wallets())
+        return self._scanner
+
+    def build_index(self):
+        self.index = WalletIndex()
+        for e in self.manifest:
+            self.index.add(e["id"], [(unhexlify(fp), tuple(der)) for fp, der in e["keys"]])
+
+    def descriptor_hash(self, w):
+        return hexlify(hashes.sha256(str(w.descriptor).encode())).decode()
+
+    def wallet_id(self, w):
+        """Id of the saved wallet - name of its folder"""
+        return int(w.path.split("/")[-1])
+
+    def manifest_entry(self, wid, w):
+        return {
+            "id": wid,
+            "name": w.name,
+            "hash": self.descriptor_hash(w),
+            "watchonly": w.is_watchonly,
+            # entries of the wallet index, to find wallets of psbt without loading them
+            "keys": [[hexlify(fp).decode(), list(der)] for fp, der in WalletIndex.entries(w)],
+        }
+
+    def load_manifest(self):
+        """
+        Loads manifest of the wallets.
+        If it's missing, tampered or doesn't match wallet folders
+        all wallets are loaded and the manifest is written again.
+        """
+        try:
+            platform.maybe_mkdir(self.path)
+            wallet_ids = self.get_wallet_ids()
+            _, data = self.keystore.load_aead(self.path + "/manifest")
+            manifest = json.loads(data.decode())["wallets"]
+            if [e["id"] for e in manifest] == wallet_ids:
+                return manifest
+        except Exception:
+            pass
+        return self.rebuild_manifest()
+
+    def rebuild_manifest(self):
+        """Loads all wallets, writes their manifest and rebuilds the index"""
+        wallets = self.load_wallets()
+        self._loaded = {}
+        manifest = []
+        for w in wallets:
+            wid = self.wallet_id(w)
+            self._loaded[wid] = w
+            manifest.append(self.manifest_entry(wid, w))
+        self.manifest = manifest
+        if manifest:
+            self.save_manifest()
+        # index and scanner refer to the wallets of the old manifest
+        self.build_index()
+        self._scanner = None
+        return manifest
+
+    def save_manifest(self):
+        data = json.dumps({"wallets": self.manifest}).encode()
+        self.keystore.save_aead(self.path + "/manifest", plaintext=data)
+
+    def get_wallet(self, wid):
+        """Returns wallet by id, loads it if it's not loaded yet"""
+        w = self._loaded.get(wid)
+        if w is not None:
+            return w
+        entries = [e for e in self.manifest if e["id"] == wid]
+        if not entries:
+            raise WalletError("Wallet not found")
+        entry = entries[0]
+        try:
+            w = self.load_wallet(self.path + ("/%d" % wid))
+        except Exception as e:
+            # folder is deleted by load_wallet
+            self.manifest.remove(entry)
+            self.index.remove(wid)
+            self.save_manifest()
+            raise e
+        if self.descriptor_hash(w) != entry["hash"]:
+            # manifest doesn't match wallet files - reload everything
+            self.rebuild_manifest()
+            if wid not in self._loaded:
+                raise WalletError("Wallet not found")
+            return self._loaded[wid]
+        self._loaded[wid] = w
+        return w
+
+    def wallet_candidates(self, scope, wallets):
+        """
+        Wallets that may own psbt scope: already detected wallets first -
+        in most common case all inputs are owned by the same wallet
+        and the index is not even looked up, then wallets with a key
+        matching one of the scope derivations.
+        """
+        detected = [w for w in wallets if w is not None]
+        for w in detected:
+            yield w
+        skip = [self.wallet_id(w) for w in detected]
+        for w in self.iter_wallets(self.index.candidates(scope, skip)):
+            yield w
 
     def get_address(self, psbtout):
         """Helper function to get an address for every output"""
@@ -99,19 +245,20 @@ class WalletManager(BaseApp):
             return hexlify(psbtout.script_pubkey.data).decode()
 
     async def menu(self, show_screen):
+        # rendered from the manifest, wallet is loaded when selected
         buttons = [(None, "Your wallets")]
-        buttons += [(w, w.name) for w in self.wallets if not w.is_watchonly]
-        if len(buttons) != (len(self.wallets)+1):
+        buttons += [(e, e["name"]) for e in self.manifest if not e["watchonly"]]
+        if len(buttons) != (len(self.manifest)+1):
             buttons += [(None, "Watch only wallets")]
-            buttons += [(w, w.name) for w in self.wallets if w.is_watchonly]
+            buttons += [(e, e["name"]) for e in self.manifest if e["watchonly"]]
         menuitem = await show_screen(Menu(buttons, last=(255, None)))
         if menuitem == 255:
             # we are done
             return False
         else:
-            w = menuitem
             # pass wallet and network
             self.show_loader(title="Loading wallet...")
+            w = self.get_wallet(menuitem["id"])
             cmd = await w.show(self.network, show_screen)
             if cmd == DELETE:
                 scr = Prompt(
@@ -133,6 +280,8 @@ class WalletManager(BaseApp):
                 if name is not None and name != w.name and name != "":
                     w.name = name
                     w.save(self.keystore)
+                    menuitem["name"] = name
+                    self.save_manifest()
             return True
 
     def can_process(self, stream):
@@ -151,6 +300,8 @@ class WalletManager(BaseApp):
                 return ADD_WALLET, stream
             elif prefix == b"listwallets":
                 return LIST_WALLETS, stream
+            elif prefix == b"findaddr":
+                return FIND_ADDRESSES, stream
             else:
                 return None, None
         # if not - we get data any without prefix
@@ -233,8 +384,29 @@ class WalletManager(BaseApp):
                 return res, obj
             return False
         elif cmd == LIST_WALLETS:
-            wnames = json.dumps([w.name for w in self.wallets])
+            wnames = json.dumps([e["name"] for e in self.manifest])
             return BytesIO(wnames.encode()), {}
+        elif cmd == FIND_ADDRESSES:
+            # space or newline separated addresses
+            addrs = [a.replace("bitcoin:", "") for a in stream.read().decode().split()]
+            # tells the host which addresses are ours - ask the user first
+            shown = addrs[:self.FIND_ADDRESSES_SHOWN]
+            msg = "\nHost wants to know which of your wallets own these addresses:\n\n"
+            msg += "\n".join(shown)
+            if len(addrs) > len(shown):
+                msg += "\n\n... and %d more" % (len(addrs) - len(shown))
+            if not await show_screen(Prompt("Find addresses?", msg)):
+                return False
+            res = []
+            for addr in addrs:
+                obj = {"address": addr, "wallet": None}
+                found = self.scan_address(addr)
+                if found is not None:
+                    w, (idx, branch_idx) = found
+                    obj.update({"wallet": w.name, "branch": branch_idx, "index": idx})
+                res.append(obj)
+            self.save_indexes()
+            return BytesIO(json.dumps(res).encode()), {}
         elif cmd == ADD_WALLET:
             # read content, it's small
             desc = stream.read().decode().strip()
@@ -244,19 +416,20 @@ class WalletManager(BaseApp):
                 self.add_wallet(w)
             return bool(confirm)
         elif cmd == VERIFY_ADDRESS:
-            data = stream.read().decode().replace("bitcoin:", "")
-            # should be of the form addr?index=N or similar
-            if "index=" not in data or "?" not in data:
-                raise WalletError("Can't verify address with unknown index")
-            addr, rest = data.split("?")
-            args = rest.split("&")
+            data = stream.read().decode().replace("bitcoin:", "").strip()
+            # should be of the form addr?index=N or similar,
+            # without index we scan address windows of all wallets
+            addr = data.split("?")[0]
             idx = None
-            for arg in args:
-                if arg.startswith("index="):
-                    idx = int(arg[6:])
-                    break
-            w, _ = self.find_wallet_from_address(addr, index=idx)
-            await show_screen(WalletScreen(w, self.network, idx))
+            if "?" in data:
+                args = data.split("?")[1].split("&")
+                for arg in args:
+                    if arg.startswith("index="):
+                        idx = int(arg[6:])
+                        break
+            w, (idx, branch_idx) = self.find_wallet_from_address(addr, index=idx)
+            self.save_indexes()
+            await show_screen(WalletScreen(w, self.network, idx, branch_index=branch_idx))
             return True
         elif cmd == DERIVE_ADDRESS:
             arr = stream.read().split(b" ")
@@ -278,27 +451,54 @@ class WalletManager(BaseApp):
             raise WalletError("Unknown command")
 
     async def sign_psbt(self, stream, show_screen, encoding=BASE64_STREAM):
+        self.sign_stats = []
+        raw = None
         if encoding == BASE64_STREAM:
-            with open(self.tempdir+"/raw", "wb") as f:
-                # read in chunks, write to ram file
-                a2b_base64_stream(stream, f)
-            with open(self.tempdir+"/raw", "rb") as f:
-                res = await self.sign_psbt(f, show_screen, encoding=RAW_STREAM)
-            if res:
-                with open(self.tempdir+"/signed_b64", "wb") as fout:
-                    with open(res, "rb") as fin:
-                        b2a_base64_stream(fin, fout)
-                return self.tempdir+"/signed_b64"
-            return
-
+            stream, raw = self.open_base64(stream)
+        try:
+            res = await self.sign_psbt_stream(stream, show_screen, encoding == BASE64_STREAM)
+        finally:
+            if raw is not None:
+                raw.close()
+        if self.PRINT_SIGN_STATS:
+            for stage, nbytes, ms in self.sign_stats:
+                print("sign: %-10s %8d bytes %6d ms" % (stage, nbytes, ms))
+        return res
+
+    def open_base64(self, stream):
+        """
+        Returns seekable stream with decoded psbt and a file to close after signing.
+        Decodes only the data that is read if possible,
+        otherwise decodes everything to the ramdisk.
+        """
+        try:
+            return Base64Reader(stream), None
+        except ValueError:
+            # line breaks in base64 - offsets can't be mapped
+            pass
+        t0 = time.ticks_ms()
+        with open(self.tempdir+"/raw", "wb") as f:
+            # read in chunks, write to ram file
+            self.log_stage("decode", a2b_base64_stream(stream, f), t0)
+        f = open(self.tempdir+"/raw", "rb")
+        return f, f
+
+    def log_stage(self, stage, nbytes, t0):
+        """Records bytes written to the ramdisk and time of a signing stage"""
+        self.sign_stats.append((stage, nbytes, time.ticks_diff(time.ticks_ms(), t0)))
+
+    async def sign_psbt_stream(self, stream, show_screen, b64=False):
+        """Signs psbt from seekable stream, returns path to the signed psbt (base64 if b64)"""
         # preprocess stream - parse psbt, check wallets in inputs and outputs,
         # get metadata to display, default sighash for signing,
         # fill missing metadata and store it in temp file:
+        t0 = time.ticks_ms()
         with open(self.tempdir + "/filled_psbt", "wb") as fout:
             try:
                 wallets, meta = self.preprocess_psbt(stream, fout)
             except PSBTError as e:
                 raise WalletError("Invalid PSBT:\n\n%s" % e)
+            self.log_stage("fill", fout.tell(), t0)
 
         # now we can work with copletely filled psbt:
         with open(self.tempdir + "/filled_psbt", "rb") as f:
@@ -313,9 +513,24 @@ class WalletManager(BaseApp):
             gc.collect()
             # sign transaction if the user confirmed
             self.show_loader(title="Signing transaction...")
-            with open(self.tempdir+"/signed_raw", "wb") as f:
-                sig_count = self.sign_psbtview(psbtv, f, wallets, **options)
-            return self.tempdir+"/signed_raw"
+            # signatures are created by a separate view of the filled psbt
+            # while psbtv writes the signed one
+            path = self.tempdir + ("/signed_b64" if b64 else "/signed_raw")
+            t0 = time.ticks_ms()
+            with open(self.tempdir + "/filled_psbt", "rb") as fsig:
+                sig_psbtv = self.PSBTViewClass.view(fsig, compress=True)
+                try:
+                    with open(path, "wb") as fout:
+                        out = Base64Writer(fout) if b64 else fout
+                        self.sign_psbtview(psbtv, out, wallets, sig_psbtv, **options)
+                        if b64:
+                            out.close()
+                        self.log_stage("sign", fout.tell(), t0)
+                except Exception as e:
+                    # don't leave a partially signed psbt on the ramdisk
+                    os.remove(path)
+                    raise e
+            return path
 
     async def confirm_transaction(self, wallets, meta, show_screen):
         """
@@ -484,22 +699,32 @@ class WalletManager(BaseApp):
         addr, _ = w.get_address(idx, self.network, branch_idx)
         return addr
 
+    def get_wallet_ids(self):
+        # Every wallet is stored in a numeric folder
+        return sorted(
+            [
+                int(f[0])
+                for f in os.ilistdir(self.path)
+                if f[0].isdigit() and f[1] == 0x4000
+            ]
+        )
+
     def load_wallets(self):
         """Loads all wallets from path"""
         try:
             platform.maybe_mkdir(self.path)
             # Get ids of the wallets.
-            # Every wallet is stored in a numeric folder
-            wallet_ids = sorted(
-                [
-                    int(f[0])
-                    for f in os.ilistdir(self.path)
-                    if f[0].isdigit() and f[1] == 0x4000
-                ]
-            )
-            return [self.load_wallet(self.path + ("/%d" % wid)) for wid in wallet_ids]
+            wallet_ids = self.get_wallet_ids()
         except:
             return []
+        wallets = []
+        for wid in wallet_ids:
+            # broken wallet is deleted by load_wallet, the rest is loaded
+            try:
+                wallets.append(self.load_wallet(self.path + ("/%d" % wid)))
+            except Exception as e:
+                print(e)
+        return wallets
 
     def load_wallet(self, path):
         """Loads a wallet with particular id"""
@@ -531,7 +756,7 @@ class WalletManager(BaseApp):
             w = self.WalletClass.parse(desc)
         except Exception as e:
             raise WalletError("Can't parse descriptor\n\n%s" % str(e))
-        if str(w.descriptor) in [str(ww.descriptor) for ww in self.wallets]:
+        if self.descriptor_hash(w) in [e["hash"] for e in self.manifest]:
             raise WalletError("Wallet with this descriptor already exists")
         # check that xpubs and tpubs are not mixed in the same descriptor:
         if not w.check_network(self.Networks[self.network]):
@@ -539,32 +764,37 @@ class WalletManager(BaseApp):
         return w
 
     def add_wallet(self, w):
-        self.wallets.append(w)
-        wallet_ids = sorted(
-            [
-                int(f[0])
-                for f in os.ilistdir(self.path)
-                if f[0].isdigit() and f[1] == 0x4000
-            ]
-        )
-        # get wallet id
-        wid = (max(wallet_ids) + 1) if wallet_ids else 0
+        # get wallet id, manifest has all wallet folders
+        wid = (max(e["id"] for e in self.manifest) + 1) if self.manifest else 0
         newpath = self.path + ("/%d" % wid)
         platform.maybe_mkdir(newpath)
         w.save(self.keystore, path=newpath)
+        self._loaded[wid] = w
+        entry = self.manifest_entry(wid, w)
+        self.manifest.append(entry)
+        self.save_manifest()
+        self.index.add(wid, WalletIndex.entries(w))
+        if self._scanner is not None:
+            self._scanner.add(w)
 
     def delete_wallet(self, w):
-        if w not in self.wallets:
+        wid = self.wallet_id(w) if w.path is not None else None
+        if wid is None or self._loaded.get(wid) is not w:
             raise WalletError("Wallet not found")
-        self.wallets.pop(self.wallets.index(w))
+        self._loaded.pop(wid)
+        self.manifest = [e for e in self.manifest if e["id"] != wid]
+        self.save_manifest()
+        self.index.remove(wid)
+        if self._scanner is not None:
+            self._scanner.remove(w)
         w.wipe()
 
     def find_wallet_from_address(self, addr: str, paths=None, index=None):
         if index is not None:
-            for w in self.wallets:
-                a, _ = w.get_address(index, self.network)
-                if a == addr:
-                    return w, (0, index)
+            # wallets are loaded one by one until one matches
+            for w in self.iter_wallets():
+                if self.address_matches(w, index, 0, addr):
+                    return w, (index, 0)
         if paths is not None:
             # we can detect the wallet from just one path
             p = paths[0]
@@ -575,15 +805,48 @@ class WalletManager(BaseApp):
                 fingerprint = self.keystore.fingerprint
                 derivation = bip32.parse_path(p)
             derivation_path = DerivationPath(fingerprint, derivation)
-            for w in self.wallets:
+            # only wallets with a key matching the derivation are loaded
+            for w in self.iter_wallets(self.index.matching(derivation_path)):
                 der = w.descriptor.check_derivation(derivation_path)
                 if der is not None:
                     idx, branch_idx = der
-                    a, _ = w.get_address(idx, self.network, branch_idx)
-                    if a == addr:
+                    if self.address_matches(w, idx, branch_idx, addr):
                         return w, (idx, branch_idx)
+        res = self.scan_address(addr)
+        if res is not None:
+            return res
         raise WalletError("Can't find wallet owning address %s" % addr)
 
+    def address_to_script(self, addr):
+        return script.address_to_scriptpubkey(addr)
+
+    def save_indexes(self):
+        """Saves address indexes extended by lookups, next lookup after reboot is a table lookup"""
+        for w in self._loaded.values():
+            if w.INDEX_EXTRA is not None and w.index_changed:
+                w.save_index(self.keystore)
+
+    def address_matches(self, w, idx, branch_idx, addr):
+        a, _ = w.get_address(idx, self.network, branch_idx)
+        return a == addr
+
+    def scan_address(self, addr):
+        """
+        Looks for the address in address windows of all wallets.
+        Returns (wallet, (idx, branch_idx)) or None
+        """
+        try:
+            sc = self.address_to_script(addr)
+        except Exception:
+            return None
+        res = self.scanner.lookup(sc)
+        if res is None:
+            return None
+        w, branch_idx, idx = res
+        if not self.address_matches(w, idx, branch_idx, addr):
+            return None
+        return w, (idx, branch_idx)
+
     def fill_zero_fingerprint(self, scope):
         """Blue Wallet hack - zeroes in fingerprint should be checked and replaced by our fingerprint"""
         for pub in scope.bip32_derivations:
@@ -592,21 +855,22 @@ class WalletManager(BaseApp):
                 if self.keystore.get_xpub(scope.bip32_derivations[pub].derivation).key == pub:
                     scope.bip32_derivations[pub].fingerprint = self.keystore.fingerprint
 
-    def check_signed_inputs(self, psbtv):
-        """Goes through all input scopes and checks if they are already signed"""
-        signed_inputs = 0
-        for i in range(psbtv.num_inputs):
-            psbtv.seek_to_scope(i)
-            off = psbtv.seek_to_value(b"\x07", from_current=True) # final scriptsig
-            if off is not None:
-                signed_inputs += 1
-                continue
-            psbtv.seek_to_scope(i)
-            off = psbtv.seek_to_value(b"\x08", from_current=True) # final scriptwitness
-            if off is not None:
-                signed_inputs += 1
-                continue
-        return signed_inputs
+    def is_finalized(self, psbtv, i):
+        """
+        Checks if input scope i has final scriptsig or scriptwitness.
+        Compressed scopes don't keep them, so the keys are checked
+        in one pass over the scope.
+        """
+        psbtv.seek_to_scope(i)
+        while True:
+            key = read_string(psbtv.stream)
+            # separator - end of scope
+            if len(key) == 0:
+                return False
+            # final scriptsig or final scriptwitness
+            if key[0] in (0x07, 0x08):
+                return True
+            skip_string(psbtv.stream)
 
     def preprocess_psbt(self, stream, fout):
         """
@@ -620,9 +884,6 @@ class WalletManager(BaseApp):
         # compress = True flag will make sure large fields won't be loaded to RAM
         psbtv = self.PSBTViewClass.view(stream, compress=True)
 
-        # check if inputs are already signed
-        signed_inputs = self.check_signed_inputs(psbtv)
-
         # Write global scope first
         psbtv.stream.seek(psbtv.offset)
         res = read_write(psbtv.stream, fout, psbtv.first_scope-psbtv.offset)
@@ -637,7 +898,7 @@ class WalletManager(BaseApp):
             "inputs": [{} for i in range(psbtv.num_inputs)],
             "outputs": [{} for i in range(psbtv.num_outputs)],
             "default_asset": "BTC" if self.network == "main" else "tBTC",
-            "signed_inputs": signed_inputs,
+            "signed_inputs": 0,
         }
 
         fingerprint = self.keystore.fingerprint
@@ -647,6 +908,9 @@ class WalletManager(BaseApp):
         # At the end we should have the most complete PSBT / PSET possible
         for i in range(psbtv.num_inputs):
             self.show_loader(title="Parsing input %d..." % i)
+            # check if input is already signed
+            if self.is_finalized(psbtv, i):
+                meta["signed_inputs"] += 1
             # load input to memory, verify it (check prevtx hash)
             inp = psbtv.input(i)
             metainp = meta["inputs"][i]
@@ -659,35 +923,34 @@ class WalletManager(BaseApp):
 
             self.fill_zero_fingerprint(inp)
 
-            # Find wallets owning the inputs and fill scope data:
-            # first we check already detected wallet owns the input
-            # as in most common case all inputs are owned by the same wallet.
+            # Find wallets owning the inputs and fill scope data.
+            # Only wallets with a key matching one of the derivations are tried,
+            # already detected wallets first - in most common case
+            # all inputs are owned by the same wallet.
             wallet = None
             gaps = None
-            for w in wallets:
-                # pass rangeproof offset if it's in the scope
-                if w and w.fill_scope(inp, fingerprint):
+            der = None
+            for w in self.wallet_candidates(inp, wallets):
+                if w.fill_scope(inp, fingerprint):
                     wallet = w
                     break
-            if wallet is None:
-                # find wallet and append it to wallets
-                for w in self.wallets:
-                    # pass rangeproof offset if it's in the scope
-                    if w.fill_scope(inp, fingerprint):
-                        wallet = w
-                        break
             if wallet:
                 gaps = [g for g in wallet.gaps] # copy
-                res = wallet.get_derivation(inp.bip32_derivations)
-                if res:
-                    idx, branch_idx = res
+                der = wallet.get_derivation(inp.bip32_derivations, inp.taproot_bip32_derivations)
+                if der:
+                    idx, branch_idx = der
                     gaps[branch_idx] = max(gaps[branch_idx], idx+wallet.GAP_LIMIT+1)
             # add wallet to tx wallets dict
             if wallet not in wallets:
                 wallets[wallet] = {"amount": 0, "gaps": gaps}
+                if wallet:
+                    # max used derivation index per branch, for update_gaps on signing
+                    wallets[wallet]["used"] = [None] * len(wallet.gaps)
             else:
                 if wallets[wallet]["gaps"] is not None and gaps is not None:
                     wallets[wallet]["gaps"] = [max(g1,g2) for g1,g2 in zip(gaps, wallets[wallet]["gaps"])]
+            if wallet:
+                self._mark_used(wallets[wallet], der)
 
             value = inp.utxo.value
             fee += value
@@ -720,17 +983,10 @@ class WalletManager(BaseApp):
             self.fill_zero_fingerprint(out)
 
             wallet = None
-            for w in wallets:
-                # pass rangeproof offset if it's in the scope
-                if w and w.fill_scope(out, fingerprint):
+            for w in self.wallet_candidates(out, wallets):
+                if w.fill_scope(out, fingerprint):
                     wallet = w
                     break
-            if wallet is None:
-                # find wallet and append it to wallets
-                for w in self.wallets:
-                    if w.fill_scope(out, fingerprint):
-                        wallet = w
-                        break
             # Get values and store in metadata and wallets dict
             value = out.value
             fee -= value
@@ -741,6 +997,9 @@ class WalletManager(BaseApp):
             })
             if wallet:
                 metaout["label"] = wallet.name
+                if wallet in wallets:
+                    self._mark_used(wallets[wallet], wallet.get_derivation(
+                        out.bip32_derivations, out.taproot_bip32_derivations))
                 res = wallet.get_derivation(out.bip32_derivations)
                 if res:
                     idx, branch_idx = res
@@ -763,38 +1022,88 @@ class WalletManager(BaseApp):
         meta["fee"] = fee
         return wallets, meta
 
-    def sign_psbtview(self, psbtv, out_stream, wallets, sighash):
+    @staticmethod
+    def _mark_used(info, der):
+        """Remembers max derivation index per branch in wallets dict entry"""
+        used = info.get("used")
+        if der is None or used is None:
+            return
+        idx, branch_idx = der
+        if used[branch_idx] is None or used[branch_idx] < idx:
+            used[branch_idx] = idx
+
+    def sign_psbtview(self, psbtv, out_stream, wallets, sig_psbtv, sighash):
+        """
+        Signs psbtv and writes the signed psbt to out_stream.
+        sig_psbtv is another view of the same psbt, signatures
+        of every input are created from it when out_stream needs them.
+        Wallets are updated only if something was signed.
+        """
+        if not self.can_sign(sig_psbtv, wallets):
+            raise WalletError(NO_SIGNATURES)
+        sig_count = [0]
+        sigs = IterReader(self.sign_inputs(sig_psbtv, wallets, sighash, sig_count))
+        psbtv.write_to(out_stream, compress=CompressMode.PARTIAL, extra_input_streams=[sigs])
+        if sig_count[0] == 0:
+            raise WalletError(NO_SIGNATURES)
         for w in wallets:
             if w is None:
                 continue
-            # update max used derivations in wallets
-            w.update_gaps(psbtv=psbtv)
+            # update max used derivations in wallets,
+            # use indexes collected in preprocess_psbt if available
+            used = wallets[w].get("used")
+            if used is not None:
+                w.update_gaps(used_idxs=used)
+            else:
+                w.update_gaps(psbtv=psbtv)
             w.save(self.keystore)
-        sig_count = 0
-        with open(self.tempdir+"/sigs", "wb") as sig_stream:
-            for i in range(psbtv.num_inputs):
-                self.show_loader(title="Signing input %d of %d" % (i+1, psbtv.num_inputs))
-                inp = psbtv.input(i)
-                inp_sighash = sighash or inp.sighash_type or self.DEFAULT_SIGHASH
-                for w in wallets:
-                    if w is None:
-                        continue
-                    # sign with wallet if it has private keys
-                    if w.has_private_keys:
-                        sig_count += w.sign_input(psbtv, i, sig_stream, inp_sighash, inp)
-                # sign with keystore
-                sig_count += self.keystore.sign_input(psbtv, i, sig_stream, inp_sighash, inp)
-                # add separator
-                sig_stream.write(b"\x00")
-        if sig_count == 0:
-            raise WalletError("We didn't add any signatures!\n\nMaybe you forgot to import the wallet?\n\nScan the wallet descriptor to import it.")
-        # remove unnecessary stuff:
-        with open(self.tempdir+"/sigs", "rb") as sig_stream:
-            psbtv.write_to(out_stream, compress=CompressMode.PARTIAL, extra_input_streams=[sig_stream])
 
+    def can_sign(self, psbtv, wallets):
+        """
+        Checks if we may have something to sign before anything is written:
+        an input of a wallet we have keys for or an input with our fingerprint
+        """
+        for w in wallets:
+            if w is not None and not w.is_watchonly:
+                return True
+        fingerprint = self.keystore.fingerprint
+        for i in range(psbtv.num_inputs):
+            inp = psbtv.input(i)
+            for der in inp.bip32_derivations.values():
+                if der.fingerprint == fingerprint:
+                    return True
+            for _, der in getattr(inp, "taproot_bip32_derivations", {}).values():
+                if der.fingerprint == fingerprint:
+                    return True
+        return False
+
+    def sign_inputs(self, psbtv, wallets, sighash, sig_count):
+        """
+        Generator of serialized signatures of every input (separator included),
+        adds number of signatures to sig_count[0]
+        """
+        for i in range(psbtv.num_inputs):
+            sig_stream = BytesIO()
+            self.show_loader(title="Signing input %d of %d" % (i+1, psbtv.num_inputs))
+            inp = psbtv.input(i)
+            inp_sighash = sighash or inp.sighash_type or self.DEFAULT_SIGHASH
+            for w in wallets:
+                if w is None:
+                    continue
+                # sign with wallet if it has private keys
+                if w.has_private_keys:
+                    sig_count[0] += w.sign_input(psbtv, i, sig_stream, inp_sighash, inp)
+            # sign with keystore
+            sig_count[0] += self.keystore.sign_input(psbtv, i, sig_stream, inp_sighash, inp)
+            # add separator
+            sig_stream.write(b"\x00")
+            yield sig_stream.getvalue()
 
     def wipe(self):
         """Deletes all wallets info"""
-        self.wallets = []
+        self.manifest = []
+        self._loaded = {}
+        self.index = WalletIndex()
+        self._scanner = None
         self.path = None
         platform.delete_recursively(self.root_path)
@@ -0,0 +1,73 @@
+class AddressScanner:
+    """
+    Finds wallet, branch and index of a script_pubkey
+    by deriving address windows of all wallets.
+
+    Every branch of every wallet is scanned in [0, gap + extra),
+    in steps of STEP addresses, lower indexes of all wallets first.
+    Script_pubkeys are kept in a dict keyed by the last bytes
+    of the script (hash part), so lookups of addresses that were
+    already scanned don't derive anything. Wallets take them from
+    their index (Wallet.index_keys) if it's loaded from flash.
+    Hits are not verified - compare the address of the result.
+    """
+
+    STEP = 10
+    # bytes of script_pubkey used as a key (at least 8 bytes of the hash),
+    # not more than Wallet.INDEX_KEY_LEN
+    KEY_LEN = 10
+
+    def __init__(self, wallets=(), extra=20):
+        self.extra = extra
+        self.wallets = []
+        # {key: (wallet, branch_index, idx)}
+        self._spks = {}
+        # {id(wallet): [next index to derive per branch]}
+        self._next = {}
+        for w in wallets:
+            self.add(w)
+
+    def add(self, w):
+        self.wallets.append(w)
+        self._next[id(w)] = [0] * w.descriptor.num_branches
+
+    def remove(self, w):
+        """Removes the wallet and its script_pubkeys"""
+        self.wallets = [ww for ww in self.wallets if ww is not w]
+        self._next.pop(id(w), None)
+        self._spks = {k: v for k, v in self._spks.items() if v[0] is not w}
+
+    def _key(self, data):
+        return bytes(data[-self.KEY_LEN:])
+
+    def _extend(self):
+        """Derives next STEP addresses of every branch, returns False if all are scanned"""
+        extended = False
+        for w in self.wallets:
+            nxt = self._next[id(w)]
+            for branch_index, start in enumerate(nxt):
+                end = min(start + self.STEP, w.gaps[branch_index] + self.extra)
+                if end <= start:
+                    continue
+                idx = start
+                for index_key in w.index_keys(start, end, branch_index):
+                    key = self._key(index_key)
+                    if key not in self._spks:
+                        self._spks[key] = (w, branch_index, idx)
+                    idx += 1
+                nxt[branch_index] = end
+                extended = True
+        return extended
+
+    def lookup(self, script_pubkey):
+        """Returns (wallet, branch_index, idx) owning script_pubkey or None"""
+        key = self._key(script_pubkey.data)
+        while True:
+            res = self._spks.get(key)
+            if res is not None:
+                return res
+            if not self._extend():
+                return None
+
+    def __len__(self):
+        return len(self._spks)
@@ -2,16 +2,19 @@ from app import AppError
 import platform
 from platform import maybe_mkdir, delete_recursively
 import json
-from embit import ec, hashes
+from collections import OrderedDict
+from io import BytesIO
+from embit import ec, hashes, compact
 from embit.networks import NETWORKS
 from embit.psbt import DerivationPath
 from embit.descriptor import Descriptor
 from embit.descriptor.checksum import add_checksum
-from embit.descriptor.arguments import AllowedDerivation
+from embit.descriptor.arguments import AllowedDerivation, KeyOrigin
 from embit.transaction import SIGHASH
 from .screens import WalletScreen, WalletInfoScreen
 from .commands import DELETE, EDIT, MENU, INFO, EXPORT
 from gui.screens import Menu, QRAlert, Alert, Prompt
+from helpers import IterReader
 import lvgl as lv
 
 class WalletError(AppError):
@@ -21,6 +24,12 @@ class WalletError(AppError):
 class Wallet:
 
     GAP_LIMIT = 20
+    # derived descriptors kept per wallet (LRU)
+    DERIVE_CACHE_SIZE = 16
+    # script_pubkeys indexed after the gap limit, None disables the index
+    INDEX_EXTRA = 20
+    # bytes of script_pubkey stored in the index (hash part)
+    INDEX_KEY_LEN = 20
     DescriptorClass = Descriptor
     Networks = NETWORKS
 
@@ -37,8 +46,190 @@ class Wallet:
         self.unused_recv = 0
         self.keystore = None
 
+    @property
+    def descriptor(self):
+        return self._descriptor
+
+    @descriptor.setter
+    def descriptor(self, desc):
+        self._descriptor = desc
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Drops cached branch and child descriptors"""
+        # {branch_index: branch descriptor with keys derived to the branch node}
+        self._branches = {}
+        # {(branch_index, idx): [derived descriptor, script_pubkey or None]}
+        self._derived = OrderedDict()
+        # {branch_index: index keys of script_pubkeys 0..n-1 concatenated}
+        self._spk_index = {}
+        # {branch_index: length of the index on flash}
+        self._spk_index_saved = {}
+
+    def _branch_descriptor(self, branch_index):
+        """
+        Descriptor of one branch with every xpub derived down to the
+        branch node (e.g. xpub/1 for change), so deriving a child
+        takes a single derivation step per key.
+        Derived children are the same as from self.descriptor.derive().
+        """
+        desc = self._branches.get(branch_index)
+        if desc is not None:
+            return desc
+        # branch() creates new key objects, we can modify them
+        desc = self.descriptor.branch(branch_index)
+        for k in desc.keys:
+            if not k.is_extended or k.allowed_derivation is None:
+                continue
+            indexes = k.allowed_derivation.indexes
+            # fixed unhardened indexes before the wildcard
+            n = 0
+            while n < len(indexes) and isinstance(indexes[n], int) and indexes[n] < 0x80000000:
+                n += 1
+            if n == 0:
+                continue
+            prefix = indexes[:n]
+            if k.origin is None:
+                # Key.derive() uses fingerprint of the xpub itself as origin
+                k.origin = KeyOrigin(k.key.my_fingerprint, [])
+            k.origin = KeyOrigin(k.origin.fingerprint, k.origin.derivation + prefix)
+            k.key = k.key.derive(prefix)
+            k.allowed_derivation = AllowedDerivation(indexes[n:]) if n < len(indexes) else None
+        self._branches[branch_index] = desc
+        return desc
+
+    def _cached(self, idx, branch_index):
+        """Cache entry [derived descriptor, script_pubkey or None] for the child"""
+        cache = self._derived
+        key = (branch_index, idx)
+        if key in cache:
+            # move to most-recently-used position
+            entry = cache.pop(key)
+            cache[key] = entry
+            return entry
+        entry = [self._branch_descriptor(branch_index).derive(idx), None]
+        while len(cache) >= self.DERIVE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[key] = entry
+        return entry
+
+    def derive(self, idx, branch_index=0):
+        """Same as self.descriptor.derive(idx, branch_index), but cached"""
+        return self._cached(idx, branch_index)[0]
+
+    def _script_pubkey(self, idx, branch_index=0):
+        entry = self._cached(idx, branch_index)
+        if entry[1] is None:
+            entry[1] = entry[0].script_pubkey()
+            self._index_append(idx, branch_index, entry[1])
+        return entry[1]
+
+    def _index_key(self, script_pubkey):
+        return script_pubkey.data[-self.INDEX_KEY_LEN:]
+
+    def _index_entry(self, idx, branch_index):
+        """Index key of the script_pubkey or None if it's not indexed"""
+        table = self._spk_index.get(branch_index)
+        n = self.INDEX_KEY_LEN
+        if table is None or (idx + 1) * n > len(table):
+            return None
+        return bytes(table[idx * n:(idx + 1) * n])
+
+    def _index_append(self, idx, branch_index, script_pubkey):
+        """Adds script_pubkey to the index if it's the next one"""
+        if self.INDEX_EXTRA is None or idx >= self.gaps[branch_index] + self.INDEX_EXTRA:
+            return
+        table = self._spk_index.get(branch_index)
+        if table is None:
+            table = bytearray()
+            self._spk_index[branch_index] = table
+        if len(table) == idx * self.INDEX_KEY_LEN:
+            table.extend(self._index_key(script_pubkey))
+
+    def index_keys(self, start, end, branch_index=0):
+        """
+        Yields index keys (last INDEX_KEY_LEN bytes of script_pubkey)
+        of addresses start..end-1 of the branch.
+        Taken from the index if possible, otherwise derived from
+        the cached branch keys (without filling the LRU) and indexed.
+        """
+        desc = None
+        for idx in range(start, end):
+            key = self._index_entry(idx, branch_index)
+            if key is None:
+                if desc is None:
+                    desc = self._branch_descriptor(branch_index)
+                sc = desc.derive(idx).script_pubkey()
+                self._index_append(idx, branch_index, sc)
+                key = self._index_key(sc)
+            yield key
+
+    @property
+    def index_changed(self):
+        """True if the index has entries that are not saved yet"""
+        return any(
+            len(table) != self._spk_index_saved.get(b, 0)
+            for b, table in self._spk_index.items()
+        )
+
+    def _index_adata(self):
+        # binds the index to the descriptor
+        return b"spks" + hashes.sha256(str(self.descriptor).encode())
+
+    def save_index(self, keystore):
+        """Saves script_pubkey index next to the descriptor, encrypted and authenticated"""
+        if self.path is None:
+            raise WalletError("Path is not defined")
+        saved = {}
+
+        def chunks():
+            for b in range(self.descriptor.num_branches):
+                table = self._spk_index.get(b, b"")
+                saved[b] = len(table)
+                yield compact.to_bytes(len(table) // self.INDEX_KEY_LEN)
+                yield table
+
+        # tables are encrypted in chunks, without a copy of the whole index
+        keystore.save_aead_stream(self.path + "/index", IterReader(chunks()), adata=self._index_adata())
+        self._spk_index_saved = saved
+
+    def load_index(self, keystore):
+        """
+        Loads index saved with save_index.
+        Missing, tampered or other wallet's index is ignored
+        and rebuilt when addresses are derived.
+        """
+        try:
+            adata, data = keystore.load_aead(self.path + "/index")
+        except Exception:
+            return False
+        if adata != self._index_adata():
+            return False
+        s = BytesIO(data)
+        index = {}
+        for b in range(self.descriptor.num_branches):
+            l = compact.read_from(s) * self.INDEX_KEY_LEN
+            table = s.read(l)
+            if len(table) != l:
+                return False
+            index[b] = bytearray(table)
+        self._spk_index = index
+        self._spk_index_saved = {b: len(table) for b, table in index.items()}
+        return True
+
+    def precompute(self, idx=None, branch_index=0, before=1, after=1):
+        """
+        Derives addresses around idx (unused_recv by default)
+        so next / previous address is taken from the cache.
+        """
+        if idx is None:
+            idx = self.unused_recv
+        for i in range(max(idx - before, 0), min(idx + after + 1, 0x80000000)):
+            self._script_pubkey(i, branch_index)
+
     async def show(self, network, show_screen):
         while True:
+            self.precompute()
             scr = WalletScreen(self, network, idx=self.unused_recv)
             cmd = await show_screen(scr)
             if cmd == MENU:
@@ -119,6 +310,9 @@ class Wallet:
         obj = {"gaps": self.gaps, "name": self.name, "unused_recv": self.unused_recv}
         meta = json.dumps(obj).encode()
         keystore.save_aead(self.path + "/meta", plaintext=meta)
+        # index is saved to a new path even if it didn't change
+        if self.INDEX_EXTRA is not None and (path is not None or self.index_changed):
+            self.save_index(keystore)
 
     def check_network(self, network):
         """
@@ -150,14 +344,15 @@ class Wallet:
             raise WalletError("Invalid branch index %d - can be between 0 and %d" % (branch_index, self.descriptor.num_branches))
         if idx < 0 or idx >= 0x80000000:
             raise WalletError("Invalid index %d" % idx)
-        return self.descriptor.derive(idx, branch_index=branch_index), self.gaps[branch_index]
+        return self.derive(idx, branch_index), self.gaps[branch_index]
 
     def script_pubkey(self, derivation: list):
         """Returns script_pubkey and gap limit"""
         # derivation can be only two elements
         branch_idx, idx = derivation
-        desc, gap = self.get_descriptor(idx, branch_idx)
-        return desc.script_pubkey(), gap
+        # validates indexes
+        self.get_descriptor(idx, branch_idx)
+        return self._script_pubkey(idx, branch_idx), self.gaps[branch_idx]
 
     @property
     def fingerprint(self):
@@ -167,8 +362,30 @@ class Wallet:
     def owns(self, psbt_scope):
         """
         Checks that psbt scope belongs to the wallet.
+        Same as Descriptor.owns, but uses cached script_pubkeys.
         """
-        return self.descriptor.owns(psbt_scope)
+        # we can't check if we don't know script_pubkey
+        if psbt_scope.script_pubkey is None:
+            return False
+        # quick check of script_pubkey type
+        if psbt_scope.script_pubkey.script_type() != self.descriptor.scriptpubkey_type():
+            return False
+        ders = list(psbt_scope.bip32_derivations.values())
+        ders += [der for leafs, der in psbt_scope.taproot_bip32_derivations.values()]
+        for der in ders:
+            for k in self.keys:
+                if not k.is_extended:
+                    continue
+                res = k.check_derivation(der)
+                if res:
+                    idx, branch_idx = res
+                    key = self._index_entry(idx, branch_idx)
+                    if key is not None:
+                        # script type is checked above, the rest is the hash
+                        return key == self._index_key(psbt_scope.script_pubkey)
+                    # if derivation is found but scriptpubkey doesn't match - fail
+                    return self._script_pubkey(idx, branch_idx) == psbt_scope.script_pubkey
+        return False
 
     def get_derivation(self, bip32_derivations={}, taproot_bip32_derivations={}):
         # otherwise we need standard derivation
@@ -181,7 +398,12 @@ class Wallet:
             if der is not None:
                 return der
 
-    def update_gaps(self, psbtv=None, known_idxs=None):
+    def update_gaps(self, psbtv=None, known_idxs=None, used_idxs=None):
+        """
+        Moves gaps after the derivation indexes used by the wallet.
+        used_idxs is a list of max used index per branch (or None),
+        same as scanning psbtv but without parsing the psbt again.
+        """
         gaps = self.gaps
         # update from psbt
         if psbtv is not None:
@@ -193,12 +415,18 @@ class Wallet:
                         idx, branch_idx = res
                         if idx + self.GAP_LIMIT > gaps[branch_idx]:
                             gaps[branch_idx] = idx + self.GAP_LIMIT + 1
+        # update from indexes collected while parsing the psbt
+        if used_idxs is not None:
+            for branch_idx, idx in enumerate(used_idxs):
+                if idx is not None and idx + self.GAP_LIMIT > gaps[branch_idx]:
+                    gaps[branch_idx] = idx + self.GAP_LIMIT + 1
         # update from gaps arg
         if known_idxs is not None:
             for i, gap in enumerate(gaps):
                 if known_idxs[i] is not None and known_idxs[i] + self.GAP_LIMIT > gap:
                     gaps[i] = known_idxs[i] + self.GAP_LIMIT
         self.unused_recv = gaps[0] - self.GAP_LIMIT
+        # address index grows to the new gaps lazily, when addresses are derived
         self.gaps = gaps
 
     def fill_scope(self, scope, fingerprint):
@@ -209,7 +437,7 @@ class Wallet:
         if der is None:
             return False
         idx, branch_idx = der
-        desc = self.descriptor.derive(idx, branch_index=branch_idx)
+        desc = self.derive(idx, branch_idx)
         # find keys with our fingerprint
         for key in desc.keys:
             if key.fingerprint == fingerprint:
@@ -267,7 +495,7 @@ class Wallet:
             if der is None:
                 continue
             idx, branch = der
-            derived = self.descriptor.derive(idx, branch_index=branch)
+            derived = self.derive(idx, branch)
             keys = [k for k in derived.keys if k.is_private]
             for k in keys:
                 if k.is_private:
@@ -282,7 +510,7 @@ class Wallet:
         if der is None:
             return 0
         idx, branch = der
-        derived = self.descriptor.derive(idx, branch_index=branch)
+        derived = self.derive(idx, branch)
         keys = [k for k in derived.keys if k.is_private]
         count = 0
         for k in keys:
@@ -329,6 +557,8 @@ class Wallet:
             w.name = obj["name"]
         if "unused_recv" in obj:
             w.unused_recv = obj["unused_recv"]
+        if w.INDEX_EXTRA is not None:
+            w.load_index(keystore)
         # wallet has access to keystore only if it's saved or loaded from file
         w.keystore = keystore
         return w
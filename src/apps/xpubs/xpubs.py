@@ -5,9 +5,10 @@ import json
 from binascii import hexlify
 from embit.liquid.networks import NETWORKS
 from embit import bip32
-from helpers import is_liquid
+from helpers import is_liquid, BufferedWriter
 from io import BytesIO
 import platform
+import time
 from collections import OrderedDict
 
 class XpubApp(BaseApp):
@@ -23,6 +24,8 @@ class XpubApp(BaseApp):
     button = "Master public keys"
     prefixes = [b"fingerprint", b"xpub"]
     name = "xpub"
+    # min time between loader redraws when exporting many accounts
+    PROGRESS_INTERVAL = 500  # ms
 
     def __init__(self, path):
         self.account = 0
@@ -138,27 +141,60 @@ class XpubApp(BaseApp):
             return True
         return False
 
-    async def save_all_to_sd(self, file_format, account, show_screen):
-
+    def _filename(self, file_format, from_account, to_account=None):
         fingerprint = hexlify(self.keystore.fingerprint).decode()
-
+        if to_account is not None:
+            return "%s-%s-%d-%d.txt" % (file_format, fingerprint, from_account, to_account)
         extension = "txt" if file_format == self.export_specter_diy else "json"
-        filename = "%s-%s-%d-all.%s" % (
-            file_format, fingerprint, account, extension,
-        )
+        return "%s-%s-%d-all.%s" % (file_format, fingerprint, from_account, extension)
+
+    def _progress(self, total):
+        """Returns a callback redrawing the loader at most every PROGRESS_INTERVAL ms"""
+        last = [None]
+
+        def progress(done):
+            now = time.ticks_ms()
+            if last[0] is not None and time.ticks_diff(now, last[0]) < self.PROGRESS_INTERVAL:
+                return
+            last[0] = now
+            self.show_loader(title="Exporting accounts... %d of %d" % (done, total))
+
+        return progress
+
+    async def save_all_to_sd(self, file_format, account, show_screen):
+        filename = self._filename(file_format, account)
+        if await self._export_accounts(file_format, [(filename, [account])], show_screen):
+            return filename
 
+    async def _export_accounts(self, file_format, files, show_screen, progress=None):
+        """
+        Writes accounts to files on the SD card in one mount session.
+        files is a list of (filename, accounts).
+        Returns False if the user didn't want to overwrite existing files.
+        """
         if not platform.sdcard.is_present:
             raise AppError("Please insert SD card")
-
+        done = 0
         with platform.sdcard as sd:
-            if sd.file_exists(filename):
-                confirm = await show_screen(Prompt("Overwrite?", message="File %s already exists on the SD card. Overwrite?" % filename))
+            existing = [fname for fname, _ in files if sd.file_exists(fname)]
+            if existing:
+                if len(existing) == 1:
+                    msg = "File %s already exists on the SD card. Overwrite?" % existing[0]
+                else:
+                    msg = "%d files already exist on the SD card. Overwrite?" % len(existing)
+                confirm = await show_screen(Prompt("Overwrite?", message=msg))
                 if not confirm:
-                    return
-            with sd.open(filename, "w") as f:
-                self._dump_account(f, file_format, account)
-
-        return filename
+                    return False
+            for fname, accounts in files:
+                with sd.open(fname, "w") as f:
+                    # few large writes instead of one per line or json token
+                    with BufferedWriter(f) as writer:
+                        for account in accounts:
+                            self._dump_account(writer, file_format, account)
+                            done += 1
+                            if progress is not None:
+                                progress(done)
+        return True
 
     async def export_multiple_accounts_xpubs(
         self,
@@ -171,39 +207,19 @@ class XpubApp(BaseApp):
             from_account, to_account = to_account, from_account
         if to_account >= 0x80000000:
             raise AppError('Account number too large')
-        fingerprint = hexlify(self.keystore.fingerprint).decode()
+        accounts = range(from_account, to_account+1)
         if file_format == self.export_specter_diy:
             # in our format we can dump any number of accounts in one file
-            filename = "%s-%s-%d-%d.txt" % (
-                file_format, fingerprint, from_account, to_account
-            )
-            with platform.sdcard as sd:
-                if sd.file_exists(filename):
-                    confirm = await show_screen(Prompt("Overwrite?", message="File %s already exists on the SD card. Overwrite?" % filename))
-                    if not confirm:
-                        return
-                with sd.open(filename, "w") as f:
-                    for account in range(from_account, to_account+1):
-                        self.show_loader(title="Exporting account %d..." % account)
-                        self._dump_account(f, file_format, account)
-            await show_screen(
-                Alert(
-                    "Success!",
-                    "File was successfully saved under:\n\n%s" % filename,
-                    button_text="OK",
-                )
-            )
+            filename = self._filename(file_format, from_account, to_account)
+            files = [(filename, accounts)]
+            msg = "File was successfully saved under:\n\n%s" % filename
         else: # cc format - one file per account
-            for account in range(from_account, to_account+1):
-                self.show_loader(title="Exporting account %d..." % account)
-                await self.save_all_to_sd(file_format, account, show_screen)
-            await show_screen(
-                Alert(
-                    "Success!",
-                    "All accounts are saved to corresponding files.",
-                    button_text="OK",
-                )
-            )
+            files = [(self._filename(file_format, account), [account]) for account in accounts]
+            msg = "All accounts are saved to corresponding files."
+        progress = self._progress(len(accounts))
+        if not await self._export_accounts(file_format, files, show_screen, progress):
+            return
+        await show_screen(Alert("Success!", msg, button_text="OK"))
 
     def _dump_account(self, f, file_format, account):
         """dump all keys of one account to a file"""
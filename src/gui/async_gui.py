@@ -147,11 +147,12 @@ class AsyncGUI:
         await alert.result()
 
     async def qr_alert(
-        self, title, msg, qr_msg, qr_width=None, button_text="OK", note=None
+        self, title, msg, qr_msg, qr_width=None, button_text="OK", note=None, autotune=False
     ):
-        """Shows an alert with QR code"""
+        """Shows an alert with QR code, autotune picks density and rate of animated QRs"""
         alert = QRAlert(
-            title, msg, qr_msg, qr_width=qr_width, button_text=button_text, note=note
+            title, msg, qr_msg, qr_width=qr_width, button_text=button_text, note=note,
+            autotune=autotune,
         )
         await self.load_screen(alert)
         return await alert.result()
@@ -3,11 +3,12 @@ import lvqr
 import qrcode
 import math
 import gc
+import time
 import asyncio
 import platform
 
 from io import BytesIO
-from qrencoder import QREncoder
+from qrencoder import QREncoder, FrameCache
 
 qr_style = lv.style_t()
 qr_style.body.main_color = lv.color_hex(0xFFFFFF)
@@ -23,20 +24,44 @@ QR_SIZES = [17, 32, 53, 78, 106, 154, 192, 230, 271, 367, 458, 586, 718, 858]
 BTNSIZE = 70
 
 class QRCode(lv.obj):
-    RATE = 500  # ms
+    RATE = 200  # ms, frames are prepared ahead in the frame cache
+    # frames prepared ahead of playback and max frames in the cache
+    PRECOMPUTE = 4
+    FRAME_CACHE_SIZE = 16
+    # export mode (autotune): density and frame rate are picked
+    # to show all frames in TARGET_TIME ms
+    TARGET_TIME = 6000
+    MIN_RATE = 100  # ms
+    MIN_AUTO_VERSION = 5
+    MAX_AUTO_VERSION = 11
+    # frame time per render time, the rest is left for the scanner
+    RENDER_SHARE = 3
+    # render time estimate before the first frame is measured,
+    # density is picked with it and fixed once the first frame is shown
+    RENDER_TIME = 40  # ms
     FRAME_SIZE = 300
     QR_VERSION = 10
     MIN_SIZE = 300
     MAX_SIZE = QR_SIZES[-1]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, rate=None, autotune=False, **kwargs):
         super().__init__(*args, **kwargs)
         style = lv.style_t()
         lv.style_copy(style, qr_style)
         style.text.font = lv.font_roboto_16
         style.text.color = lv.color_hex(0x192432)
 
+        self.rate = rate or self.RATE
+        self.autotune = autotune
+        self._render_time = self.RENDER_TIME
+        # time to prepare one frame for the cache, ms
+        self._load_time = 0
+        # density is picked for the current encoder
+        self._tuned = False
         self.encoder = None
+        self.frames = None
+        # index of the frame on the screen, None if it has to be redrawn
+        self._shown = None
         self._autoplay = True
 
         self.qr = lvqr.QRCode(self)
@@ -144,31 +169,74 @@ class QRCode(lv.obj):
 
     async def animate(self):
         while True:
+            t0 = time.ticks_ms()
             if self.idx is not None:
-                self.set_frame()
+                # paused or single frame - QR on the screen is up to date
+                if self.idx != self._shown:
+                    self.set_frame()
                 if self._autoplay:
                     self.idx += 1
                 if not (self.encoder and self.encoder.is_infinite):
                     self.idx = self.idx % self.frame_num
-            await asyncio.sleep_ms(self.RATE)
+            # frame is on the screen, prepare next frames one by one
+            # in the rest of the frame time, other tasks run in between
+            while self.idx is not None and self.frames is not None:
+                t1 = time.ticks_ms()
+                if time.ticks_diff(t1, t0) + self._load_time > self.rate:
+                    break
+                if not self.frames.prefetch(self.idx, self.PRECOMPUTE):
+                    break
+                self._load_time = time.ticks_diff(time.ticks_ms(), t1)
+                await asyncio.sleep_ms(0)
+            dt = time.ticks_diff(time.ticks_ms(), t0)
+            await asyncio.sleep_ms(max(self.rate - dt, 0))
+
+    def set_density(self, version):
+        self.version = version
+        if self.idx is not None:
+            self.idx = 0
+        if self.encoder:
+            self.encoder.part_len = QR_SIZES[self.version]
+            self.frame_num = len(self.encoder)
+            self.frames.clear()
+            self._shown = None
+
+    def tune(self):
+        """
+        Picks frame rate and density from the data size and render time.
+        Density is picked once before the first frame: it defines the number
+        of parts, and the scanner rejects parts with a different count.
+        """
+        self.rate = max(self.MIN_RATE, self.RENDER_SHARE * self._render_time)
+        if self._tuned:
+            # frames are on the screen already, only the rate can change
+            return
+        version = self.MAX_AUTO_VERSION
+        for v in range(self.MIN_AUTO_VERSION, self.MAX_AUTO_VERSION):
+            if self.encoder.frames_for(QR_SIZES[v]) * self.rate <= self.TARGET_TIME:
+                version = v
+                break
+        # encoder starts with its own part_len
+        self.set_density(version)
+        self._tuned = True
+
+    @property
+    def transfer_time(self):
+        """Expected time to show all frames in ms"""
+        if self.encoder is None:
+            return 0
+        return self.encoder.frames_for(QR_SIZES[self.version]) * self.rate
 
     def on_plus(self, obj, event):
         if event == lv.EVENT.RELEASED and (self.version + 1) < len(QR_SIZES):
-            self.version += 1
-            if self.idx is not None:
-                self.idx = 0
-            if self.encoder:
-                self.encoder.part_len = QR_SIZES[self.version]
-                self.frame_num = len(self.encoder)
+            # user knows better
+            self.autotune = False
+            self.set_density(self.version + 1)
 
     def on_minus(self, obj, event):
         if event == lv.EVENT.RELEASED and self.version > 0:
-            self.version -= 1
-            if self.idx is not None:
-                self.idx = 0
-            if self.encoder:
-                self.encoder.part_len = QR_SIZES[self.version]
-                self.frame_num = len(self.encoder)
+            self.autotune = False
+            self.set_density(self.version - 1)
 
     def on_pause(self, obj, event):
         if event == lv.EVENT.RELEASED:
@@ -180,6 +248,7 @@ class QRCode(lv.obj):
             if not self._text: # can't stop
                 return
             self.idx = None
+            self._shown = None
             self._set_text(self._text)
             self.check_controls()
 
@@ -223,6 +292,8 @@ class QRCode(lv.obj):
         super().set_size(width, height)
         self.qr.set_size(width-10)
         self.qr.align(self, lv.ALIGN.CENTER, 0, -100 if height==800 else 0)
+        # redraw the frame with the new size
+        self._shown = None
         self.update_note()
 
     @property
@@ -247,13 +318,17 @@ class QRCode(lv.obj):
         if platform.simulator and self._text != text:
             print("QR on screen:", text)
         self.encoder = None
+        self.frames = None
+        self._shown = None
         self._text = text
         if isinstance(text, QREncoder):
             self.encoder = text
+            self.frames = FrameCache(text, self.FRAME_CACHE_SIZE)
             self._text = text.get_full(self.MAX_SIZE)
             self.frame_num = len(self.encoder)
             if not self._text: # we can't get full data in one QR
                 self.idx = 0
+                self._tuned = False
                 self.set_frame()
                 self._autoplay = True
                 return
@@ -263,14 +338,26 @@ class QRCode(lv.obj):
 
     def set_frame(self):
         if self.encoder:
-            payload = self.encoder[self.idx]
+            if self.autotune:
+                # picks density before the first frame, then the rate
+                self.tune()
+            payload = self.frames[self.idx]
+            t0 = time.ticks_ms()
             self._set_text(payload)
+            # moving average of render time
+            dt = time.ticks_diff(time.ticks_ms(), t0)
+            self._render_time = (3 * self._render_time + dt) // 4
+            self._shown = self.idx
             if self.encoder.is_infinite:
                 note = ""
             else:
                 frameCount = len(self.encoder)
                 currentFrame = self.idx + 1
                 note = "Part %d of %d." % (currentFrame, frameCount)
+            if self.autotune:
+                note += " Density %d, %d ms per frame, ~%d s." % (
+                    self.version, self.rate, math.ceil(self.transfer_time / 1000)
+                )
         else:
             self._set_text(self._text)
             note = ""
@@ -7,7 +7,8 @@ class Progress(Alert):
     """
     Shows progress (rotating thingy), also can show
     percentage of the progress or checkboxes for parts of QR code
-    Use tick() to rotate, set_progress(float or list) to set progress
+    Use tick() to rotate, set_progress(float or list) to set progress,
+    optionally with estimated number of frames left
     """
 
     def __init__(self, title, message, button_text="Cancel"):
@@ -27,7 +28,7 @@ class Progress(Alert):
         self.end = (self.end - d) % 360
         self.arc.set_angles(self.start, self.end)
 
-    def set_progress(self, val):
+    def set_progress(self, val, frames_left=None):
         txt = ""
         if isinstance(val, list):
             ok = "#00F100 " + lv.SYMBOL.OK + " # "
@@ -35,4 +36,6 @@ class Progress(Alert):
             txt = " ".join([ok if e else no for e in val])
         elif val > 0:
             txt = "%d%%" % int(val * 100)
+        if frames_left:
+            txt += "\n~%d frame%s left" % (frames_left, "" if frames_left == 1 else "s")
         self.progress.set_text(txt)
@@ -63,7 +63,7 @@ class SpecterGUI(AsyncGUI):
         while host.in_progress and scr.waiting:
             await asyncio.sleep_ms(30)
             scr.tick(5)
-            scr.set_progress(host.progress)
+            scr.set_progress(host.progress, host.frames_left)
         if host.in_progress:
             host.abort()
         if scr.waiting:
@@ -71,14 +71,7 @@ def aead_encrypt(key: bytes, adata: bytes = b"", plaintext: bytes = b"") -> byte
     Encrypts and authenticates with associated data using key k.
     output format: <compact-len:associated data><iv><ct><hmac>
     """
-    aes_key = tagged_hash("aes", key)
-    hmac_key = tagged_hash("hmac", key)
-    data = compact.to_bytes(len(adata)) + adata
-    # if there is not ct - just add hmac
-    if len(plaintext) > 0:
-        data += encrypt(plaintext, aes_key)
-    mac = hmac.new(hmac_key, data, digestmod="sha256").digest()
-    return data + mac
+    return AEADContext(key).encrypt(adata, plaintext)
 
 
 def aead_decrypt(ciphertext: bytes, key: bytes) -> tuple:
@@ -87,22 +80,7 @@ def aead_decrypt(ciphertext: bytes, key: bytes) -> tuple:
     Inverse to aead_encrypt
     Returns a tuple adata, plaintext
     """
-    mac = ciphertext[-32:]
-    ct = ciphertext[:-32]
-
-    aes_key = tagged_hash("aes", key)
-    hmac_key = tagged_hash("hmac", key)
-    if mac != hmac.new(hmac_key, ct, digestmod="sha256").digest():
-        raise Exception("Invalid HMAC")
-    b = BytesIO(ct)
-    l = compact.read_from(b)
-    adata = b.read(l)
-    if len(adata) != l:
-        raise Exception("Invalid length")
-    ct = b.read()
-    if len(ct) == 0:
-        return adata, b""
-    return adata, decrypt(ct, aes_key)
+    return AEADContext(key).decrypt(ciphertext)
 
 
 def load_apps(module="apps", whitelist=None, blacklist=None):
@@ -123,28 +101,524 @@ def load_apps(module="apps", whitelist=None, blacklist=None):
             print("Failed loading app:", modname)
     return apps
 
-def a2b_base64_stream(sin, sout):
+# Default buffer size of the stream helpers below.
+# Large enough to amortize per-call overhead of file reads on QSPI / SD,
+# small enough to not matter for the heap.
+CHUNK_SIZE = 512
+_WHITESPACE = b" \t\r\n"
+
+
+def _readinto(s, mv):
+    """readinto() for streams that only implement read()"""
+    if hasattr(s, "readinto"):
+        return s.readinto(mv) or 0
+    chunk = s.read(len(mv))
+    mv[:len(chunk)] = chunk
+    return len(chunk)
+
+
+class BufferedReader:
+    """
+    Reads a stream in chunks through one reusable buffer.
+
+    Parsing helpers (read_until, seek_to, peek) work on the buffer instead
+    of calling s.read(1) for every byte. As the reader reads ahead, the
+    underlying stream is ahead of the logical position - use the reader
+    for all reads, or call sync() before touching the stream directly.
+    """
+
+    def __init__(self, s, chunk_size=CHUNK_SIZE):
+        self.s = s
+        self.buf = bytearray(chunk_size)
+        self.mv = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+
+    def _fill(self):
+        """Refill the buffer if empty, returns number of buffered bytes"""
+        if self.start == self.end:
+            self.start = 0
+            self.end = _readinto(self.s, self.mv)
+        return self.end - self.start
+
+    def peek(self, n=1):
+        """Returns up to n next bytes without consuming them (n <= chunk size)"""
+        if self.end - self.start < n:
+            # move the rest to the front and top up
+            rest = self.end - self.start
+            self.buf[:rest] = bytes(self.mv[self.start:self.end])
+            self.start = 0
+            self.end = rest
+            while self.end < n:
+                l = _readinto(self.s, self.mv[self.end:])
+                if l == 0:
+                    break
+                self.end += l
+        return bytes(self.mv[self.start:min(self.end, self.start + n)])
+
+    def read(self, n=-1):
+        """Reads n bytes (everything if n < 0)"""
+        res = b""
+        while n < 0 or len(res) < n:
+            avail = self._fill()
+            if avail == 0:
+                break
+            if n >= 0:
+                avail = min(avail, n - len(res))
+            res += self.mv[self.start:self.start + avail]
+            self.start += avail
+        return res
+
+    def readinto(self, b):
+        """Reads into buffer b, returns number of bytes read"""
+        mv = memoryview(b)
+        total = 0
+        while total < len(mv):
+            avail = self._fill()
+            if avail == 0:
+                break
+            avail = min(avail, len(mv) - total)
+            mv[total:total + avail] = self.mv[self.start:self.start + avail]
+            self.start += avail
+            total += avail
+        return total
+
+    def _find(self, chars, end):
+        """Index of the first of chars in buf[start:end] or -1"""
+        # bytearray has no find() on MicroPython - one copy per chunk
+        data = bytes(self.mv[self.start:end])
+        idx = -1
+        for c in chars:
+            i = data.find(bytes([c]))
+            if i >= 0 and (idx < 0 or i < idx):
+                idx = i
+        return idx if idx < 0 else self.start + idx
+
+    def read_until(self, chars=b"\n\r", max_len=100, return_on_max_len=False):
+        """
+        Reads until one of the chars, same contract as helpers.read_until:
+        returns (data, char), (data, None) at the end of the stream or
+        (data or None, None) if more than max_len bytes come before the char.
+        """
+        res = b""
+        while True:
+            if self._fill() == 0:
+                return res, None
+            # never look further than max_len+1 bytes
+            end = min(self.end, self.start + max_len + 1 - len(res))
+            idx = self._find(chars, end)
+            if idx >= 0:
+                res += self.mv[self.start:idx]
+                self.start = idx + 1
+                return res, bytes([self.buf[idx]])
+            res += self.mv[self.start:end]
+            self.start = end
+            if len(res) > max_len:
+                return res if return_on_max_len else None, None
+
+    def seek_to(self, chars=b"\n"):
+        """Skips until one of the chars, returns (bytes skipped incl. char, char)"""
+        off = 0
+        while True:
+            if self._fill() == 0:
+                return off, None
+            idx = self._find(chars, self.end)
+            if idx >= 0:
+                off += idx + 1 - self.start
+                self.start = idx + 1
+                return off, bytes([self.buf[idx]])
+            off += self.end - self.start
+            self.start = self.end
+
+    def copy_to(self, fout, limit=None):
+        """Writes the rest of the stream (or limit bytes) to fout, returns bytes written"""
+        total = 0
+        while limit is None or total < limit:
+            avail = self._fill()
+            if avail == 0:
+                break
+            if limit is not None:
+                avail = min(avail, limit - total)
+            total += fout.write(self.mv[self.start:self.start + avail])
+            self.start += avail
+        return total
+
+    def sync(self):
+        """Moves the underlying stream back to the logical position"""
+        if self.end > self.start:
+            self.s.seek(self.start - self.end, 1)
+        self.start = self.end = 0
+        return self.s
+
+
+def copy(fin, fout, limit=None, chunk_size=CHUNK_SIZE):
+    """Copies fin to fout (up to limit bytes) through one buffer, returns bytes written"""
+    if isinstance(fin, BufferedReader):
+        return fin.copy_to(fout, limit)
+    buf = bytearray(chunk_size)
+    mv = memoryview(buf)
+    total = 0
+    while limit is None or total < limit:
+        n = chunk_size if limit is None else min(chunk_size, limit - total)
+        l = _readinto(fin, mv[:n])
+        if l == 0:
+            break
+        total += fout.write(mv[:l])
+    return total
+
+
+def _readinto_full(s, mv):
+    """Fills mv unless the stream ends (streams may return short reads)"""
+    total = 0
+    while total < len(mv):
+        l = _readinto(s, mv[total:])
+        if l == 0:
+            break
+        total += l
+    return total
+
+
+def a2b_base64_stream(sin, sout, chunk_size=CHUNK_SIZE):
+    """Decodes base64 from sin to sout, returns number of bytes written"""
+    chunk_size -= chunk_size % 4 # whole base64 quads
+    buf = bytearray(chunk_size)
+    mv = memoryview(buf)
     l = 0
     while True:
-        chunk = sin.read(64).strip() # 16 chunks 4 chars each
-        if len(chunk) == 0:
+        end = _readinto_full(sin, mv)
+        start = 0
+        # strip whitespace (trailing newline)
+        while start < end and buf[start] in _WHITESPACE:
+            start += 1
+        while end > start and buf[end - 1] in _WHITESPACE:
+            end -= 1
+        if end == start:
             break
-        l += sout.write(a2b_base64(chunk))
+        l += sout.write(a2b_base64(mv[start:end]))
     return l
 
-def b2a_base64_stream(sin, sout):
+def b2a_base64_stream(sin, sout, chunk_size=CHUNK_SIZE):
+    """Encodes sin to base64 without newlines, returns number of chars written"""
+    chunk_size -= chunk_size % 3 # whole base64 triplets
+    buf = bytearray(chunk_size)
+    mv = memoryview(buf)
     l = 0
     while True:
-        chunk = sin.read(48) # 16 chunks 3 bytes each
-        if len(chunk) == 0:
+        n = _readinto_full(sin, mv)
+        if n == 0:
             break
-        l += sout.write(b2a_base64(chunk).strip())
+        l += sout.write(b2a_base64(mv[:n]).strip())
     return l
 
+class Base64Reader:
+    """
+    Read-only seekable view of base64 data in a seekable stream,
+    only the part that is read is decoded (CHUNK_SIZE window).
+
+    Byte p of the decoded data is in the base64 quad p // 3, so
+    the data must be contiguous - whitespace is allowed only at the end.
+    Raises ValueError otherwise and rewinds the stream,
+    use a2b_base64_stream in this case.
+    """
+
+    def __init__(self, s, chunk_size=CHUNK_SIZE):
+        self.s = s
+        self.chunk_size = chunk_size - chunk_size % 4 # whole base64 quads
+        self.start = s.tell()
+        # one read-only pass: find the end of the data, check for line breaks
+        chars = 0
+        tail = False
+        while True:
+            chunk = s.read(self.chunk_size)
+            if not chunk:
+                break
+            data = chunk.rstrip(_WHITESPACE)
+            if (data and tail) or any(c in data for c in (b" ", b"\t", b"\r", b"\n")):
+                s.seek(self.start)
+                raise ValueError("Whitespace in base64 data")
+            chars += len(data)
+            tail = len(data) < len(chunk)
+        if chars % 4 != 0:
+            s.seek(self.start)
+            raise ValueError("Invalid base64 length")
+        pad = 0
+        if chars > 0:
+            s.seek(self.start + chars - 2)
+            pad = s.read(2).count(b"=")
+        self.chars = chars
+        self.size = chars // 4 * 3 - pad
+        self.pos = 0
+        # decoded window and its offset
+        self.buf = b""
+        self.buf_start = 0
+
+    def _load(self):
+        """Decodes the window starting at the quad with current position"""
+        quad = self.pos // 3
+        self.s.seek(self.start + quad * 4)
+        self.buf = a2b_base64(self.s.read(min(self.chunk_size, self.chars - quad * 4)))
+        self.buf_start = quad * 3
+
+    def read(self, n=-1):
+        """Reads n decoded bytes (everything if n < 0)"""
+        if n < 0 or self.pos + n > self.size:
+            n = max(self.size - self.pos, 0)
+        res = b""
+        while len(res) < n:
+            off = self.pos - self.buf_start
+            if off < 0 or off >= len(self.buf):
+                self._load()
+                off = self.pos - self.buf_start
+            chunk = self.buf[off:off + n - len(res)]
+            res += chunk
+            self.pos += len(chunk)
+        return res
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        self.pos = max(offset, 0)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+
+class Base64Writer:
+    """
+    Encodes everything written to it as base64 (without newlines)
+    to stream s in CHUNK_SIZE pieces. close() writes the last padded
+    quad, closing s is up to the caller.
+    """
+
+    def __init__(self, s, chunk_size=CHUNK_SIZE):
+        self.s = s
+        self.chunk_size = chunk_size - chunk_size % 3 # whole base64 triplets
+        self.buf = bytearray()
+        self.written = 0
+
+    def _encode(self, n):
+        self.written += self.s.write(b2a_base64(self.buf[:n]).strip())
+        self.buf = self.buf[n:]
+
+    def write(self, data):
+        self.buf += data
+        if len(self.buf) >= self.chunk_size:
+            self._encode(len(self.buf) - len(self.buf) % 3)
+        return len(data)
+
+    def close(self):
+        if self.buf:
+            self._encode(len(self.buf))
+
+
+class BufferedWriter:
+    """
+    Collects small writes (json.dump writes every token separately)
+    and passes them to stream s in pieces of at least chunk_size.
+    Works with text and binary streams, flush() writes the rest.
+    """
+
+    def __init__(self, s, chunk_size=CHUNK_SIZE):
+        self.s = s
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.parts:
+            # "" or b"" depending on the stream
+            self.s.write(self.parts[0][:0].join(self.parts))
+        self.parts = []
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+
+class IterReader:
+    """
+    Readable stream over an iterator of byte chunks,
+    lets a generator feed a parser that reads from a stream.
+    The next chunk is pulled only when the current one is consumed.
+    """
+
+    def __init__(self, chunks):
+        self.it = iter(chunks)
+        self.buf = b""
+        self.off = 0
+
+    def read(self, n=-1):
+        res = b""
+        while n < 0 or len(res) < n:
+            if self.off >= len(self.buf):
+                try:
+                    self.buf = next(self.it)
+                except StopIteration:
+                    break
+                self.off = 0
+                continue
+            end = len(self.buf) if n < 0 else self.off + n - len(res)
+            chunk = self.buf[self.off:end]
+            res += chunk
+            self.off += len(chunk)
+        return res
+
+class AEADContext:
+    """
+    aead_encrypt / aead_decrypt with subkeys derived once for the key.
+
+    Data is encrypted and decrypted between streams in chunks
+    and MACed incrementally, so big files are never kept in RAM.
+    The format is the same as of aead_encrypt:
+    <compact-len:associated data><iv><ct><hmac>
+    """
+
+    def __init__(self, key):
+        self.aes_key = bytearray(tagged_hash("aes", key))
+        self.hmac_key = bytearray(tagged_hash("hmac", key))
+
+    def wipe(self):
+        """Zeroises subkeys, the context can't be used after that"""
+        for k in [self.aes_key, self.hmac_key]:
+            for i in range(len(k)):
+                k[i] = 0
+
+    def _mac(self):
+        return hmac.new(bytes(self.hmac_key), digestmod="sha256")
+
+    def encrypt_stream(self, fin, fout, adata=b"", chunk_size=CHUNK_SIZE):
+        """Encrypts plaintext from fin to fout, returns bytes written"""
+        chunk_size -= chunk_size % AES_BLOCK
+        mac = self._mac()
+        header = compact.to_bytes(len(adata)) + adata
+        mac.update(header)
+        total = fout.write(header)
+        # room for padding
+        buf = bytearray(chunk_size + AES_BLOCK)
+        mv = memoryview(buf)
+        l = _readinto_full(fin, mv[:chunk_size])
+        # if there is not ct - just add hmac
+        if l > 0:
+            iv = rng.get_random_bytes(IV_SIZE)
+            crypto = aes(bytes(self.aes_key), AES_CBC, iv)
+            mac.update(iv)
+            total += fout.write(iv)
+            while True:
+                last = l < chunk_size
+                if last:
+                    # bit padding 0x80 0x00...
+                    buf[l] = 0x80
+                    end = l + 1 + (-(l + 1)) % AES_BLOCK
+                    mv[l + 1:end] = bytes(end - l - 1)
+                    l = end
+                ct = crypto.encrypt(mv[:l])
+                mac.update(ct)
+                total += fout.write(ct)
+                if last:
+                    break
+                l = _readinto_full(fin, mv[:chunk_size])
+        total += fout.write(mac.digest())
+        return total
+
+    def decrypt_stream(self, fin, fout, chunk_size=CHUNK_SIZE):
+        """
+        Decrypts data from fin (seekable, till the end) to fout,
+        returns associated data.
+        The MAC is checked in a separate pass before anything
+        is decrypted, so a tampered file only fails with "Invalid HMAC".
+        """
+        chunk_size -= chunk_size % AES_BLOCK
+        start = fin.tell()
+        end = fin.seek(0, 2) - 32
+        if end <= start:
+            raise Exception("Invalid length")
+        fin.seek(end)
+        tag = fin.read(32)
+        fin.seek(start)
+        buf = bytearray(chunk_size)
+        mv = memoryview(buf)
+        mac = self._mac()
+        left = end - start
+        while left > 0:
+            l = _readinto_full(fin, mv[:min(chunk_size, left)])
+            if l == 0:
+                raise Exception("Invalid length")
+            mac.update(mv[:l])
+            left -= l
+        if mac.digest() != tag:
+            raise Exception("Invalid HMAC")
+        fin.seek(start)
+        l = compact.read_from(fin)
+        adata = fin.read(l)
+        if len(adata) != l:
+            raise Exception("Invalid length")
+        left = end - fin.tell()
+        if left > 0:
+            if left < IV_SIZE + AES_BLOCK or (left - IV_SIZE) % AES_BLOCK != 0:
+                raise Exception("Invalid length")
+            iv = fin.read(IV_SIZE)
+            crypto = aes(bytes(self.aes_key), AES_CBC, iv)
+            left -= IV_SIZE
+            while left > 0:
+                l = _readinto_full(fin, mv[:min(chunk_size, left)])
+                if l == 0 or l % AES_BLOCK != 0:
+                    raise Exception("Invalid length")
+                left -= l
+                plain = crypto.decrypt(mv[:l])
+                if left == 0:
+                    # remove 80... padding, it's in the last block
+                    n = len(plain.rstrip(b"\x00"))
+                    if n == 0 or plain[n - 1] != 0x80 or len(plain) - n >= AES_BLOCK:
+                        raise Exception("Invalid padding")
+                    plain = plain[:n - 1]
+                fout.write(plain)
+        return adata
+
+    def encrypt(self, adata=b"", plaintext=b""):
+        fout = BytesIO()
+        self.encrypt_stream(BytesIO(plaintext), fout, adata)
+        return fout.getvalue()
+
+    def decrypt(self, ciphertext):
+        """Returns a tuple adata, plaintext"""
+        fout = BytesIO()
+        adata = self.decrypt_stream(BytesIO(ciphertext), fout)
+        return adata, fout.getvalue()
+
+
 def read_until(s, chars=b"\n\r", max_len=100, return_on_max_len=False):
     """Reads from stream until one of the chars"""
+    if isinstance(s, BufferedReader):
+        return s.read_until(chars, max_len, return_on_max_len)
+    if not hasattr(s, "seek"):
+        # can't rewind after reading ahead (usb, sockets, IterReader)
+        return _read_until_bytewise(s, chars, max_len, return_on_max_len)
+    # seekable stream: read ahead, then rewind to the char
+    r = BufferedReader(s, min(CHUNK_SIZE, max_len + 1))
+    res = r.read_until(chars, max_len, return_on_max_len)
+    r.sync()
+    return res
+
+def _read_until_bytewise(s, chars, max_len, return_on_max_len):
     res = b""
-    chunk = b""
     while True:
         chunk = s.read(1)
         if len(chunk) == 0:
@@ -157,8 +631,17 @@ def read_until(s, chars=b"\n\r", max_len=100, return_on_max_len=False):
 
 def seek_to(s, chars=b"\n"):
     """Seeks stream to one of the chars"""
+    if isinstance(s, BufferedReader):
+        return s.seek_to(chars)
+    if not hasattr(s, "seek"):
+        return _seek_to_bytewise(s, chars)
+    r = BufferedReader(s)
+    res = r.seek_to(chars)
+    r.sync()
+    return res
+
+def _seek_to_bytewise(s, chars):
     off = 0
-    chunk = b""
     while True:
         chunk = s.read(1)
         off += len(chunk)
@@ -167,11 +650,5 @@ def seek_to(s, chars=b"\n"):
         if chunk in chars:
             return off, chunk
 
-def read_write(fin, fout, chunk_size=32):
-    chunk = fin.read(chunk_size)
-    total = fout.write(chunk)
-    while len(chunk) > 0:
-        chunk = fin.read(chunk_size)
-        total += fout.write(chunk)
-    return total
-
+def read_write(fin, fout, chunk_size=CHUNK_SIZE):
+    return copy(fin, fout, chunk_size=chunk_size)
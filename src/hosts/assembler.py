@@ -0,0 +1,102 @@
+import os
+from helpers import copy
+
+
+class PartAssembler:
+    """
+    Assembles parts of an animated QR code directly in the output file.
+
+    Encoders split data in parts of equal length, only the last one
+    is shorter, so part i is written at header + i * part_len as soon
+    as it arrives and nothing has to be copied when all parts are there.
+    The last part is kept in memory until the end as its offset
+    is not known before the length of other parts is.
+    Parts that don't fit this layout are appended after the uniform
+    area and recorded in a small offset table, the file is compacted
+    once in this case. Received parts are tracked in a bit array.
+    """
+
+    def __init__(self, path, n, header=b""):
+        if n < 1:
+            raise ValueError("Invalid number of parts")
+        self.path = path
+        self.n = n
+        self.header = header
+        self.received = bytearray((n + 7) // 8)
+        self.count = 0
+        self.part_len = None
+        self.last = None
+        # {index: (offset, length)} of parts that don't fit the uniform layout
+        self.spilled = {}
+        self.spill_end = None
+        self.f = open(path, "wb")
+        self.f.write(header)
+
+    def has(self, idx):
+        return bool(self.received[idx // 8] & (1 << (idx % 8)))
+
+    @property
+    def complete(self):
+        return self.count == self.n
+
+    @property
+    def progress(self):
+        """List of True / False for every part"""
+        return [self.has(i) for i in range(self.n)]
+
+    def _write(self, offset, data):
+        self.f.seek(offset)
+        self.f.write(data)
+
+    def add(self, idx, data):
+        """Adds part idx (0-based), returns True when all parts are received"""
+        if idx < 0 or idx >= self.n:
+            raise ValueError("Invalid part index")
+        if self.has(idx):
+            return self.complete
+        if idx == self.n - 1:
+            self.last = bytes(data)
+        else:
+            if self.part_len is None:
+                self.part_len = len(data)
+            if len(data) == self.part_len:
+                self._write(len(self.header) + idx * self.part_len, data)
+            else:
+                if self.spill_end is None:
+                    self.spill_end = len(self.header) + self.n * self.part_len
+                self.spilled[idx] = (self.spill_end, len(data))
+                self._write(self.spill_end, data)
+                self.spill_end += len(data)
+        self.received[idx // 8] |= 1 << (idx % 8)
+        self.count += 1
+        return self.complete
+
+    def finish(self):
+        """Writes the last part and closes the file, returns the path"""
+        if not self.spilled:
+            self._write(len(self.header) + (self.n - 1) * (self.part_len or 0), self.last)
+            self.close()
+            return self.path
+        # non-uniform parts - copy everything in order once
+        self.f.close()
+        self.f = None
+        tmp = self.path + ".tmp"
+        with open(self.path, "rb") as fin:
+            with open(tmp, "wb") as fout:
+                fout.write(self.header)
+                for idx in range(self.n - 1):
+                    offset, length = self.spilled.get(
+                        idx, (len(self.header) + idx * self.part_len, self.part_len)
+                    )
+                    fin.seek(offset)
+                    copy(fin, fout, length)
+                fout.write(self.last)
+        os.remove(self.path)
+        os.rename(tmp, self.path)
+        return self.path
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+        self.last = None
@@ -30,6 +30,8 @@ class Host:
     settings_button = None
     # link to specter instance
     parent = None
+    # estimated number of frames still to scan, None if unknown
+    frames_left = None
 
     def __init__(self, path):
         # storage for data
@@ -52,6 +54,8 @@ class Host:
         # can be a float between 0 and 1 or
         # a list of [True, False, ...] (for QR code)
         # self.progress = 0
+        # estimated number of frames (QR code) still to scan or None
+        # self.frames_left = None
 
     def init(self):
         """
@@ -4,11 +4,14 @@ import time
 import asyncio
 from platform import simulator, config, delete_recursively
 import gc
+import math
 from gui.screens.settings import HostSettings
 from gui.screens import Alert
-from helpers import read_until, read_write, a2b_base64_stream
+from helpers import copy, a2b_base64_stream
+from io import BytesIO
 from microur.decoder import FileURDecoder
 from microur.util import cbor
+from .assembler import PartAssembler
 
 QRSCANNER_TRIGGER = config.QRSCANNER_TRIGGER
 # OK response from scanner
@@ -52,6 +55,10 @@ class QRHost(Host):
 
     # time to wait after init
     RECOVERY_TIME = 30
+    # collect garbage before decoding a UR frame only if the heap is that low
+    UR_GC_THRESHOLD = 64 * 1024
+    # sequence numbers of mixed fountain parts kept to skip repeated frames
+    UR_RECENT = 8
 
     button = "Scan QR code"
     settings_button = "QR scanner"
@@ -84,7 +91,15 @@ class QRHost(Host):
             self.trigger.on()
             self.is_configured = True
         self.scanning = False
+        # PartAssembler of animated QR code
         self.parts = None
+        # current frame collected from uart chunks
+        self.frame = bytearray()
+        # sequence numbers of decoded UR fragments (seq <= ur_count),
+        # last mixed fountain parts and number of fragments
+        self.ur_seen = set()
+        self.ur_recent = []
+        self.ur_count = 0
         self.raw = False
         self.chunk_timeout = 0.5
 
@@ -278,8 +293,7 @@ class QRHost(Host):
         self._stop_scanner()
 
     def abort(self):
-        with open(self.tmpfile,"wb"):
-            pass
+        self.frame = bytearray()
         self.cancelled = True
         self.stop_scanning()
 
@@ -292,8 +306,7 @@ class QRHost(Host):
         self.chunk_timeout = chunk_timeout
         self._start_scanner()
         # clear the data
-        with open(self.tmpfile,"wb") as f:
-            pass
+        self.frame = bytearray()
         if self.f is not None:
             self.f.close()
             self.f = None
@@ -304,6 +317,9 @@ class QRHost(Host):
         self.bcur = False
         self.bcur2 = False
         self.decoder = FileURDecoder(self.path)
+        self.ur_seen = set()
+        self.ur_recent = []
+        self.ur_count = 0
         self.bcur_hash = b""
         gc.collect()
         while self.scanning:
@@ -312,8 +328,11 @@ class QRHost(Host):
             # or manual cancel from GUI
         self.animated = False
         if self.parts is not None:
-            del self.parts
+            self.parts.close()
             self.parts = None
+        self.frame = bytearray()
+        self.ur_seen = set()
+        self.ur_recent = []
         del self.decoder
         self.decoder = None
         gc.collect()
@@ -359,195 +378,170 @@ class QRHost(Host):
             else:
                 # if animated - we process chunks one at a time
                 d = self.uart.read()
-            # no new lines - just write and continue
+            # no new lines - collect and continue
             if d[-len(self.EOL):] != self.EOL:
-                with open(self.tmpfile,"ab") as f:
-                    f.write(d)
+                self.frame += d
                 return
             # restart scan while processing data
             await self._restart_scanner()
             # slice to write
-            d = d[:-len(self.EOL)]
-            with open(self.tmpfile,"ab") as f:
-                f.write(d)
+            self.frame += d[:-len(self.EOL)]
+            data = bytes(self.frame)
+            self.frame = bytearray()
             try:
-                if self.process_chunk():
+                if self.process_chunk(data):
                     self.stop_scanning()
             except Exception as e:
                 self.stop_scanning()
                 raise e
-            # erase the content of the file
-            with open(self.tmpfile, "wb") as f:
-                pass
 
-    def process_chunk(self):
+    def process_chunk(self, data):
         """Returns true when scanning complete"""
         # should not be there if trigger mode or simulator
-        with open(self.tmpfile, "rb") as f:
-            c = f.read(len(SUCCESS))
-            while c == SUCCESS:
-                c = f.read(len(SUCCESS))
-            f.seek(-len(c), 1)
-            # check if it's bcur encoding
-            start = f.read(9).upper()
-            f.seek(-len(start), 1)
-            if start == b"UR:BYTES/":
-                self.bcur = True
-                return self.process_bcur(f)
-            # bcur2 encoding
-            elif start == b"UR:CRYPTO":
-                self.bcur2 = True
-                return self.process_bcur2(f)
-            else:
-                return self.process_normal(f)
+        start = 0
+        while data[start:start+len(SUCCESS)] == SUCCESS:
+            start += len(SUCCESS)
+        if start > 0:
+            data = data[start:]
+        # check if it's bcur encoding
+        prefix = data[:9].upper()
+        if prefix == b"UR:BYTES/":
+            self.bcur = True
+            return self.process_bcur(data)
+        # bcur2 encoding
+        elif prefix == b"UR:CRYPTO":
+            self.bcur2 = True
+            return self.process_bcur2(data)
+        else:
+            return self.process_normal(data)
 
-    def process_bcur2(self, f):
-        gc.collect()
-        if self.decoder.read_part(f):
+    def write_data(self, *chunks):
+        """Writes complete scanned data, returns True"""
+        with open(self.path + "/data.txt", "wb") as fout:
+            for chunk in chunks:
+                fout.write(chunk)
+        return True
+
+    def add_part(self, m, n, data, header=b""):
+        """Adds part m of n, first part allocates the assembler"""
+        if self.parts is None:
+            self.animated = True
+            self.parts = PartAssembler(self.path + "/data.txt", n, header)
+        if n != self.parts.n:
+            raise HostError("Invalid prefix")
+        try:
+            complete = self.parts.add(m - 1, data)
+        except ValueError as e:
+            raise HostError("Invalid prefix: %s" % e)
+        if complete:
+            self._stop_scanner()
+            self.parts.finish()
+        return complete
+
+    @staticmethod
+    def parse_ur_seq(data):
+        """Returns (seq, count) of a multipart UR: ur:type/seq-count/data, or None"""
+        start = data.find(b"/")
+        if start < 0:
+            return None
+        end = data.find(b"/", start + 1, start + 24)
+        if end < 0:
+            return None
+        arr = data[start+1:end].split(b"-")
+        if len(arr) != 2:
+            return None
+        try:
+            return int(arr[0]), int(arr[1])
+        except ValueError:
+            return None
+
+    def process_bcur2(self, data):
+        # the scanner sends the same frame many times while it's on the screen,
+        # fountain parts have unique sequence numbers - skip the ones we've decoded
+        seq = self.parse_ur_seq(data)
+        if seq is not None and (seq[0] in self.ur_seen or seq[0] in self.ur_recent):
+            return False
+        if gc.mem_free() < self.UR_GC_THRESHOLD:
+            gc.collect()
+        done = self.decoder.read_part(BytesIO(data))
+        if seq is not None:
+            self.ur_count = seq[1]
+            if seq[0] <= seq[1]:
+                self.ur_seen.add(seq[0])
+            else:
+                # mixed parts never repeat once the frame is off the screen,
+                # remember only the last few to keep the heap bounded
+                self.ur_recent.append(seq[0])
+                if len(self.ur_recent) > self.UR_RECENT:
+                    self.ur_recent.pop(0)
+        if done:
             self._stop_scanner()
             fname = self.path + "/data.txt"
             with self.decoder.result() as b:
                 msglen = cbor.read_bytes_len(b)
                 with open(fname, "wb") as fout:
-                    read_write(b, fout)
+                    copy(b, fout)
             gc.collect()
             return True
         return False
 
-    def process_bcur(self, f):
-        # check if starts with UR:BYTES/
-        chunk, char = read_until(f, b"/", return_on_max_len=True)
-        chunk = chunk or b""
-        assert chunk.upper() == b"UR:BYTES"
-        assert char == b"/"
+    def process_bcur(self, data):
         # format: ur:bytes/MofN/hash/data
         # check if next part is MofN,
         # if not - 64 bytes is enough to read the hash
-        chunk, char = read_until(f, b"/", max_len=64, return_on_max_len=True)
-        chunk = chunk or b""
+        mv = memoryview(data)
+        end = data.find(b"/", 9, 9 + 65)
         # if next / is not found or OF not there
-        if char is None or b"OF" not in chunk.upper():
+        if end < 0 or b"OF" not in data[9:end].upper():
             if not self.animated:
                 # maybe there is a hash, but no parts
-                fname = self.path + "/data.txt"
-                with open(fname, "wb") as fout:
-                    fout.write(b"UR:BYTES/")
-                    fout.write(chunk)
-                    fout.write(char or b"")
-                    read_write(f, fout)
-                return True
+                return self.write_data(b"UR:BYTES/", mv[9:])
             else:
                 self.stop_scanning()
-                raise HostError("Ivalid QR code part encoding: %r" % chunk)
+                raise HostError("Ivalid QR code part encoding: %r" % data[9:9+64])
         # converting to pMofN to reuse parser
-        prefix = b"p" + chunk.lower()
-        hsh, char = read_until(f, b"/", max_len=80, return_on_max_len=True)
-        hsh = hsh or b""
-        assert char == b"/"
+        prefix = b"p" + data[9:end].lower()
+        hsh_end = data.find(b"/", end + 1, end + 1 + 81)
+        assert hsh_end >= 0
+        hsh = data[end+1:hsh_end]
         if not self.animated:
             try:
                 m, n = self.parse_prefix(prefix)
-                # if succeed - first animated frame,
-                # allocate stuff
-                self.animated = True
-                self.parts = [None] * n
-                fname = "%s/p%d.txt" % (self.path, m-1)
-                with open(fname, "wb") as fout:
-                    read_write(f, fout)
-                self.parts[m - 1] = fname
-                self.bcur_hash = hsh
-                return False
             # failed - not animated, just unfortunately similar data
             except:
-                raise HostError("Ivalid QR code part encoding: %r" % chunk)
+                raise HostError("Ivalid QR code part encoding: %r" % data[9:end])
+            # first animated frame
+            self.bcur_hash = hsh
+            return self.add_part(m, n, mv[hsh_end+1:], header=b"UR:BYTES/" + hsh + b"/")
         # expecting animated frame
         m, n = self.parse_prefix(prefix)
-        if n != len(self.parts):
-            raise HostError("Invalid prefix")
         if hsh != self.bcur_hash:
             print(hsh, self.bcur_hash)
             raise HostError("Checksum mismatch")
-        fname = "%s/p%d.txt" % (self.path, m-1)
-        with open(fname, "wb") as fout:
-            fout.write(f.read())
-        self.parts[m - 1] = fname
-        # all have non-zero len
-        if None not in self.parts:
-            self._stop_scanner()
-            fname = self.path + "/data.txt"
-            with open(fname, "wb") as fout:
-                fout.write(b"UR:BYTES/")
-                fout.write(self.bcur_hash)
-                fout.write(b"/")
-                for part in self.parts:
-                    with open(part, "rb") as fp:
-                        read_write(fp, fout)
-            return True
-        else:
-            return False
+        return self.add_part(m, n, mv[hsh_end+1:])
 
-    def process_normal(self, f):
+    def process_normal(self, data):
         # check if it starts with pMofN
-        chunk, char = read_until(f, b" ", max_len=10, return_on_max_len=True)
-        chunk = chunk or b""
-        if char is None:
+        end = data.find(b" ", 0, 11)
+        if end < 0:
             if not self.animated:
-                fname = self.path + "/data.txt"
-                with open(fname, "wb") as fout:
-                    fout.write(chunk)
-                    read_write(f, fout)
-                return True
+                return self.write_data(data)
             else:
                 self.stop_scanning()
-                raise HostError("Ivalid QR code part encoding: %r" % chunk)
+                raise HostError("Ivalid QR code part encoding: %r" % data[:11])
         # space is there
+        prefix = data[:end]
         if not self.animated:
-            if chunk.startswith(b"p") and b"of" in chunk:
-                try:
-                    m, n = self.parse_prefix(chunk)
-                    # if succeed - first animated frame,
-                    # allocate stuff
-                    self.animated = True
-                    self.parts = [None] * n
-                    fname = "%s/p%d.txt" % (self.path, m-1)
-                    with open(fname, "wb") as fout:
-                        read_write(f, fout)
-                    self.parts[m - 1] = fname
-                    return False
-                # failed - not animated, just unfortunately similar data
-                except:
-                    fname = self.path + "/data.txt"
-                    with open(fname, "wb") as fout:
-                        fout.write(chunk)
-                        fout.write(char)
-                        read_write(f, fout)
-                    return True
-            else:
-                fname = self.path + "/data.txt"
-                with open(fname, "wb") as fout:
-                    fout.write(chunk)
-                    fout.write(char)
-                    read_write(f, fout)
-                return True
-        # expecting animated frame
-        m, n = self.parse_prefix(chunk)
-        if n != len(self.parts):
-            raise HostError("Invalid prefix")
-        fname = "%s/p%d.txt" % (self.path, m-1)
-        with open(fname, "wb") as fout:
-            read_write(f, fout)
-        self.parts[m - 1] = fname
-        # all have non-zero len
-        if None not in self.parts:
-            self._stop_scanner()
-            fname = self.path + "/data.txt"
-            with open(fname, "wb") as fout:
-                for part in self.parts:
-                    with open(part, "rb") as fp:
-                        read_write(fp, fout)
-            return True
+            if not (prefix.startswith(b"p") and b"of" in prefix):
+                return self.write_data(data)
+            try:
+                m, n = self.parse_prefix(prefix)
+            # failed - not animated, just unfortunately similar data
+            except:
+                return self.write_data(data)
         else:
-            return False
+            m, n = self.parse_prefix(prefix)
+        return self.add_part(m, n, memoryview(data)[end+1:])
 
     def parse_prefix(self, prefix: bytes):
         print(prefix)
@@ -599,12 +593,28 @@ class QRHost(Host):
         else:
             from qrencoder import Base64QREncoder as EncoderCls
         with EncoderCls(stream, tempfile=self.path+"/qrtmp") as enc:
-            await self.manager.gui.qr_alert(title, "", enc, note=note, qr_width=480)
+            await self.manager.gui.qr_alert(title, "", enc, note=note, qr_width=480, autotune=True)
 
     @property
     def in_progress(self):
         return self.scanning
 
+    @property
+    def frames_left(self):
+        """Estimated number of frames still to scan, None if unknown"""
+        if not self.in_progress:
+            return None
+        if self.parts is not None:
+            return self.parts.n - self.parts.count
+        if self.bcur2 and self.ur_count and self.decoder:
+            # every part recovers at most one fragment, mixed ones often none
+            left = self.ur_count - len(self.ur_seen)
+            progress = self.decoder.progress
+            if isinstance(progress, float):
+                left = max(left, math.ceil(self.ur_count * (1 - progress)))
+            return max(left, 1)
+        return None
+
     @property
     def progress(self):
         """
@@ -618,4 +628,4 @@ class QRHost(Host):
             return 1
         if not self.animated:
             return 0
-        return [part is not None for part in self.parts]
+        return self.parts.progress
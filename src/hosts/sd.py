@@ -3,7 +3,7 @@ from platform import fpath
 import os
 import platform
 from binascii import hexlify
-from helpers import a2b_base64_stream
+from helpers import a2b_base64_stream, copy
 
 class SDHost(Host):
     """
@@ -33,12 +33,7 @@ class SDHost(Host):
         platform.sdcard.mount()
 
     def copy(self, fin, fout):
-        b = bytearray(100)
-        while True:
-            l = fin.readinto(b)
-            if l == 0:
-                break
-            fout.write(b, l)
+        copy(fin, fout)
 
     async def get_data(self, raw=False, chunk_timeout=0.1):
         """
@@ -184,4 +179,4 @@ class SDHost(Host):
             from qrencoder import LegacyBCUREncoder as EncoderCls
         if EncoderCls is not None:
             with EncoderCls(stream, tempfile=self.path+"/qrtmp") as enc:
-                await self.manager.gui.qr_alert(title, msg, enc, note=note, qr_width=480)
+                await self.manager.gui.qr_alert(title, msg, enc, note=note, qr_width=480, autotune=True)
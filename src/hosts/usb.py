@@ -2,8 +2,64 @@ from errors import BaseError
 from .core import Host, HostError
 import sys
 import pyb
+import time
+import binascii
 import asyncio
 import platform
+from helpers import copy
+
+# not every micropython build has it, binary mode is refused then
+crc32 = getattr(binascii, "crc32", None)
+
+
+class _USBWriter:
+    """
+    Writes everything to usb of the USBHost,
+    USB_VCP.write can accept only a part of the data
+    """
+
+    def __init__(self, host):
+        self.host = host
+
+    def write(self, data):
+        host = self.host
+        # host stopped reading, drop the rest of the response
+        if host.stalled:
+            return len(data)
+        if isinstance(data, str):
+            data = data.encode()
+        total = host.usb.write(data) or 0
+        if total == len(data):
+            return total
+        mv = memoryview(data)
+        t0 = time.ticks_ms()
+        while total < len(mv):
+            l = host.usb.write(mv[total:])
+            if l:
+                total += l
+                t0 = time.ticks_ms()
+                continue
+            # host is not reading, give up if it's gone or doesn't read for too long
+            if not platform.usb_connected():
+                host.stalled = True
+                raise HostError("USB disconnected")
+            if time.ticks_diff(time.ticks_ms(), t0) > host.WRITE_TIMEOUT:
+                host.stalled = True
+                raise HostError("USB write timeout")
+        return total
+
+
+class _CRCWriter:
+    """Writes to the stream and keeps crc32 of everything written"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.crc = 0
+
+    def write(self, data):
+        self.crc = crc32(data, self.crc)
+        self.stream.write(data)
+        return len(data)
 
 
 class USBHost(Host):
@@ -15,6 +71,30 @@ class USBHost(Host):
     ACK = b"ACK\r\n"
     RECOVERY_TIME = 10
     settings_button = "USB communication"
+    # bytes read from usb per update, buffer is allocated once
+    READ_SIZE = 2048
+    # chunk size of responses
+    WRITE_SIZE = 1024
+    # polling interval in ms, faster while data is coming
+    POLL_INTERVAL = 10
+    ACTIVE_POLL_INTERVAL = 1
+    # transfer is active for this time in ms after the last read
+    ACTIVE_TIME = 200
+    # text command switching to binary mode, response is BINARY_VERSION
+    HANDSHAKE = b"binary"
+    BINARY_VERSION = b"binary 1"
+    # binary frame: magic, payload length (4 bytes, little endian),
+    # raw payload, crc32 of the payload (4 bytes, little endian).
+    # Text commands never start with \x00, so both work in binary mode.
+    FRAME_MAGIC = b"\x00\xf5"
+    FRAME_HEADER = 6
+    FRAME_CRC = 4
+    # incomplete frame is dropped if nothing comes for this time in ms
+    FRAME_TIMEOUT = 1000
+    # after a frame error input is ignored until the line is idle for this time in ms
+    DRAIN_TIME = 200
+    # response is dropped if the host doesn't read anything for this time in ms
+    WRITE_TIMEOUT = 1000
 
     def __init__(self, path):
         super().__init__(path)
@@ -22,6 +102,30 @@ class USBHost(Host):
         self.settings = { "enabled": False }
         self.usb = None
         self.f = None
+        self.buf = bytearray(self.READ_SIZE)
+        self.mv = memoryview(self.buf)
+        # time of the last read, None if idle
+        self._last_read = None
+        # set by the handshake, frames are only parsed in binary mode
+        self.binary = False
+        # set after a frame error, the rest of the frame is thrown away
+        self._drain = False
+        # set if the host stopped reading, responses are dropped
+        # until it sends something again
+        self.stalled = False
+        # largest frame payload, set on the first frame
+        self._max_frame = None
+        self._reset_frame()
+
+    @property
+    def max_frame(self):
+        """
+        Largest frame payload we accept, half of the ramdisk:
+        the signed copy of the payload is written there as well
+        """
+        if self._max_frame is None:
+            self._max_frame = platform.ramdisk_size() // 2
+        return self._max_frame
 
     def init(self):
         # doesn't work if it was enabled and then disabled
@@ -41,6 +145,9 @@ class USBHost(Host):
     async def enable(self):
         # cleanup first
         self.cleanup()
+        self.binary = False
+        self._drain = False
+        self.stalled = False
         if self.usb is not None:
             self.usb.read()
         return await super().enable()
@@ -62,6 +169,16 @@ class USBHost(Host):
             self.f.close()
             self.f = None
         platform.delete_recursively(self.path)
+        self._reset_frame()
+
+    def _reset_frame(self):
+        # current request is a frame, the response is framed as well
+        self.framed = False
+        # header or crc of the frame read so far
+        self._hdr = bytearray()
+        # payload bytes left, None while reading the header
+        self._left = None
+        self._crc = 0
 
     async def process_command(self, stream):
         if self.manager is None:
@@ -71,6 +188,11 @@ class USBHost(Host):
         # if empty command - return \r\n back
         if len(b) == 0:
             return self.respond(b"")
+        if b == self.HANDSHAKE:
+            if crc32 is None:
+                raise HostError("Binary mode is not supported")
+            self.binary = True
+            return self.respond(self.BINARY_VERSION)
         # rewind
         stream.seek(0)
         # res should be a stream as well
@@ -89,16 +211,65 @@ class USBHost(Host):
                 self._send_data(stream)
 
     def _send_data(self, stream):
-        # loop until we read everything
-        chunk = stream.read(32)
-        while len(chunk) > 0:
-            self.usb.write(chunk)
-            chunk = stream.read(32)
+        if self.framed:
+            pos = stream.tell()
+            size = stream.seek(0, 2) - pos
+            stream.seek(pos)
+            usb = _USBWriter(self)
+            usb.write(self.FRAME_MAGIC + size.to_bytes(4, "little"))
+            out = _CRCWriter(usb)
+            copy(stream, out, chunk_size=self.WRITE_SIZE)
+            usb.write(out.crc.to_bytes(4, "little"))
+            return
+        # loop until we read everything, in memoryview slices of one buffer
+        copy(stream, _USBWriter(self), chunk_size=self.WRITE_SIZE)
         self.respond(b"")
 
     def respond(self, data):
-        self.usb.write(data)
-        self.usb.write("\r\n")
+        usb = _USBWriter(self)
+        if self.framed:
+            usb.write(self.FRAME_MAGIC + len(data).to_bytes(4, "little"))
+            usb.write(data)
+            usb.write(crc32(data).to_bytes(4, "little"))
+            return
+        usb.write(data)
+        usb.write("\r\n")
+
+    def _read_frame(self, mv):
+        """
+        Writes payload of the binary frame from mv to the file.
+        Returns filename with the payload when the frame is complete.
+        Anything after the frame is thrown away like in text mode.
+        """
+        i = 0
+        if self._left is None:
+            i = min(self.FRAME_HEADER - len(self._hdr), len(mv))
+            self._hdr.extend(mv[:i])
+            if len(self._hdr) < self.FRAME_HEADER:
+                return
+            if self._hdr[:2] != self.FRAME_MAGIC:
+                raise HostError("Invalid frame")
+            self._left = int.from_bytes(self._hdr[2:], "little")
+            if self._left > self.max_frame:
+                raise HostError("Frame too large")
+            self._hdr = bytearray()
+        if self._left > 0:
+            chunk = mv[i:i + self._left]
+            self.f.write(chunk)
+            self._crc = crc32(chunk, self._crc)
+            self._left -= len(chunk)
+            i += len(chunk)
+            if self._left > 0:
+                return
+        n = min(self.FRAME_CRC - len(self._hdr), len(mv) - i)
+        self._hdr.extend(mv[i:i + n])
+        if len(self._hdr) < self.FRAME_CRC:
+            return
+        if int.from_bytes(self._hdr, "little") != self._crc:
+            raise HostError("Frame checksum mismatch")
+        self.f.close()
+        self.f = None
+        return self.path + "/data"
 
     def read_to_file(self):
         """
@@ -106,19 +277,39 @@ class USBHost(Host):
         Returns None if line is not complete,
         filename with data if line is read
         """
-        # trying to read something
-        res = self.usb.read(64)
+        # trying to read everything that is there to the buffer
+        l = self.usb.readinto(self.buf)
+        if l:
+            self.stalled = False
+        # rest of a broken frame, wait until the host stops sending
+        if self._drain:
+            if l:
+                self._last_read = time.ticks_ms()
+            elif time.ticks_diff(time.ticks_ms(), self._last_read) > self.DRAIN_TIME:
+                self._drain = False
+            return
         # if we didn't get anything - return
-        if res is None or len(res) == 0:
+        if not l:
+            # host stopped in the middle of a frame
+            if self.framed and time.ticks_diff(time.ticks_ms(), self._last_read) > self.FRAME_TIMEOUT:
+                raise HostError("Frame timeout")
             return
+        self._last_read = time.ticks_ms()
         # check if we already have something
         # if not - create new file on the ramdisk
         if self.f is None:
             self.f = open(self.path + "/data", "wb")
-        # check if we dont have EOL in the data
+            # binary frame - raw payload, no EOL scanning
+            self.framed = self.binary and self.buf[0] == self.FRAME_MAGIC[0]
+        if self.framed:
+            return self._read_frame(self.mv[:l])
+        # check if we dont have EOL in the data,
+        # bytearray supports `in` (but not find) in micropython
+        res = self.buf[:l] if l < len(self.buf) else self.buf
         if b"\n" not in res and b"\r" not in res:
-            self.f.write(res)
+            self.f.write(self.mv[:l])
             return
+        res = bytes(res)
         # if we do - there is a command
         # both \r, \n or \r\n should work:
         for eol in [b"\r\n", b"\r", b"\n"]:
@@ -148,6 +339,15 @@ class USBHost(Host):
         self.f = None
         return self.path + "/data"
 
+    @property
+    def poll_interval(self):
+        """Polls faster while a transfer is active"""
+        if self._last_read is None:
+            return self.POLL_INTERVAL
+        if time.ticks_diff(time.ticks_ms(), self._last_read) > self.ACTIVE_TIME:
+            return self.POLL_INTERVAL
+        return self.ACTIVE_POLL_INTERVAL
+
     async def update(self):
         if self.manager is None:
             return await asyncio.sleep_ms(100)
@@ -155,17 +355,30 @@ class USBHost(Host):
             return await asyncio.sleep_ms(100)
         if not platform.usb_connected():
             return await asyncio.sleep_ms(100)
-        res = self.read_to_file()
+        try:
+            res = self.read_to_file()
+        # broken or incomplete frame - tell the host and start over
+        # when the line is idle
+        except HostError as e:
+            try:
+                _USBWriter(self).write(self.ACK)
+                self.respond(b"error: %s" % e)
+            # host is not reading, nothing else to do
+            except HostError as err:
+                sys.print_exception(err)
+            self.cleanup()
+            self._drain = True
+            res = None
         # if we got a filename - line is ready
         if res is not None:
-            # first send the host that we are processing data
-            self.usb.write(self.ACK)
-            # open again for reading and try to process content
             try:
+                # first send the host that we are processing data
+                _USBWriter(self).write(self.ACK)
+                # open again for reading and try to process content
                 with open(self.path + "/data", "rb") as f:
                     await self.process_command(f)
             # if we fail with our own error type
-            # tell the host why we failed
+            # tell the host why we failed (dropped if it stopped reading)
             except BaseError as e:
                 self.respond(b"error: %s" % e)
                 sys.print_exception(e)
@@ -179,4 +392,4 @@ class USBHost(Host):
             self.cleanup()
 
         # wait a bit
-        await asyncio.sleep_ms(10)
+        await asyncio.sleep_ms(self.poll_interval)
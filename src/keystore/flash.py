@@ -152,6 +152,7 @@ class FlashKeyStore(RAMKeyStore):
     def lock(self):
         """Locks the keystore, requires PIN to unlock"""
         self._is_locked = True
+        self.wipe_cache()
         return self.is_locked
 
     def _change_pin(self, old_pin, new_pin):
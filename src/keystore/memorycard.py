@@ -205,6 +205,7 @@ In this mode device can only operate when the smartcard is inserted!"""
     def lock(self):
         """Locks the keystore, requires PIN to unlock"""
         self.applet.lock()
+        self.wipe_cache()
         return self.is_locked
 
     def _change_pin(self, old_pin, new_pin):
@@ -6,11 +6,13 @@ import hmac
 from embit import ec, bip39, bip32
 from embit.liquid import slip77
 from embit.transaction import SIGHASH
-from helpers import aead_encrypt, aead_decrypt, tagged_hash
+from helpers import AEADContext, tagged_hash
 import secp256k1
 from gui.screens import Alert, PinScreen, Prompt, Menu, QRAlert
 from gui.screens.mnemonic import ExportMnemonicScreen
 from binascii import hexlify
+from io import BytesIO
+from collections import OrderedDict
 
 class RAMKeyStore(KeyStore):
     """
@@ -21,6 +23,10 @@ class RAMKeyStore(KeyStore):
     """
 
     storage_button = None
+    # number of keys with cached AEAD contexts
+    AEAD_CACHE_SIZE = 4
+    # derived nodes kept (LRU), wiped on lock and mnemonic change
+    DERIVE_CACHE_SIZE = 32
 
     def __init__(self):
         # bip39 mnemonic
@@ -50,6 +56,10 @@ class RAMKeyStore(KeyStore):
         self.initialized = False
         # show function for menus and stuff
         self.show = None
+        # {hash of the key: AEADContext} of recently used keys, wiped on lock
+        self._aead = {}
+        # {path tuple: [private node, public node or None]}
+        self._derived = OrderedDict()
 
     def set_mnemonic(self, mnemonic=None, password=""):
         if mnemonic == self.mnemonic and password != "":
@@ -63,6 +73,7 @@ class RAMKeyStore(KeyStore):
             if not bip39.mnemonic_is_valid(self.mnemonic):
                 raise KeyStoreError("Invalid mnemonic")
         seed = bip39.mnemonic_to_seed(self.mnemonic, password)
+        self.wipe_cache()
         self.root = bip32.HDKey.from_seed(seed)
         self.fingerprint = self.root.child(0).fingerprint
         # slip 77 blinding key
@@ -78,24 +89,46 @@ class RAMKeyStore(KeyStore):
         return psbtv.sign_input(i, self.root, sig_stream, sighash=sighash, extra_scope_data=extra_scope_data)
 
     def sign_hash(self, derivation, msghash: bytes):
-        return self.root.derive(derivation).key.sign(msghash)
+        return self.derive(derivation).key.sign(msghash)
 
     def sign_recoverable(self, derivation, msghash: bytes):
         """Returns a signature and a recovery flag"""
-        prv = self.root.derive(derivation).key
+        prv = self.derive(derivation).key
         sig = secp256k1.ecdsa_sign_recoverable(msghash, prv._secret)
         flag = sig[64]
         return ec.Signature(sig[:64]), flag
 
-    def save_aead(self, path, adata=b"", plaintext=b"", key=None):
-        """Encrypts and saves plaintext and associated data to file"""
+    def aead_context(self, key=None):
+        """AEADContext of the key (idkey by default), subkeys are derived once"""
         if key is None:
             key = self.idkey
         if key is None:
             raise KeyStoreError("Pass the key please")
-        d = aead_encrypt(key, adata, plaintext)
+        # no copies of the raw key in the cache
+        h = tagged_hash("aead cache", key)
+        ctx = self._aead.get(h)
+        if ctx is None:
+            if len(self._aead) >= self.AEAD_CACHE_SIZE:
+                self.wipe_aead()
+            ctx = AEADContext(key)
+            self._aead[h] = ctx
+        return ctx
+
+    def wipe_aead(self):
+        """Overwrites cached AEAD subkeys with zeroes and forgets them"""
+        for ctx in self._aead.values():
+            ctx.wipe()
+        self._aead = {}
+
+    def save_aead(self, path, adata=b"", plaintext=b"", key=None):
+        """Encrypts and saves plaintext and associated data to file"""
+        self.save_aead_stream(path, BytesIO(plaintext), adata, key)
+
+    def save_aead_stream(self, path, stream, adata=b"", key=None):
+        """Encrypts plaintext from stream to file in chunks"""
+        ctx = self.aead_context(key)
         with open(path, "wb") as f:
-            f.write(d)
+            ctx.encrypt_stream(stream, f, adata)
         platform.sync()
 
     def load_aead(self, path, key=None):
@@ -103,25 +136,96 @@ class RAMKeyStore(KeyStore):
         Loads data saved with save_aead,
         returns a tuple (associated data, plaintext)
         """
-        if key is None:
-            key = self.idkey
-        if key is None:
-            raise KeyStoreError("Pass the key please")
+        ctx = self.aead_context(key)
+        out = BytesIO()
         with open(path, "rb") as f:
-            data = f.read()
-        return aead_decrypt(data, key)
+            adata = ctx.decrypt_stream(f, out)
+        return adata, out.getvalue()
+
+    def load_aead_stream(self, path, stream, key=None):
+        """
+        Verifies the file saved with save_aead and decrypts it to stream in chunks,
+        returns associated data
+        """
+        ctx = self.aead_context(key)
+        with open(path, "rb") as f:
+            return ctx.decrypt_stream(f, stream)
+
+    def _cached(self, path):
+        """
+        Cache entry [private node, public node or None] for the path,
+        derived from the longest cached prefix of the path
+        """
+        if isinstance(path, str):
+            path = bip32.parse_path(path)
+        path = tuple(path)
+        cache = self._derived
+        # m/48h/0h is shared by all accounts, root is ()
+        for i in range(len(path), -1, -1):
+            entry = cache.get(path[:i])
+            if entry is not None:
+                # move to most-recently-used position
+                del cache[path[:i]]
+                cache[path[:i]] = entry
+                break
+        else:
+            i = -1
+            entry = [self.root, None]
+        # intermediate nodes are kept too
+        for j in range(i, len(path)):
+            if j >= 0:
+                entry = [self._keep(entry[0].child(path[j])), None]
+            while len(cache) >= self.DERIVE_CACHE_SIZE:
+                oldest = next(iter(cache))
+                self._forget(cache.pop(oldest))
+            cache[path[:j + 1]] = entry
+        return entry
+
+    @staticmethod
+    def _keep(node):
+        """Moves secret and chain code of a derived node to buffers we can zero"""
+        node.key._secret = bytearray(node.key._secret)
+        node.chain_code = bytearray(node.chain_code)
+        return node
+
+    def _forget(self, entry):
+        """Zeroes secret and chain code of a cached node (root is not ours)"""
+        node = entry[0]
+        if node is self.root:
+            return
+        for b in [node.key._secret, node.chain_code]:
+            for i in range(len(b)):
+                b[i] = 0
+
+    def derive(self, path):
+        """Same as self.root.derive(path), but cached"""
+        return self._cached(path)[0]
+
+    def _get_xpub(self, path):
+        entry = self._cached(path)
+        if entry[1] is None:
+            pub = entry[0].to_public()
+            # don't share the buffer that is zeroed with the private node
+            pub.chain_code = bytes(pub.chain_code)
+            entry[1] = pub
+        return entry[1]
+
+    def wipe_cache(self):
+        """Zeroes and forgets derived private nodes and AEAD subkeys"""
+        for entry in self._derived.values():
+            self._forget(entry)
+        self._derived = OrderedDict()
+        self.wipe_aead()
 
     def get_xpub(self, path):
         if self.is_locked or self.root is None:
             raise KeyStoreError("Keystore is not ready")
-        return self.root.derive(path).to_public()
+        return self._get_xpub(path)
 
     def owns(self, key):
         if key.fingerprint is not None and key.fingerprint != self.fingerprint:
             return False
-        if key.derivation is None:
-            return key.key == self.root.to_public()
-        return key.key == self.root.derive(key.derivation).to_public()
+        return key.key == self._get_xpub(key.derivation or ())
 
     def wipe(self, path):
         """Delete everything in path"""
@@ -231,7 +335,7 @@ class RAMKeyStore(KeyStore):
 
     def lock(self):
         """Locks the keystore"""
-        pass
+        self.wipe_cache()
 
     def _unlock(self, pin):
         """
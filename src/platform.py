@@ -145,6 +145,11 @@ def mount_sdram():
         os.mount(bdev, path)
     return path
 
+def ramdisk_size():
+    """Size of the ramdisk in bytes (of the storage on simulator)"""
+    st = os.statvfs(fpath("" if simulator else "/ramdisk"))
+    return st[0] * st[2]
+
 def get_preallocated_ram():
     """Returns pointer and size of preallocated memory"""
     if simulator:
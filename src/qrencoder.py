@@ -1,8 +1,9 @@
 import math
+from collections import OrderedDict
 from microur.util.bytewords import stream_pos
 from microur.encoder import UREncoder
 from bcur import bcur_encode_stream
-from helpers import b2a_base64_stream, read_write
+from helpers import b2a_base64_stream, copy
 
 class QREncoder:
     """A simple encoder that just splits the data into chunks"""
@@ -22,7 +23,7 @@ class QREncoder:
 
     def convert(self, fin, fout):
         # dummy convertion, just copy to the tempfile
-        return 0, read_write(fin, fout)
+        return 0, copy(fin, fout)
 
     @property
     def part_len(self):
@@ -30,9 +31,17 @@ class QREncoder:
 
     @part_len.setter
     def part_len(self, part_len):
+        self._part_len = self._frame_len(part_len)
+
+    def _frame_len(self, part_len):
+        """Length of data in a frame of part_len characters"""
         if part_len > 2 * self.MAX_PREFIX_LEN:
             part_len -= self.MAX_PREFIX_LEN
-        self._part_len = math.ceil(self._len / math.ceil(self._len / part_len))
+        return math.ceil(self._len / math.ceil(self._len / part_len))
+
+    def frames_for(self, part_len):
+        """Number of frames needed to transfer the data with part_len"""
+        return math.ceil(self._len / self._frame_len(part_len))
 
     def get_full(self, maxlen=None):
         if maxlen is not None and maxlen < self._len:
@@ -106,6 +115,7 @@ class LegacyBCUREncoder(QREncoder):
 class CryptoPSBTEncoder(QREncoder):
     is_infinite = True
     MAX_PREFIX_LEN = 22
+    FOUNTAIN_OVERHEAD = 1.25
 
     def __init__(self, *args, **kwargs):
         self.encoder = None
@@ -145,3 +155,65 @@ class CryptoPSBTEncoder(QREncoder):
             self._part_len = self.encoder.part_len
         else:
             self._part_len = math.ceil(self._len / math.ceil(self._len / part_len))
+
+    def frames_for(self, part_len):
+        # fountain parts mixing several fragments often don't add anything,
+        # decoders usually need a few more parts than fragments
+        return math.ceil(super().frames_for(part_len) * self.FOUNTAIN_OVERHEAD)
+
+
+class FrameCache:
+    """
+    LRU cache of frames of an encoder.
+
+    Frames are prepared ahead of playback with prefetch() while the
+    animation is idle, so showing the next frame doesn't seek and read
+    the tempfile, build the prefix or mix fountain parts.
+    Frames of finite encoders repeat, so short animations are read once.
+    Has to be cleared when part_len of the encoder changes.
+    """
+
+    def __init__(self, encoder, size=16):
+        self.encoder = encoder
+        self.size = size
+        self._frames = OrderedDict()
+
+    def clear(self):
+        self._frames = OrderedDict()
+
+    def _key(self, idx):
+        if self.encoder.is_infinite:
+            return idx
+        return idx % len(self.encoder)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def _load(self, key):
+        frames = self._frames
+        while len(frames) >= self.size:
+            del frames[next(iter(frames))]
+        frames[key] = self.encoder[key]
+
+    def __getitem__(self, idx):
+        key = self._key(idx)
+        if key not in self._frames:
+            self._load(key)
+        # move to most-recently-used position
+        frame = self._frames.pop(key)
+        self._frames[key] = frame
+        return frame
+
+    def prefetch(self, idx, num):
+        """
+        Prepares the first of frames idx...idx+num-1 that is not cached yet,
+        one frame per call so the caller can yield in between.
+        Returns False if all of them are cached already.
+        """
+        # never evict the frame on the screen
+        for i in range(idx, idx + min(num, self.size - 1)):
+            key = self._key(i)
+            if key not in self._frames:
+                self._load(key)
+                return True
+        return False
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark encrypted keystore files (RAMKeyStore.save_aead / load_aead).
+
+For files of a few sizes (host settings, descriptors and wallet meta are
+small, wallet indexes and asset lists grow) measures save and load of
+  - previous code: aead_encrypt / aead_decrypt deriving the subkeys
+    (four SHA256) on every call, the whole file built and read in RAM
+  - AEADContext: subkeys derived once per key, file encrypted and
+    decrypted in chunks, the MAC verified in a pass before decryption
+with time and peak heap per operation.
+
+helpers imports the firmware modules (ucryptolib, platform), so run it
+with the unix port from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_aead.py [--repeat N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+from io import BytesIO  # noqa: E402
+from benchutil import arg_value, measure, report  # noqa: E402
+import helpers  # noqa: E402
+import platform  # noqa: E402
+import rng  # noqa: E402
+
+WORK_DIR = "/tmp/bench_aead"
+SIZES = (100, 2000, 32000)
+
+
+def _bench_size(ctx, key, size, repeat):
+    path = WORK_DIR + "/file"
+    plaintext = rng.get_random_bytes(size)
+    adata = b"adata"
+    print("{} bytes".format(size))
+
+    def save_before():
+        with open(path, "wb") as f:
+            f.write(helpers.aead_encrypt(key, adata, plaintext))
+
+    def load_before():
+        with open(path, "rb") as f:
+            assert helpers.aead_decrypt(f.read(), key)[1] == plaintext
+
+    def save_after():
+        with open(path, "wb") as f:
+            ctx.encrypt_stream(BytesIO(plaintext), f, adata)
+
+    def load_after():
+        out = BytesIO()
+        with open(path, "rb") as f:
+            ctx.decrypt_stream(f, out)
+        assert out.getvalue() == plaintext
+
+    def load_after_file():
+        with open(path, "rb") as f:
+            with open(path + ".out", "wb") as fout:
+                ctx.decrypt_stream(f, fout)
+
+    ops, heap = measure(save_before, repeat)
+    report("before: aead_encrypt + write", ops, heap, "files/s")
+    ops, heap = measure(save_after, repeat)
+    report("after: encrypt_stream", ops, heap, "files/s")
+    ops, heap = measure(load_before, repeat)
+    report("before: read + aead_decrypt", ops, heap, "files/s")
+    ops, heap = measure(load_after, repeat)
+    report("after: decrypt_stream to RAM", ops, heap, "files/s")
+    ops, heap = measure(load_after_file, repeat)
+    report("after: decrypt_stream to file", ops, heap, "files/s")
+
+
+def main():
+    repeat = arg_value("repeat", 20)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    platform.maybe_mkdir(WORK_DIR)
+    key = rng.get_random_bytes(32)
+    ctx = helpers.AEADContext(key)
+    print("Keystore AEAD files ({} runs)".format(repeat))
+    for size in SIZES:
+        _bench_size(ctx, key, size, repeat)
+
+
+if __name__ == "__main__":
+    main()
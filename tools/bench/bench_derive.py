@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark address derivation of wallets (WalletScreen.next, VERIFY_ADDRESS).
+
+Measures Wallet.get_address for consecutive indexes:
+  - descriptor.derive() from the account xpubs (previous code)
+  - Wallet.derive() with branch xpubs cached (first visit of an index)
+  - precomputed window / revisiting an index (LRU hit)
+and Wallet.owns for a psbt input of the wallet (every fill_scope call).
+Then the throughput of AddressScanner (addresses/s) for singlesig and 2-of-3
+multisig wallets: a lookup of an unknown address scans all windows, deriving
+every address or taking it from the wallet's script_pubkey index.
+
+apps.wallets.wallet imports the firmware modules (lvgl, gui, platform), so
+run it with the unix port from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_derive.py [--addresses N] [--gap N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+from benchutil import arg_value, measure, report  # noqa: E402
+from embit import bip32  # noqa: E402
+from embit.descriptor import Descriptor  # noqa: E402
+from embit.psbt import DerivationPath, InputScope  # noqa: E402
+from embit.transaction import TransactionOutput  # noqa: E402
+from apps.wallets.scanner import AddressScanner  # noqa: E402
+from apps.wallets.wallet import Wallet  # noqa: E402
+
+NETWORK = "test"
+
+
+def _descriptor():
+    keys = []
+    for i in range(3):
+        root = bip32.HDKey.from_seed(bytes([i + 1]) * 32)
+        path = "m/48h/1h/0h/2h"
+        keys.append("[%s/48h/1h/0h/2h]%s/{0,1}/*" % (
+            root.my_fingerprint.hex(), root.derive(path).to_public().to_base58()))
+    return "wsh(sortedmulti(2,%s))" % ",".join(keys)
+
+
+def _bench_scanner(gap):
+    """Full scan of all branches, [0, gap + extra) each"""
+    singlesig = "wpkh([%s/84h/1h/0h]%s/{0,1}/*)"
+    root = bip32.HDKey.from_seed(b"\x05" * 32)
+    singlesig = singlesig % (root.my_fingerprint.hex(), root.derive("m/84h/1h/0h").to_public().to_base58())
+    for name, desc in (("singlesig", singlesig), ("2-of-3 multisig", _descriptor())):
+        w = Wallet(Descriptor.from_string(desc))
+        w.gaps = [gap] * len(w.gaps)
+        unknown = Descriptor.from_string(desc).derive(10 * gap, branch_index=0).script_pubkey()
+        sizes = []
+
+        def scan():
+            scanner = AddressScanner([w])
+            assert scanner.lookup(unknown) is None
+            sizes.append(len(scanner))
+
+        w.INDEX_EXTRA = None
+        ops, heap = measure(scan, 2)
+        report("scan {}".format(name), ops * sizes[0], heap, "addr/s")
+        # index filled by one scan, as loaded from flash after reboot
+        w.INDEX_EXTRA = Wallet.INDEX_EXTRA
+        AddressScanner([w]).lookup(unknown)
+        ops, heap = measure(scan, 20)
+        report("scan {} from index".format(name), ops * sizes[0], heap, "addr/s")
+        w.clear_cache()
+
+
+def main():
+    addresses = arg_value("addresses", 20)
+    desc = _descriptor()
+    print("Next address benchmark (2-of-3 multisig, {} addresses)".format(addresses))
+
+    plain = Descriptor.from_string(desc)
+    state = [0]
+
+    def uncached():
+        state[0] += 1
+        plain.derive(state[0], branch_index=0).address(Wallet.Networks[NETWORK])
+
+    ops, heap = measure(uncached, addresses)
+    report("before: descriptor.derive", ops, heap, "addr/s")
+
+    w = Wallet(Descriptor.from_string(desc))
+    w.DERIVE_CACHE_SIZE = 2 * addresses + 2
+    state[0] = 0
+
+    def first_visit():
+        state[0] += 1
+        w.get_address(state[0], NETWORK)
+
+    ops, heap = measure(first_visit, addresses)
+    report("after: new index (branch xpub cached)", ops, heap, "addr/s")
+    print("  {:<40} {:>12.1f} ms".format("next address latency", 1000 / ops))
+
+    def revisit():
+        state[0] -= 1
+        w.get_address(state[0] % addresses + 1, NETWORK)
+
+    ops, heap = measure(revisit, addresses)
+    report("after: cached index (prev / precompute)", ops, heap, "addr/s")
+
+    der = plain.derive(1, branch_index=0)
+    scope = InputScope()
+    for k in der.keys:
+        scope.bip32_derivations[k.get_public_key()] = DerivationPath(k.fingerprint, k.derivation)
+    scope.witness_utxo = TransactionOutput(1000, der.script_pubkey())
+    assert plain.owns(scope) and w.owns(scope)
+    ops, heap = measure(lambda: plain.owns(scope), addresses)
+    report("before: Descriptor.owns", ops, heap, "scopes/s")
+    ops, heap = measure(lambda: w.owns(scope), addresses)
+    report("after: Wallet.owns", ops, heap, "scopes/s")
+
+    _bench_scanner(arg_value("gap", 20))
+
+
+if __name__ == "__main__":
+    main()
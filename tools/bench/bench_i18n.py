@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark translation lookups: per-call file reads vs. TranslationTable.
+
+Compiles the English language JSON into a temporary binary and measures
+lookups per second plus peak heap for
+  - read_translation_from_binary() (opens file + parses header every call)
+  - TranslationTable with caching disabled (index in RAM, open handle)
+  - TranslationTable with the default LRU cache, cycling over a screen-sized
+    working set of keys (the typical GenericMenu build pattern)
+  - cold screen builds: one lookup() per key vs. one lookup_many() batch
+    (what SpecterGui.show_menu does via I18nManager.prefetch())
+  - compressed pack (--compress): file size, and lookups that inflate a
+    block every time (worst case) vs. lookups served from the block buffer
+
+Compressed packs can only be built where zlib.compressobj exists; on the unix
+port compile on the host first and pass the file with --compressed PATH.
+
+Usage:
+    python3 tools/bench/bench_i18n.py [--iterations N] [--screen-keys N] [--compressed PATH]
+    ./bin/micropython_unix tools/bench/bench_i18n.py
+"""
+
+import json
+import os
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../scenarios/MockUI/src/MockUI/i18n")
+
+import lang_compiler  # noqa: E402
+from benchutil import IS_MICROPYTHON, arg_value, measure, report  # noqa: E402
+
+EN_JSON = _HERE + "/../../scenarios/MockUI/src/MockUI/i18n/languages/specter_ui_en.json"
+WORK_DIR = "/tmp/bench_i18n"
+
+
+def _prepare(compress=False):
+    """Compile English JSON into WORK_DIR and return (binary_path, key_count)."""
+    for path in (WORK_DIR, WORK_DIR + "/z"):
+        try:
+            os.mkdir(path)
+        except OSError:
+            pass
+    with open(EN_JSON, "r") as f:
+        keys = sorted(json.load(f)["translations"].keys())
+    key_to_index = {key: i for i, key in enumerate(keys)}
+    out = WORK_DIR + ("/z/" if compress else "/") + lang_compiler.get_binary_filename("en")
+    if lang_compiler.json_to_binary(EN_JSON, key_to_index, out, compress=compress) is None:
+        raise RuntimeError("could not compile " + EN_JSON)
+    return out, len(keys)
+
+
+def main():
+    iterations = arg_value("iterations", 2000 if IS_MICROPYTHON else 20000)
+    screen_keys = arg_value("screen-keys", 12)
+
+    path, key_count = _prepare()
+    print("Translation lookup benchmark ({} keys, {} lookups)".format(key_count, iterations))
+
+    state = [0]
+
+    def next_key(modulo):
+        state[0] = (state[0] + 1) % modulo
+        return state[0]
+
+    def legacy():
+        lang_compiler.read_translation_from_binary(path, next_key(key_count))
+
+    ops, heap = measure(legacy, iterations)
+    report("before: read_translation_from_binary", ops, heap, "lookups/s")
+
+    uncached = lang_compiler.TranslationTable(path, cache_size=0)
+
+    def table_uncached():
+        uncached.lookup(next_key(key_count))
+
+    ops, heap = measure(table_uncached, iterations)
+    report("after: TranslationTable (no cache)", ops, heap, "lookups/s")
+    uncached.close()
+
+    cached = lang_compiler.TranslationTable(path)
+
+    def table_cached():
+        cached.lookup(next_key(screen_keys))
+
+    ops, heap = measure(table_cached, iterations)
+    report("after: TranslationTable ({} key screen)".format(screen_keys), ops, heap, "lookups/s")
+
+    # Cold screen builds: cache is cleared before every simulated screen switch.
+    # Menu keys share a prefix (MENU_*, WALLET_MENU_*), so their strings are
+    # stored close together; model that with a few gaps inside each screen.
+    screens = [
+        [idx for idx in range(start, min(start + screen_keys + 4, key_count)) if idx % 3][:screen_keys]
+        for start in range(0, key_count, screen_keys)
+    ]
+    builds = max(iterations // screen_keys, 1)
+
+    def screen_single():
+        cached.clear_cache()
+        for idx in screens[next_key(len(screens))]:
+            cached.lookup(idx)
+
+    ops, heap = measure(screen_single, builds)
+    report("cold screen: lookup() per key", ops, heap, "screens/s")
+
+    def screen_batched():
+        cached.clear_cache()
+        cached.lookup_many(screens[next_key(len(screens))])
+
+    ops, heap = measure(screen_batched, builds)
+    report("cold screen: lookup_many() prefetch", ops, heap, "screens/s")
+
+    # read() calls matter most on QSPI/FAT flash - count them per screen
+    counter = _ReadCounter(cached._file)
+    cached._file = counter
+    for label, build in (("lookup() per key", screen_single), ("lookup_many()", screen_batched)):
+        counter.reads = 0
+        for _ in range(len(screens)):
+            build()
+        print("  read() calls per cold screen, {:<22} {:>6.1f}".format(label, counter.reads / len(screens)))
+    cached.close()
+
+    compressed_path = arg_value("compressed", "")
+    if not compressed_path:
+        if lang_compiler.zlib is None or not hasattr(lang_compiler.zlib, "compressobj"):
+            print("  (compressed pack skipped: build one on the host and pass --compressed PATH)")
+            return
+        compressed_path = _prepare(compress=True)[0]
+    _bench_compressed(path, compressed_path, iterations, next_key)
+
+
+def _bench_compressed(plain_path, path, iterations, next_key):
+    """Compressed pack: size, cold-block (worst case) and warm-block lookups."""
+    print("  file size: plain {} B, compressed {} B".format(os.stat(plain_path)[6], os.stat(path)[6]))
+    table = lang_compiler.TranslationTable(path, cache_size=0)
+    # One representative key per block, so every lookup has to inflate
+    first_key = {}
+    for idx in range(table.key_count):
+        first_key.setdefault(table._offsets[idx] >> 16, idx)
+    per_block = [first_key[b] for b in sorted(first_key)]
+
+    def cold_block():
+        table._block_id = -1
+        table.lookup(per_block[next_key(len(per_block))])
+
+    ops, heap = measure(cold_block, iterations)
+    report("compressed: cold block (inflate)", ops, heap, "lookups/s")
+    print("  worst-case (cold block) lookup time {:>19.1f} us".format(1000000 / ops))
+
+    def warm_block():
+        table.lookup(per_block[0])
+
+    ops, heap = measure(warm_block, iterations)
+    report("compressed: block already in buffer", ops, heap, "lookups/s")
+    table.close()
+
+
+class _ReadCounter:
+    """File wrapper counting read() calls."""
+
+    def __init__(self, f):
+        self._f = f
+        self.reads = 0
+
+    def read(self, n=-1):
+        self.reads += 1
+        return self._f.read(n)
+
+    def seek(self, *args):
+        return self._f.seek(*args)
+
+    def close(self):
+        self._f.close()
+
+
+if __name__ == "__main__":
+    main()
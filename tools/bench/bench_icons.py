@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark BTC_ICONS cold import: one module per icon vs. packed atlas.
+
+Prepares two copies of the MockUI symbol_lib package under WORK_DIR:
+  - modules: the checked-in layout (btc_icons.py imports all icons/ modules)
+  - atlas:   generate_btc_icons.py --atlas output (one bytes blob, icons
+             resolved lazily on first attribute access)
+and measures for each
+  - cold import of the package (time + peak heap)
+  - first access of every icon (time + peak heap)
+Then it measures the decode cost of RLE-encoded icons (icon.decode_rle, what
+Icon.get_image_dsc pays on a decode-cache miss) next to the flash each
+encoding needs.
+
+Preparation needs CPython (the atlas generator parses icons/ with ast), so on
+the unix port run the host side first. Frozen firmware never compiles source
+at import time; pass --mpy-cross to precompile both trees to .mpy so the
+unix port measures the same:
+
+    python3 tools/bench/bench_icons.py --mpy-cross f469-disco/micropython/mpy-cross/build/mpy-cross
+    ./bin/micropython_unix tools/bench/bench_icons.py
+
+On CPython lvgl is replaced by the mocks from scenarios/conftest.py when the
+real binding is not installed.
+
+Usage:
+    python3 tools/bench/bench_icons.py [--repeat N] [--mpy-cross PATH]
+"""
+
+import gc
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+
+from benchutil import IS_MICROPYTHON, HeapMeter, arg_value, measure, report, ticks_diff, ticks_us  # noqa: E402
+
+SRC_BASIC = _HERE + "/../../scenarios/MockUI/src/MockUI/basic"
+WORK_DIR = "/tmp/bench_icons"
+PACKAGE = "iconbench"
+VARIANTS = ("modules", "atlas")
+
+
+def _prepare(mpy_cross):
+    """Build WORK_DIR/<variant>/iconbench/{ui_consts.py, symbol_lib/} (CPython only)."""
+    import compileall
+    import shutil
+    import subprocess
+    from pathlib import Path
+
+    sys.path.insert(0, _HERE + "/../symbol_lib")
+    import generate_btc_icons
+
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    for variant in VARIANTS:
+        pkg = Path(WORK_DIR) / variant / PACKAGE
+        shutil.copytree(Path(SRC_BASIC) / "symbol_lib", pkg / "symbol_lib",
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copy(Path(SRC_BASIC) / "ui_consts.py", pkg / "ui_consts.py")
+        (pkg / "__init__.py").write_text("")
+        if variant == "atlas":
+            generate_btc_icons.generate_atlas(pkg / "symbol_lib", 42)
+            # The atlas replaces the per-icon modules in firmware
+            shutil.rmtree(pkg / "symbol_lib" / "icons")
+        if mpy_cross:
+            for py in sorted(pkg.rglob("*.py")):
+                subprocess.run([mpy_cross, "-o", str(py.with_suffix(".mpy")), str(py)], check=True)
+                py.unlink()
+        else:
+            # Precompiled bytecode on the host too - measure loading, not compiling
+            compileall.compile_dir(str(pkg), quiet=1)
+
+    names = sorted(
+        generate_btc_icons.read_icon_module(p)[0]
+        for p in (Path(SRC_BASIC) / "symbol_lib" / "icons").glob("*.py")
+        if p.name != "__init__.py"
+    )
+    (Path(WORK_DIR) / "names.txt").write_text("\n".join(names))
+
+    # RLE-encoded patterns for the decode benchmark: uint16 length + data per icon
+    with open(WORK_DIR + "/rle.bin", "wb") as f:
+        for p in sorted((Path(SRC_BASIC) / "symbol_lib" / "icons").glob("*.py")):
+            if p.name == "__init__.py":
+                continue
+            _, width, height, pattern = generate_btc_icons.read_icon_module(p)
+            data = generate_btc_icons.encode_rle(pattern)
+            f.write(len(data).to_bytes(2, "little") + data)
+
+
+def _ensure_lvgl():
+    """Use the real lvgl binding if present, otherwise the test mocks (CPython only)."""
+    try:
+        import lvgl  # noqa: F401
+    except ImportError:
+        if IS_MICROPYTHON:
+            raise
+        sys.path.insert(0, _HERE + "/../../scenarios")
+        import conftest  # noqa: F401  (installs micropython/lvgl mocks)
+
+
+def _purge():
+    """Forget the benchmark package so the next import is cold."""
+    for name in list(sys.modules):
+        if name == PACKAGE or name.startswith(PACKAGE + "."):
+            del sys.modules[name]
+    gc.collect()
+
+
+def _import_variant(variant):
+    """Cold-import iconbench.symbol_lib from WORK_DIR/<variant>; returns the module."""
+    sys.path.insert(0, WORK_DIR + "/" + variant)
+    try:
+        __import__(PACKAGE + ".symbol_lib")
+        return sys.modules[PACKAGE + ".symbol_lib"]
+    finally:
+        sys.path.pop(0)
+
+
+def main():
+    repeat = arg_value("repeat", 5)
+    if not IS_MICROPYTHON:
+        _prepare(arg_value("mpy-cross", ""))
+    _ensure_lvgl()
+    with open(WORK_DIR + "/names.txt") as f:
+        names = f.read().split("\n")
+
+    print("BTC_ICONS cold import benchmark ({} icons, {} runs)".format(len(names), repeat))
+    for variant in VARIANTS:
+        # Prime the import machinery (and CPython's bytecode cache) once
+        _purge()
+        _import_variant(variant)
+
+        import_us = 0
+        access_us = 0
+        for _ in range(repeat):
+            _purge()
+            start = ticks_us()
+            icons = _import_variant(variant).BTC_ICONS
+            import_us += ticks_diff(ticks_us(), start)
+            start = ticks_us()
+            for name in names:
+                getattr(icons, name)
+            access_us += ticks_diff(ticks_us(), start)
+            icons = None
+
+        # Heap in a separate pass - tracemalloc distorts CPython timings
+        _purge()
+        with HeapMeter() as heap:
+            icons = _import_variant(variant).BTC_ICONS
+        import_heap = heap.peak
+        with HeapMeter() as heap:
+            for name in names:
+                getattr(icons, name)
+        access_heap = heap.peak
+        icons = None
+
+        print("  {:<8} cold import {:>10.1f} ms  peak heap {:>8d} B".format(
+            variant, import_us / repeat / 1000, import_heap))
+        print("  {:<8} resolve all {:>10.1f} ms  peak heap {:>8d} B".format(
+            variant, access_us / repeat / 1000, access_heap))
+    _bench_decode(names)
+    _purge()
+
+
+def _bench_decode(names):
+    """RLE decode cost per icon and flash use per encoding (42x42 icons)."""
+    _purge()
+    decode_rle = _import_variant("modules").icon.decode_rle
+    with open(WORK_DIR + "/rle.bin", "rb") as f:
+        blob = f.read()
+    encoded = []
+    pos = 0
+    while pos < len(blob):
+        n = blob[pos] | (blob[pos + 1] << 8)
+        encoded.append(blob[pos + 2:pos + 2 + n])
+        pos += 2 + n
+    size = 42 * 42
+    print("Icon encodings ({} icons): a8 {} B, a4 {} B, rle {} B of flash".format(
+        len(names), len(encoded) * size, len(encoded) * 21 * 42, sum(len(e) for e in encoded)))
+
+    state = [0]
+
+    def decode_next():
+        state[0] = (state[0] + 1) % len(encoded)
+        decode_rle(encoded[state[0]], size)
+
+    ops, heap = measure(decode_next, len(encoded) * 20)
+    report("rle decode (cache miss)", ops, heap, "icons/s")
+    print("  {:<40} {:>12.1f} us per icon".format("rle decode time", 1000000 / ops))
+
+
+if __name__ == "__main__":
+    main()
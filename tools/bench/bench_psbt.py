@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmark wallet detection in PSBT preprocessing (WalletManager.preprocess_psbt).
+
+Builds a synthetic setup with many 2-of-3 multisig wallets sharing our key
+(same fingerprint, different accounts) and a PSBT with hundreds of inputs:
+most inputs belong to one wallet, a few to another one and the rest are
+foreign (e.g. other participants of a coinjoin) and measures
+  - finding the owning wallet of every input and output: trying every
+    wallet in turn (previous code) vs. WalletIndex candidates
+  - the gap update before signing: parsing every scope of the PSBT again
+    (Wallet.update_gaps(psbtv=...)) vs. indexes collected while parsing
+    (Wallet.update_gaps(used_idxs=...))
+  - the check for already signed inputs: a separate pass looking up final
+    scriptsig and final scriptwitness one after another (previous code)
+    vs. one pass over the scope in the parsing loop
+    (WalletManager.is_finalized)
+
+Wallets are minimal stand-ins with the same owns / get_derivation logic as
+apps.wallets.wallet.Wallet, so only embit and apps/wallets/index.py are
+imported. Works on CPython with embit installed and on the unix port:
+
+    python3 tools/bench/bench_psbt.py [--wallets N] [--inputs N] [--iterations N]
+    ./bin/micropython_unix tools/bench/bench_psbt.py
+"""
+
+import sys
+from io import BytesIO
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src/apps/wallets")
+
+from benchutil import arg_value, measure, report  # noqa: E402
+from embit import bip32, bip39  # noqa: E402
+from embit.descriptor import Descriptor  # noqa: E402
+from embit.psbt import PSBT, DerivationPath, InputScope, OutputScope, read_string, skip_string  # noqa: E402
+from embit.psbtview import PSBTView  # noqa: E402
+from embit.transaction import TransactionOutput  # noqa: E402
+from index import WalletIndex  # noqa: E402
+
+GAP_LIMIT = 20
+MNEMONIC = "abandon " * 11 + "about"
+
+
+class BenchWallet:
+    """Wallet with the scope matching logic of apps.wallets.wallet.Wallet"""
+
+    GAP_LIMIT = GAP_LIMIT
+
+    def __init__(self, descriptor):
+        self.descriptor = descriptor
+        self.keys = descriptor.keys
+        self.gaps = [GAP_LIMIT] * descriptor.num_branches
+
+    def owns(self, scope):
+        return self.descriptor.owns(scope)
+
+    def get_derivation(self, bip32_derivations={}, taproot_bip32_derivations={}):
+        for derivation in bip32_derivations.values():
+            der = self.descriptor.check_derivation(derivation)
+            if der is not None:
+                return der
+        for leafs, derivation in taproot_bip32_derivations.values():
+            der = self.descriptor.check_derivation(derivation)
+            if der is not None:
+                return der
+
+    def fill_scope(self, scope, fingerprint):
+        # derivations are already in the synthetic psbt, matching is what we measure
+        if not self.owns(scope):
+            return False
+        return self.get_derivation(scope.bip32_derivations, scope.taproot_bip32_derivations) is not None
+
+    def update_gaps(self, psbtv=None, used_idxs=None):
+        gaps = self.gaps
+        if psbtv is not None:
+            for i in range(psbtv.num_inputs + psbtv.num_outputs):
+                sc = psbtv.input(i) if i < psbtv.num_inputs else psbtv.output(i - psbtv.num_inputs)
+                if self.owns(sc):
+                    res = self.get_derivation(sc.bip32_derivations, sc.taproot_bip32_derivations)
+                    if res is not None:
+                        idx, branch_idx = res
+                        if idx + GAP_LIMIT > gaps[branch_idx]:
+                            gaps[branch_idx] = idx + GAP_LIMIT + 1
+        if used_idxs is not None:
+            for branch_idx, idx in enumerate(used_idxs):
+                if idx is not None and idx + GAP_LIMIT > gaps[branch_idx]:
+                    gaps[branch_idx] = idx + GAP_LIMIT + 1
+        self.gaps = gaps
+
+
+def _make_wallets(root, count):
+    """count multisig wallets: our key at account i, two random cosigners each"""
+    fingerprint = root.my_fingerprint
+    wallets = []
+    for i in range(count):
+        path = "m/48h/1h/%dh/2h" % i
+        keys = ["[%s%s]%s/{0,1}/*" % (fingerprint.hex(), path[1:], root.derive(path).to_public().to_base58())]
+        for j in range(2):
+            cosigner = bip32.HDKey.from_seed(bytes([i % 256, j]) * 32)
+            keys.append("[%s/48h/1h/0h/2h]%s/{0,1}/*" % (
+                cosigner.my_fingerprint.hex(),
+                cosigner.derive("m/48h/1h/0h/2h").to_public().to_base58()))
+        wallets.append(BenchWallet(Descriptor.from_string("wsh(sortedmulti(2,%s))" % ",".join(keys))))
+    return wallets
+
+
+def _scope(cls, wallet, branch, idx):
+    desc = wallet.descriptor.derive(idx, branch_index=branch)
+    sc = cls()
+    for k in desc.keys:
+        sc.bip32_derivations[k.get_public_key()] = DerivationPath(k.origin.fingerprint, k.origin.derivation)
+    return sc, desc.script_pubkey()
+
+
+def _make_psbt(wallets, foreign, num_inputs):
+    """Serialized psbt: 80% inputs of wallets[-1], 5% of wallets[-2], the rest foreign"""
+    psbt = PSBT()
+    for i in range(num_inputs):
+        if i % 20 == 0:
+            w = wallets[-2]
+        elif i % 5 == 4:
+            w = foreign
+        else:
+            w = wallets[-1]
+        inp, spk = _scope(InputScope, w, 0, i)
+        inp.txid = bytes([i % 256, i // 256]) * 16
+        inp.vout = 0
+        inp.witness_utxo = TransactionOutput(10000, spk)
+        psbt.inputs.append(inp)
+    for w, branch in ((foreign, 0), (wallets[-1], 1)):
+        out, spk = _scope(OutputScope, w, branch, num_inputs)
+        out.value = 5000
+        out.script_pubkey = spk
+        psbt.outputs.append(out)
+    return psbt.serialize()
+
+
+def find_all(wallets, scopes):
+    """Previous preprocess_psbt loop: detected wallets first, then all wallets"""
+    detected = {}
+    for sc in scopes:
+        wallet = None
+        for w in detected:
+            if w.fill_scope(sc, None):
+                wallet = w
+                break
+        if wallet is None:
+            for w in wallets:
+                if w.fill_scope(sc, None):
+                    wallet = w
+                    break
+        if wallet is not None:
+            detected[wallet] = True
+    return detected
+
+
+def find_indexed(index, scopes):
+    """WalletManager.preprocess_psbt: detected wallets first, then WalletIndex candidates"""
+    detected = {}
+    for sc in scopes:
+        wallet = None
+        for w in detected:
+            if w.fill_scope(sc, None):
+                wallet = w
+                break
+        if wallet is None:
+            for w in index.candidates(sc, detected):
+                if w.fill_scope(sc, None):
+                    wallet = w
+                    break
+        if wallet is not None:
+            detected[wallet] = True
+    return detected
+
+
+def signed_separately(psbtv):
+    """Previous WalletManager.check_signed_inputs"""
+    signed_inputs = 0
+    for i in range(psbtv.num_inputs):
+        psbtv.seek_to_scope(i)
+        if psbtv.seek_to_value(b"\x07", from_current=True) is not None:
+            signed_inputs += 1
+            continue
+        psbtv.seek_to_scope(i)
+        if psbtv.seek_to_value(b"\x08", from_current=True) is not None:
+            signed_inputs += 1
+    return signed_inputs
+
+
+def is_finalized(psbtv, i):
+    """WalletManager.is_finalized"""
+    psbtv.seek_to_scope(i)
+    while True:
+        key = read_string(psbtv.stream)
+        if len(key) == 0:
+            return False
+        if key[0] in (0x07, 0x08):
+            return True
+        skip_string(psbtv.stream)
+
+
+def signed_one_pass(psbtv):
+    return sum(1 for i in range(psbtv.num_inputs) if is_finalized(psbtv, i))
+
+
+def main():
+    num_wallets = arg_value("wallets", 30)
+    num_inputs = arg_value("inputs", 300)
+    iterations = arg_value("iterations", 3)
+
+    root = bip32.HDKey.from_seed(bip39.mnemonic_to_seed(MNEMONIC))
+    wallets = _make_wallets(root, num_wallets)
+    foreign = _make_wallets(bip32.HDKey.from_seed(b"\x01" * 32), 1)[0]
+    raw = _make_psbt(wallets, foreign, num_inputs)
+    psbtv = PSBTView.view(BytesIO(raw))
+    scopes = [psbtv.input(i) for i in range(psbtv.num_inputs)]
+    scopes += [psbtv.output(i) for i in range(psbtv.num_outputs)]
+    print("PSBT wallet detection benchmark ({} wallets, {} inputs, {} KB psbt)".format(
+        num_wallets, num_inputs, len(raw) // 1024))
+
+    index = WalletIndex(wallets)
+    before = find_all(wallets, scopes)
+    after = find_indexed(index, scopes)
+    assert list(before) == list(after) == [wallets[-2], wallets[-1]]
+
+    ops, heap = measure(lambda: find_all(wallets, scopes), iterations)
+    report("before: try every wallet", ops * len(scopes), heap, "scopes/s")
+    ops, heap = measure(lambda: WalletIndex(wallets), iterations)
+    report("WalletIndex build (once in init)", ops, heap, "builds/s")
+    ops, heap = measure(lambda: find_indexed(index, scopes), iterations)
+    report("after: WalletIndex candidates", ops * len(scopes), heap, "scopes/s")
+
+    # gap update on signing for the main wallet
+    w = wallets[-1]
+    used = [None] * len(w.gaps)
+    for sc in scopes:
+        der = w.get_derivation(sc.bip32_derivations) if w.owns(sc) else None
+        if der is not None and (used[der[1]] is None or used[der[1]] < der[0]):
+            used[der[1]] = der[0]
+    ops, heap = measure(lambda: w.update_gaps(psbtv=psbtv), iterations)
+    report("before: update_gaps(psbtv)", ops, heap, "updates/s")
+    gaps = list(w.gaps)
+    ops, heap = measure(lambda: w.update_gaps(used_idxs=used), iterations * 1000)
+    report("after: update_gaps(used_idxs)", ops, heap, "updates/s")
+    assert w.gaps == gaps
+
+    assert signed_separately(psbtv) == signed_one_pass(psbtv) == 0
+    ops, heap = measure(lambda: signed_separately(psbtv), iterations)
+    report("before: check_signed_inputs", ops, heap, "psbts/s")
+    ops, heap = measure(lambda: signed_one_pass(psbtv), iterations)
+    report("after: is_finalized per input", ops, heap, "psbts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark assembly of animated QR codes (QRHost.update / process_chunk).
+
+Frames of a base64 PSBT split like Base64QREncoder ("pMofN data") are fed
+through QRHost.update from a fake UART, in chunks of --chunk bytes as they
+come from the scanner, in random order. Measures sustained frames/s of
+  - previous code: every chunk appended to the tmp file, the frame re-read
+    from it, written to p%d.txt and all parts concatenated into data.txt
+    at the end (emulated here with the same file operations)
+  - QRHost with PartAssembler: frames parsed from memory and written
+    at their final offset in data.txt
+Then the same for a crypto-psbt UR (fountain code) shown by CryptoPSBTEncoder,
+every frame read --repeat times as the scanner sees it while it's on the screen:
+  - previous code: gc.collect() and FileURDecoder.read_part for every frame
+  - QRHost: duplicate frames skipped by sequence number
+Restarting the scanner between frames (30 ms trigger toggle) is skipped,
+it limits the real scanner, not the processing.
+
+hosts.qr imports the firmware modules (pyb, lvgl, platform), so run it with
+the simulator (unix port) from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_qr.py [--kb N] [--part N] [--chunk N] [--repeat N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+import asyncio  # noqa: E402
+import gc  # noqa: E402
+from io import BytesIO  # noqa: E402
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+import platform  # noqa: E402
+import rng  # noqa: E402
+from hosts.qr import QRHost  # noqa: E402
+from microur.decoder import FileURDecoder  # noqa: E402
+from qrencoder import CryptoPSBTEncoder  # noqa: E402
+
+WORK_DIR = "/tmp/bench_qr"
+EOL = b"\r\n"
+ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+class FakeUART:
+    """Returns one chunk of the frames per read"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.idx = 0
+
+    def any(self):
+        return len(self.chunks[self.idx]) if self.idx < len(self.chunks) else 0
+
+    def read(self):
+        if self.idx >= len(self.chunks):
+            return b""
+        self.idx += 1
+        return self.chunks[self.idx - 1]
+
+
+def _frames(size, part_len):
+    data = bytes(ALPHABET[b % 64] for b in rng.get_random_bytes(size))
+    n = (size + part_len - 1) // part_len
+    part_len = (size + n - 1) // n
+    frames = [b"p%dof%d %s" % (i + 1, n, data[i * part_len:(i + 1) * part_len]) for i in range(n)]
+    # shuffle, the first frame stays first (it's read in one piece)
+    for i in range(n - 1, 1, -1):
+        j = 1 + rng.get_random_bytes(1)[0] % i
+        frames[i], frames[j] = frames[j], frames[i]
+    return data, frames
+
+
+def _chunks(frames, chunk):
+    res = [frames[0] + EOL]
+    for frame in frames[1:]:
+        frame += EOL
+        res += [frame[i:i + chunk] for i in range(0, len(frame), chunk)]
+    return res
+
+
+def legacy(chunks, path):
+    """File operations of the previous QRHost.update / process_normal"""
+    tmpfile = path + "/tmp"
+    parts = None
+    for d in chunks:
+        if d[-len(EOL):] != EOL:
+            with open(tmpfile, "ab") as f:
+                f.write(d)
+            continue
+        with open(tmpfile, "ab") as f:
+            f.write(d[:-len(EOL)])
+        with open(tmpfile, "rb") as f:
+            prefix = f.read(20).split(b" ")[0]
+            f.seek(len(prefix) + 1)
+            m, n = [int(x) for x in prefix[1:].split(b"of")]
+            if parts is None:
+                parts = [None] * n
+            fname = "%s/p%d.txt" % (path, m - 1)
+            with open(fname, "wb") as fout:
+                fout.write(f.read())
+            parts[m - 1] = fname
+        with open(tmpfile, "wb"):
+            pass
+        if None not in parts:
+            with open(path + "/data.txt", "wb") as fout:
+                for part in parts:
+                    with open(part, "rb") as fp:
+                        fout.write(fp.read())
+            return
+
+
+def legacy_ur(frames, path):
+    """Previous QRHost.process_bcur2, returns number of frames read"""
+    decoder = FileURDecoder(path)
+    for i, frame in enumerate(frames):
+        gc.collect()
+        if decoder.read_part(BytesIO(frame)):
+            return i + 1
+
+
+async def _noop():
+    pass
+
+
+async def assemble(host, chunks):
+    """Returns data stream and time in us from the first chunk to the end of assembly"""
+    host._restart_scanner = _noop
+    host.uart = FakeUART([])
+
+    async def feed():
+        # scan() has cleaned the uart already
+        host.uart.chunks = chunks
+        start = ticks_us()
+        while host.scanning:
+            await host.update()
+        return ticks_diff(ticks_us(), start)
+
+    return await asyncio.gather(host.scan(chunk_timeout=0), feed())
+
+
+def _bench_parts(size, part_len, chunk):
+    data, frames = _frames(size, part_len)
+    chunks = _chunks(frames, chunk)
+    print("Animated QR assembly ({} frames, {} bytes per frame, {} byte uart chunks)".format(
+        len(frames), len(frames[0]), chunk))
+
+    start = ticks_us()
+    legacy(chunks, WORK_DIR)
+    dt = ticks_diff(ticks_us(), start)
+    print("  {:<40} {:>12.1f} frames/s".format("before: tmp file + part files", len(frames) * 1e6 / dt))
+    with open(WORK_DIR + "/data.txt", "rb") as f:
+        assert f.read() == data
+
+    host = QRHost(WORK_DIR + "/qr")
+    f, dt = asyncio.run(assemble(host, chunks))
+    print("  {:<40} {:>12.1f} frames/s".format("after: PartAssembler", len(frames) * 1e6 / dt))
+    assert f.read() == data
+    f.close()
+
+
+def _bench_ur(size, part_len, repeat):
+    data = rng.get_random_bytes(size)
+    frames = []
+    with CryptoPSBTEncoder(BytesIO(data), part_len=part_len, tempfile=WORK_DIR + "/qrtmp") as enc:
+        fragments = len(enc)
+        # two rounds of fountain parts is more than enough to decode
+        for i in range(2 * fragments):
+            part = enc[i]
+            if isinstance(part, str):
+                part = part.encode()
+            frames += [part] * repeat
+    print("UR crypto-psbt ({} bytes, {} fragments, every frame read {} times)".format(
+        size, fragments, repeat))
+
+    start = ticks_us()
+    num = legacy_ur(frames, WORK_DIR)
+    dt = ticks_diff(ticks_us(), start)
+    print("  {:<40} {:>12.1f} frames/s".format("before: decode every frame", num * 1e6 / dt))
+
+    host = QRHost(WORK_DIR + "/qr")
+    f, dt = asyncio.run(assemble(host, [frame + EOL for frame in frames]))
+    assert host.uart.idx == num
+    print("  {:<40} {:>12.1f} frames/s".format("after: skip duplicates", num * 1e6 / dt))
+    assert f.read() == data
+    f.close()
+
+
+def main():
+    size = arg_value("kb", 20) * 1024
+    part_len = arg_value("part", 300)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    platform.maybe_mkdir(WORK_DIR)
+    _bench_parts(size, part_len, arg_value("chunk", 128))
+    _bench_ur(size, part_len, arg_value("repeat", 3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark animated QR playback (QRCode.animate / set_frame): frames per second.
+
+A base64 PSBT of --kb kilobytes is shown with Base64QREncoder at a few
+densities (QR_SIZES) and every frame is drawn with lvqr like QRCode._set_text.
+Measures for consecutive frames
+  - previous code: encoder[idx] (seek + read of the tempfile, prefix)
+    and the QR encoding of lvqr for every frame
+  - FrameCache: frames prepared ahead with prefetch() in idle time
+    (one frame per call, like one frame per animation step when playback
+    keeps up), drawing takes a cached payload (hit) and only encodes the QR
+  - frame preparation alone: encoder[idx] vs. cache hit
+The inverse of the per-frame time is the fastest QRCode.rate the
+animation can keep up with, prefetch runs in the rest of the frame time.
+
+lvqr and lvgl are firmware modules, so run it with the simulator (unix port)
+from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_qr_playback.py [--kb N] [--frames N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+from io import BytesIO  # noqa: E402
+from benchutil import arg_value, measure, report  # noqa: E402
+import display  # noqa: E402
+import lvgl as lv  # noqa: E402
+import lvqr  # noqa: E402
+import platform  # noqa: E402
+import rng  # noqa: E402
+from gui.components.qrcode import QR_SIZES, QRCode  # noqa: E402
+from qrencoder import Base64QREncoder, FrameCache  # noqa: E402
+
+WORK_DIR = "/tmp/bench_qr_playback"
+# indexes in QR_SIZES
+VERSIONS = (7, 10, 13)
+
+
+def _bench_version(qr, data, version, frames):
+    with Base64QREncoder(BytesIO(data), part_len=QR_SIZES[version], tempfile=WORK_DIR + "/qrtmp") as enc:
+        num = len(enc)
+        print("{} frames of {} bytes".format(num, len(enc[0])))
+        state = [0]
+
+        def uncached():
+            state[0] += 1
+            qr.set_text(enc[state[0]])
+
+        ops, heap = measure(uncached, frames)
+        report("before: read + encode every frame", ops, heap, "fps")
+
+        cache = FrameCache(enc, QRCode.FRAME_CACHE_SIZE)
+
+        def cached():
+            state[0] += 1
+            qr.set_text(cache[state[0]])
+            cache.prefetch(state[0] + 1, QRCode.PRECOMPUTE)
+
+        ops, heap = measure(cached, frames)
+        report("after: prefetched frame + encode", ops, heap, "fps")
+        cache.prefetch(state[0] + 1, QRCode.PRECOMPUTE)
+        ops_hit, _ = measure(lambda: qr.set_text(cache[state[0] + 1]), frames)
+        print("  {:<40} {:>12.1f} ms".format("after: frame time (cache hit)", 1000 / ops_hit))
+
+        ops, heap = measure(lambda: enc[state[0]], frames)
+        report("frame: encoder[idx]", ops, heap, "frames/s")
+        ops, heap = measure(lambda: cache[state[0]], frames)
+        report("frame: FrameCache hit", ops, heap, "frames/s")
+
+
+def main():
+    size = arg_value("kb", 10) * 1024
+    frames = arg_value("frames", 20)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    platform.maybe_mkdir(WORK_DIR)
+    display.init(False)
+    scr = lv.obj()
+    lv.scr_load(scr)
+    qr = lvqr.QRCode(scr)
+    qr.set_size(470)
+    data = rng.get_random_bytes(size)
+    print("Animated QR playback ({} bytes, {} frames per run)".format(size, frames))
+    for version in VERSIONS:
+        _bench_version(qr, data, version, frames)
+
+
+if __name__ == "__main__":
+    main()
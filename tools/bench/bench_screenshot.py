@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark simulator screenshot handling: frames per second.
+
+Writes a random 480x800 RGB565 frame (what SDL.screenshot produces) to
+WORK_DIR and measures
+  - client conversion to an RGB image: the old per-pixel struct.unpack loop
+    vs. sim_cli.rgb565_to_image (PIL's BGR;16 raw decoder)
+  - the full save_screenshot path (read + convert + PNG encode)
+  - a perceptual hash instead of a PNG
+  - server side: crop_rgb565 for a region and for a 1/2 scaled full frame
+    (what the control server does before the client reads the file)
+
+The client side needs CPython with Pillow. On the unix port only the server
+side is measured, which is where crop_rgb565 runs in the simulator:
+
+    python3 tools/bench/bench_screenshot.py
+    ./bin/micropython_unix tools/bench/bench_screenshot.py
+
+Usage:
+    python3 tools/bench/bench_screenshot.py [--frames N]
+"""
+
+import os
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+
+from benchutil import IS_MICROPYTHON, measure, report, arg_value  # noqa: E402
+
+WORK_DIR = "/tmp/bench_screenshot"
+WIDTH = 480
+HEIGHT = 800
+CROP = (0, 100, 480, 200)  # e.g. a menu header region
+
+
+def _prepare():
+    """Write a random frame to WORK_DIR/frame.raw and return its path."""
+    try:
+        os.mkdir(WORK_DIR)
+    except OSError:
+        pass
+    path = WORK_DIR + "/frame.raw"
+    with open(path, "wb") as f:
+        for _ in range(HEIGHT):
+            f.write(os.urandom(WIDTH * 2))
+    return path
+
+
+def _crop_rgb565():
+    """crop_rgb565 from the control server (lvgl is mocked on CPython)."""
+    sys.path.insert(0, _HERE + "/../../scenarios")
+    if not IS_MICROPYTHON:
+        import conftest  # noqa: F401  (installs micropython/lvgl mocks)
+    from sim_control.control_server import crop_rgb565
+    return crop_rgb565
+
+
+def _convert_per_pixel(raw, w, h):
+    """Previous sim_cli.save_screenshot conversion (reference)."""
+    import struct
+    from PIL import Image
+
+    pixels = bytearray(w * h * 3)
+    for i in range(0, len(raw), 2):
+        if i + 1 >= len(raw):
+            break
+        pixel = struct.unpack('<H', raw[i:i+2])[0]
+        rv = ((pixel >> 11) & 0x1F) << 3
+        gv = ((pixel >> 5) & 0x3F) << 2
+        bv = (pixel & 0x1F) << 3
+        idx = (i // 2) * 3
+        pixels[idx] = rv
+        pixels[idx + 1] = gv
+        pixels[idx + 2] = bv
+    return Image.frombytes('RGB', (w, h), bytes(pixels))
+
+
+def main():
+    frames = arg_value("frames", 5)
+    path = _prepare()
+    print("Screenshot benchmark ({}x{} RGB565, {} frames)".format(WIDTH, HEIGHT, frames))
+
+    crop_rgb565 = _crop_rgb565()
+    out = WORK_DIR + "/crop.raw"
+
+    def server_crop():
+        crop_rgb565(path, out, WIDTH, CROP, 1)
+
+    def server_scale():
+        crop_rgb565(path, out, WIDTH, (0, 0, WIDTH, HEIGHT), 2)
+
+    ops, heap = measure(server_crop, frames * 4)
+    report("server: crop {}x{}".format(CROP[2], CROP[3]), ops, heap, "fps")
+    ops, heap = measure(server_scale, frames)
+    report("server: scale 1/2", ops, heap, "fps")
+    if IS_MICROPYTHON:
+        return
+
+    _bench_client(path, frames)
+
+
+def _bench_client(path, frames):
+    """Client-side conversion, PNG and hash (CPython + Pillow)."""
+    mcp_dir = _HERE + "/../../mcp-servers/lvgl-sim"
+    sys.path.insert(0, mcp_dir)
+    import sim_cli
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    before = _convert_per_pixel(raw, WIDTH, HEIGHT)
+    after = sim_cli.rgb565_to_image(raw, WIDTH, HEIGHT)
+    # Same image up to the low bits PIL fills in when expanding 5/6-bit channels
+    assert bytes(b & 0xE0 for b in before.tobytes()[:3000]) == bytes(b & 0xE0 for b in after.tobytes()[:3000])
+
+    def read_raw():
+        with open(path, "rb") as f:
+            return f.read()
+
+    ops_before, heap = measure(lambda: _convert_per_pixel(read_raw(), WIDTH, HEIGHT), frames)
+    report("before: struct.unpack per pixel", ops_before, heap, "fps")
+    ops_after, heap = measure(lambda: sim_cli.rgb565_to_image(read_raw(), WIDTH, HEIGHT), frames * 20)
+    report("after: frombuffer BGR;16", ops_after, heap, "fps")
+    print("  {:<40} {:>12.1f}x".format("conversion speedup", ops_after / ops_before))
+
+    png = WORK_DIR + "/frame.png"
+    ops, heap = measure(lambda: sim_cli.rgb565_to_image(read_raw(), WIDTH, HEIGHT).save(png, "PNG"), frames)
+    report("after: convert + PNG encode", ops, heap, "fps")
+    ops, heap = measure(lambda: sim_cli.dhash(sim_cli.rgb565_to_image(read_raw(), WIDTH, HEIGHT)), frames * 20)
+    report("after: perceptual hash (no PNG)", ops, heap, "fps")
+
+
+if __name__ == "__main__":
+    main()
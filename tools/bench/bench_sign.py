@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark signing of a large base64 PSBT (WalletManager.sign_psbt)
+with the default wallet, one signature per input:
+  - previous code: temp file per stage (raw, filled_psbt, sigs,
+    signed_raw, signed_b64), emulated here with the same calls
+  - WalletManager.sign_psbt: base64 decoded when read, signatures created
+    while the signed psbt is written and encoded (filled_psbt, signed_b64)
+Prints bytes written to the ramdisk and time per stage (sign_stats)
+and checks that both produce the same signed psbt.
+
+apps.wallets imports the firmware modules (lvgl, gui, platform), so run it
+with the unix port from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_sign.py [--inputs N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+import asyncio  # noqa: E402
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+from binascii import b2a_base64  # noqa: E402
+from embit.psbt import PSBT, CompressMode, DerivationPath, InputScope, OutputScope  # noqa: E402
+from embit.transaction import TransactionOutput  # noqa: E402
+import platform  # noqa: E402
+from app import BaseApp  # noqa: E402
+from apps.wallets.manager import WalletManager, BASE64_STREAM  # noqa: E402
+from helpers import a2b_base64_stream, b2a_base64_stream  # noqa: E402
+from bench_wallets import BenchKeyStore, NETWORK, WORK_DIR  # noqa: E402
+
+def _psbt(w, num_inputs):
+    """base64 psbt spending num_inputs receiving addresses of w to its change"""
+    psbt = PSBT()
+    for i in range(num_inputs):
+        desc = w.derive(i, branch_index=0)
+        inp = InputScope()
+        for k in desc.keys:
+            inp.bip32_derivations[k.get_public_key()] = DerivationPath(k.origin.fingerprint, k.origin.derivation)
+        inp.txid = bytes([i % 256, i // 256]) * 16
+        inp.vout = 0
+        inp.witness_utxo = TransactionOutput(10000, desc.script_pubkey())
+        psbt.inputs.append(inp)
+    out = OutputScope()
+    out.value = 9000 * num_inputs
+    out.script_pubkey = w.derive(0, branch_index=1).script_pubkey()
+    psbt.outputs.append(out)
+    return b2a_base64(psbt.serialize()).strip()
+
+
+async def _confirm(*args):
+    return {"sighash": None}
+
+
+def _print_stages(stats, ms):
+    total = 0
+    for stage, nbytes, stage_ms in stats:
+        print("    {:<12} {:>9} bytes {:>9} ms".format(stage, nbytes, stage_ms))
+        total += nbytes
+    print("    {:<12} {:>9} bytes {:>9.0f} ms".format("total", total, ms))
+
+
+def _legacy_sign(wm, path):
+    """Previous sign_psbt with a temp file per stage, without the user interaction"""
+    tmp = wm.tempdir
+    stats = []
+
+    def stage(name, nbytes, t0):
+        stats.append((name, nbytes, ticks_diff(ticks_us(), t0) // 1000))
+
+    start = t0 = ticks_us()
+    with open(path, "rb") as f:
+        with open(tmp + "/raw", "wb") as fout:
+            stage("decode", a2b_base64_stream(f, fout), t0)
+    t0 = ticks_us()
+    with open(tmp + "/raw", "rb") as f:
+        with open(tmp + "/filled_psbt", "wb") as fout:
+            wallets, _ = wm.preprocess_psbt(f, fout)
+            stage("fill", fout.tell(), t0)
+    with open(tmp + "/filled_psbt", "rb") as f:
+        psbtv = wm.PSBTViewClass.view(f, compress=True)
+        t0 = ticks_us()
+        with open(tmp + "/sigs", "wb") as fsig:
+            for chunk in wm.sign_inputs(psbtv, wallets, None, [0]):
+                fsig.write(chunk)
+            stage("sigs", fsig.tell(), t0)
+        t0 = ticks_us()
+        with open(tmp + "/sigs", "rb") as fsig:
+            with open(tmp + "/signed_raw", "wb") as fout:
+                psbtv.write_to(fout, compress=CompressMode.PARTIAL, extra_input_streams=[fsig])
+                stage("write", fout.tell(), t0)
+    t0 = ticks_us()
+    with open(tmp + "/signed_raw", "rb") as fin:
+        with open(tmp + "/signed_b64", "wb") as fout:
+            stage("encode", b2a_base64_stream(fin, fout), t0)
+    _print_stages(stats, ticks_diff(ticks_us(), start) / 1000)
+    with open(tmp + "/signed_b64", "rb") as f:
+        return f.read()
+
+
+def _sign(wm, path):
+    with open(path, "rb") as f:
+        start = ticks_us()
+        res = asyncio.run(wm.sign_psbt(f, None, BASE64_STREAM))
+        ms = ticks_diff(ticks_us(), start) / 1000
+    _print_stages(wm.sign_stats, ms)
+    with open(res, "rb") as f:
+        return f.read()
+
+
+def main():
+    num_inputs = arg_value("inputs", 500)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    BaseApp.TEMPDIR = WORK_DIR + "/tmp"
+    wm = WalletManager(WORK_DIR)
+    wm.init(BenchKeyStore(), NETWORK, lambda *args, **kwargs: None, None)
+    wm.confirm_transaction = _confirm
+    path = WORK_DIR + "/psbt.b64"
+    with open(path, "wb") as f:
+        f.write(_psbt(wm.get_wallet(0), num_inputs))
+    print("Signing benchmark ({} inputs)".format(num_inputs))
+    print("  before: temp file per stage")
+    before = _legacy_sign(wm, path)
+    print("  after: pipelined")
+    after = _sign(wm, path)
+    assert before == after
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark the stream helpers in src/helpers.py (PSBT, QR and SD paths).
+
+Compares the previous byte-at-a-time / small-chunk helpers (copied below as
+reference) with the buffered ones:
+  - base64 decode of a large PSBT (a2b_base64_stream, what sign_psbt does
+    with every base64 request) and encode of the signed result
+  - file to file copy (read_write / copy, used for QR parts and SD files)
+  - parsing an animated QR part header (read_until + copy of the payload,
+    what QRHost.process_bcur does per scanned frame)
+
+helpers imports the firmware modules (embit, ucryptolib, platform), so run
+it with the unix port from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_streams.py [--psbt-kb N] [--iterations N]
+"""
+
+import os
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+from benchutil import arg_value, measure, report  # noqa: E402
+from binascii import a2b_base64, b2a_base64  # noqa: E402
+import helpers  # noqa: E402
+
+WORK_DIR = "/tmp/bench_streams"
+
+
+# --- previous implementations (reference) ---
+
+def old_a2b_base64_stream(sin, sout):
+    l = 0
+    while True:
+        chunk = sin.read(64).strip()
+        if len(chunk) == 0:
+            break
+        l += sout.write(a2b_base64(chunk))
+    return l
+
+
+def old_b2a_base64_stream(sin, sout):
+    l = 0
+    while True:
+        chunk = sin.read(48)
+        if len(chunk) == 0:
+            break
+        l += sout.write(b2a_base64(chunk).strip())
+    return l
+
+
+def old_read_until(s, chars=b"\n\r", max_len=100, return_on_max_len=False):
+    res = b""
+    while True:
+        chunk = s.read(1)
+        if len(chunk) == 0:
+            return res, None
+        if chunk in chars:
+            return res, chunk
+        res += chunk
+        if len(res) > max_len:
+            return res if return_on_max_len else None, None
+
+
+def old_read_write(fin, fout, chunk_size=32):
+    chunk = fin.read(chunk_size)
+    total = fout.write(chunk)
+    while len(chunk) > 0:
+        chunk = fin.read(chunk_size)
+        total += fout.write(chunk)
+    return total
+
+
+def _prepare(psbt_kb):
+    """Write raw.psbt, psbt.b64 and a QR part to WORK_DIR"""
+    try:
+        os.mkdir(WORK_DIR)
+    except OSError:
+        pass
+    raw = b"psbt\xff" + os.urandom(psbt_kb * 1024 - 5)
+    with open(WORK_DIR + "/raw.psbt", "wb") as f:
+        f.write(raw)
+    with open(WORK_DIR + "/psbt.b64", "wb") as f:
+        # base64 as sent by the host, trailing newline included
+        for i in range(0, len(raw), 3 * 256):
+            f.write(b2a_base64(raw[i:i + 3 * 256]).strip())
+        f.write(b"\n")
+    with open(WORK_DIR + "/part.txt", "wb") as f:
+        f.write(b"UR:BYTES/3OF12/" + b"q" * 58 + b"/" + b"x" * 600)
+    return len(raw)
+
+
+def _run(fn, src, dst):
+    with open(WORK_DIR + "/" + src, "rb") as fin:
+        with open(WORK_DIR + "/" + dst, "wb") as fout:
+            return fn(fin, fout)
+
+
+def _parse_part(read_until, fin, fout):
+    chunk, char = read_until(fin, b"/", return_on_max_len=True)
+    chunk, char = read_until(fin, b"/", max_len=64, return_on_max_len=True)
+    hsh, char = read_until(fin, b"/", max_len=80, return_on_max_len=True)
+    return fout.write(fin.read())
+
+
+def _parse_part_buffered(fin, fout):
+    r = helpers.BufferedReader(fin)
+    chunk, char = r.read_until(b"/", return_on_max_len=True)
+    chunk, char = r.read_until(b"/", max_len=64, return_on_max_len=True)
+    hsh, char = r.read_until(b"/", max_len=80, return_on_max_len=True)
+    return r.copy_to(fout)
+
+
+def main():
+    psbt_kb = arg_value("psbt-kb", 100)
+    iterations = arg_value("iterations", 5)
+    size = _prepare(psbt_kb)
+    kb = size / 1024
+    print("Stream helper benchmark ({} KB PSBT, chunk {} B)".format(psbt_kb, helpers.CHUNK_SIZE))
+
+    # correctness: both decoders must produce the original PSBT
+    _run(helpers.a2b_base64_stream, "psbt.b64", "decoded.psbt")
+    with open(WORK_DIR + "/decoded.psbt", "rb") as f1, open(WORK_DIR + "/raw.psbt", "rb") as f2:
+        assert f1.read() == f2.read()
+
+    cases = (
+        ("base64 decode", "psbt.b64", old_a2b_base64_stream, helpers.a2b_base64_stream),
+        ("base64 encode", "raw.psbt", old_b2a_base64_stream, helpers.b2a_base64_stream),
+        ("file copy", "raw.psbt", old_read_write, helpers.copy),
+    )
+    for name, src, before, after in cases:
+        for label, fn in (("before", before), ("after", after)):
+            ops, heap = measure(lambda: _run(fn, src, "out"), iterations)
+            report("{}: {}".format(label, name), ops * kb, heap, "KB/s")
+
+    frames = iterations * 50
+    ops, heap = measure(lambda: _run(lambda i, o: _parse_part(old_read_until, i, o), "part.txt", "out"), frames)
+    report("before: QR part header + payload", ops, heap, "frames/s")
+    ops, heap = measure(lambda: _run(_parse_part_buffered, "part.txt", "out"), frames)
+    report("after: QR part header + payload", ops, heap, "frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark USB host transport throughput (USBHost.read_to_file / _send_data)
+against the simulator's TCP-backed USB_VCP on 127.0.0.1:8789.
+
+  - upload: a getrandom command padded with spaces to --kb kilobytes
+    (the app strips them), KB/s from the first byte sent to the ACK
+  - download: getrandom 1000 (2000 hex characters back), KB/s from
+    the ACK to the end of the response line, --repeat times
+
+Start the simulator, unlock it and enable USB communication in the
+settings, then run on the host:
+
+    python3 tools/bench/bench_usb.py [--kb N] [--repeat N] [--port N]
+
+Run it against a build before and after a transport change to compare,
+the numbers depend on the simulator's event loop as much as on USBHost.
+"""
+
+import socket
+import sys
+import time
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+
+HOST = "127.0.0.1"
+ACK = b"ACK\r\n"
+# bytes per send() call, like a host writing to a serial port
+SEND_CHUNK = 4096
+TIMEOUT = 60
+
+
+class Connection:
+    def __init__(self, port):
+        self.s = socket.create_connection((HOST, port), timeout=TIMEOUT)
+        self.buf = b""
+
+    def send(self, data):
+        for i in range(0, len(data), SEND_CHUNK):
+            self.s.sendall(data[i:i + SEND_CHUNK])
+
+    def read_line(self):
+        while b"\r\n" not in self.buf:
+            chunk = self.s.recv(4096)
+            if not chunk:
+                raise RuntimeError("Connection closed")
+            self.buf += chunk
+        line, self.buf = self.buf.split(b"\r\n", 1)
+        return line
+
+    def command(self, data):
+        """Sends a command, returns (response, us to ACK, us from ACK to response)"""
+        start = ticks_us()
+        self.send(data + b"\r\n")
+        ack = self.read_line()
+        if ack + b"\r\n" != ACK:
+            raise RuntimeError("Expected ACK, got %r" % ack[:100])
+        acked = ticks_us()
+        res = self.read_line()
+        return res, ticks_diff(acked, start), ticks_diff(ticks_us(), acked)
+
+    def close(self):
+        self.s.close()
+
+
+def main():
+    size = arg_value("kb", 64) * 1024
+    repeat = arg_value("repeat", 5)
+    conn = Connection(arg_value("port", 8789))
+    print("USB transport throughput ({}:{})".format(HOST, arg_value("port", 8789)))
+    # start over in case something is left from a previous run
+    conn.send(b"\r\n\r\n")
+    time.sleep(0.5)
+    conn.buf = b""
+
+    cmd = b"getrandom" + b" " * (size - len(b"getrandom 32")) + b" 32"
+    res, up, _ = conn.command(cmd)
+    assert len(res) == 64, res[:100]
+    print("  {:<40} {:>12.1f} KB/s".format("upload ({} KB)".format(size // 1024), size / 1024 * 1e6 / up))
+
+    total = 0
+    dt = 0
+    for _ in range(repeat):
+        res, _, down = conn.command(b"getrandom 1000")
+        assert len(res) == 2000, res[:100]
+        total += len(res) + 2
+        dt += down
+    print("  {:<40} {:>12.1f} KB/s".format("download (2 KB responses)", total / 1024 * 1e6 / dt))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
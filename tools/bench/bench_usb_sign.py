@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark the round trip of signing a PSBT over USB (USBHost.update ->
+WalletManager.sign_psbt -> response), from the first byte of the request
+to the last byte of the response, for a PSBT of --kb kilobytes:
+  - text protocol (previous code): "sign <base64>" line, base64 decoded
+    by the wallet manager, signed psbt encoded back to base64
+  - binary mode (after the "binary" handshake): raw psbt in a length
+    prefixed frame with crc32, written to the ramdisk without EOL scanning,
+    raw signed psbt in the response frame
+The usb port is replaced with a fake one returning --chunk bytes per read,
+the transaction is confirmed without the screen. Bytes on the wire are
+printed as well, at 12 Mbit/s full speed USB the base64 overhead of the
+text protocol is about 33% of the transfer time on top of the numbers here.
+
+apps.wallets and hosts import the firmware modules (lvgl, gui, platform, pyb),
+so run it with the unix port from the repository root:
+
+    ./bin/micropython_unix tools/bench/bench_usb_sign.py [--kb N] [--chunk N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+import asyncio  # noqa: E402
+from binascii import a2b_base64, b2a_base64, crc32  # noqa: E402
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+import platform  # noqa: E402
+from app import BaseApp  # noqa: E402
+from apps.wallets.manager import WalletManager  # noqa: E402
+from bench_sign import _confirm, _psbt  # noqa: E402
+from bench_wallets import BenchKeyStore, NETWORK, WORK_DIR  # noqa: E402
+from hosts.usb import USBHost  # noqa: E402
+
+
+class FakeUSB:
+    """Returns the request in chunks, collects the response"""
+
+    def __init__(self, data, chunk):
+        self.chunks = [data[i:i + chunk] for i in range(0, len(data), chunk)]
+        self.idx = 0
+        self.out = bytearray()
+
+    def readinto(self, buf):
+        if self.idx >= len(self.chunks):
+            return None
+        chunk = self.chunks[self.idx]
+        self.idx += 1
+        buf[:len(chunk)] = chunk
+        return len(chunk)
+
+    def write(self, data):
+        # respond() writes the EOL as str
+        if isinstance(data, str):
+            data = data.encode()
+        self.out.extend(data)
+        return len(data)
+
+
+class Manager:
+    """Passes host requests to the wallet manager like Specter does"""
+
+    def __init__(self, wm):
+        self.wm = wm
+
+    async def process_host_request(self, stream):
+        return await self.wm.process_host_command(stream, None)
+
+
+def _frame(payload):
+    return USBHost.FRAME_MAGIC + len(payload).to_bytes(4, "little") + payload + crc32(payload).to_bytes(4, "little")
+
+
+def _handshake_response(out):
+    # ACK, response line
+    if len(out) > len(USBHost.ACK) and out[-2:] == b"\r\n":
+        return bytes(out[len(USBHost.ACK):-2])
+
+
+def _text_response(out):
+    res = _handshake_response(out)
+    if res is not None:
+        return a2b_base64(res)
+
+
+def _frame_response(out):
+    # ACK, frame header, payload, crc
+    start = len(USBHost.ACK)
+    if len(out) < start + USBHost.FRAME_HEADER:
+        return
+    size = int.from_bytes(out[start + 2:start + USBHost.FRAME_HEADER], "little")
+    end = start + USBHost.FRAME_HEADER + size
+    if len(out) == end + USBHost.FRAME_CRC:
+        return bytes(out[start + USBHost.FRAME_HEADER:end])
+
+
+async def _roundtrip(host, request, chunk, response):
+    host.usb = FakeUSB(request, chunk)
+    start = ticks_us()
+    res = None
+    while res is None:
+        await host.update()
+        res = response(host.usb.out)
+    return res, ticks_diff(ticks_us(), start), len(host.usb.out)
+
+
+def _report(name, dt, sent, received):
+    print("  {:<28} {:>9.0f} ms, {:>7} bytes sent, {:>7} received".format(name, dt / 1000, sent, received))
+
+
+def main():
+    size = arg_value("kb", 100) * 1024
+    chunk = arg_value("chunk", USBHost.READ_SIZE)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    BaseApp.TEMPDIR = WORK_DIR + "/tmp"
+    wm = WalletManager(WORK_DIR)
+    wm.init(BenchKeyStore(), NETWORK, lambda *args, **kwargs: None, None)
+    wm.confirm_transaction = _confirm
+    w = wm.get_wallet(0)
+    per_input = len(a2b_base64(_psbt(w, 10))) // 10
+    raw = a2b_base64(_psbt(w, max(size // per_input, 1)))
+    host = USBHost(WORK_DIR + "/usb")
+    host.manager = Manager(wm)
+    print("Sign PSBT over USB ({} bytes, {} byte reads)".format(len(raw), chunk))
+
+    request = b"sign " + b2a_base64(raw).strip() + b"\r\n"
+    before, dt, received = asyncio.run(_roundtrip(host, request, chunk, _text_response))
+    _report("before: text, base64", dt, len(request), received)
+
+    handshake = asyncio.run(_roundtrip(host, host.HANDSHAKE + b"\r\n", chunk, _handshake_response))
+    assert handshake[0] == host.BINARY_VERSION
+    request = _frame(raw)
+    after, dt, received = asyncio.run(_roundtrip(host, request, chunk, _frame_response))
+    _report("after: binary frame", dt, len(request), received)
+    assert before == after
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold WalletManager.init (what Specter.init_apps does for the
+wallets app when the keystore or the network changes) with 1, 10 and 50
+2-of-3 multisig wallets:
+  - without a manifest: every wallet folder is decrypted and its
+    descriptor parsed (previous behaviour, also the one-time upgrade)
+  - with the manifest: one file is decrypted, wallets are loaded
+    when they are opened or needed for a PSBT
+
+The keystore is a minimal stand-in using helpers.AEADContext
+with a fixed key, wallets are written to WORK_DIR. apps.wallets imports the
+firmware modules (lvgl, gui, platform), so run it with the unix port from the
+repository root:
+
+    ./bin/micropython_unix tools/bench/bench_wallets.py [--repeat N]
+"""
+
+import os
+import sys
+from io import BytesIO
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+from embit import bip32, bip39  # noqa: E402
+import helpers  # noqa: E402
+import platform  # noqa: E402
+from apps.wallets.manager import WalletManager  # noqa: E402
+
+WORK_DIR = "/tmp/bench_wallets"
+NETWORK = "main"
+COUNTS = (1, 10, 50)
+
+
+class BenchKeyStore:
+    """Keystore methods used by WalletManager"""
+
+    def __init__(self):
+        self.root = bip32.HDKey.from_seed(bip39.mnemonic_to_seed("abandon " * 11 + "about"))
+        self.fingerprint = self.root.my_fingerprint
+        self.idkey = b"\x01" * 32
+        self.aead = helpers.AEADContext(self.idkey)
+
+    def save_aead(self, path, adata=b"", plaintext=b""):
+        self.save_aead_stream(path, BytesIO(plaintext), adata)
+
+    def save_aead_stream(self, path, stream, adata=b""):
+        with open(path, "wb") as f:
+            self.aead.encrypt_stream(stream, f, adata)
+
+    def load_aead(self, path):
+        with open(path, "rb") as f:
+            return self.aead.decrypt(f.read())
+
+    def get_xpub(self, path):
+        return self.root.derive(path).to_public()
+
+    def sign_input(self, psbtv, i, sig_stream, sighash=1, extra_scope_data=None):
+        return psbtv.sign_input(i, self.root, sig_stream, sighash=sighash, extra_scope_data=extra_scope_data)
+
+    def owns(self, key):
+        if key.fingerprint is not None and key.fingerprint != self.fingerprint:
+            return False
+        if key.derivation is None:
+            return key.key == self.root.to_public()
+        return key.key == self.root.derive(key.derivation).to_public()
+
+
+def _multisig(ks, i):
+    path = "m/48h/0h/%dh/2h" % i
+    keys = ["[%s%s]%s/{0,1}/*" % (ks.fingerprint.hex(), path[1:], ks.root.derive(path).to_public().to_base58())]
+    for j in range(2):
+        cosigner = bip32.HDKey.from_seed(bytes([i % 256, j + 1]) * 32)
+        keys.append("[%s/48h/0h/0h/2h]%s/{0,1}/*" % (
+            cosigner.my_fingerprint.hex(), cosigner.derive("m/48h/0h/0h/2h").to_public().to_base58()))
+    return "Multisig %d&wsh(sortedmulti(2,%s))" % (i, ",".join(keys))
+
+
+def _init(ks):
+    wm = WalletManager(WORK_DIR)
+    start = ticks_us()
+    wm.init(ks, NETWORK, lambda *args, **kwargs: None, None)
+    return wm, ticks_diff(ticks_us(), start) / 1000
+
+
+def main():
+    repeat = arg_value("repeat", 3)
+    ks = BenchKeyStore()
+    print("Cold WalletManager.init ({} runs)".format(repeat))
+    for count in COUNTS:
+        platform.delete_recursively(WORK_DIR, include_self=True)
+        wm, _ = _init(ks)
+        for i in range(count - 1):
+            wm.add_wallet(wm.parse_wallet(_multisig(ks, i)))
+        manifest = wm.path + "/manifest"
+        eager = lazy = 0
+        for _ in range(repeat):
+            os.remove(manifest)
+            eager += _init(ks)[1]
+            lazy += _init(ks)[1]
+        print("  {:>3} wallets: without manifest {:>9.1f} ms, with manifest {:>7.1f} ms".format(
+            count, eager / repeat, lazy / repeat))
+
+
+if __name__ == "__main__":
+    main()
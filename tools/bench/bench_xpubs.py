@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark XpubApp.export_multiple_accounts_xpubs for accounts 0..99
+(six account xpubs per account, specter-diy and coldcard formats):
+  - previous code: keystore.get_xpub derives every path from the root,
+    every line / json token written to the file, the loader redrawn and
+    (coldcard format) the SD card mounted for every account
+  - RAMKeyStore derivation cache: nodes of path prefixes (m/84h/0h,
+    m/48h/0h, ...) are derived once and reused, starting from an
+    empty cache (as after unlock), files written through BufferedWriter
+    in one SD card session, the loader redrawn every PROGRESS_INTERVAL
+
+The SD card is replaced with a folder in WORK_DIR, outputs of both runs
+are compared. Loader redraws and mounts are counted, not timed.
+apps.xpubs and the keystore import the firmware modules (lvgl, gui,
+platform), so run it with the unix port from the repository root
+(--accounts 1000 for a bulk export):
+
+    ./bin/micropython_unix tools/bench/bench_xpubs.py [--accounts N]
+"""
+
+import sys
+
+_HERE = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _HERE)
+sys.path.insert(0, _HERE + "/../../src")
+
+import asyncio  # noqa: E402
+from benchutil import arg_value, ticks_diff, ticks_us  # noqa: E402
+import platform  # noqa: E402
+from apps.xpubs.xpubs import XpubApp  # noqa: E402
+from keystore.ram import RAMKeyStore  # noqa: E402
+
+WORK_DIR = "/tmp/bench_xpubs"
+
+
+class BenchKeyStore(RAMKeyStore):
+    def __init__(self):
+        super().__init__()
+        self.show_loader = lambda *args, **kwargs: None
+        self.set_mnemonic("abandon " * 11 + "about")
+
+
+class PlainKeyStore(BenchKeyStore):
+    def get_xpub(self, path):
+        """get_xpub of the previous code"""
+        return self.root.derive(path).to_public()
+
+
+class FakeSD:
+    """platform.sdcard writing to a folder"""
+
+    is_present = True
+
+    def __init__(self, path):
+        self.path = path
+        self.mounts = 0
+
+    def __enter__(self):
+        self.mounts += 1
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def file_exists(self, fname):
+        return False
+
+    def open(self, fname, mode):
+        return open(self.path + "/" + fname, mode)
+
+
+async def _show(screen):
+    return True
+
+
+async def _legacy_export(app, accounts, file_format):
+    """Previous export_multiple_accounts_xpubs"""
+    if file_format == XpubApp.export_specter_diy:
+        with platform.sdcard as sd:
+            with sd.open(_files(file_format, accounts)[0], "w") as f:
+                for account in range(accounts):
+                    app.show_loader(title="Exporting account %d..." % account)
+                    app._dump_account(f, file_format, account)
+    else:
+        for account, fname in enumerate(_files(file_format, accounts)):
+            app.show_loader(title="Exporting account %d..." % account)
+            with platform.sdcard as sd:
+                with sd.open(fname, "w") as f:
+                    app._dump_account(f, file_format, account)
+
+
+def _export(name, accounts, file_format):
+    path = WORK_DIR + "/" + name
+    platform.maybe_mkdir(path)
+    platform.sdcard = FakeSD(path)
+    loaders = [0]
+
+    def show_loader(*args, **kwargs):
+        loaders[0] += 1
+
+    ks = BenchKeyStore() if name == "after" else PlainKeyStore()
+    app = XpubApp(WORK_DIR)
+    app.init(ks, "main", show_loader, None)
+    ks.wipe_cache()
+    start = ticks_us()
+    if name == "after":
+        asyncio.run(app.export_multiple_accounts_xpubs(0, accounts - 1, file_format, _show))
+    else:
+        asyncio.run(_legacy_export(app, accounts, file_format))
+    dt = ticks_diff(ticks_us(), start) / 1000
+    print("  {:<12} {:<7} {:>9.1f} ms, {:>4} loader redraws, {:>4} mounts".format(
+        file_format, name, dt, loaders[0], platform.sdcard.mounts))
+    return path
+
+
+def _files(file_format, accounts):
+    if file_format == XpubApp.export_specter_diy:
+        return ["%s-73c5da0a-0-%d.txt" % (file_format, accounts - 1)]
+    return ["%s-73c5da0a-%d-all.json" % (file_format, account) for account in range(accounts)]
+
+
+def main():
+    accounts = arg_value("accounts", 100)
+    platform.delete_recursively(WORK_DIR, include_self=True)
+    platform.maybe_mkdir(WORK_DIR)
+    print("Export xpubs of accounts 0..{}".format(accounts - 1))
+    for file_format in (XpubApp.export_specter_diy, XpubApp.export_coldcard):
+        path_before = _export("before", accounts, file_format)
+        path_after = _export("after", accounts, file_format)
+        for fname in _files(file_format, accounts):
+            with open(path_before + "/" + fname) as f1, open(path_after + "/" + fname) as f2:
+                assert f1.read() == f2.read()
+
+
+if __name__ == "__main__":
+    main()
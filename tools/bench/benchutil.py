@@ -0,0 +1,102 @@
+"""
+Timing and heap helpers shared by the micro-benchmarks in tools/bench/.
+
+Works on CPython and on the MicroPython unix port, so the same benchmark
+script can be run on the host and with bin/micropython_unix:
+
+    python3 tools/bench/bench_i18n.py
+    ./bin/micropython_unix tools/bench/bench_i18n.py
+"""
+
+import gc
+import sys
+import time
+
+IS_MICROPYTHON = sys.implementation.name == "micropython"
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def ticks_us():
+    """Monotonic microsecond counter."""
+    if IS_MICROPYTHON:
+        return time.ticks_us()
+    return time.perf_counter_ns() // 1000
+
+
+def ticks_diff(end, start):
+    """Difference of two ticks_us() values in microseconds."""
+    if IS_MICROPYTHON:
+        return time.ticks_diff(end, start)
+    return end - start
+
+
+class HeapMeter:
+    """
+    Measure peak heap growth of a code block.
+
+    CPython uses tracemalloc (true peak). MicroPython has no peak tracking,
+    so the meter reports gc.mem_alloc() growth with GC disabled, which is an
+    upper bound of what the block allocated.
+    """
+
+    def __init__(self):
+        self.peak = 0
+
+    def __enter__(self):
+        gc.collect()
+        if tracemalloc is not None:
+            tracemalloc.start()
+        else:
+            gc.disable()
+            self._start = gc.mem_alloc()
+        return self
+
+    def __exit__(self, *exc):
+        if tracemalloc is not None:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            self.peak = gc.mem_alloc() - self._start
+            gc.enable()
+        gc.collect()
+        return False
+
+
+def measure(fn, iterations):
+    """
+    Run fn() iterations times for timing, then again under a HeapMeter.
+
+    Timing and heap are separate passes because tracemalloc slows CPython
+    down by an order of magnitude.
+
+    Returns:
+        Tuple of (ops_per_second: float, peak_heap_bytes: int)
+    """
+    gc.collect()
+    start = ticks_us()
+    for _ in range(iterations):
+        fn()
+    elapsed = ticks_diff(ticks_us(), start)
+    with HeapMeter() as heap:
+        for _ in range(iterations):
+            fn()
+    return (iterations * 1000000 / max(elapsed, 1), heap.peak)
+
+
+def report(name, ops_per_second, peak_heap, unit="ops/s"):
+    """Print one aligned result line."""
+    print("  {:<40} {:>12.1f} {}  peak heap {:>8d} B".format(name, ops_per_second, unit, peak_heap))
+
+
+def arg_value(name, default):
+    """Return the value following --name in sys.argv (argparse is unavailable on MicroPython)."""
+    flag = "--" + name
+    if flag in sys.argv:
+        pos = sys.argv.index(flag)
+        if pos + 1 < len(sys.argv):
+            return type(default)(sys.argv[pos + 1])
+    return default
@@ -27,12 +27,42 @@ Usage
     # Only regenerate the aggregator (btc_icons.py) from existing icons/
     python3 generate_btc_icons.py --aggregate-only <symbol_lib_dir>
 
+    # Pack all icons/ into one atlas (btc_icon_atlas.py) with a lazy aggregator
+    python3 generate_btc_icons.py --aggregate-only --atlas <symbol_lib_dir>
+
+    # Run-length encoded icons (smaller flash, decoded on demand)
+    python3 generate_btc_icons.py <svg_or_png_dir> <symbol_lib_dir> --encoding rle
+
 Arguments
 ---------
     source_dir       Directory containing source SVG or PNG files
     symbol_lib_dir   Directory that contains icon.py; icons/ will be created here
     --size N         Target icon size in pixels (default: 42)
     --aggregate-only Skip icon conversion; only rebuild btc_icons.py
+    --atlas          Emit btc_icon_atlas.py (one bytes blob + offset table)
+                     and a btc_icons.py that resolves icons lazily from it
+    --encoding E     Pattern encoding for new icon files / the atlas:
+                     a8 (default), a4 or rle - prints the flash savings
+
+Encodings
+---------
+    a8   one alpha byte per pixel (1764 bytes per 42×42 icon), used in place
+    a4   two 4-bit alpha pixels per byte (half the flash, 16 alpha levels),
+         rendered natively by LVGL as an A4 image - no RAM, no decoding
+    rle  lossless PackBits-style runs of the A8 data (~4× smaller for the
+         Bitcoin icon set); Icon expands it to A8 on first use and keeps
+         it in a size-limited LRU cache (icon.DECODE_CACHE_BYTES)
+
+Atlas mode
+----------
+The default aggregator imports every icons/ module, so importing BTC_ICONS
+creates 126 module objects, 126 globals dicts and 126 Icon instances.
+With --atlas all patterns (including hand-maintained custom icons) are
+concatenated into a single bytes literal. BTC_ICONS becomes an object whose
+attributes are resolved on first access: the Icon wraps a memoryview slice
+of the frozen blob, so image descriptors point straight into flash and no
+pattern is ever copied. icons/ stays the source of truth - rerun with
+--atlas after adding or regenerating icons.
 
 Example
 -------
@@ -43,13 +73,12 @@ Example
 """
 
 import argparse
+import ast
 import shutil
 import subprocess
 import sys
 from pathlib import Path
 
-from PIL import Image
-
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -118,6 +147,8 @@ def stem_to_name(stem: str) -> str:
 
 def png_to_alpha_bytes(png_path: Path, size: int) -> bytes:
     """Open a PNG, resize to size×size with LANCZOS, return raw A8 alpha bytes."""
+    from PIL import Image  # only needed for conversion, not for --aggregate-only
+
     img = Image.open(png_path).convert("RGBA")
     if img.size != (size, size):
         img = img.resize((size, size), Image.LANCZOS)
@@ -125,7 +156,112 @@ def png_to_alpha_bytes(png_path: Path, size: int) -> bytes:
     return bytes(a.tobytes())
 
 
-def format_icon_file(name: str, size: int, data: bytes) -> str:
+ENCODINGS = ("a8", "a4", "rle")
+
+
+def encode_a4(data: bytes, width: int, height: int) -> bytes:
+    """Pack A8 alpha to LVGL A4: two pixels per byte, high nibble first, rows byte-aligned."""
+    out = bytearray()
+    for row in range(height):
+        line = data[row * width:(row + 1) * width]
+        for x in range(0, width, 2):
+            hi = (line[x] + 8) // 17
+            lo = (line[x + 1] + 8) // 17 if x + 1 < width else 0
+            out.append((hi << 4) | lo)
+    return bytes(out)
+
+
+def decode_a4(data: bytes, width: int, height: int) -> bytes:
+    """Expand LVGL A4 data back to A8 (nibble × 17, as LVGL renders it)."""
+    stride = (width + 1) // 2
+    out = bytearray()
+    for row in range(height):
+        for x in range(width):
+            byte = data[row * stride + x // 2]
+            out.append(((byte >> 4) if x % 2 == 0 else (byte & 0x0F)) * 17)
+    return bytes(out)
+
+
+def encode_rle(data: bytes) -> bytes:
+    """PackBits-style RLE, decoded at runtime by icon.decode_rle().
+
+    control < 0x80  -> control + 1 literal bytes follow
+    control >= 0x80 -> next byte repeated control - 126 times (2..129)
+    """
+    out = bytearray()
+    literal = bytearray()
+
+    def flush_literal():
+        for start in range(0, len(literal), 128):
+            chunk = literal[start:start + 128]
+            out.append(len(chunk) - 1)
+            out.extend(chunk)
+        literal.clear()
+
+    i = 0
+    while i < len(data):
+        run = 1
+        while i + run < len(data) and data[i + run] == data[i] and run < 129:
+            run += 1
+        if run >= 2:
+            flush_literal()
+            out.append(run + 126)
+            out.append(data[i])
+            i += run
+        else:
+            literal.append(data[i])
+            i += 1
+    flush_literal()
+    return bytes(out)
+
+
+def decode_rle(data: bytes) -> bytes:
+    """Expand encode_rle() output (host-side mirror of icon.decode_rle())."""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        control = data[i]
+        if control < 0x80:
+            out.extend(data[i + 1:i + 2 + control])
+            i += control + 2
+        else:
+            out.extend(bytes([data[i + 1]]) * (control - 126))
+            i += 2
+    return bytes(out)
+
+
+def encode_pattern(data: bytes, width: int, height: int, encoding: str) -> bytes:
+    """Encode an A8 pattern; the result round-trips (A4 up to quantisation)."""
+    if encoding == "a4":
+        return encode_a4(data, width, height)
+    if encoding == "rle":
+        encoded = encode_rle(data)
+        assert decode_rle(encoded) == data
+        return encoded
+    return data
+
+
+def decode_pattern(data: bytes, width: int, height: int, encoding: str) -> bytes:
+    """Return the A8 pattern for data stored with the given encoding."""
+    if encoding == "a4":
+        return decode_a4(data, width, height)
+    if encoding == "rle":
+        return decode_rle(data)
+    return data
+
+
+def print_flash_savings(label: str, count: int, a8_bytes: int, encoded_bytes: int,
+                        encoding: str) -> None:
+    """Print pattern flash use of an icon set before/after encoding."""
+    if encoding == "a8" or not count:
+        return
+    saved = a8_bytes - encoded_bytes
+    print(f"{label}: {count} icons, A8 {a8_bytes} B → {encoding} {encoded_bytes} B "
+          f"(saves {saved} B = {saved * 100 // a8_bytes}%, "
+          f"avg {encoded_bytes // count} B instead of {a8_bytes // count} B per icon)")
+
+
+def format_icon_file(name: str, size: int, data: bytes, encoding: str = "a8") -> str:
     """Return the full content of an individual icon .py file.
 
     Uses adjacent bytes LITERALS (b'\\x00...') rather than a bytes([...])
@@ -142,6 +278,7 @@ def format_icon_file(name: str, size: int, data: bytes) -> str:
         row = data[row_start:row_start + size]
         rows.append("        b\"" + "".join(f"\\x{v:02x}" for v in row) + "\"")
     body = "\n".join(rows)
+    encoding_arg = f"    encoding=\"{encoding}\",\n" if encoding != "a8" else ""
     return (
         f'"""AUTO-GENERATED — do not edit. '
         f"Regenerate with tools/symbol_lib/generate_btc_icons.py\"\"\"\n"
@@ -154,6 +291,7 @@ def format_icon_file(name: str, size: int, data: bytes) -> str:
         f"    ),\n"
         f"    width={size},\n"
         f"    height={size},\n"
+        f"{encoding_arg}"
         f")\n"
     )
 
@@ -208,11 +346,147 @@ def build_aggregator(icons_dir: Path, symbol_lib_dir: Path, size: int, count: in
     )
 
 
+def read_icon_module(path: Path):
+    """Return (name, width, height, A8 pattern) of an icons/ module without importing it.
+
+    Icon modules import lvgl via icon.py, so the Icon(...) call is evaluated
+    from the syntax tree instead. Every icons/ module (generated or custom)
+    assigns exactly one Icon(pattern=..., width=..., height=...).
+    """
+    tree = ast.parse(path.read_text())
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, "id", None) == "Icon"):
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.value.keywords}
+            name = node.targets[0].id
+            pattern = decode_pattern(bytes(kwargs["pattern"]), kwargs["width"], kwargs["height"],
+                                     kwargs.get("encoding", "a8"))
+            if len(pattern) != kwargs["width"] * kwargs["height"]:
+                raise ValueError(f"{path}: pattern size does not match width × height")
+            return name, kwargs["width"], kwargs["height"], pattern
+    raise ValueError(f"{path}: no Icon(...) assignment found")
+
+
+def _bytes_literal(data: bytes) -> str:
+    """Compact bytes literal: printable ASCII as-is, NUL as \\0 where unambiguous.
+
+    A8 icons are mostly transparent (0x00), so this roughly halves the source
+    size of the atlas compared to \\xNN escapes - which keeps mpy-cross
+    memory use in check for the single large literal.
+    """
+    out = []
+    for i, v in enumerate(data):
+        if v == 0 and (i + 1 == len(data) or not 0x30 <= data[i + 1] <= 0x37):
+            out.append("\\0")
+        elif 0x20 <= v < 0x7F and v not in (0x22, 0x5C):  # not " or \\
+            out.append(chr(v))
+        else:
+            out.append(f"\\x{v:02x}")
+    return "b\"" + "".join(out) + "\""
+
+
+def build_atlas(icons_dir: Path, encoding: str = "a8") -> tuple:
+    """Pack every icons/ module into one blob; return (atlas module source, entries).
+
+    entries is a list of (name, offset, length, width, height) sorted by name;
+    every pattern is stored with the given encoding.
+    """
+    icons = sorted(
+        (read_icon_module(p) for p in icons_dir.glob("*.py") if p.name != "__init__.py"),
+        key=lambda icon: icon[0],
+    )
+    entries = []
+    rows = []
+    offset = 0
+    for name, width, height, pattern in icons:
+        data = encode_pattern(pattern, width, height, encoding)
+        entries.append((name, offset, len(data), width, height))
+        rows.append(f"    # {name} @ {offset} ({width}×{height})\n    {_bytes_literal(data)}")
+        offset += len(data)
+
+    names = "".join(f"    \"{entry[0]}\",\n" for entry in entries)
+    layout = "".join(f"    {o}, {n}, {w}, {h},\n" for _, o, n, w, h in entries)
+    source = (
+        f'"""Packed icon atlas — {len(entries)} icons, {offset} bytes ({encoding}).\n'
+        f"\n"
+        f"AUTO-GENERATED — do not edit. Regenerate with\n"
+        f"    python3 tools/symbol_lib/generate_btc_icons.py --aggregate-only --atlas <symbol_lib_dir>\n"
+        f"\n"
+        f"ATLAS is a single bytes literal - stored in flash (ROM) in frozen bytecode.\n"
+        f"Icon i occupies ATLAS[LAYOUT[4*i]:LAYOUT[4*i] + LAYOUT[4*i+1]].\n"
+        f'"""\n'
+        f"\n"
+        f"# Pattern encoding of every icon (see icon.ENCODING_*)\n"
+        f"ENCODING = \"{encoding}\"\n"
+        f"\n"
+        f"# Icon names, sorted (index into LAYOUT)\n"
+        f"NAMES = (\n{names})\n"
+        f"\n"
+        f"# offset, length, width, height per icon\n"
+        f"LAYOUT = (\n{layout})\n"
+        f"\n"
+        f"ATLAS = (\n" + "\n".join(rows) + "\n)\n"
+    )
+    return source, entries
+
+
+def build_atlas_aggregator(entries: list, size: int) -> str:
+    """Return the content of btc_icons.py in atlas mode (lazy attribute resolution)."""
+    n_icons = len(entries)
+    names = "\n".join(f"        {entry[0]}" for entry in entries)
+    return (
+        f'"""Bitcoin icon library aggregator — {n_icons} icons at {size}×{size} px (atlas mode).\n'
+        f"\n"
+        f"AUTO-GENERATED — do not edit directly.\n"
+        f"Regenerate with:\n"
+        f"    python3 tools/symbol_lib/generate_btc_icons.py --aggregate-only --atlas \\\\\n"
+        f"        scenarios/MockUI/src/MockUI/basic/symbol_lib\n"
+        f"\n"
+        f"All patterns live in btc_icon_atlas.ATLAS. Icons are created on first\n"
+        f"attribute access and wrap a memoryview slice of the frozen blob, so\n"
+        f"image descriptors point straight into flash (no copies).\n"
+        f'"""\n'
+        f"\n"
+        f"from .icon import Icon\n"
+        f"from . import btc_icon_atlas as _atlas\n"
+        f"\n"
+        f"\n"
+        f"class _BtcIcons:\n"
+        f"    \"\"\"\n"
+        f"    Library of Bitcoin-themed icons ({n_icons} total, {size}×{size} px).\n"
+        f"\n"
+        f"    Icons default to white; pass a color to tint them:\n"
+        f"        BTC_ICONS.WALLET(lv.color_hex(0xFF0000))  # red\n"
+        f"        BTC_ICONS.QR_CODE(GREEN_HEX)\n"
+        f"        BTC_ICONS.BITCOIN                         # white (default)\n"
+        f"\n"
+        f"    Available icons:\n"
+        f"{names}\n"
+        f"    \"\"\"\n"
+        f"\n"
+        f"    def __getattr__(self, name):\n"
+        f"        # Only called for icons not resolved yet - afterwards the Icon\n"
+        f"        # sits in the instance dict and is found directly\n"
+        f"        try:\n"
+        f"            i = _atlas.NAMES.index(name)\n"
+        f"        except ValueError:\n"
+        f"            raise AttributeError(name)\n"
+        f"        offset, length, width, height = _atlas.LAYOUT[4 * i:4 * i + 4]\n"
+        f"        icon = Icon(memoryview(_atlas.ATLAS)[offset:offset + length], width, height,\n"
+        f"                    encoding=_atlas.ENCODING)\n"
+        f"        setattr(self, name, icon)\n"
+        f"        return icon\n"
+        f"\n"
+        f"\n"
+        f"BTC_ICONS = _BtcIcons()\n"
+    )
+
+
 # ---------------------------------------------------------------------------
 # Main logic
 # ---------------------------------------------------------------------------
 
-def generate_icons(png_dir: Path, symbol_lib_dir: Path, size: int) -> int:
+def generate_icons(png_dir: Path, symbol_lib_dir: Path, size: int, encoding: str = "a8") -> int:
     """Write one .py file per PNG into <symbol_lib_dir>/icons/. Returns count."""
     png_files = sorted(png_dir.glob("*.png"))
     if not png_files:
@@ -227,15 +501,21 @@ def generate_icons(png_dir: Path, symbol_lib_dir: Path, size: int) -> int:
         init_file.write_text("# icons package — individual icon modules\n")
 
     count = 0
+    a8_bytes = 0
+    encoded_bytes = 0
     for png_path in png_files:
         name = stem_to_name(png_path.stem)
         stem_lower = png_path.stem.replace("-", "_").lower()
         out_path = icons_dir / f"{stem_lower}.py"
         data = png_to_alpha_bytes(png_path, size)
-        out_path.write_text(format_icon_file(name, size, data))
+        encoded = encode_pattern(data, size, size, encoding)
+        out_path.write_text(format_icon_file(name, size, encoded, encoding))
+        a8_bytes += len(data)
+        encoded_bytes += len(encoded)
         count += 1
 
-    print(f"Wrote {count} icon files ({size}×{size} px) → {icons_dir}/")
+    print(f"Wrote {count} icon files ({size}×{size} px, {encoding}) → {icons_dir}/")
+    print_flash_savings("Icon files", count, a8_bytes, encoded_bytes, encoding)
     return count
 
 
@@ -249,6 +529,21 @@ def generate_aggregator(symbol_lib_dir: Path, size: int, count: int) -> None:
     print(f"Wrote aggregator ({n} icons) → {aggregator_path}")
 
 
+def generate_atlas(symbol_lib_dir: Path, size: int, encoding: str = "a8") -> None:
+    """Write btc_icon_atlas.py and a lazy btc_icons.py from all files in icons/."""
+    icons_dir = symbol_lib_dir / "icons"
+    atlas_path = symbol_lib_dir / "btc_icon_atlas.py"
+    source, entries = build_atlas(icons_dir, encoding)
+    atlas_path.write_text(source)
+    aggregator_path = symbol_lib_dir / "btc_icons.py"
+    aggregator_path.write_text(build_atlas_aggregator(entries, size))
+    total = sum(n for _, _, n, _, _ in entries)
+    print(f"Wrote atlas ({len(entries)} icons, {total} bytes, {encoding}) → {atlas_path}")
+    print(f"Wrote lazy aggregator → {aggregator_path}")
+    print_flash_savings("Atlas", len(entries), sum(w * h for _, _, _, w, h in entries),
+                        total, encoding)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Generate per-icon .py files and btc_icons.py aggregator.",
@@ -278,6 +573,17 @@ def main() -> None:
         action="store_true",
         help="Skip PNG conversion; only rebuild btc_icons.py from existing icons/",
     )
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help="Emit one packed atlas (btc_icon_atlas.py) and a lazy btc_icons.py",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=ENCODINGS,
+        default="a8",
+        help="Pattern encoding: a8 (default), a4 (native 4-bit) or rle (decoded on demand)",
+    )
     args = parser.parse_args()
 
     if not args.symbol_lib_dir.is_dir():
@@ -285,7 +591,10 @@ def main() -> None:
         sys.exit(1)
 
     if args.aggregate_only:
-        generate_aggregator(args.symbol_lib_dir, args.size, 0)
+        if args.atlas:
+            generate_atlas(args.symbol_lib_dir, args.size, args.encoding)
+        else:
+            generate_aggregator(args.symbol_lib_dir, args.size, 0)
     else:
         if args.source_dir is None:
             parser.error("source_dir is required unless --aggregate-only is set")
@@ -313,8 +622,11 @@ def main() -> None:
             )
             sys.exit(1)
 
-        count = generate_icons(png_dir, args.symbol_lib_dir, args.size)
-        generate_aggregator(args.symbol_lib_dir, args.size, count)
+        count = generate_icons(png_dir, args.symbol_lib_dir, args.size, args.encoding)
+        if args.atlas:
+            generate_atlas(args.symbol_lib_dir, args.size, args.encoding)
+        else:
+            generate_aggregator(args.symbol_lib_dir, args.size, count)
 
 
 if __name__ == "__main__":